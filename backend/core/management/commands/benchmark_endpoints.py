@@ -0,0 +1,121 @@
+"""
+Management command to benchmark the query count and wall time of every
+read-only router endpoint against a realistic, seeded tenant.
+
+The tenant is seeded twice - a small data set first, then grown to the
+requested size - and each endpoint is measured after both. Endpoints whose
+query count grows with the data set have an N+1 problem. All seeded data is
+created in a transaction that is rolled back at the end.
+
+Usage:
+    python manage.py benchmark_endpoints
+    python manage.py benchmark_endpoints --clients 5000 --tasks-per-client 8
+    python manage.py benchmark_endpoints --fail-on-growth
+"""
+
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from core.models import Organization, User
+from core.utils.query_budget import get_router_endpoints, measure_endpoints, seed_tenant
+
+
+class Command(BaseCommand):
+    help = 'Measure query count and wall time of all router endpoints on a seeded tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients',
+            type=int,
+            default=2000,
+            help='Number of clients in the grown data set (default: 2000)',
+        )
+        parser.add_argument(
+            '--tasks-per-client',
+            type=int,
+            default=5,
+            help='Number of tasks per client (default: 5)',
+        )
+        parser.add_argument(
+            '--fail-on-growth',
+            action='store_true',
+            help='Exit with an error if any endpoint runs more queries on the grown data set',
+        )
+
+    def handle(self, *args, **options):
+        from rest_framework.test import APIClient
+
+        clients = max(10, options['clients'])
+        tasks_per_client = max(1, options['tasks_per_client'])
+        endpoints = get_router_endpoints()
+        growing = []
+
+        # The test client identifies itself as "testserver"
+        with override_settings(ALLOWED_HOSTS=['testserver']), transaction.atomic():
+            run_id = uuid.uuid4().hex[:8]
+            organization = Organization.objects.create(
+                name=f'Benchmark {run_id}',
+                email=f'benchmark-{run_id}@example.com'
+            )
+            admin = User.objects.create_user(
+                username=f'benchmark-admin-{run_id}',
+                email=f'benchmark-admin-{run_id}@example.com',
+                password=None,
+                organization=organization,
+                role='ADMIN'
+            )
+            platform_admin = User.objects.create_user(
+                username=f'benchmark-platform-{run_id}',
+                email=f'benchmark-platform-{run_id}@example.com',
+                password=None,
+                organization=organization,
+                role='ADMIN',
+                is_platform_admin=True
+            )
+
+            admin_client = APIClient()
+            admin_client.force_authenticate(admin)
+            platform_client = APIClient()
+            platform_client.force_authenticate(platform_admin)
+
+            seed_tenant(organization, clients=10, tasks_per_client=tasks_per_client, prefix=f'{run_id}-a')
+            small = measure_endpoints(admin_client, platform_client, endpoints)
+
+            counts = seed_tenant(
+                organization,
+                clients=clients - 10,
+                tasks_per_client=tasks_per_client,
+                prefix=f'{run_id}-b'
+            )
+            large = measure_endpoints(admin_client, platform_client, endpoints)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"Seeded {clients} clients and {counts['tasks'] + 10 * tasks_per_client} tasks (rolled back)\n"
+        )
+        self.stdout.write(f"{'Endpoint':<55} {'Status':>6} {'Small':>6} {'Large':>6} {'Time (ms)':>10}")
+
+        for _, path in endpoints:
+            before, after = small[path], large[path]
+            line = (
+                f"{path:<55} {after['status_code']:>6} {before['queries']:>6} "
+                f"{after['queries']:>6} {after['seconds'] * 1000:>10.1f}"
+            )
+            if after['status_code'] == 200 and after['queries'] > before['queries']:
+                growing.append(path)
+                self.stdout.write(self.style.ERROR(line))
+            elif after['status_code'] != 200:
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
+
+        if growing:
+            message = f'{len(growing)} endpoint(s) run more queries as rows are added: {", ".join(growing)}'
+            if options['fail_on_growth']:
+                raise CommandError(message)
+            self.stdout.write(self.style.ERROR(f'\n{message}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nNo endpoint query count grows with the data set'))
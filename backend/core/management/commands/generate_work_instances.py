@@ -2,11 +2,17 @@
 Django management command to generate upcoming work instances automatically.
 This command should be run periodically (e.g., daily via cron or scheduler)
 to ensure all active client work mappings have upcoming tasks created.
+
+Mappings are processed in chunks of organizations. Each chunk loads the latest
+instance of every mapping in one query, preloads task category assignments and
+bulk-creates the new instances. With --celery the chunks run in parallel as
+Celery chord subtasks. Mappings that already have enough instances are filtered
+out in the database and never loaded.
 """
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
-from core.models import ClientWorkMapping, WorkInstance
+from core.models import ClientWorkMapping
 from core.services.task_service import TaskAutomationService
 
 
@@ -25,10 +31,22 @@ class Command(BaseCommand):
             action='store_true',
             help='Perform a dry run without creating any work instances',
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=20,
+            help='Number of organizations processed per chunk (default: 20)',
+        )
+        parser.add_argument(
+            '--celery',
+            action='store_true',
+            help='Dispatch the chunks as parallel Celery subtasks instead of running them here',
+        )
 
     def handle(self, *args, **options):
         lookforward_months = options['lookforward_months']
         dry_run = options['dry_run']
+        chunk_size = max(1, options['chunk_size'])
 
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No work instances will be created'))
@@ -39,27 +57,43 @@ class Command(BaseCommand):
 
         self.stdout.write(f'Generating work instances from {today} to {cutoff_date}')
 
-        # Get all active client work mappings
-        active_mappings = ClientWorkMapping.objects.filter(active=True).select_related(
-            'client', 'work_type'
+        # Organizations that have active client work mappings
+        organization_ids = sorted(
+            ClientWorkMapping.objects.filter(active=True).values_list('organization_id', flat=True).distinct()
         )
+        chunks = [
+            organization_ids[i:i + chunk_size]
+            for i in range(0, len(organization_ids), chunk_size)
+        ]
 
-        total_created = 0
-        total_mappings = active_mappings.count()
+        self.stdout.write(
+            f'Found {len(organization_ids)} organization(s) with active mappings in {len(chunks)} chunk(s)'
+        )
 
-        self.stdout.write(f'Found {total_mappings} active client work mapping(s)')
+        if options['celery']:
+            self.dispatch_chunks(chunks, cutoff_date, dry_run)
+            return
 
-        for mapping in active_mappings:
-            created_count = self.generate_instances_for_mapping(mapping, cutoff_date, dry_run)
-            total_created += created_count
+        total_created = 0
+        total_mappings = 0
 
-            if created_count > 0:
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'  [OK] {mapping.client.client_name} - {mapping.work_type.work_name}: '
-                        f'Created {created_count} instance(s)'
+        for chunk in chunks:
+            counts = TaskAutomationService.generate_upcoming_work_instances(
+                ClientWorkMapping.objects.filter(active=True, organization_id__in=chunk),
+                cutoff_date,
+                dry_run=dry_run
+            )
+            total_mappings += len(counts)
+
+            for mapping, created_count in counts.items():
+                total_created += created_count
+                if created_count > 0:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'  [OK] {mapping.client.client_name} - {mapping.work_type.work_name}: '
+                            f'Created {created_count} instance(s)'
+                        )
                     )
-                )
 
         # Mark overdue tasks
         if not dry_run:
@@ -71,50 +105,32 @@ class Command(BaseCommand):
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'\nCompleted! Total work instances created: {total_created}'
+                f'\nCompleted! Checked {total_mappings} mapping(s), '
+                f'total work instances created: {total_created}'
             )
         )
 
-    def generate_instances_for_mapping(self, mapping, cutoff_date, dry_run):
+    def dispatch_chunks(self, chunks, cutoff_date, dry_run):
         """
-        Generate work instances for a specific mapping up to the cutoff date.
-        Returns the number of instances created.
+        Dispatch one Celery subtask per organization chunk. The chord callback
+        marks overdue tasks once every chunk is done.
         """
-        # Skip ONE_TIME task categories if they already have an instance
-        if mapping.effective_frequency == 'ONE_TIME':
-            existing_count = WorkInstance.objects.filter(client_work=mapping).count()
-            if existing_count > 0:
-                return 0
-
-        created_count = 0
-        max_iterations = 50  # Safety limit to prevent infinite loops
-
-        for _ in range(max_iterations):
-            # Get the latest work instance for this mapping
-            latest_instance = WorkInstance.objects.filter(
-                client_work=mapping
-            ).order_by('-due_date').first()
-
-            # Determine if we need to create a new instance
-            if latest_instance:
-                # Check if the latest instance's due date is beyond our cutoff
-                if latest_instance.due_date >= cutoff_date:
-                    break  # We have enough instances
-            else:
-                # No instances exist, create the first one
-                pass
-
-            # Create the next work instance
-            if not dry_run:
-                new_instance = TaskAutomationService.create_work_instance(mapping)
-                created_count += 1
-
-                # Check if the newly created instance is beyond cutoff
-                if new_instance.due_date >= cutoff_date:
-                    break
-            else:
-                # In dry run, just simulate creation
-                created_count += 1
-                break  # Don't loop in dry run
-
-        return created_count
+        from celery import chord
+        from core.tasks import generate_work_instances_for_organizations, summarize_work_instance_generation
+
+        if not chunks:
+            self.stdout.write(self.style.SUCCESS('\nCompleted! Nothing to generate'))
+            return
+
+        result = chord(
+            generate_work_instances_for_organizations.s(
+                chunk,
+                cutoff_date.isoformat(),
+                dry_run
+            )
+            for chunk in chunks
+        )(summarize_work_instance_generation.s(dry_run=dry_run))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nDispatched {len(chunks)} chunk(s) to Celery (chord {result.id})')
+        )
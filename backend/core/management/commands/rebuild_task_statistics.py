@@ -0,0 +1,48 @@
+"""
+Management command to backfill/rebuild the daily task statistics rollup
+(TaskStatisticsDaily) from work instances.
+
+The rollup is kept up to date incrementally and existing tasks are backfilled
+by migration 0040; run this whenever the rollup needs to be corrected.
+
+Usage:
+    python manage.py rebuild_task_statistics
+    python manage.py rebuild_task_statistics --organization <organization-id>
+"""
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Organization
+from core.services.task_statistics_service import TaskStatisticsService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily task statistics rollup from work instances'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization',
+            type=str,
+            help='Rebuild only the given organization (ID)',
+        )
+
+    def handle(self, *args, **options):
+        organization_id = options.get('organization')
+
+        if organization_id:
+            try:
+                organizations = [Organization.objects.get(id=organization_id)]
+            except (Organization.DoesNotExist, ValidationError):
+                raise CommandError(f'Organization "{organization_id}" not found')
+        else:
+            organizations = Organization.objects.order_by('name')
+
+        total_rows = 0
+        for organization in organizations:
+            rows = TaskStatisticsService.rebuild(organization)
+            total_rows += rows
+            self.stdout.write(f'  {organization.name}: {rows} rollup row(s)')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nCompleted! Total rollup rows written: {total_rows}')
+        )
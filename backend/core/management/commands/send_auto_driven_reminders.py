@@ -10,6 +10,7 @@ from django.utils import timezone
 from datetime import datetime, date, timedelta
 from core.models import WorkInstance, ReminderInstance, WorkType
 from core.services.email_service import EmailService
+from core.services.template_renderer import TemplateRenderer
 
 
 class Command(BaseCommand):
@@ -59,138 +60,143 @@ class Command(BaseCommand):
         total_skipped = 0
         total_failed = 0
 
-        for work_type in auto_driven_work_types:
-            self.stdout.write(f'\nProcessing: {work_type.work_name}')
-            self.stdout.write(f'  Reminder frequency: {work_type.client_reminder_frequency_type}')
-            self.stdout.write(f'  Interval: {work_type.client_reminder_interval_days} days')
-
-            # Find all active (non-completed) tasks for this work type
-            active_tasks = WorkInstance.objects.filter(
-                client_work__work_type=work_type,
-                status__in=['NOT_STARTED', 'STARTED', 'PAUSED']
-            ).select_related(
-                'client_work__client',
-                'client_work__work_type',
-                'organization'
-            )
-
-            if not active_tasks.exists():
-                self.stdout.write(f'  No active tasks found')
-                continue
-
-            for task in active_tasks:
-                client = task.client_work.client
-                client_email = client.email
+        # Load the reminder templates once for all work types
+        templates = EmailService.get_reminder_templates(auto_driven_work_types.values('id'))
+
+        # Reuse SMTP connections and write email logs in bulk across the whole batch
+        with EmailService.batch():
+            for work_type in auto_driven_work_types:
+                self.stdout.write(f'\nProcessing: {work_type.work_name}')
+                self.stdout.write(f'  Reminder frequency: {work_type.client_reminder_frequency_type}')
+                self.stdout.write(f'  Interval: {work_type.client_reminder_interval_days} days')
+
+                # Find all active (non-completed) tasks for this work type
+                active_tasks = WorkInstance.objects.filter(
+                    client_work__work_type=work_type,
+                    status__in=['NOT_STARTED', 'STARTED', 'PAUSED']
+                ).select_related(
+                    'client_work__client',
+                    'client_work__work_type',
+                    'organization'
+                )
 
-                if not client_email:
-                    self.stdout.write(
-                        self.style.WARNING(f'  [SKIP] {client.client_name} - No email address')
-                    )
-                    total_skipped += 1
+                if not active_tasks.exists():
+                    self.stdout.write(f'  No active tasks found')
                     continue
 
-                # Calculate reminder period for this task
-                period_dates = work_type.get_period_dates(task.period_start or task.due_date)
-                reminder_start = period_dates['client_reminder_start']
-                reminder_end = period_dates['client_reminder_end']
-
-                # Check if today is within the reminder period
-                if not (reminder_start <= today <= reminder_end):
-                    self.stdout.write(
-                        f'  [SKIP] {client.client_name} - {task.period_label}: '
-                        f'Outside reminder period ({reminder_start} to {reminder_end})'
-                    )
-                    total_skipped += 1
-                    continue
+                for task in active_tasks:
+                    client = task.client_work.client
+                    client_email = client.email
 
-                # Check if we should send a reminder today based on frequency
-                should_send = self._should_send_today(
-                    start_date=reminder_start,
-                    current_date=today,
-                    frequency_type=work_type.client_reminder_frequency_type,
-                    interval_days=work_type.client_reminder_interval_days,
-                    weekdays=work_type.client_reminder_weekdays
-                )
+                    if not client_email:
+                        self.stdout.write(
+                            self.style.WARNING(f'  [SKIP] {client.client_name} - No email address')
+                        )
+                        total_skipped += 1
+                        continue
 
-                if not should_send:
-                    self.stdout.write(
-                        f'  [SKIP] {client.client_name} - {task.period_label}: '
-                        f'Not a reminder day based on frequency'
-                    )
-                    total_skipped += 1
-                    continue
+                    # Calculate reminder period for this task
+                    period_dates = work_type.get_period_dates(task.period_start or task.due_date)
+                    reminder_start = period_dates['client_reminder_start']
+                    reminder_end = period_dates['client_reminder_end']
 
-                # Check if reminder was already sent today
-                already_sent = ReminderInstance.objects.filter(
-                    work_instance=task,
-                    recipient_type='CLIENT',
-                    scheduled_at__date=today,
-                    send_status='SENT'
-                ).exists()
-
-                if already_sent:
-                    self.stdout.write(
-                        f'  [SKIP] {client.client_name} - {task.period_label}: '
-                        f'Already sent today'
+                    # Check if today is within the reminder period
+                    if not (reminder_start <= today <= reminder_end):
+                        self.stdout.write(
+                            f'  [SKIP] {client.client_name} - {task.period_label}: '
+                            f'Outside reminder period ({reminder_start} to {reminder_end})'
+                        )
+                        total_skipped += 1
+                        continue
+
+                    # Check if we should send a reminder today based on frequency
+                    should_send = self._should_send_today(
+                        start_date=reminder_start,
+                        current_date=today,
+                        frequency_type=work_type.client_reminder_frequency_type,
+                        interval_days=work_type.client_reminder_interval_days,
+                        weekdays=work_type.client_reminder_weekdays
                     )
-                    total_skipped += 1
-                    continue
-
-                # Create or get reminder instance for today (scheduled at 11:00 AM IST)
-                reminder, created = ReminderInstance.objects.get_or_create(
-                    work_instance=task,
-                    recipient_type='CLIENT',
-                    scheduled_at__date=today,
-                    defaults={
-                        'organization': task.organization,
-                        'scheduled_at': timezone.make_aware(
-                            datetime.combine(today, datetime.min.time().replace(hour=11, minute=30))
-                        ),
-                        'email_to': client_email,
-                        'send_status': 'PENDING',
-                        'repeat_count': 0
-                    }
-                )
 
-                if reminder.send_status == 'SENT':
-                    total_skipped += 1
-                    continue
-
-                # Send the reminder
-                if dry_run:
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'  [DRY RUN] Would send to {client_email}: '
-                            f'{client.client_name} - {task.period_label}'
+                    if not should_send:
+                        self.stdout.write(
+                            f'  [SKIP] {client.client_name} - {task.period_label}: '
+                            f'Not a reminder day based on frequency'
                         )
+                        total_skipped += 1
+                        continue
+
+                    # Check if reminder was already sent today
+                    already_sent = ReminderInstance.objects.filter(
+                        work_instance=task,
+                        recipient_type='CLIENT',
+                        scheduled_at__date=today,
+                        send_status='SENT'
+                    ).exists()
+
+                    if already_sent:
+                        self.stdout.write(
+                            f'  [SKIP] {client.client_name} - {task.period_label}: '
+                            f'Already sent today'
+                        )
+                        total_skipped += 1
+                        continue
+
+                    # Create or get reminder instance for today (scheduled at 11:00 AM IST)
+                    reminder, created = ReminderInstance.objects.get_or_create(
+                        work_instance=task,
+                        recipient_type='CLIENT',
+                        scheduled_at__date=today,
+                        defaults={
+                            'organization': task.organization,
+                            'scheduled_at': timezone.make_aware(
+                                datetime.combine(today, datetime.min.time().replace(hour=11, minute=30))
+                            ),
+                            'email_to': client_email,
+                            'send_status': 'PENDING',
+                            'repeat_count': 0
+                        }
                     )
-                    total_sent += 1
-                else:
-                    success, error = self._send_auto_driven_reminder(task, reminder)
 
-                    if success:
-                        reminder.send_status = 'SENT'
-                        reminder.sent_at = now
-                        reminder.save()
+                    if reminder.send_status == 'SENT':
+                        total_skipped += 1
+                        continue
 
+                    # Send the reminder
+                    if dry_run:
                         self.stdout.write(
                             self.style.SUCCESS(
-                                f'  [SENT] {client_email}: {client.client_name} - {task.period_label}'
+                                f'  [DRY RUN] Would send to {client_email}: '
+                                f'{client.client_name} - {task.period_label}'
                             )
                         )
                         total_sent += 1
                     else:
-                        reminder.send_status = 'FAILED'
-                        reminder.error_message = error[:500] if error else 'Unknown error'
-                        reminder.last_attempt_at = now
-                        reminder.save()
+                        success, error = self._send_auto_driven_reminder(task, reminder, templates)
 
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f'  [FAILED] {client_email}: {client.client_name} - Error: {error}'
+                        if success:
+                            reminder.send_status = 'SENT'
+                            reminder.sent_at = now
+                            reminder.save()
+
+                            self.stdout.write(
+                                self.style.SUCCESS(
+                                    f'  [SENT] {client_email}: {client.client_name} - {task.period_label}'
+                                )
                             )
-                        )
-                        total_failed += 1
+                            total_sent += 1
+                        else:
+                            reminder.send_status = 'FAILED'
+                            reminder.error_message = error[:500] if error else 'Unknown error'
+                            reminder.last_attempt_at = now
+                            reminder.save()
+
+                            self.stdout.write(
+                                self.style.ERROR(
+                                    f'  [FAILED] {client_email}: {client.client_name} - Error: {error}'
+                                )
+                            )
+                            total_failed += 1
 
         # Summary
         self.stdout.write(f'\n{"=" * 60}')
@@ -227,13 +233,12 @@ class Command(BaseCommand):
 
         return True  # Default: send
 
-    def _send_auto_driven_reminder(self, task, reminder):
+    def _send_auto_driven_reminder(self, task, reminder, templates):
         """
         Send an auto-driven reminder email to the client.
+        templates is the dict from EmailService.get_reminder_templates().
         Returns (success: bool, error: str or None)
         """
-        from core.models import EmailTemplate
-
         try:
             client = task.client_work.client
             work_type = task.client_work.work_type
@@ -246,15 +251,7 @@ class Command(BaseCommand):
             organization_name = organization.firm_name if organization else 'Your CA Firm'
 
             # Check for custom email template
-            email_template = None
-            try:
-                email_template = EmailTemplate.objects.filter(
-                    work_type=work_type,
-                    template_type=recipient_type,
-                    is_active=True
-                ).first()
-            except Exception:
-                pass
+            email_template = templates.get((work_type.id, recipient_type))
 
             if email_template:
                 # Build context for template rendering
@@ -268,8 +265,7 @@ class Command(BaseCommand):
                     'statutory_form': work_type.statutory_form or '',
                     'firm_name': organization_name,
                 }
-                subject = EmailService.render_template(email_template.subject_template, context)
-                body = EmailService.render_template(email_template.body_template, context)
+                subject, body = TemplateRenderer.render(email_template, context)
             else:
                 # Use default template
                 subject = f"Reminder: {work_type.work_name} - Documents Required - {client.client_name}"
@@ -60,46 +60,53 @@ class Command(BaseCommand):
         sent_count = 0
         failed_count = 0
 
-        for reminder in pending_reminders:
-            if dry_run:
-                self.stdout.write(
-                    f'  [DRY RUN] Would send: {reminder.work_instance.client_work.client.client_name} - '
-                    f'{reminder.work_instance.client_work.work_type.work_name} '
-                    f'to {reminder.email_to}'
-                )
-                sent_count += 1
-            else:
-                success, error = EmailService.send_reminder_email(reminder)
-
-                if success:
-                    # Update reminder status
-                    reminder.send_status = 'SENT'
-                    reminder.sent_at = timezone.now()
-                    reminder.save()
+        # Load the reminder templates once for all reminders
+        templates = EmailService.get_reminder_templates(
+            {reminder.work_instance.client_work.work_type_id for reminder in pending_reminders}
+        )
 
+        # Reuse SMTP connections and write email logs in bulk across the whole batch
+        with EmailService.batch():
+            for reminder in pending_reminders:
+                if dry_run:
                     self.stdout.write(
-                        self.style.SUCCESS(
-                            f'  [OK] Sent to {reminder.email_to}: '
-                            f'{reminder.work_instance.client_work.client.client_name} - '
-                            f'{reminder.work_instance.client_work.work_type.work_name}'
-                        )
+                        f'  [DRY RUN] Would send: {reminder.work_instance.client_work.client.client_name} - '
+                        f'{reminder.work_instance.client_work.work_type.work_name} '
+                        f'to {reminder.email_to}'
                     )
                     sent_count += 1
                 else:
-                    # Update reminder as failed
-                    reminder.send_status = 'FAILED'
-                    reminder.error_message = error[:500] if error else 'Unknown error'
-                    reminder.save()
-
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f'  [FAILED] {reminder.email_to}: '
-                            f'{reminder.work_instance.client_work.client.client_name} - '
-                            f'{reminder.work_instance.client_work.work_type.work_name}. '
-                            f'Error: {error}'
+                    success, error = EmailService.send_reminder_email(reminder, templates=templates)
+
+                    if success:
+                        # Update reminder status
+                        reminder.send_status = 'SENT'
+                        reminder.sent_at = timezone.now()
+                        reminder.save()
+
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'  [OK] Sent to {reminder.email_to}: '
+                                f'{reminder.work_instance.client_work.client.client_name} - '
+                                f'{reminder.work_instance.client_work.work_type.work_name}'
+                            )
                         )
-                    )
-                    failed_count += 1
+                        sent_count += 1
+                    else:
+                        # Update reminder as failed
+                        reminder.send_status = 'FAILED'
+                        reminder.error_message = error[:500] if error else 'Unknown error'
+                        reminder.save()
+
+                        self.stdout.write(
+                            self.style.ERROR(
+                                f'  [FAILED] {reminder.email_to}: '
+                                f'{reminder.work_instance.client_work.client.client_name} - '
+                                f'{reminder.work_instance.client_work.work_type.work_name}. '
+                                f'Error: {error}'
+                            )
+                        )
+                        failed_count += 1
 
         # Summary
         self.stdout.write('\n' + '=' * 50)
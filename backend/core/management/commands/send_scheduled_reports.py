@@ -17,6 +17,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from core.models import ReportConfiguration
 from core.services.report_service import ReportService
+from core.services.smtp_pool import smtp_pool
 
 
 class Command(BaseCommand):
@@ -61,66 +62,68 @@ class Command(BaseCommand):
         reports_sent = 0
         reports_failed = 0
 
-        for config in configs:
-            should_send = False
-
-            if force:
-                should_send = True
-                reason = "Forced send"
-            else:
-                # Check if report should be sent based on schedule
-                config_hour = config.send_time.hour if config.send_time else 9
-
-                # Only process if current hour matches configured send time
-                if current_hour == config_hour:
-                    if ReportService.should_send_report_today(config):
-                        should_send = True
-                        reason = f"Scheduled {config.get_frequency_display()} report"
-                    else:
-                        reason = f"Not scheduled for today ({config.get_frequency_display()})"
+        # Reuse the mail connection across all reports of this run
+        with smtp_pool.batch():
+            for config in configs:
+                should_send = False
+
+                if force:
+                    should_send = True
+                    reason = "Forced send"
                 else:
-                    reason = f"Wrong hour (configured: {config_hour}:00, current: {current_hour}:00)"
+                    # Check if report should be sent based on schedule
+                    config_hour = config.send_time.hour if config.send_time else 9
+
+                    # Only process if current hour matches configured send time
+                    if current_hour == config_hour:
+                        if ReportService.should_send_report_today(config):
+                            should_send = True
+                            reason = f"Scheduled {config.get_frequency_display()} report"
+                        else:
+                            reason = f"Not scheduled for today ({config.get_frequency_display()})"
+                    else:
+                        reason = f"Wrong hour (configured: {config_hour}:00, current: {current_hour}:00)"
 
-            if should_send:
-                if dry_run:
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'[DRY RUN] Would send: {config.name} ({config.organization.name}) - {reason}'
+                if should_send:
+                    if dry_run:
+                        self.stdout.write(
+                            self.style.SUCCESS(
+                                f'[DRY RUN] Would send: {config.name} ({config.organization.name}) - {reason}'
+                            )
                         )
-                    )
-                    self.stdout.write(f'  Recipients: {", ".join(config.get_recipient_list())}')
-                    reports_sent += 1
-                else:
-                    self.stdout.write(f'Sending: {config.name} ({config.organization.name})...')
+                        self.stdout.write(f'  Recipients: {", ".join(config.get_recipient_list())}')
+                        reports_sent += 1
+                    else:
+                        self.stdout.write(f'Sending: {config.name} ({config.organization.name})...')
 
-                    try:
-                        success, error = ReportService.generate_and_send_report(config)
+                        try:
+                            success, error = ReportService.generate_and_send_report(config)
 
-                        if success:
-                            reports_sent += 1
-                            self.stdout.write(
-                                self.style.SUCCESS(
-                                    f'  SUCCESS: Sent to {", ".join(config.get_recipient_list())}'
+                            if success:
+                                reports_sent += 1
+                                self.stdout.write(
+                                    self.style.SUCCESS(
+                                        f'  SUCCESS: Sent to {", ".join(config.get_recipient_list())}'
+                                    )
                                 )
-                            )
-                        else:
+                            else:
+                                reports_failed += 1
+                                self.stdout.write(
+                                    self.style.ERROR(f'  FAILED: {error}')
+                                )
+
+                        except Exception as e:
                             reports_failed += 1
                             self.stdout.write(
-                                self.style.ERROR(f'  FAILED: {error}')
+                                self.style.ERROR(f'  ERROR: {str(e)}')
                             )
-
-                    except Exception as e:
-                        reports_failed += 1
+                else:
+                    if options.get('verbosity', 1) > 1:
                         self.stdout.write(
-                            self.style.ERROR(f'  ERROR: {str(e)}')
-                        )
-            else:
-                if options.get('verbosity', 1) > 1:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'Skipping: {config.name} ({config.organization.name}) - {reason}'
+                            self.style.WARNING(
+                                f'Skipping: {config.name} ({config.organization.name}) - {reason}'
+                            )
                         )
-                    )
 
         # Summary
         self.stdout.write('')
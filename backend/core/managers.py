@@ -98,3 +98,49 @@ class UserManager(models.Manager):
     def platform_admins(self):
         """Get all platform administrators."""
         return self.get_queryset().filter(is_platform_admin=True)
+
+
+class WorkInstanceQuerySet(models.QuerySet):
+    """
+    QuerySet for WorkInstance with read-time computed task state.
+    """
+
+    def with_overdue_flag(self, today=None):
+        """
+        Annotate overdue_flag from the due date instead of the persisted status
+        (for filtering and ordering in SQL; WorkInstance.is_overdue is the
+        same check in Python).
+
+        The stored OVERDUE status is reconciled by the scheduled
+        mark_overdue_tasks job; reads never write.
+        """
+        from django.db.models import BooleanField, Case, Q, Value, When
+        from django.utils import timezone
+
+        if today is None:
+            today = timezone.now().date()
+
+        return self.annotate(
+            overdue_flag=Case(
+                When(Q(due_date__lt=today) & ~Q(status='COMPLETED'), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            )
+        )
+
+    def with_document_count(self):
+        """Annotate document_count (attached TaskDocuments) instead of counting per row"""
+        from django.db.models import Count
+
+        return self.annotate(document_count=Count('documents', distinct=True))
+
+    def for_serializer(self):
+        """
+        Load everything WorkInstanceSerializer reads in the list query: client,
+        task category and assignee via joins, and document_count as an annotation.
+        """
+        return self.select_related(
+            'client_work__client',
+            'client_work__work_type',
+            'assigned_to'
+        ).with_document_count()
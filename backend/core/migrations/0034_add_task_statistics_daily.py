@@ -0,0 +1,84 @@
+# Generated by Django 5.0.1 on 2026-10-16 10:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0033_add_email_log_tracking"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskStatisticsDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "date",
+                    models.DateField(help_text="Due date of the counted tasks"),
+                ),
+                ("status", models.CharField(max_length=20)),
+                ("task_count", models.IntegerField(default=0)),
+                (
+                    "total_time_spent",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Total time spent in seconds on the counted tasks",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "assigned_to",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="task_statistics",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="core.organization",
+                    ),
+                ),
+                (
+                    "work_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="task_statistics",
+                        to="core.worktype",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "task_statistics_daily",
+                "ordering": ["date"],
+                "indexes": [
+                    models.Index(
+                        fields=["organization", "date"],
+                        name="task_statis_organiz_c40828_idx",
+                    ),
+                    models.Index(
+                        fields=["organization", "date", "work_type", "assigned_to", "status"],
+                        name="task_statis_organiz_89c9fa_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-16 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0034_add_task_statistics_daily"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googleconnection",
+            name="tasks_synced_until",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Google Tasks changed before this time have been synced to NexPro (sync cursor)",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.0.1 on 2026-10-16 14:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0035_add_google_tasks_sync_cursor"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GoogleSyncOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("work_instance_id", models.BigIntegerField(unique=True)),
+                (
+                    "operation",
+                    models.CharField(
+                        choices=[
+                            ("UPSERT", "Create or update Google Task"),
+                            ("DELETE", "Delete Google Task"),
+                        ],
+                        default="UPSERT",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "google_task_id",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                (
+                    "google_tasklist_id",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Last change; the row is synced once this is older than the debounce delay",
+                    ),
+                ),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="%(class)s_set",
+                        to="core.organization",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="google_sync_outbox",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "google_sync_outbox",
+                "indexes": [
+                    models.Index(
+                        fields=["updated_at"],
+                        name="google_sync_outbox_updated_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-16 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0036_add_google_sync_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googleconnection",
+            name="calendar_sync_token",
+            field=models.CharField(
+                blank=True,
+                help_text="Google Calendar nextSyncToken; the next sync lists only events changed since",
+                max_length=255,
+                null=True,
+            ),
+        ),
+    ]
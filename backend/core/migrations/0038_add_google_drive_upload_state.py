@@ -0,0 +1,84 @@
+# Generated by Django 5.0.1 on 2026-10-16 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0037_add_google_calendar_sync_token"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="googledrivemapping",
+            name="folder_type",
+            field=models.CharField(
+                choices=[
+                    ("CLIENT", "Client Folder"),
+                    ("WORK_TYPE", "Task Category Folder"),
+                    ("YEAR", "Year Folder"),
+                    ("TASK", "Task Folder"),
+                    ("FILE", "Uploaded File"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="googledrivemapping",
+            name="task_document",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="google_drive_uploads",
+                to="core.taskdocument",
+            ),
+        ),
+        migrations.AddField(
+            model_name="googledrivemapping",
+            name="upload_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("UPLOADING", "Uploading"),
+                    ("COMPLETED", "Completed"),
+                    ("FAILED", "Failed"),
+                ],
+                max_length=20,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="googledrivemapping",
+            name="upload_session_uri",
+            field=models.TextField(
+                blank=True, help_text="Google Drive resumable upload session URI", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="googledrivemapping",
+            name="upload_bytes_sent",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="googledrivemapping",
+            name="upload_total_bytes",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="googledrivemapping",
+            name="upload_attempts",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="googledrivemapping",
+            name="upload_error",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="googledrivemapping",
+            index=models.Index(fields=["upload_status", "updated_at"], name="google_drive_upload_idx"),
+        ),
+    ]
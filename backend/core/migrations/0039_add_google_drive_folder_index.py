@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-16 17:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0038_add_google_drive_upload_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googledrivemapping",
+            name="google_connection",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="drive_folders",
+                to="core.googleconnection",
+            ),
+        ),
+        migrations.AddField(
+            model_name="googledrivemapping",
+            name="folder_path",
+            field=models.CharField(
+                blank=True,
+                help_text="Path below the NexPro root folder, e.g. 'Client Name/2025/GST Return'",
+                max_length=1024,
+                null=True,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="googledrivemapping",
+            constraint=models.UniqueConstraint(
+                fields=("google_connection", "folder_path"), name="google_drive_folder_path_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-16 18:00
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+# Rollup rows inserted per bulk_create
+BATCH_SIZE = 1000
+
+
+def backfill_task_statistics(apps, schema_editor):
+    """
+    Rebuild the task statistics rollup from existing work instances. Rows
+    written incrementally so far are replaced, which also merges any
+    duplicate buckets before task_statistics_bucket_unique is added.
+    """
+    TaskStatisticsDaily = apps.get_model('core', 'TaskStatisticsDaily')
+    WorkInstance = apps.get_model('core', 'WorkInstance')
+
+    TaskStatisticsDaily.objects.all().delete()
+
+    groups = WorkInstance.objects.values(
+        'organization_id', 'due_date', 'client_work__work_type_id', 'assigned_to_id', 'status'
+    ).annotate(count=Count('id'), time_spent=Sum('total_time_spent')).order_by()
+
+    batch = []
+    for group in groups.iterator():
+        batch.append(TaskStatisticsDaily(
+            organization_id=group['organization_id'],
+            date=group['due_date'],
+            work_type_id=group['client_work__work_type_id'],
+            assigned_to_id=group['assigned_to_id'],
+            status=group['status'],
+            task_count=group['count'],
+            total_time_spent=group['time_spent'] or 0
+        ))
+        if len(batch) >= BATCH_SIZE:
+            TaskStatisticsDaily.objects.bulk_create(batch)
+            batch = []
+
+    if batch:
+        TaskStatisticsDaily.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0039_add_google_drive_folder_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_task_statistics, migrations.RunPython.noop),
+    ]
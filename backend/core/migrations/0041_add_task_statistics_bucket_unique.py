@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-16 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0040_backfill_task_statistics_daily"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="taskstatisticsdaily",
+            name="task_statis_organiz_89c9fa_idx",
+        ),
+        migrations.AddConstraint(
+            model_name="taskstatisticsdaily",
+            constraint=models.UniqueConstraint(
+                fields=("organization", "date", "work_type", "assigned_to", "status"),
+                name="task_statistics_bucket_unique",
+                nulls_distinct=False,
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-17 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0041_add_task_statistics_bucket_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="googletaskmapping",
+            name="sync_failures",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Failed attempts to apply the current Google change (reset on success)",
+            ),
+        ),
+    ]
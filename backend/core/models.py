@@ -3,8 +3,12 @@ from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.utils.text import slugify
 from cryptography.fernet import Fernet
+import copy
+import time
 import uuid
 
+from .managers import WorkInstanceQuerySet
+
 
 # =============================================================================
 # MULTI-TENANT ORGANIZATION MODEL
@@ -995,6 +999,8 @@ class WorkInstance(TenantModel):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = WorkInstanceQuerySet.as_manager()
+
     class Meta:
         db_table = 'work_instances'
         ordering = ['due_date', 'client_work']
@@ -1007,6 +1013,47 @@ class WorkInstance(TenantModel):
     def __str__(self):
         return f"{self.client_work.client.client_name} - {self.client_work.work_type.work_name} - {self.period_label}"
 
+    # Fields that determine the TaskStatisticsDaily bucket of an instance
+    STATISTICS_FIELDS = ('organization_id', 'due_date', 'client_work_id', 'assigned_to_id', 'status', 'total_time_spent')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the statistics values as loaded so saves/deletes can move
+        # counts between rollup buckets without re-reading the row
+        if not instance.get_deferred_fields().intersection(cls.STATISTICS_FIELDS):
+            instance._statistics_key = instance.get_statistics_key()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # The reloaded statistics values are the ones now stored in the database
+        deferred = self.get_deferred_fields()
+        if fields is None:
+            refreshed = {field.attname for field in self._meta.concrete_fields} - deferred
+        else:
+            refreshed = {self._meta.get_field(name).attname for name in fields}
+
+        old_key = getattr(self, '_statistics_key', None)
+        if old_key is not None:
+            self._statistics_key = tuple(
+                getattr(self, field) if field in refreshed else old
+                for field, old in zip(self.STATISTICS_FIELDS, old_key)
+            )
+        elif not deferred.intersection(self.STATISTICS_FIELDS):
+            self._statistics_key = self.get_statistics_key()
+
+    def get_statistics_key(self):
+        """Return the current (organization, due_date, client_work, assigned_to, status, time spent) values"""
+        return tuple(getattr(self, field) for field in self.STATISTICS_FIELDS)
+
+    @classmethod
+    def affects_statistics(cls, update_fields):
+        """Whether a save with these update_fields can move the task between rollup buckets"""
+        if update_fields is None:
+            return True
+        return any(cls._meta.get_field(name).attname in cls.STATISTICS_FIELDS for name in update_fields)
+
     def start_timer(self):
         """Start the timer for this task"""
         from django.utils import timezone
@@ -1099,6 +1146,53 @@ class TaskDocument(TenantModel):
         super().save(*args, **kwargs)
 
 
+class TaskStatisticsDaily(TenantModel):
+    """
+    Daily task statistics rollup - tenant scoped.
+    Number of tasks and total time spent per (due date, task category,
+    assigned employee, status). Maintained incrementally from WorkInstance
+    changes and rebuilt with the rebuild_task_statistics command.
+    """
+    date = models.DateField(help_text="Due date of the counted tasks")
+    work_type = models.ForeignKey(
+        WorkType,
+        on_delete=models.CASCADE,
+        related_name='task_statistics'
+    )
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='task_statistics'
+    )
+    status = models.CharField(max_length=20)
+    task_count = models.IntegerField(default=0)
+    total_time_spent = models.BigIntegerField(
+        default=0,
+        help_text="Total time spent in seconds on the counted tasks"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'task_statistics_daily'
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['organization', 'date']),
+        ]
+        constraints = [
+            # One row per bucket; unassigned tasks share a bucket too
+            models.UniqueConstraint(
+                fields=['organization', 'date', 'work_type', 'assigned_to', 'status'],
+                name='task_statistics_bucket_unique',
+                nulls_distinct=False
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.status}: {self.task_count}"
+
+
 class CredentialVault(TenantModel):
     """Secure storage for client portal credentials - tenant scoped"""
     PORTAL_TYPE_CHOICES = [
@@ -2106,6 +2200,14 @@ class PlatformSettings(models.Model):
     def __str__(self):
         return f"Platform Settings ({self.platform_name})"
 
+    # Shared-cache key whose value changes whenever the settings are saved
+    CACHE_VERSION_KEY = 'platform_settings:version'
+
+    # Process-local memoized instance (see get_settings)
+    _cached_instance = None
+    _cached_version = None
+    _cached_checked_at = 0.0
+
     def save(self, *args, **kwargs):
         """Ensure only one instance exists"""
         if not self.pk and PlatformSettings.objects.exists():
@@ -2113,12 +2215,53 @@ class PlatformSettings(models.Model):
             existing = PlatformSettings.objects.first()
             self.pk = existing.pk
         super().save(*args, **kwargs)
+        PlatformSettings.invalidate_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        PlatformSettings.invalidate_cache()
+        return result
 
     @classmethod
     def get_settings(cls):
-        """Get or create the singleton settings instance"""
-        settings, _ = cls.objects.get_or_create(pk=1)
-        return settings
+        """
+        Get or create the singleton settings instance.
+
+        The instance is memoized per process. A version stamp in the shared
+        cache (checked at most every PLATFORM_SETTINGS_CHECK_INTERVAL seconds)
+        tells other processes to reload it after a save. Each caller gets its
+        own copy, so changes are only seen by others once saved.
+        """
+        from django.core.cache import cache
+
+        now = time.monotonic()
+        interval = getattr(settings, 'PLATFORM_SETTINGS_CHECK_INTERVAL', 5)
+        if cls._cached_instance is None or now - cls._cached_checked_at >= interval:
+            version = cache.get(cls.CACHE_VERSION_KEY)
+            if version is None:
+                cache.add(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+                version = cache.get(cls.CACHE_VERSION_KEY)
+
+            if cls._cached_instance is None or version != cls._cached_version:
+                instance, _ = cls.objects.get_or_create(pk=1)
+                # Decrypted secrets, shared by all copies of this instance
+                instance._decrypted = {}
+                cls._cached_instance = instance
+                cls._cached_version = version
+            cls._cached_checked_at = now
+
+        return copy.copy(cls._cached_instance)
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Drop the memoized instance here and (after commit) in all other processes"""
+        from django.core.cache import cache
+        from django.db import transaction
+
+        cls._cached_instance = None
+        transaction.on_commit(
+            lambda: cache.set(cls.CACHE_VERSION_KEY, uuid.uuid4().hex, None)
+        )
 
     # ==========================================================================
     # Encryption/Decryption for sensitive fields
@@ -2130,16 +2273,29 @@ class PlatformSettings(models.Model):
             return Fernet(settings.FERNET_KEY.encode() if isinstance(settings.FERNET_KEY, str) else settings.FERNET_KEY)
         raise ValueError("FERNET_KEY not configured in settings")
 
-    @property
-    def google_client_secret(self):
-        """Decrypt and return Google client secret"""
-        if not self.google_client_secret_encrypted:
+    def _decrypt(self, encrypted_value):
+        """
+        Decrypt a stored secret. Results are memoized by ciphertext on
+        instances from get_settings(), so secrets are decrypted once per
+        process rather than once per email.
+        """
+        if not encrypted_value:
             return ''
+        decrypted = self.__dict__.get('_decrypted')
+        if decrypted is not None and encrypted_value in decrypted:
+            return decrypted[encrypted_value]
         try:
-            fernet = self._get_fernet()
-            return fernet.decrypt(self.google_client_secret_encrypted.encode()).decode()
+            value = self._get_fernet().decrypt(encrypted_value.encode()).decode()
         except Exception:
-            return ''
+            value = ''
+        if decrypted is not None:
+            decrypted[encrypted_value] = value
+        return value
+
+    @property
+    def google_client_secret(self):
+        """Decrypt and return Google client secret"""
+        return self._decrypt(self.google_client_secret_encrypted)
 
     @google_client_secret.setter
     def google_client_secret(self, value):
@@ -2156,13 +2312,7 @@ class PlatformSettings(models.Model):
     @property
     def smtp_password(self):
         """Decrypt and return SMTP password"""
-        if not self.smtp_password_encrypted:
-            return ''
-        try:
-            fernet = self._get_fernet()
-            return fernet.decrypt(self.smtp_password_encrypted.encode()).decode()
-        except Exception:
-            return ''
+        return self._decrypt(self.smtp_password_encrypted)
 
     @smtp_password.setter
     def smtp_password(self, value):
@@ -2188,13 +2338,7 @@ class PlatformSettings(models.Model):
     @property
     def sendgrid_api_key(self):
         """Decrypt and return SendGrid API key"""
-        if not self.sendgrid_api_key_encrypted:
-            return ''
-        try:
-            fernet = self._get_fernet()
-            return fernet.decrypt(self.sendgrid_api_key_encrypted.encode()).decode()
-        except Exception:
-            return ''
+        return self._decrypt(self.sendgrid_api_key_encrypted)
 
     @sendgrid_api_key.setter
     def sendgrid_api_key(self, value):
@@ -2216,13 +2360,7 @@ class PlatformSettings(models.Model):
     @property
     def aws_secret_access_key(self):
         """Decrypt and return AWS Secret Access Key"""
-        if not self.aws_secret_access_key_encrypted:
-            return ''
-        try:
-            fernet = self._get_fernet()
-            return fernet.decrypt(self.aws_secret_access_key_encrypted.encode()).decode()
-        except Exception:
-            return ''
+        return self._decrypt(self.aws_secret_access_key_encrypted)
 
     @aws_secret_access_key.setter
     def aws_secret_access_key(self, value):
@@ -2284,43 +2422,14 @@ class EmailUsageLog(models.Model):
     @classmethod
     def increment_count(cls, organization=None):
         """
-        Increment email count for an organization (or platform if None).
+        Count one email for an organization (or platform if None) against the
+        daily limits. Counting is done with atomic cache counters and written
+        to this table periodically (see EmailRateLimiter).
         Returns (success: bool, error_message: str or None)
         """
-        from django.utils import timezone
-        from django.db import transaction
-
-        today = timezone.now().date()
-
-        # Get platform settings for limits
-        platform_settings = PlatformSettings.get_settings()
-
-        with transaction.atomic():
-            # Get or create today's usage record
-            usage, created = cls.objects.select_for_update().get_or_create(
-                organization=organization,
-                date=today,
-                defaults={'email_count': 0}
-            )
-
-            # Check organization limit (if organization is specified)
-            if organization and platform_settings.email_daily_limit_per_org > 0:
-                if usage.email_count >= platform_settings.email_daily_limit_per_org:
-                    return False, f"Daily email limit ({platform_settings.email_daily_limit_per_org}) reached for this organization"
-
-            # Check platform-wide limit
-            if platform_settings.email_daily_limit_platform > 0:
-                total_today = cls.objects.filter(date=today).aggregate(
-                    total=models.Sum('email_count')
-                )['total'] or 0
-                if total_today >= platform_settings.email_daily_limit_platform:
-                    return False, f"Platform daily email limit ({platform_settings.email_daily_limit_platform}) reached"
+        from core.services.email_rate_limiter import EmailRateLimiter
 
-            # Increment count
-            usage.email_count += 1
-            usage.save()
-
-        return True, None
+        return EmailRateLimiter.reserve(organization)
 
     @classmethod
     def get_usage_stats(cls, organization=None, days=30):
@@ -2601,14 +2710,32 @@ class EmailLog(TenantModel):
         if gmail_thread_id:
             self.gmail_thread_id = gmail_thread_id
 
-        self.save()
+        self._save_status()
 
     def mark_failed(self, error_message):
         """Mark email as failed with error message"""
         self.status = 'FAILED'
         self.error_message = error_message
         self.retry_count += 1
-        self.save()
+        self._save_status()
+
+    def _save_status(self):
+        """
+        Save a status change. Logs created by EmailService.log_email are not
+        saved until their status is known: buffered logs are written by the
+        EmailLogBuffer, others are inserted here with their final status.
+        """
+        buffer = getattr(self, '_log_buffer', None)
+        if buffer is not None:
+            buffer.record_changed(self)
+            return
+
+        try:
+            self.save()
+        except Exception as e:
+            # Logging must never break sending
+            import logging
+            logging.getLogger(__name__).error(f"Failed to save email log {self.tracking_id}: {str(e)}")
 
     def update_gmail_ids(self, gmail_message_id, gmail_thread_id=None):
         """Update Gmail IDs after successful send via Gmail API"""
@@ -2929,6 +3056,17 @@ class GoogleConnection(TenantModel):
         blank=True,
         help_text="Last successful sync timestamp"
     )
+    tasks_synced_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Google Tasks changed before this time have been synced to NexPro (sync cursor)"
+    )
+    calendar_sync_token = models.CharField(
+        max_length=255,
+        blank=True,
+        null=True,
+        help_text="Google Calendar nextSyncToken; the next sync lists only events changed since"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -3262,6 +3400,10 @@ class GoogleTaskMapping(TenantModel):
         blank=True,
         help_text="Last update time in Google (for conflict detection)"
     )
+    sync_failures = models.PositiveIntegerField(
+        default=0,
+        help_text="Failed attempts to apply the current Google change (reset on success)"
+    )
 
     class Meta:
         db_table = 'google_task_mappings'
@@ -3274,6 +3416,55 @@ class GoogleTaskMapping(TenantModel):
         return f"TaskMapping: {self.work_instance} <-> {self.google_task_id}"
 
 
+class GoogleSyncOutbox(TenantModel):
+    """
+    Pending Google Tasks sync operations, one row per WorkInstance.
+    Written by the WorkInstance signals after commit and drained in batches
+    by the drain_google_sync_outbox task (see GoogleSyncOutboxService).
+    """
+    OPERATION_CHOICES = [
+        ('UPSERT', 'Create or update Google Task'),
+        ('DELETE', 'Delete Google Task'),
+    ]
+
+    # Not a foreign key: DELETE operations outlive the WorkInstance
+    work_instance_id = models.BigIntegerField(unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='google_sync_outbox'
+    )
+    operation = models.CharField(
+        max_length=10,
+        choices=OPERATION_CHOICES,
+        default='UPSERT'
+    )
+
+    # Google Task to delete (DELETE operations)
+    google_task_id = models.CharField(max_length=255, blank=True, null=True)
+    google_tasklist_id = models.CharField(max_length=255, blank=True, null=True)
+
+    # Retries of failed connections
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Last change; the row is synced once this is older than the debounce delay"
+    )
+
+    class Meta:
+        db_table = 'google_sync_outbox'
+        indexes = [
+            models.Index(fields=['updated_at'], name='google_sync_outbox_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"SyncOutbox: {self.operation} WorkInstance {self.work_instance_id}"
+
+
 class GoogleCalendarMapping(TenantModel):
     """
     Maps NexPro WorkInstance to Google Calendar Event for two-way sync.
@@ -3324,6 +3515,9 @@ class GoogleCalendarMapping(TenantModel):
 class GoogleDriveMapping(TenantModel):
     """
     Maps NexPro clients/folders to Google Drive folders.
+    Folders with a folder_path form the per-connection folder index
+    (core.services.google_drive_folders). FILE rows track resumable uploads
+    of task documents (core.services.google_drive_uploads).
     """
     # What this folder is for
     FOLDER_TYPE_CHOICES = [
@@ -3331,6 +3525,14 @@ class GoogleDriveMapping(TenantModel):
         ('WORK_TYPE', 'Task Category Folder'),
         ('YEAR', 'Year Folder'),
         ('TASK', 'Task Folder'),
+        ('FILE', 'Uploaded File'),
+    ]
+
+    UPLOAD_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('UPLOADING', 'Uploading'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
     ]
 
     folder_type = models.CharField(
@@ -3360,6 +3562,13 @@ class GoogleDriveMapping(TenantModel):
         blank=True,
         related_name='google_drive_folders'
     )
+    task_document = models.ForeignKey(
+        'TaskDocument',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='google_drive_uploads'
+    )
 
     # Year for year folders
     year = models.IntegerField(
@@ -3367,6 +3576,22 @@ class GoogleDriveMapping(TenantModel):
         blank=True
     )
 
+    # Folder index: the connection whose Drive holds the folder, and the
+    # folder's path below the connection's NexPro root folder
+    google_connection = models.ForeignKey(
+        'GoogleConnection',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='drive_folders'
+    )
+    folder_path = models.CharField(
+        max_length=1024,
+        blank=True,
+        null=True,
+        help_text="Path below the NexPro root folder, e.g. 'Client Name/2025/GST Return'"
+    )
+
     # Google Drive identifiers
     google_folder_id = models.CharField(
         max_length=255,
@@ -3383,6 +3608,23 @@ class GoogleDriveMapping(TenantModel):
         help_text="Parent folder ID in Google Drive"
     )
 
+    # Resumable upload state (FILE rows); kept so an upload resumes after a worker restart
+    upload_status = models.CharField(
+        max_length=20,
+        choices=UPLOAD_STATUS_CHOICES,
+        blank=True,
+        null=True
+    )
+    upload_session_uri = models.TextField(
+        blank=True,
+        null=True,
+        help_text="Google Drive resumable upload session URI"
+    )
+    upload_bytes_sent = models.BigIntegerField(default=0)
+    upload_total_bytes = models.BigIntegerField(default=0)
+    upload_attempts = models.IntegerField(default=0)
+    upload_error = models.TextField(blank=True, null=True)
+
     # Shared with users
     shared_with_users = models.ManyToManyField(
         settings.AUTH_USER_MODEL,
@@ -3399,6 +3641,13 @@ class GoogleDriveMapping(TenantModel):
             models.Index(fields=['organization', 'folder_type']),
             models.Index(fields=['client']),
             models.Index(fields=['google_folder_id']),
+            models.Index(fields=['upload_status', 'updated_at'], name='google_drive_upload_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['google_connection', 'folder_path'],
+                name='google_drive_folder_path_unique'
+            ),
         ]
 
     def __str__(self):
@@ -3509,121 +3758,101 @@ class GoogleAPIQuotaUsage(models.Model):
                        operation_type='read', user=None, organization=None,
                        failed=False, rate_limited=False):
         """
-        Increment usage counters for an API type.
-        Thread-safe using F() expressions.
+        Count usage for an API type. Counts are buffered in memory and
+        written by the flush_google_quota_usage task (see
+        core.services.google_quota), so this makes no database queries.
+        user and organization are accepted for compatibility; unique
+        users/organizations are not tracked.
         """
-        from django.db.models import F
-        from django.utils import timezone
-
-        today = timezone.now().date()
-
-        # Get or create today's record
-        usage, created = cls.objects.get_or_create(
-            date=today,
-            api_type=api_type,
-            defaults={
-                'queries_count': 0,
-                'quota_units_used': 0,
-            }
+        from core.services.google_quota import google_quota
+
+        google_quota.record(
+            api_type,
+            queries=queries,
+            quota_units=quota_units,
+            operation_type=operation_type,
+            failed=failed,
+            rate_limited=rate_limited
         )
 
-        # Update counters using F() for thread safety
-        update_fields = {
-            'queries_count': F('queries_count') + queries,
-            'quota_units_used': F('quota_units_used') + quota_units,
+    @staticmethod
+    def get_quota_limits():
+        """Daily quota limit per API type from PlatformSettings"""
+        platform_settings = PlatformSettings.get_settings()
+        return {
+            'TASKS': platform_settings.google_tasks_daily_quota,
+            'CALENDAR': platform_settings.google_calendar_daily_quota,
+            'DRIVE': platform_settings.google_drive_daily_quota,
+            'GMAIL': platform_settings.google_gmail_daily_quota,
         }
 
-        if operation_type == 'read':
-            update_fields['read_operations'] = F('read_operations') + queries
-        elif operation_type == 'write':
-            update_fields['write_operations'] = F('write_operations') + queries
-        elif operation_type == 'delete':
-            update_fields['delete_operations'] = F('delete_operations') + queries
-
-        if failed:
-            update_fields['failed_requests'] = F('failed_requests') + 1
-        if rate_limited:
-            update_fields['rate_limit_hits'] = F('rate_limit_hits') + 1
-
-        cls.objects.filter(pk=usage.pk).update(**update_fields)
-
-        # Update unique users/orgs (this is approximate for performance)
-        # A more accurate count would require a separate tracking table
-
-        return usage
-
     @classmethod
     def get_usage_percentage(cls, api_type):
         """Get current usage as percentage of quota limit"""
-        from django.utils import timezone
-        today = timezone.now().date()
-
-        try:
-            usage = cls.objects.get(date=today, api_type=api_type)
-            platform_settings = PlatformSettings.get_settings()
-
-            quota_map = {
-                'TASKS': platform_settings.google_tasks_daily_quota,
-                'CALENDAR': platform_settings.google_calendar_daily_quota,
-                'DRIVE': platform_settings.google_drive_daily_quota,
-                'GMAIL': platform_settings.google_gmail_daily_quota,
-            }
+        from core.services.google_quota import google_quota
 
-            quota_limit = quota_map.get(api_type, 0)
-            if quota_limit == 0:
-                return 0
-
-            return round((usage.queries_count / quota_limit) * 100, 2)
-        except cls.DoesNotExist:
+        quota_limit = cls.get_quota_limits().get(api_type, 0)
+        if quota_limit == 0:
             return 0
 
+        return round((google_quota.get_used(api_type) / quota_limit) * 100, 2)
+
     @classmethod
     def get_daily_summary(cls, date=None):
-        """Get summary of all API usage for a date"""
+        """
+        Get summary of all API usage for a date, including counts not yet
+        written to the database. One query for all API types.
+        """
         from django.utils import timezone
+        from core.services.google_quota import google_quota
+
         if date is None:
             date = timezone.now().date()
 
         platform_settings = PlatformSettings.get_settings()
+        quota_map = cls.get_quota_limits()
 
         summary = {
             'date': date.isoformat(),
             'apis': {}
         }
 
-        quota_map = {
-            'TASKS': platform_settings.google_tasks_daily_quota,
-            'CALENDAR': platform_settings.google_calendar_daily_quota,
-            'DRIVE': platform_settings.google_drive_daily_quota,
-            'GMAIL': platform_settings.google_gmail_daily_quota,
-        }
+        usage_by_type = {usage.api_type: usage for usage in cls.objects.filter(date=date)}
+        pending_by_type = google_quota.get_pending(date)
 
         for api_type, _ in cls.API_TYPE_CHOICES:
-            try:
-                usage = cls.objects.get(date=date, api_type=api_type)
-                quota_limit = quota_map.get(api_type, 0)
-                percentage = round((usage.queries_count / quota_limit) * 100, 2) if quota_limit > 0 else 0
+            usage = usage_by_type.get(api_type)
+            pending = pending_by_type.get(api_type, {})
+            quota_limit = quota_map.get(api_type, 0)
 
-                summary['apis'][api_type] = {
-                    'queries': usage.queries_count,
-                    'quota_limit': quota_limit,
-                    'percentage': percentage,
-                    'quota_units': usage.quota_units_used,
-                    'read_ops': usage.read_operations,
-                    'write_ops': usage.write_operations,
-                    'delete_ops': usage.delete_operations,
-                    'failed': usage.failed_requests,
-                    'rate_limits': usage.rate_limit_hits,
-                    'status': 'critical' if percentage >= platform_settings.quota_critical_threshold
-                             else 'warning' if percentage >= platform_settings.quota_warning_threshold
-                             else 'normal'
-                }
-            except cls.DoesNotExist:
+            if usage is None and not pending:
                 summary['apis'][api_type] = {
                     'queries': 0,
-                    'quota_limit': quota_map.get(api_type, 0),
+                    'quota_limit': quota_limit,
                     'percentage': 0,
                     'status': 'normal'
                 }
+                continue
+
+            def count(field):
+                return (getattr(usage, field) if usage else 0) + pending.get(field, 0)
+
+            queries = count('queries_count')
+            percentage = round((queries / quota_limit) * 100, 2) if quota_limit > 0 else 0
+
+            summary['apis'][api_type] = {
+                'queries': queries,
+                'quota_limit': quota_limit,
+                'percentage': percentage,
+                'quota_units': count('quota_units_used'),
+                'read_ops': count('read_operations'),
+                'write_ops': count('write_operations'),
+                'delete_ops': count('delete_operations'),
+                'failed': count('failed_requests'),
+                'rate_limits': count('rate_limit_hits'),
+                'status': 'critical' if percentage >= platform_settings.quota_critical_threshold
+                         else 'warning' if percentage >= platform_settings.quota_warning_threshold
+                         else 'normal'
+            }
 
         return summary
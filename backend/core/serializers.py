@@ -79,7 +79,9 @@ class OrganizationEmailSerializer(serializers.ModelSerializer):
         }
 
     def get_work_types_count(self, obj):
-        """Count of work types using this email"""
+        """Count of work types using this email (annotated by OrganizationEmailViewSet when listing)"""
+        if hasattr(obj, 'work_types_count'):
+            return obj.work_types_count
         return obj.work_types.count()
 
     def get_smtp_inherit_from_email(self, obj):
@@ -246,8 +248,13 @@ class UserSerializer(serializers.ModelSerializer):
         }
 
     def get_assigned_work_types(self, obj):
-        """Get list of work types assigned to this user"""
-        assignments = obj.work_type_assignments.filter(is_active=True).select_related('work_type')
+        """
+        Get list of work types assigned to this user.
+        Uses active_work_type_assignments when prefetched by UserViewSet.
+        """
+        assignments = getattr(obj, 'active_work_type_assignments', None)
+        if assignments is None:
+            assignments = obj.work_type_assignments.filter(is_active=True).select_related('work_type')
         return [
             {
                 'id': a.id,
@@ -315,6 +322,9 @@ class ClientSerializer(TenantModelSerializer):
         read_only_fields = ['organization']
 
     def get_work_count(self, obj):
+        # Annotated by ClientViewSet; count per client otherwise
+        if hasattr(obj, 'work_count'):
+            return obj.work_count
         return obj.work_mappings.filter(active=True).count()
 
 
@@ -369,7 +379,9 @@ class WorkTypeSerializer(TenantModelSerializer):
             return None
 
     def get_subtask_count(self, obj):
-        """Get count of active subtasks"""
+        """Get count of active subtasks (annotated by WorkTypeViewSet when listing)"""
+        if hasattr(obj, 'subtask_count'):
+            return obj.subtask_count
         return obj.subtask_categories.filter(is_active=True).count()
 
 
@@ -466,7 +478,12 @@ class WorkInstanceSerializer(TenantModelSerializer):
         return obj.format_time_spent()
 
     def get_document_count(self, obj):
-        """Get the count of documents attached to this work instance"""
+        """
+        Get the count of documents attached to this work instance.
+        Uses the document_count annotation (WorkInstanceQuerySet.for_serializer) when present.
+        """
+        if hasattr(obj, 'document_count'):
+            return obj.document_count
         return obj.documents.count()
 
     def validate(self, data):
@@ -865,7 +882,9 @@ class SubscriptionPlanSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'organizations_count', 'sync_frequency_display', 'created_at', 'updated_at']
 
     def get_organizations_count(self, obj):
-        """Count organizations using this plan"""
+        """Count organizations using this plan (annotated by SubscriptionPlanViewSet when listing)"""
+        if hasattr(obj, 'organizations_count'):
+            return obj.organizations_count
         return Organization.objects.filter(plan=obj.code).count()
 
 
@@ -0,0 +1,124 @@
+"""
+Dashboard Service for NexPro
+
+Computes the dashboard summary counters with a single conditional aggregation
+query and caches them per tenant for a short time. Cached summaries are
+invalidated by bumping a per-organization version whenever a WorkInstance is
+saved or deleted.
+"""
+
+import logging
+from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Short TTL so counters still refresh after bulk updates that bypass signals
+SUMMARY_CACHE_TIMEOUT = 60
+
+ACTIVE_STATUSES = ['NOT_STARTED', 'STARTED', 'IN_PROGRESS']
+
+
+class DashboardService:
+    """
+    Service for dashboard statistics.
+    """
+
+    @staticmethod
+    def _version_key(organization_id):
+        return f'dashboard:version:{organization_id}'
+
+    @staticmethod
+    def get_cache_version(organization_id):
+        """Return the current summary cache version of an organization"""
+        return cache.get_or_set(DashboardService._version_key(organization_id), 1, timeout=None)
+
+    @staticmethod
+    def invalidate(organization_id):
+        """
+        Invalidate all cached dashboard summaries of an organization by bumping
+        its cache version. Old entries simply expire.
+        """
+        key = DashboardService._version_key(organization_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Version not cached yet (or evicted) - nothing cached can be stale
+            cache.set(key, 1, timeout=None)
+
+    @staticmethod
+    def get_summary_counts(work_instances, today=None):
+        """
+        Compute the task counters for a WorkInstance queryset with one
+        conditional aggregation query.
+
+        Returns:
+            dict: pending_tasks, overdue_tasks, today_due, week_due, completed_this_month
+        """
+        if today is None:
+            today = timezone.now().date()
+        week_later = today + timedelta(days=7)
+
+        return work_instances.aggregate(
+            pending_tasks=Count('id', filter=Q(status__in=ACTIVE_STATUSES)),
+            overdue_tasks=Count('id', filter=Q(due_date__lt=today) & ~Q(status='COMPLETED')),
+            today_due=Count('id', filter=Q(due_date=today)),
+            week_due=Count('id', filter=Q(due_date__gte=today, due_date__lte=week_later)),
+            completed_this_month=Count('id', filter=Q(
+                status='COMPLETED',
+                completed_on__year=today.year,
+                completed_on__month=today.month
+            )),
+        )
+
+    @staticmethod
+    def get_summary(organization, user, work_instances):
+        """
+        Get the dashboard summary for a user, cached per
+        (organization, role, user, date) for SUMMARY_CACHE_TIMEOUT seconds.
+
+        Args:
+            organization: Organization of the request (may be None)
+            user: Requesting user
+            work_instances: WorkInstance queryset visible to the user
+
+        Returns:
+            dict: Summary stats as returned by the dashboard summary endpoint
+        """
+        from ..models import Client
+
+        today = timezone.now().date()
+        cache_key = None
+
+        if organization:
+            cache_key = 'dashboard:summary:{}:{}:{}:{}:{}'.format(
+                organization.id,
+                DashboardService.get_cache_version(organization.id),
+                user.role,
+                user.id,
+                today.isoformat()
+            )
+            stats = cache.get(cache_key)
+            if stats is not None:
+                return stats
+
+        counts = DashboardService.get_summary_counts(work_instances, today)
+
+        if user.role == 'STAFF':
+            stats = {'my_tasks': counts['pending_tasks']}
+        else:
+            stats = {
+                'total_clients': Client.objects.filter(
+                    organization=organization,
+                    status='ACTIVE'
+                ).count() if organization else 0,
+            }
+        stats.update(counts)
+
+        if cache_key:
+            cache.set(cache_key, stats, SUMMARY_CACHE_TIMEOUT)
+
+        return stats
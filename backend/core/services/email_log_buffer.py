@@ -0,0 +1,292 @@
+"""
+Buffered EmailLog writer for NexPro
+
+Inside a batch (``with email_log_buffer.batch(): ...``, usually entered
+through EmailService.batch()) EmailLog records are kept in memory while the
+emails are sent and written with one bulk_create per EMAIL_LOG_BUFFER_SIZE
+records, already carrying their final status (SENT/FAILED). Outside a batch
+each record is written once, when its status is known.
+
+Every buffered record is also appended to a spool file so that the records
+of a worker that crashes mid-batch are not lost. Each batch writes its own
+uniquely named file and holds an exclusive flock on it while open; the lock
+is released by the OS when the process dies, so spool files nobody holds a
+lock on are written to the database (idempotently, by tracking_id) at the
+start of the next batch and by the recover_email_log_spool task.
+
+EMAIL_LOG_SPOOL_DIR must be on a volume that survives worker restarts and is
+shared by the workers that can recover it (in containers, mount a persistent
+volume there; a directory inside the image is lost with the container).
+"""
+
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+SPOOL_FILE_PREFIX = 'emaillog-'
+
+# Without flock (Windows), spool files not written to for this long are
+# considered abandoned
+SPOOL_STALE_SECONDS = 3600
+
+
+def _lock(spool):
+    """
+    Take an exclusive, non-blocking lock on an open spool file.
+
+    Returns:
+        bool: True if this process now holds the lock
+    """
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+class EmailLogBuffer:
+    """
+    Per-thread buffer of unsaved EmailLog records.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def size(self):
+        """Records written per bulk_create"""
+        return getattr(settings, 'EMAIL_LOG_BUFFER_SIZE', 100)
+
+    @property
+    def spool_dir(self):
+        return getattr(settings, 'EMAIL_LOG_SPOOL_DIR', None) or os.path.join(
+            tempfile.gettempdir(), 'nexpro-email-log-spool'
+        )
+
+    def is_active(self):
+        """True if the current thread is inside a batch()"""
+        return getattr(self._local, 'depth', 0) > 0
+
+    # ==========================================================================
+    # Batches
+    # ==========================================================================
+
+    @contextmanager
+    def batch(self):
+        """
+        Buffer EmailLog writes made in this block (by the current thread).
+        Batches can be nested; the buffer is flushed when the outermost batch exits.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self.recover_spool()
+            self._local.records = {}
+            self._local.spool = self._open_spool()
+        self._local.depth = depth + 1
+        try:
+            yield self
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                flushed = self.flush()
+                self._close_spool(remove=flushed)
+
+    def _open_spool(self):
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            path = os.path.join(self.spool_dir, f'{SPOOL_FILE_PREFIX}{uuid.uuid4().hex}.jsonl')
+            spool = open(path, 'a', encoding='utf-8')
+            # Held until the spool is closed or the process dies
+            _lock(spool)
+            return spool
+        except OSError as e:
+            logger.warning(f"Email log spool unavailable, buffering in memory only: {str(e)}")
+            return None
+
+    def _close_spool(self, remove):
+        spool = getattr(self._local, 'spool', None)
+        self._local.spool = None
+        if spool is None:
+            return
+        spool.close()
+        if remove:
+            try:
+                os.remove(spool.name)
+            except OSError:
+                pass
+
+    def _spool_write(self, email_log):
+        spool = getattr(self._local, 'spool', None)
+        if spool is None:
+            return
+        record = {
+            field.attname: field.value_from_object(email_log)
+            for field in email_log._meta.concrete_fields
+            if not field.primary_key
+        }
+        try:
+            spool.write(json.dumps(record, cls=DjangoJSONEncoder) + '\n')
+            spool.flush()
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to spool email log {email_log.tracking_id}: {str(e)}")
+
+    # ==========================================================================
+    # Records
+    # ==========================================================================
+
+    def add(self, email_log):
+        """
+        Buffer an unsaved EmailLog. Its mark_sent()/mark_failed() update the
+        buffered record instead of saving it.
+        """
+        if len(self._local.records) >= self.size:
+            # Earlier records already carry their final status
+            self.flush()
+
+        email_log._log_buffer = self
+        self._local.records[email_log.tracking_id] = email_log
+        self._spool_write(email_log)
+
+    def record_changed(self, email_log):
+        """Called by EmailLog when a buffered record's status changes"""
+        self._spool_write(email_log)
+
+    def flush(self):
+        """
+        Write buffered records with bulk_create and truncate the spool file.
+
+        Returns:
+            bool: True if everything buffered was written
+        """
+        from core.models import EmailLog
+
+        records = list(getattr(self._local, 'records', {}).values())
+        if not records:
+            return True
+
+        try:
+            EmailLog.objects.bulk_create(records, ignore_conflicts=True)
+        except Exception as e:
+            # Keep the spool file; it is recovered by a later batch
+            logger.error(f"Failed to write {len(records)} email log(s): {str(e)}")
+            self._local.records = {}
+            self._close_spool(remove=False)
+            self._local.spool = self._open_spool()
+            return False
+
+        for record in records:
+            record._log_buffer = None
+        self._local.records = {}
+
+        spool = getattr(self._local, 'spool', None)
+        if spool is not None:
+            spool.seek(0)
+            spool.truncate()
+        return True
+
+    # ==========================================================================
+    # Crash recovery
+    # ==========================================================================
+
+    def recover_spool(self):
+        """
+        Write the spooled records of batches that are no longer running
+        (spool files no process holds a lock on).
+
+        Returns:
+            int: Number of records recovered
+        """
+        from core.models import EmailLog
+
+        fields = {
+            field.attname: field
+            for field in EmailLog._meta.concrete_fields
+            if not field.primary_key
+        }
+        recovered = 0
+
+        for path in glob.glob(os.path.join(self.spool_dir, f'{SPOOL_FILE_PREFIX}*.jsonl')):
+            try:
+                spool = open(path, 'r+', encoding='utf-8')
+            except OSError as e:
+                # Removed by its owner or another recovering process
+                logger.debug(f"Cannot open email log spool {path}: {str(e)}")
+                continue
+
+            with spool:
+                recovered += self._recover_file(spool, fields)
+
+        return recovered
+
+    def _recover_file(self, spool, fields):
+        """Write and remove one spool file if no running batch owns it"""
+        from core.models import EmailLog
+
+        path = spool.name
+        if not _lock(spool):
+            # Owned by a running batch
+            return 0
+        if fcntl is None and time.time() - os.path.getmtime(path) < SPOOL_STALE_SECONDS:
+            return 0
+
+        # Last snapshot of each record wins
+        snapshots = {}
+        try:
+            for line in spool:
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    # Partial last line of a crashed write
+                    continue
+                snapshots[data.get('tracking_id')] = data
+        except OSError as e:
+            logger.warning(f"Cannot read email log spool {path}: {str(e)}")
+            return 0
+
+        if not snapshots and time.time() - os.path.getmtime(path) < SPOOL_STALE_SECONDS:
+            # Possibly just created by a batch that has not locked it yet
+            return 0
+
+        records = [
+            EmailLog(**{
+                attname: fields[attname].to_python(value)
+                for attname, value in data.items()
+                if attname in fields
+            })
+            for tracking_id, data in snapshots.items()
+            if tracking_id
+        ]
+        try:
+            # tracking_id is unique, so records written before the crash are skipped
+            EmailLog.objects.bulk_create(records, ignore_conflicts=True)
+        except Exception as e:
+            logger.error(f"Failed to recover email log spool {path}: {str(e)}")
+            return 0
+
+        # Removed while still locked, so no other process can pick it up again
+        os.remove(path)
+        if records:
+            logger.info(f"Recovered {len(records)} email log(s) from {path}")
+        return len(records)
+
+
+# Process-wide buffer (records are per thread)
+email_log_buffer = EmailLogBuffer()
@@ -0,0 +1,239 @@
+"""
+Outbound Email Queue for NexPro
+
+Emails are sent by Celery workers instead of inside request handlers:
+
+- email_priority: OTP emails. Never waits for concurrency slots, so signup
+  and password reset codes go out even during a reminder burst. Run it on a
+  dedicated worker (see README).
+- email: other single emails (welcome emails, notifications).
+- email_bulk: reminder batches (send_reminder_group).
+
+System emails (no organization, e.g. OTPs and welcome emails) are sent
+through the platform SMTP settings and are not counted against the daily
+email limits, as when they were sent inline.
+
+Messages on the email/email_bulk queues take an SMTP concurrency slot and
+one for their organization before sending. Reminder batches use their own organization slots
+(EMAIL_QUEUE_ORG_BULK_CONCURRENCY), so a reminder burst never holds the
+slots single emails of the same organization need. Slots are soft limits kept in the cache; a task that cannot get a
+slot is retried shortly after. Failed sends are retried with exponential
+backoff.
+"""
+
+import logging
+import random
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+EMAIL_QUEUE_PRIORITY = 'email_priority'
+EMAIL_QUEUE_DEFAULT = 'email'
+EMAIL_QUEUE_BULK = 'email_bulk'
+
+# A slot held by a crashed worker is freed when its counter expires
+SLOT_TIMEOUT = 300
+
+# Delay before a task that found no free slot tries again (seconds)
+SLOT_RETRY_DELAY = 5
+
+DEFAULT_PROVIDER_CONCURRENCY = {'SMTP': 8, 'SENDGRID': 20, 'SES': 20}
+
+
+class EmailQueue:
+    """
+    Service for queueing outbound emails and limiting send concurrency.
+    """
+
+    # ==========================================================================
+    # Concurrency slots
+    # ==========================================================================
+
+    @staticmethod
+    def _slot_key(scope):
+        return f'email:slots:{scope}'
+
+    @staticmethod
+    def get_provider_limit(provider):
+        limits = getattr(settings, 'EMAIL_QUEUE_PROVIDER_CONCURRENCY', DEFAULT_PROVIDER_CONCURRENCY)
+        return limits.get(provider, DEFAULT_PROVIDER_CONCURRENCY['SMTP'])
+
+    @staticmethod
+    def get_organization_limit(bulk=False):
+        if bulk:
+            return getattr(settings, 'EMAIL_QUEUE_ORG_BULK_CONCURRENCY', 2)
+        return getattr(settings, 'EMAIL_QUEUE_ORG_CONCURRENCY', 2)
+
+    @staticmethod
+    def acquire_slot(scope, limit):
+        """
+        Take one of `limit` concurrency slots for a scope.
+
+        Returns:
+            bool: True if a slot was taken (release it with release_slot)
+        """
+        key = EmailQueue._slot_key(scope)
+        cache.add(key, 0, SLOT_TIMEOUT)
+        try:
+            in_flight = cache.incr(key)
+        except ValueError:
+            # Counter expired between add() and incr()
+            cache.set(key, 1, SLOT_TIMEOUT)
+            in_flight = 1
+
+        if in_flight > limit:
+            EmailQueue.release_slot(scope)
+            return False
+        return True
+
+    @staticmethod
+    def release_slot(scope):
+        try:
+            cache.decr(EmailQueue._slot_key(scope))
+        except ValueError:
+            # Counter expired - nothing to release
+            pass
+
+    @staticmethod
+    def acquire_slots(organization_id=None, provider=None, bulk=False):
+        """
+        Take a provider slot and (if given) an organization slot.
+
+        Args:
+            organization_id: Optional organization to take a slot for
+            provider: Optional email provider to take a slot for
+            bulk: Take a slot for reminder batches of the organization instead
+                of one shared with its single emails
+
+        Returns:
+            list: Scopes taken, or None if any slot is busy (nothing is held then)
+        """
+        scopes = []
+        if provider:
+            scopes.append((f'provider:{provider}', EmailQueue.get_provider_limit(provider)))
+        if organization_id:
+            scope = f'org-bulk:{organization_id}' if bulk else f'org:{organization_id}'
+            scopes.append((scope, EmailQueue.get_organization_limit(bulk)))
+
+        taken = []
+        for scope, limit in scopes:
+            if not EmailQueue.acquire_slot(scope, limit):
+                EmailQueue.release_slots(taken)
+                return None
+            taken.append(scope)
+        return taken
+
+    @staticmethod
+    def release_slots(scopes):
+        for scope in scopes or []:
+            EmailQueue.release_slot(scope)
+
+    @staticmethod
+    def slot_retry_delay():
+        """Jittered delay so waiting tasks do not retry in lockstep"""
+        return SLOT_RETRY_DELAY + random.uniform(0, SLOT_RETRY_DELAY)
+
+    @staticmethod
+    def retry_delay(attempt):
+        """Exponential backoff with jitter for failed sends: ~30s, 1m, 2m, 4m, ..."""
+        base = getattr(settings, 'EMAIL_QUEUE_RETRY_BACKOFF', 30)
+        delay = min(base * (2 ** attempt), 3600)
+        return delay + random.uniform(0, delay / 4)
+
+    # ==========================================================================
+    # Queueing and delivery
+    # ==========================================================================
+
+    @staticmethod
+    def enqueue(to_email, subject, body, html_body=None, organization=None,
+                email_type='OTHER', priority=False):
+        """
+        Queue an email for sending by a Celery worker (after the current
+        transaction commits). If the broker is unreachable the email is sent
+        inline instead.
+
+        Args:
+            to_email: Recipient email address
+            subject: Email subject
+            body: Plain text body
+            html_body: Optional HTML body
+            organization: Optional organization; sent through the organization's
+                email account if given, otherwise through the platform SMTP settings
+            email_type: EmailLog type
+            priority: Send on the priority lane (OTP emails)
+
+        Returns:
+            tuple: (success: bool, error_message: str or None). Outside a
+                transaction the message is dispatched right away and a failure
+                to queue or (as a fallback) send it is reported. Inside a
+                transaction dispatch waits for the commit and (True, None)
+                only means the message was accepted.
+        """
+        message = {
+            'to_email': to_email,
+            'subject': subject,
+            'body': body,
+            'html_body': html_body,
+            'organization_id': str(organization.id) if organization else None,
+            'email_type': email_type,
+            'priority': priority,
+            'attempt': 0,
+        }
+        queue = EMAIL_QUEUE_PRIORITY if priority else EMAIL_QUEUE_DEFAULT
+        outcome = {'success': True, 'error': None}
+
+        def dispatch():
+            from core.tasks import send_queued_email
+
+            try:
+                send_queued_email.apply_async(args=[message], queue=queue, retry=False)
+            except Exception as e:
+                logger.warning(f"Email queue unavailable, sending inline: {str(e)}")
+                try:
+                    outcome['success'], outcome['error'] = EmailQueue.deliver(message)
+                except Exception as e:
+                    logger.error(f"Inline send to {to_email} failed: {str(e)}")
+                    outcome['success'], outcome['error'] = False, str(e)
+
+        # Runs immediately when not inside a transaction
+        transaction.on_commit(dispatch)
+        return outcome['success'], outcome['error']
+
+    @staticmethod
+    def deliver(message):
+        """
+        Send a queued message now.
+
+        Returns:
+            tuple: (success: bool, error_message: str or None)
+        """
+        from core.models import Organization
+        from core.services.email_service import EmailService
+
+        organization = None
+        if message.get('organization_id'):
+            organization = Organization.objects.filter(id=message['organization_id']).first()
+
+        if organization:
+            result = EmailService.send_email_for_organization(
+                organization=organization,
+                to_email=message['to_email'],
+                subject=message['subject'],
+                body=message['body'],
+                html_body=message.get('html_body'),
+                email_type=message.get('email_type', 'OTHER')
+            )
+        else:
+            # System emails - platform SMTP, not counted against the daily limits
+            result = EmailService.send_email_via_platform_smtp(
+                to_email=message['to_email'],
+                subject=message['subject'],
+                body=message['body'],
+                html_body=message.get('html_body')
+            )
+
+        # SMTP senders also return the tracking ID
+        return result[0], result[1]
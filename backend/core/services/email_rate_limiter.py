@@ -0,0 +1,270 @@
+"""
+Email Rate Limiter for NexPro
+
+Daily email limits (PlatformSettings.email_daily_limit_per_org and
+email_daily_limit_platform) are checked against counters in the cache that
+are changed with atomic increments only - no row locks and no SUM over all
+organizations per email. The counters are seeded from EmailUsageLog when
+first used on a day.
+
+Each reserved send is also added to a per-organization "pending" counter
+which is written to EmailUsageLog with F() updates: inline at most once per
+FLUSH_INTERVAL per organization, and by the flush_email_usage Celery task.
+
+Use a shared cache backend (e.g. Redis) in production so all processes see
+the same counters.
+"""
+
+import logging
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Counters only matter for their own day; keep them a little longer so late
+# flushes of yesterday's pending counts still find them
+COUNTER_TIMEOUT = 60 * 60 * 48
+
+# Minimum seconds between inline flushes of an organization's pending count
+FLUSH_INTERVAL = 60
+
+PLATFORM_SCOPE = 'platform'
+
+
+class EmailRateLimiter:
+    """
+    Service for lock-free email rate limiting and usage counting.
+    """
+
+    @staticmethod
+    def _scope(organization_id):
+        return str(organization_id) if organization_id else PLATFORM_SCOPE
+
+    @staticmethod
+    def _count_key(day, scope):
+        return f'email:usage:{day.isoformat()}:count:{scope}'
+
+    @staticmethod
+    def _total_key(day):
+        return f'email:usage:{day.isoformat()}:total'
+
+    @staticmethod
+    def _pending_key(day, scope):
+        return f'email:usage:{day.isoformat()}:pending:{scope}'
+
+    @staticmethod
+    def _incr(key, delta, seed):
+        """
+        Atomically add delta to a counter, seeding it with seed() if it does
+        not exist yet. Returns the new value.
+        """
+        if delta == 0:
+            value = cache.get(key)
+            if value is not None:
+                return value
+
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            # Missing - only one process wins the add(), the others just increment
+            cache.add(key, seed(), COUNTER_TIMEOUT)
+            return cache.incr(key, delta)
+
+    @staticmethod
+    def _decr(key, delta):
+        if delta:
+            try:
+                cache.decr(key, delta)
+            except ValueError:
+                pass
+
+    @staticmethod
+    def _decr_to_zero(key):
+        """
+        Subtract one from a counter without taking it below zero.
+        Returns True if one was subtracted.
+        """
+        try:
+            value = cache.decr(key)
+        except ValueError:
+            return False
+        if value < 0:
+            cache.incr(key)
+            return False
+        return True
+
+    # ==========================================================================
+    # Counters
+    # ==========================================================================
+
+    @staticmethod
+    def _stored_count(day, organization_id):
+        """Count stored in EmailUsageLog for one organization (or platform)"""
+        from core.models import EmailUsageLog
+
+        return EmailUsageLog.objects.filter(
+            organization_id=organization_id, date=day
+        ).aggregate(total=Sum('email_count'))['total'] or 0
+
+    @staticmethod
+    def _stored_total(day):
+        """Total stored in EmailUsageLog for all organizations"""
+        from core.models import EmailUsageLog
+
+        return EmailUsageLog.objects.filter(date=day).aggregate(total=Sum('email_count'))['total'] or 0
+
+    @staticmethod
+    def get_count(organization=None, day=None):
+        """Emails counted today (or on day) for an organization, or platform-level emails"""
+        day = day or timezone.now().date()
+        organization_id = organization.id if organization else None
+        return EmailRateLimiter._incr(
+            EmailRateLimiter._count_key(day, EmailRateLimiter._scope(organization_id)),
+            0,
+            lambda: EmailRateLimiter._stored_count(day, organization_id)
+        )
+
+    @staticmethod
+    def get_total(day=None):
+        """Emails counted today (or on day) across the platform"""
+        day = day or timezone.now().date()
+        return EmailRateLimiter._incr(
+            EmailRateLimiter._total_key(day), 0, lambda: EmailRateLimiter._stored_total(day)
+        )
+
+    # ==========================================================================
+    # Reservations
+    # ==========================================================================
+
+    @staticmethod
+    def reserve(organization=None):
+        """
+        Count one send against today's organization and platform limits. A
+        send that is reserved but not made should be given back with release().
+
+        Args:
+            organization: Sending organization, or None for platform-level emails
+
+        Returns:
+            tuple: (success: bool, error_message: str or None)
+        """
+        from core.models import PlatformSettings
+
+        platform_settings = PlatformSettings.get_settings()
+        day = timezone.now().date()
+        organization_id = organization.id if organization else None
+        scope = EmailRateLimiter._scope(organization_id)
+        count_key = EmailRateLimiter._count_key(day, scope)
+        total_key = EmailRateLimiter._total_key(day)
+
+        new_count = EmailRateLimiter._incr(
+            count_key, 1, lambda: EmailRateLimiter._stored_count(day, organization_id)
+        )
+
+        # Check organization limit (if organization is specified)
+        org_limit = platform_settings.email_daily_limit_per_org
+        if organization and org_limit > 0 and new_count > org_limit:
+            EmailRateLimiter._decr(count_key, 1)
+            return False, f"Daily email limit ({org_limit}) reached for this organization"
+
+        # Check platform-wide limit
+        platform_limit = platform_settings.email_daily_limit_platform
+        new_total = EmailRateLimiter._incr(total_key, 1, lambda: EmailRateLimiter._stored_total(day))
+        if platform_limit > 0 and new_total > platform_limit:
+            EmailRateLimiter._decr(total_key, 1)
+            EmailRateLimiter._decr(count_key, 1)
+            return False, f"Platform daily email limit ({platform_limit}) reached"
+
+        EmailRateLimiter._incr(EmailRateLimiter._pending_key(day, scope), 1, lambda: 0)
+        # At most one inline flush per organization per interval
+        if cache.add(f'email:usage:flush:{scope}', 1, FLUSH_INTERVAL):
+            EmailRateLimiter.flush(day, [organization_id])
+
+        return True, None
+
+    @staticmethod
+    def release(organization=None):
+        """
+        Give back a reserved send that was not made. Counters never go below
+        zero; a send already flushed to EmailUsageLog is subtracted there.
+        """
+        day = timezone.now().date()
+        organization_id = organization.id if organization else None
+        scope = EmailRateLimiter._scope(organization_id)
+        EmailRateLimiter._decr_to_zero(EmailRateLimiter._count_key(day, scope))
+        EmailRateLimiter._decr_to_zero(EmailRateLimiter._total_key(day))
+
+        if not EmailRateLimiter._decr_to_zero(EmailRateLimiter._pending_key(day, scope)):
+            try:
+                EmailRateLimiter._persist(day, organization_id, -1)
+            except Exception as e:
+                logger.error(f"Failed to give back email usage for {organization_id or 'platform'}: {str(e)}")
+
+    # ==========================================================================
+    # Persistence
+    # ==========================================================================
+
+    @staticmethod
+    def _persist(day, organization_id, delta):
+        """Add delta to the EmailUsageLog row of an organization (or platform)"""
+        from core.models import EmailUsageLog
+
+        rows = EmailUsageLog.objects.filter(organization_id=organization_id, date=day)
+        if rows.update(email_count=F('email_count') + delta, last_email_at=timezone.now()) or delta < 0:
+            return
+        try:
+            with transaction.atomic():
+                EmailUsageLog.objects.create(organization_id=organization_id, date=day, email_count=delta)
+        except IntegrityError:
+            # Created concurrently
+            rows.update(email_count=F('email_count') + delta, last_email_at=timezone.now())
+
+    @staticmethod
+    def flush(day=None, organization_ids=None):
+        """
+        Write pending counts to EmailUsageLog.
+
+        Args:
+            day: Date to flush (default today)
+            organization_ids: Organizations (None = platform-level emails) to
+                flush; default all organizations and platform-level emails
+
+        Returns:
+            int: Number of emails written
+        """
+        from core.models import Organization
+
+        day = day or timezone.now().date()
+        if organization_ids is None:
+            organization_ids = [None] + list(Organization.objects.values_list('id', flat=True))
+
+        keys = {
+            EmailRateLimiter._pending_key(day, EmailRateLimiter._scope(organization_id)): organization_id
+            for organization_id in organization_ids
+        }
+
+        written = 0
+        for key, pending in cache.get_many(list(keys)).items():
+            if not pending or pending <= 0:
+                continue
+            # Take the pending count first so concurrent flushes do not write it twice
+            EmailRateLimiter._decr(key, pending)
+            try:
+                EmailRateLimiter._persist(day, keys[key], pending)
+            except Exception as e:
+                EmailRateLimiter._incr(key, pending, lambda: 0)
+                logger.error(f"Failed to write email usage for {keys[key] or 'platform'}: {str(e)}")
+                continue
+            written += pending
+
+        return written
+
+    @staticmethod
+    def flush_recent():
+        """Flush today's and yesterday's pending counts (for the periodic task)"""
+        today = timezone.now().date()
+        return EmailRateLimiter.flush(today - timedelta(days=1)) + EmailRateLimiter.flush(today)
@@ -1,17 +1,34 @@
 from django.core.mail import send_mail, get_connection
 from django.conf import settings
 from datetime import datetime
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import make_msgid
 import re
 import logging
 import uuid
+from contextlib import contextmanager
+from .email_log_buffer import email_log_buffer
+from .smtp_pool import smtp_pool
+from .template_renderer import (
+    CompiledTemplate, TemplateRenderer, compile_template, get_cache_timeout
+)
+from core.utils.local_cache import LocalCache
 
 logger = logging.getLogger(__name__)
 
 
+# Per-organization branding (get_branding_config)
+_branding_cache = LocalCache(maxsize=1024, timeout=get_cache_timeout)
+
+# Compiled reminder HTML shells (build_professional_html_email), keyed by
+# recipient type, organization name and year
+_reminder_shell_cache = LocalCache(maxsize=1024)
+
+# Slots in a cached HTML shell: \x00name\x00 cannot occur in the HTML itself
+SHELL_SLOT_RE = re.compile(r'\x00(\w+)\x00')
+
+
 class EmailService:
     """Service for rendering and sending emails"""
 
@@ -67,12 +84,17 @@ class EmailService:
         """
         Log an email to the EmailLog model.
 
+        The log is not written yet: mark_sent()/mark_failed() write it once
+        with its final status, and inside EmailService.batch() logs are
+        buffered and written with bulk_create (see EmailLogBuffer).
+
         Returns: EmailLog instance or None if logging fails
         """
         try:
+            from django.utils import timezone
             from core.models import EmailLog
 
-            email_log = EmailLog.objects.create(
+            email_log = EmailLog(
                 organization=organization,
                 tracking_id=tracking_id,
                 message_id=message_id,
@@ -88,8 +110,11 @@ class EmailService:
                 client=client,
                 user=user,
                 status='PENDING',
-                metadata=metadata or {}
+                metadata=metadata or {},
+                created_at=timezone.now()
             )
+            if email_log_buffer.is_active():
+                email_log_buffer.add(email_log)
             return email_log
         except Exception as e:
             logger.error(f"Failed to log email: {str(e)}")
@@ -105,9 +130,23 @@ class EmailService:
         Get branding configuration for emails.
         Combines platform settings with organization-specific branding.
 
+        Branding is cached per organization (by updated_at) for
+        EMAIL_TEMPLATE_CACHE_TIMEOUT seconds.
+
         Returns:
             dict: Branding configuration with colors, logos, names, etc.
         """
+        key = (organization.pk, organization.updated_at) if organization else None
+        branding = _branding_cache.get(key)
+        if branding is None:
+            branding = EmailService._load_branding_config(organization)
+            _branding_cache.set(key, branding)
+
+        return dict(branding, year=datetime.now().year)
+
+    @staticmethod
+    def _load_branding_config(organization=None):
+        """Build the branding configuration from the database (uncached)"""
         from core.models import PlatformSettings
 
         # Default branding
@@ -125,7 +164,7 @@ class EmailService:
 
         # Get platform settings
         try:
-            platform_settings = PlatformSettings.objects.first()
+            platform_settings = PlatformSettings.get_settings()
             if platform_settings:
                 branding['platform_name'] = platform_settings.platform_name or 'NexPro'
                 branding['support_email'] = platform_settings.support_email or 'support@nexpro.com'
@@ -663,18 +702,21 @@ Best Regards,
             return False, str(e)
 
     @staticmethod
-    def send_email_with_provider(to_email, subject, body, from_email=None, from_name=None, html_body=None, organization=None):
+    def send_email_with_provider(to_email, subject, body, from_email=None, from_name=None, html_body=None,
+                                 organization=None):
         """
         Send email using the configured email provider (SMTP, SendGrid, or SES).
-        Includes rate limiting check.
+        Includes rate limiting check. A send that fails is given back to the
+        limits.
         Returns: (success: bool, error_message: str or None)
         """
-        from core.models import PlatformSettings, EmailUsageLog
+        from core.models import PlatformSettings
+        from core.services.email_rate_limiter import EmailRateLimiter
 
         platform_settings = PlatformSettings.get_settings()
 
-        # Check rate limits
-        can_send, limit_error = EmailUsageLog.increment_count(organization)
+        # Check rate limits (atomic counters, no row lock)
+        can_send, limit_error = EmailRateLimiter.reserve(organization)
         if not can_send:
             logger.warning(f"Email rate limit reached: {limit_error}")
             return False, limit_error
@@ -687,13 +729,24 @@ Best Regards,
 
         provider = platform_settings.email_provider
 
-        if provider == 'SENDGRID':
-            return EmailService.send_via_sendgrid(to_email, subject, body, from_email, from_name, html_body)
-        elif provider == 'SES':
-            return EmailService.send_via_ses(to_email, subject, body, from_email, from_name, html_body)
-        else:
-            # Default to SMTP
-            return EmailService.send_email_via_platform_smtp(to_email, subject, body, html_body)
+        success, error_message = False, None
+        try:
+            if provider == 'SENDGRID':
+                success, error_message = EmailService.send_via_sendgrid(
+                    to_email, subject, body, from_email, from_name, html_body
+                )
+            elif provider == 'SES':
+                success, error_message = EmailService.send_via_ses(
+                    to_email, subject, body, from_email, from_name, html_body
+                )
+            else:
+                # Default to SMTP
+                success, error_message = EmailService.send_email_via_platform_smtp(to_email, subject, body, html_body)
+        finally:
+            if not success:
+                # The counted send was not made
+                EmailRateLimiter.release(organization)
+        return success, error_message
 
     @staticmethod
     def get_platform_smtp_settings():
@@ -729,6 +782,42 @@ Best Regards,
         except Exception:
             return None
 
+    @staticmethod
+    @contextmanager
+    def batch():
+        """
+        Context for sending many emails: SMTP connections are reused
+        (smtp_pool.batch()) and EmailLog records are buffered and written
+        in bulk (email_log_buffer.batch()).
+        """
+        with smtp_pool.batch(), email_log_buffer.batch():
+            yield
+
+    @staticmethod
+    def send_via_smtp_pool(smtp_config, from_email, to_emails, message):
+        """
+        Send a message through the platform SMTP server using the SMTP
+        connection pool (connections are reused inside smtp_pool.batch()).
+
+        Args:
+            smtp_config: Dict from get_platform_smtp_settings()
+            from_email: Envelope sender
+            to_emails: List of envelope recipients
+            message: Message as a string
+        """
+        if smtp_config['use_ssl']:
+            mode = 'ssl'
+        elif smtp_config['use_tls']:
+            mode = 'starttls'
+        else:
+            mode = 'plain'
+
+        smtp_pool.send(
+            smtp_config['host'], smtp_config['port'],
+            smtp_config['username'], smtp_config['password'],
+            mode, from_email, to_emails, message
+        )
+
     @staticmethod
     def send_email_via_platform_smtp_with_from(to_email, subject, body, from_email=None,
                                                 from_name=None, html_body=None,
@@ -773,6 +862,7 @@ Best Regards,
                     recipient_list=[to_email],
                     html_message=html_body,
                     fail_silently=False,
+                    connection=smtp_pool.get_django_connection(),
                 )
                 if email_log:
                     email_log.mark_sent()
@@ -807,22 +897,14 @@ Best Regards,
                 part2 = MIMEText(html_body, 'html')
                 msg.attach(part2)
 
-            # Connect to SMTP server
-            if smtp_config['use_ssl']:
-                server = smtplib.SMTP_SSL(smtp_config['host'], smtp_config['port'])
-            else:
-                server = smtplib.SMTP(smtp_config['host'], smtp_config['port'])
-                if smtp_config['use_tls']:
-                    server.starttls()
-
-            # Login and send
+            # Send through the (pooled) platform SMTP connection
             # Note: We use actual_from_email (tenant's email) as the envelope sender
             # This ensures the "From" address shown to recipients is the tenant's email,
             # not the platform's SMTP email. The platform SMTP credentials are used for
             # authentication, but the sender identity is the tenant's.
-            server.login(smtp_config['username'], smtp_config['password'])
-            server.sendmail(actual_from_email, [to_email], msg.as_string())
-            server.quit()
+            EmailService.send_via_smtp_pool(
+                smtp_config, actual_from_email, [to_email], msg.as_string()
+            )
 
             # Mark as sent
             if email_log:
@@ -879,6 +961,7 @@ Best Regards,
                     recipient_list=[to_email],
                     html_message=html_body,
                     fail_silently=False,
+                    connection=smtp_pool.get_django_connection(),
                 )
                 # Mark as sent
                 if email_log:
@@ -911,18 +994,10 @@ Best Regards,
                 part2 = MIMEText(html_body, 'html')
                 msg.attach(part2)
 
-            # Connect to SMTP server
-            if smtp_config['use_ssl']:
-                server = smtplib.SMTP_SSL(smtp_config['host'], smtp_config['port'])
-            else:
-                server = smtplib.SMTP(smtp_config['host'], smtp_config['port'])
-                if smtp_config['use_tls']:
-                    server.starttls()
-
-            # Login and send
-            server.login(smtp_config['username'], smtp_config['password'])
-            server.sendmail(smtp_config['from_email'], [to_email], msg.as_string())
-            server.quit()
+            # Send through the (pooled) platform SMTP connection
+            EmailService.send_via_smtp_pool(
+                smtp_config, smtp_config['from_email'], [to_email], msg.as_string()
+            )
 
             # Mark as sent with message ID
             if email_log:
@@ -943,10 +1018,34 @@ Best Regards,
         Supported placeholders: {{client_name}}, {{PAN}}, {{GSTIN}}, {{period_label}},
         {{due_date}}, {{work_name}}, {{statutory_form}}, {{firm_name}}, {{employee_name}}
         """
-        for key, value in context.items():
-            placeholder = f"{{{{{key}}}}}"
-            template_str = template_str.replace(placeholder, str(value) if value else '')
-        return template_str
+        return compile_template(template_str).render(context)
+
+    @staticmethod
+    def render_template_batch(email_template, contexts):
+        """
+        Render an EmailTemplate's subject and body for many recipients from
+        one compiled template.
+
+        Returns:
+            list: (subject, body) tuples in the order of contexts
+        """
+        return TemplateRenderer.render_batch(email_template, contexts)
+
+    @staticmethod
+    def get_reminder_templates(work_type_ids):
+        """
+        Load the active reminder templates of several work types with one query.
+
+        Returns:
+            dict: {(work_type_id, template_type): EmailTemplate} - the first
+                active template per work type and recipient type
+        """
+        from core.models import EmailTemplate
+
+        templates = {}
+        for email_template in EmailTemplate.objects.filter(work_type_id__in=work_type_ids, is_active=True):
+            templates.setdefault((email_template.work_type_id, email_template.template_type), email_template)
+        return templates
 
     @staticmethod
     def get_context_from_work_instance(work_instance):
@@ -1019,19 +1118,6 @@ Best Regards,
         if not re.search(r'<[^>]+>', body_content):
             body_content = body_content.replace('\n', '<br>')
 
-        # Theme colors based on application
-        primary_gradient = "linear-gradient(135deg, #667eea 0%, #764ba2 100%)"
-
-        # Determine header icon and color based on recipient type
-        if recipient_type == 'CLIENT':
-            header_icon = "📋"
-            header_title = "Task Reminder"
-            accent_color = "#667eea"
-        else:
-            header_icon = "📌"
-            header_title = "Task Assignment Reminder"
-            accent_color = "#764ba2"
-
         # Overdue styling
         if is_overdue:
             status_badge_bg = "#fee2e2"
@@ -1082,13 +1168,48 @@ Best Regards,
                             </div>
             '''
 
+        # The shell (everything but subject, body and task card) only depends on
+        # the recipient type and organization, so it is built once and cached
+        key = (recipient_type, organization_name, datetime.now().year)
+        shell = _reminder_shell_cache.get(key)
+        if shell is None:
+            shell = CompiledTemplate.compile(
+                EmailService._build_professional_html_shell(*key), pattern=SHELL_SLOT_RE
+            )
+            _reminder_shell_cache.set(key, shell)
+
+        return shell.render({
+            'subject': subject,
+            'body_content': body_content,
+            'task_card_html': task_card_html,
+        })
+
+    @staticmethod
+    def _build_professional_html_shell(recipient_type, organization_name, year):
+        """
+        Build the HTML of build_professional_html_email with subject,
+        body_content and task_card_html slots (see SHELL_SLOT_RE).
+        """
+        # Theme colors based on application
+        primary_gradient = "linear-gradient(135deg, #667eea 0%, #764ba2 100%)"
+
+        # Determine header icon and color based on recipient type
+        if recipient_type == 'CLIENT':
+            header_icon = "📋"
+            header_title = "Task Reminder"
+            accent_color = "#667eea"
+        else:
+            header_icon = "📌"
+            header_title = "Task Assignment Reminder"
+            accent_color = "#764ba2"
+
         # Build the complete HTML email
         html_email = f'''<!DOCTYPE html>
 <html>
 <head>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{subject}</title>
+    <title>\x00subject\x00</title>
 </head>
 <body style="margin: 0; padding: 0; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background-color: #f4f4f8; -webkit-font-smoothing: antialiased;">
     <table role="presentation" style="width: 100%; border-collapse: collapse;">
@@ -1118,10 +1239,10 @@ Best Regards,
                         <td style="padding: 35px 30px;">
                             <!-- Body Content -->
                             <div style="color: #374151; font-size: 15px; line-height: 1.7;">
-                                {body_content}
+                                \x00body_content\x00
                             </div>
 
-                            {task_card_html}
+                            \x00task_card_html\x00
 
                             <!-- Action Note -->
                             <div style="background: linear-gradient(135deg, #eff6ff 0%, #f5f3ff 100%); border-left: 4px solid {accent_color}; border-radius: 0 8px 8px 0; padding: 15px 20px; margin: 25px 0;">
@@ -1156,7 +1277,7 @@ Best Regards,
                     <tr>
                         <td align="center">
                             <p style="margin: 0; color: #9ca3af; font-size: 11px;">
-                                Powered by <span style="color: #667eea; font-weight: 600;">NexPro</span> &copy; {datetime.now().year}
+                                Powered by <span style="color: #667eea; font-weight: 600;">NexPro</span> &copy; {year}
                             </p>
                         </td>
                     </tr>
@@ -1170,10 +1291,18 @@ Best Regards,
         return html_email
 
     @staticmethod
-    def send_reminder_email(reminder_instance):
+    def send_reminder_email(reminder_instance, email_account=None, templates=None):
         """
         Send a reminder email based on reminder instance.
         Uses the organization's email account configuration.
+
+        Args:
+            reminder_instance: The ReminderInstance to send
+            email_account: Optional pre-resolved OrganizationEmail to send from
+                (batch senders resolve it once per organization/sender account)
+            templates: Optional dict from get_reminder_templates() (batch
+                senders load templates once instead of once per reminder)
+
         Returns: (success: bool, error_message: str or None)
         """
         from core.models import EmailTemplate
@@ -1204,23 +1333,25 @@ Best Regards,
 
             # Check for custom email template (new system - linked to work type)
             email_template = None
-            try:
-                email_template = EmailTemplate.objects.filter(
-                    work_type=work_type,
-                    template_type=recipient_type,
-                    is_active=True
-                ).first()
-            except Exception:
-                pass
+            if templates is not None:
+                email_template = templates.get((work_type.id, recipient_type))
+            else:
+                try:
+                    email_template = EmailTemplate.objects.filter(
+                        work_type=work_type,
+                        template_type=recipient_type,
+                        is_active=True
+                    ).first()
+                except Exception:
+                    pass
 
             # Check if reminder has a rule with template (old system)
             if not email_template and reminder_instance.reminder_rule and reminder_instance.reminder_rule.email_template:
                 email_template = reminder_instance.reminder_rule.email_template
 
             if email_template:
-                # Use custom template content
-                subject = EmailService.render_template(email_template.subject_template, context)
-                body = EmailService.render_template(email_template.body_template, context)
+                # Use custom template content (compiled once per template version)
+                subject, body = TemplateRenderer.render(email_template, context)
             else:
                 # Use default template for period-based reminders
                 work_name = context.get('work_name', 'Task')
@@ -1284,7 +1415,8 @@ Best regards,
                 email_type=email_type,
                 work_instance=work_instance,
                 reminder_instance=reminder_instance,
-                client=client
+                client=client,
+                email_account=email_account
             )
 
             # Store tracking ID in reminder instance metadata if available
@@ -1340,6 +1472,7 @@ Best regards,
                 recipient_list=[to_email],
                 html_message=html_body,
                 fail_silently=False,
+                connection=smtp_pool.get_django_connection(),
             )
             return True, None
         except Exception as e:
@@ -1432,17 +1565,12 @@ Best regards,
                 part2 = MIMEText(html_body, 'html')
                 msg.attach(part2)
 
-            # Connect to SMTP server
-            if use_tls:
-                server = smtplib.SMTP(smtp_host, smtp_port)
-                server.starttls()
-            else:
-                server = smtplib.SMTP_SSL(smtp_host, smtp_port)
-
-            # Login and send
-            server.login(smtp_username, smtp_password)
-            server.sendmail(from_email, [to_email], msg.as_string())
-            server.quit()
+            # Send through the (pooled) connection - STARTTLS if use_tls, implicit SSL otherwise
+            smtp_pool.send(
+                smtp_host, smtp_port, smtp_username, smtp_password,
+                'starttls' if use_tls else 'ssl',
+                from_email, [to_email], msg.as_string()
+            )
 
             # Mark as sent
             if email_log:
@@ -1480,27 +1608,32 @@ Best regards,
             is_active=True
         ).first()
 
+    @staticmethod
+    def get_sender_email_account(organization, work_type=None):
+        """
+        Resolve the email account to send from for a task category.
+        Uses the work type's sender_email if active, else the organization default.
+        Returns: OrganizationEmail instance or None
+        """
+        sender_email = getattr(work_type, 'sender_email', None) if work_type else None
+        if sender_email and sender_email.is_active:
+            return sender_email
+        return EmailService.get_default_email_account(organization)
+
     @staticmethod
     def send_email_for_organization(organization, to_email, subject, body, html_body=None,
                                      work_type=None, email_type='OTHER', work_instance=None,
-                                     reminder_instance=None, client=None, user=None):
+                                     reminder_instance=None, client=None, user=None,
+                                     email_account=None):
         """
         Send an email using the organization's email account configuration.
-        If work_type is provided, uses the email linked to that work type.
-        Otherwise uses the default email account.
+        If email_account is provided, it is used as-is (already resolved by the caller).
+        Otherwise, if work_type is provided, uses the email linked to that work type,
+        falling back to the default email account.
         Returns: (success: bool, error_message: str or None, tracking_id: str or None)
         """
-        from core.models import OrganizationEmail
-
-        email_account = None
-
-        # Try to get email account linked to work type
-        if work_type and hasattr(work_type, 'email_account') and work_type.email_account:
-            email_account = work_type.email_account
-
-        # Fallback to default email account
         if not email_account:
-            email_account = EmailService.get_default_email_account(organization)
+            email_account = EmailService.get_sender_email_account(organization, work_type)
 
         # If no email account configured, use system default
         if not email_account:
@@ -1527,6 +1660,7 @@ Best regards,
                     recipient_list=[to_email],
                     html_message=html_body,
                     fail_silently=False,
+                    connection=smtp_pool.get_django_connection(),
                 )
                 if email_log:
                     email_log.mark_sent()
@@ -6,14 +6,24 @@ Handles synchronization between NexPro tasks and Google Calendar events.
 import logging
 from datetime import datetime, date, timedelta
 from django.utils import timezone
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-from .google_oauth_service import GoogleOAuthService
+from .google_client_cache import GoogleClientCache
+from .google_rate_limiter import google_rate_limiter
+from .google_tasks_service import parse_google_datetime
 
 logger = logging.getLogger(__name__)
 
 
+# Event IDs that no longer exist in Google (deleted events answer 410 Gone)
+EVENT_GONE_STATUSES = (404, 410)
+
+# Events per events().list page; the sync holds one page in memory at a time
+EVENT_PAGE_SIZE = 250
+# Partial response of events().list: only what sync_changes_from_calendar reads
+EVENT_LIST_FIELDS = 'items(id,status,updated,start),nextPageToken,nextSyncToken'
+
+
 class GoogleCalendarService:
     """
     Service for syncing NexPro WorkInstances with Google Calendar.
@@ -33,12 +43,24 @@ class GoogleCalendarService:
         Get authenticated Google Calendar service.
         """
         if not self.service:
-            self.credentials = GoogleOAuthService.get_credentials_from_connection(self.google_connection)
-            if not self.credentials:
-                raise ValueError("Failed to get valid credentials")
-            self.service = build('calendar', 'v3', credentials=self.credentials)
+            self.service, self.credentials = GoogleClientCache.get_client(self.google_connection, 'calendar', 'v3')
         return self.service
 
+    def _execute_batch(self, requests):
+        """
+        Execute API requests with batch HTTP, BATCH_SIZE calls per round trip
+        (through the rate limiter, see google_rate_limiter.execute_batch).
+
+        Args:
+            requests: Dict of {request_id (str): HttpRequest}
+
+        Returns:
+            dict: {request_id: (response, HttpError or None)}
+        """
+        return google_rate_limiter.execute_batch(
+            self._get_service(), requests, 'CALENDAR', self.google_connection
+        )
+
     def get_calendar_id(self):
         """
         Get the calendar ID to use for sync.
@@ -202,15 +224,6 @@ class GoogleCalendarService:
                     logger.info(f"Skipping sync from Calendar - NexPro has newer changes")
                     return None
 
-            # Update due date from event
-            start = google_event.get('start', {})
-            if start.get('date'):
-                new_due_date = datetime.strptime(start['date'], '%Y-%m-%d').date()
-                work_instance.due_date = new_due_date
-            elif start.get('dateTime'):
-                new_due_date = datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00')).date()
-                work_instance.due_date = new_due_date
-
             # Check if event was cancelled/deleted
             if google_event.get('status') == 'cancelled':
                 # Don't delete the task, just log it
@@ -225,7 +238,7 @@ class GoogleCalendarService:
                 )
                 return None
 
-            work_instance.save()
+            self._apply_calendar_event(work_instance, google_event)
 
             # Update mapping
             mapping.google_updated_at = google_updated
@@ -249,6 +262,319 @@ class GoogleCalendarService:
             logger.error(f"Error syncing event from Calendar: {str(e)}")
             raise
 
+    @staticmethod
+    def _apply_calendar_event(work_instance, google_event):
+        """
+        Apply a Google Calendar event's date to its WorkInstance as the due date.
+        """
+        start = google_event.get('start', {})
+        if start.get('date'):
+            work_instance.due_date = datetime.strptime(start['date'], '%Y-%m-%d').date()
+        elif start.get('dateTime'):
+            work_instance.due_date = datetime.fromisoformat(start['dateTime'].replace('Z', '+00:00')).date()
+
+        work_instance.save()
+
+    def sync_tasks_to_calendar(self, work_instances, sync_settings=None):
+        """
+        Push WorkInstances to Google Calendar with batch HTTP requests
+        (BATCH_SIZE calls per round trip). Tasks not updated since their
+        GoogleCalendarMapping was last synced are skipped. Mappings are
+        loaded with one query; mappings and sync logs are written with bulk
+        operations.
+
+        Returns: (synced_count, error_count)
+        """
+        from core.models import GoogleCalendarMapping, GoogleSyncLog
+
+        work_instances = list(work_instances)
+        if not work_instances:
+            return 0, 0
+
+        service = self._get_service()
+        calendar_id = self.get_calendar_id()
+        user = self.google_connection.user
+
+        mappings = {
+            mapping.work_instance_id: mapping
+            for mapping in GoogleCalendarMapping.objects.filter(
+                work_instance_id__in=[work_instance.id for work_instance in work_instances]
+            )
+        }
+
+        def is_update(work_instance):
+            mapping = mappings.get(work_instance.id)
+            return bool(mapping and mapping.user_id == user.id and mapping.google_calendar_id == calendar_id)
+
+        # Only tasks changed in NexPro since their last push
+        work_instances_by_key = {}
+        for work_instance in work_instances:
+            if is_update(work_instance):
+                nexpro_updated = mappings[work_instance.id].nexpro_updated_at
+                if nexpro_updated and work_instance.updated_at <= nexpro_updated:
+                    continue
+            work_instances_by_key[str(work_instance.id)] = work_instance
+
+        unchanged_count = len(work_instances) - len(work_instances_by_key)
+        event_data = {
+            key: self._build_calendar_event_data(work_instance, sync_settings)
+            for key, work_instance in work_instances_by_key.items()
+        }
+
+        requests = {}
+        for key, work_instance in work_instances_by_key.items():
+            if is_update(work_instance):
+                requests[key] = service.events().update(
+                    calendarId=calendar_id,
+                    eventId=mappings[work_instance.id].google_event_id,
+                    body=event_data[key]
+                )
+            else:
+                requests[key] = service.events().insert(calendarId=calendar_id, body=event_data[key])
+        results = self._execute_batch(requests)
+
+        # Events deleted in Google are created again
+        missing = {
+            key: service.events().insert(calendarId=calendar_id, body=event_data[key])
+            for key, (_, error) in results.items()
+            if isinstance(error, HttpError) and error.resp.status in EVENT_GONE_STATUSES
+            and is_update(work_instances_by_key[key])
+        }
+        if missing:
+            results.update(self._execute_batch(missing))
+
+        now = timezone.now()
+        new_mappings = []
+        changed_mappings = []
+        logs = []
+        error_count = 0
+
+        for key, work_instance in work_instances_by_key.items():
+            google_event, error = results.get(key, (None, None))
+            if error is not None or google_event is None:
+                error_count += 1
+                logger.error(f"Error syncing WorkInstance {work_instance.id} to Calendar: {str(error)}")
+                logs.append(GoogleSyncLog(
+                    organization=work_instance.organization,
+                    user=user,
+                    sync_type='CALENDAR_TO_GOOGLE',
+                    status='FAILED',
+                    work_instance=work_instance,
+                    error_message=str(error)
+                ))
+                continue
+
+            mapping = mappings.get(work_instance.id)
+            created = not is_update(work_instance) or key in missing
+            if mapping is None:
+                new_mappings.append(GoogleCalendarMapping(
+                    organization=work_instance.organization,
+                    work_instance=work_instance,
+                    user=user,
+                    google_event_id=google_event['id'],
+                    google_calendar_id=calendar_id,
+                    nexpro_updated_at=work_instance.updated_at,
+                    google_updated_at=parse_google_datetime(google_event.get('updated'))
+                ))
+            else:
+                mapping.user = user
+                mapping.google_event_id = google_event['id']
+                mapping.google_calendar_id = calendar_id
+                mapping.nexpro_updated_at = work_instance.updated_at
+                mapping.google_updated_at = parse_google_datetime(google_event.get('updated'))
+                mapping.last_synced_at = now
+                changed_mappings.append(mapping)
+
+            logs.append(GoogleSyncLog(
+                organization=work_instance.organization,
+                user=user,
+                sync_type='CALENDAR_TO_GOOGLE',
+                status='SUCCESS',
+                work_instance=work_instance,
+                google_event_id=google_event['id'],
+                details=f"{'Created' if created else 'Updated'} event: {event_data[key].get('summary')}"
+            ))
+
+        GoogleCalendarMapping.objects.bulk_create(new_mappings)
+        GoogleCalendarMapping.objects.bulk_update(changed_mappings, [
+            'user', 'google_event_id', 'google_calendar_id',
+            'nexpro_updated_at', 'google_updated_at', 'last_synced_at'
+        ])
+        GoogleSyncLog.objects.bulk_create(logs)
+
+        synced_count = len(new_mappings) + len(changed_mappings)
+        if synced_count:
+            self.google_connection.last_sync_at = now
+            self.google_connection.save(update_fields=['last_sync_at'])
+
+        logger.info(
+            f"Batch sync to Calendar: {synced_count} synced, {unchanged_count} unchanged, {error_count} errors"
+        )
+        return synced_count, error_count
+
+    def sync_changes_from_calendar(self):
+        """
+        Apply changes made in Google Calendar to NexPro (two-way sync).
+
+        Only events changed since the previous sync are listed, using the
+        connection's stored Calendar nextSyncToken. Without a token (first
+        sync, or Google expired it) the calendar is listed once to obtain
+        one. Events are processed one page at a time: mappings of a page are
+        loaded with one query, and its mapping updates and sync logs are
+        written in bulk before the next page is fetched.
+
+        Returns:
+            dict: checked, updated, skipped and errors counts
+        """
+        stats = {'checked': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        connection = self.google_connection
+        calendar_id = self.get_calendar_id()
+
+        next_sync_token = None
+        for google_events, next_sync_token in self._iter_event_pages(calendar_id, connection.calendar_sync_token):
+            self._apply_event_page(google_events, stats)
+
+        # Store the token (only reached if every page was listed)
+        connection.calendar_sync_token = next_sync_token
+        update_fields = ['calendar_sync_token']
+        if stats['updated']:
+            connection.last_sync_at = timezone.now()
+            update_fields.append('last_sync_at')
+        connection.save(update_fields=update_fields)
+
+        return stats
+
+    def _apply_event_page(self, google_events, stats):
+        """
+        Apply one page of listed Google Calendar events to their mapped
+        WorkInstances, counting into stats.
+        """
+        from core.models import GoogleCalendarMapping, GoogleSyncLog
+
+        user = self.google_connection.user
+        google_events = [google_event for google_event in google_events if google_event.get('id')]
+        stats['checked'] += len(google_events)
+        if not google_events:
+            return
+
+        # Events without a mapping weren't created from NexPro and are ignored
+        mappings = {
+            mapping.google_event_id: mapping
+            for mapping in GoogleCalendarMapping.objects.filter(
+                user=user,
+                google_event_id__in=[google_event['id'] for google_event in google_events]
+            ).select_related('work_instance__organization')
+        }
+
+        changed_mappings = []
+        logs = []
+        for google_event in google_events:
+            mapping = mappings.get(google_event['id'])
+            if mapping is None:
+                continue
+            work_instance = mapping.work_instance
+
+            if google_event.get('status') == 'cancelled':
+                # Don't delete the task, just log it
+                stats['skipped'] += 1
+                logs.append(GoogleSyncLog(
+                    organization=work_instance.organization,
+                    user=user,
+                    sync_type='CALENDAR_FROM_GOOGLE',
+                    status='SKIPPED',
+                    work_instance=work_instance,
+                    google_event_id=google_event['id'],
+                    details="Event was cancelled in Google Calendar"
+                ))
+                continue
+
+            # Skip if Google has no new changes since our last sync, or
+            # NexPro was updated more recently
+            google_updated_dt = parse_google_datetime(google_event.get('updated'))
+            if not google_updated_dt or \
+                    (mapping.google_updated_at and google_updated_dt <= mapping.google_updated_at) or \
+                    (mapping.nexpro_updated_at and mapping.nexpro_updated_at > google_updated_dt):
+                stats['skipped'] += 1
+                continue
+
+            try:
+                self._apply_calendar_event(work_instance, google_event)
+            except Exception as e:
+                stats['errors'] += 1
+                logger.error(f"Error syncing event {google_event['id']} from Calendar: {str(e)}", exc_info=True)
+                logs.append(GoogleSyncLog(
+                    organization=work_instance.organization,
+                    user=user,
+                    sync_type='CALENDAR_FROM_GOOGLE',
+                    status='FAILED',
+                    work_instance=work_instance,
+                    google_event_id=google_event['id'],
+                    error_message=str(e)
+                ))
+                continue
+
+            now = timezone.now()
+            mapping.google_updated_at = google_updated_dt
+            mapping.nexpro_updated_at = work_instance.updated_at
+            mapping.last_synced_at = now
+            changed_mappings.append(mapping)
+            logs.append(GoogleSyncLog(
+                organization=work_instance.organization,
+                user=user,
+                sync_type='CALENDAR_FROM_GOOGLE',
+                status='SUCCESS',
+                work_instance=work_instance,
+                google_event_id=google_event['id'],
+                details=f"Synced from Calendar: due_date={work_instance.due_date}"
+            ))
+            stats['updated'] += 1
+
+        GoogleCalendarMapping.objects.bulk_update(
+            changed_mappings, ['google_updated_at', 'nexpro_updated_at', 'last_synced_at']
+        )
+        GoogleSyncLog.objects.bulk_create(logs)
+
+    def _iter_event_pages(self, calendar_id, sync_token=None):
+        """
+        List the events of a calendar one page at a time, only those changed
+        since sync_token if given (deleted events included as cancelled).
+        If Google expired the sync token (410 Gone) the listing starts over
+        without it. A listing without a token leaves out deleted events and
+        only fetches the fields the sync reads, so the first sync of a large
+        calendar stays bounded to one page in memory.
+
+        Yields:
+            tuple: (events, next_sync_token), next_sync_token set on the last page
+        """
+        service = self._get_service()
+        params = {
+            'calendarId': calendar_id,
+            'maxResults': EVENT_PAGE_SIZE,
+            'fields': EVENT_LIST_FIELDS,
+        }
+        if sync_token:
+            params.update(syncToken=sync_token, showDeleted=True)
+
+        while True:
+            try:
+                results = service.events().list(**params).execute()
+            except HttpError as e:
+                if e.resp.status != 410 or 'syncToken' not in params:
+                    raise
+                # Sync token expired - list everything again
+                logger.info(
+                    f"Calendar sync token expired for user {self.google_connection.user.username}, running a full sync"
+                )
+                for key in ('syncToken', 'showDeleted', 'pageToken'):
+                    params.pop(key, None)
+                continue
+
+            page_token = results.get('nextPageToken')
+            yield results.get('items', []), results.get('nextSyncToken')
+            if not page_token:
+                return
+            params['pageToken'] = page_token
+
     def delete_event_from_calendar(self, work_instance):
         """
         Delete a calendar event when task is deleted or completed.
@@ -320,18 +646,15 @@ class GoogleCalendarService:
             # Only sync non-completed tasks with future due dates
             work_instances = queryset.exclude(status='COMPLETED').filter(
                 due_date__gte=timezone.now().date()
+            ).select_related(
+                'client_work__client',
+                'client_work__work_type',
+                'assigned_to',
+                'organization'
             )
 
-        synced_count = 0
-        error_count = 0
-
-        for work_instance in work_instances:
-            try:
-                self.sync_task_to_calendar(work_instance, sync_settings)
-                synced_count += 1
-            except Exception as e:
-                logger.error(f"Error syncing WorkInstance {work_instance.id} to Calendar: {str(e)}")
-                error_count += 1
+        # Unchanged tasks are skipped; the rest are sent in batches
+        synced_count, error_count = self.sync_tasks_to_calendar(work_instances, sync_settings)
 
         logger.info(f"Calendar bulk sync completed: {synced_count} synced, {error_count} errors")
         return synced_count, error_count
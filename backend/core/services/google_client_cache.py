@@ -0,0 +1,93 @@
+"""
+Cached Google API Clients for NexPro
+
+Building a Google API client means decrypting the connection's tokens,
+possibly refreshing the access token, and parsing a discovery document.
+Clients are kept per process and reused by every GoogleTasksService,
+GoogleCalendarService, GoogleDriveService and GoogleGmailService created
+for the same connection, keyed by (connection id, API, version, token
+version). A refreshed or reconnected token has a new version, so it gets a
+new client.
+
+httplib2 connections are not thread-safe, so each thread has its own cache.
+"""
+
+import hashlib
+import threading
+
+from .google_oauth_service import GoogleOAuthService
+from core.utils.local_cache import LocalCache
+
+
+# Clients kept per thread, and for how long (seconds)
+CLIENT_CACHE_SIZE = 64
+CLIENT_CACHE_TIMEOUT = 3600
+
+_local = threading.local()
+
+
+def _get_cache():
+    cache = getattr(_local, 'clients', None)
+    if cache is None:
+        cache = _local.clients = LocalCache(maxsize=CLIENT_CACHE_SIZE, timeout=CLIENT_CACHE_TIMEOUT)
+    return cache
+
+
+def token_version(google_connection):
+    """Short hash of the connection's stored (encrypted) access token"""
+    return hashlib.sha1((google_connection.access_token or '').encode()).hexdigest()[:16]
+
+
+class GoogleClientCache:
+    """
+    Per-process cache of authenticated Google API clients.
+    """
+
+    @staticmethod
+    def get_client(google_connection, api, version):
+        """
+        Get an authenticated API client for a connection, building it only
+        if no cached client exists for the current token. The access token
+        is refreshed when it is about to expire.
+
+        Args:
+            google_connection: GoogleConnection instance
+            api: API name ('tasks', 'calendar', 'drive', 'gmail')
+            version: API version ('v1', 'v3', ...)
+
+        Returns:
+            tuple: (service, credentials)
+
+        Raises:
+            ValueError: If the connection has no valid credentials
+        """
+        if google_connection.status != 'CONNECTED':
+            raise ValueError("Failed to get valid credentials")
+
+        cache = _get_cache()
+        key = (google_connection.pk, api, version, token_version(google_connection))
+        client = cache.get(key)
+
+        if client is not None:
+            try:
+                if GoogleOAuthService.refresh_credentials_if_expiring(google_connection, client[1]):
+                    # Keep the client under its new token version
+                    cache.set((google_connection.pk, api, version, token_version(google_connection)), client)
+                return client
+            except Exception:
+                # Rebuilt below; a failing refresh marks the connection as ERROR there
+                pass
+
+        credentials = GoogleOAuthService.get_credentials_from_connection(google_connection)
+        if not credentials:
+            raise ValueError("Failed to get valid credentials")
+
+        client = (GoogleOAuthService.build_service(api, version, credentials, google_connection), credentials)
+        # The token may have been refreshed while loading the credentials
+        cache.set((google_connection.pk, api, version, token_version(google_connection)), client)
+        return client
+
+    @staticmethod
+    def clear():
+        """Drop this thread's cached clients"""
+        _get_cache().clear()
@@ -0,0 +1,109 @@
+"""
+Google Drive Folder Index for NexPro
+
+Resolving a folder like NexPro / {client_name} / {year} / {work_type} used to
+cost a files().list search (and maybe a create) per level, every time. Known
+folders are now kept as GoogleDriveMapping rows keyed by (Google connection,
+folder path below the NexPro root), so resolving them needs no API calls.
+
+Entries are trusted until Drive says otherwise: when a call using a cached
+folder fails with 404 (the folder was deleted in Drive), the folder and
+everything below it is dropped from the index and resolved again.
+"""
+
+from django.db.models import Q
+
+# Paths in one folder_path__in query
+PATH_QUERY_CHUNK = 500
+
+
+def folder_path(*names):
+    """Index path of nested folder names ('/' inside a name is escaped)"""
+    return '/'.join(str(name).replace('%', '%25').replace('/', '%2F') for name in names)
+
+
+def parent_path(path):
+    return path.rpartition('/')[0]
+
+
+class GoogleDriveFolderIndex:
+    """
+    Folder path -> Google Drive folder ID index of one Google connection,
+    backed by GoogleDriveMapping. Rows are read on demand and kept for the
+    lifetime of the instance.
+    """
+
+    def __init__(self, google_connection):
+        self.google_connection = google_connection
+        self._folders = {}
+
+    def prefetch(self, paths):
+        """Load the index entries of paths not read yet (one query per PATH_QUERY_CHUNK paths)"""
+        from core.models import GoogleDriveMapping
+
+        missing = [path for path in dict.fromkeys(paths) if path not in self._folders]
+        for i in range(0, len(missing), PATH_QUERY_CHUNK):
+            chunk = missing[i:i + PATH_QUERY_CHUNK]
+            self._folders.update(dict.fromkeys(chunk))
+            self._folders.update(GoogleDriveMapping.objects.filter(
+                google_connection=self.google_connection,
+                folder_path__in=chunk
+            ).values_list('folder_path', 'google_folder_id'))
+
+    def get(self, path):
+        """Cached folder ID of a path, or None"""
+        if path not in self._folders:
+            self.prefetch([path])
+        return self._folders[path]
+
+    def add(self, folders):
+        """
+        Save resolved folders.
+
+        Args:
+            folders: List of (path, folder_id, parent_folder_id, name, fields)
+                tuples; fields are extra GoogleDriveMapping fields (folder_type,
+                client, year, work_type)
+        """
+        from core.models import GoogleDriveMapping
+
+        if not folders:
+            return
+
+        GoogleDriveMapping.objects.bulk_create(
+            [
+                GoogleDriveMapping(
+                    organization_id=self.google_connection.organization_id,
+                    google_connection=self.google_connection,
+                    folder_path=path,
+                    google_folder_id=folder_id,
+                    parent_folder_id=parent_folder_id,
+                    google_folder_name=name,
+                    **fields
+                )
+                for path, folder_id, parent_folder_id, name, fields in folders
+            ],
+            update_conflicts=True,
+            unique_fields=['google_connection', 'folder_path'],
+            update_fields=['google_folder_id', 'parent_folder_id', 'google_folder_name', 'updated_at']
+        )
+        self._folders.update((path, folder_id) for path, folder_id, _, _, _ in folders)
+
+    def invalidate(self, path=''):
+        """
+        Drop a folder and all folders below it. The empty path drops the
+        whole index (the root folder is gone).
+        """
+        from core.models import GoogleDriveMapping
+
+        rows = GoogleDriveMapping.objects.filter(google_connection=self.google_connection)
+        if path:
+            rows = rows.filter(Q(folder_path=path) | Q(folder_path__startswith=f'{path}/'))
+            self._folders = {
+                cached: folder_id for cached, folder_id in self._folders.items()
+                if cached != path and not cached.startswith(f'{path}/')
+            }
+        else:
+            rows = rows.filter(folder_path__isnull=False)
+            self._folders = {}
+        rows.delete()
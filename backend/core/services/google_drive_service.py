@@ -7,16 +7,35 @@ import logging
 import io
 import os
 from datetime import datetime
+from django.conf import settings
 from django.utils import timezone
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from googleapiclient.errors import HttpError
 
-from .google_oauth_service import GoogleOAuthService
+from .google_client_cache import GoogleClientCache
+from .google_drive_folders import GoogleDriveFolderIndex, folder_path, parent_path
+from .google_drive_uploads import UploadLeaseLost
+from .google_rate_limiter import google_rate_limiter
 
 logger = logging.getLogger(__name__)
 
 
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# Upload chunk size; Google requires a multiple of 256 KB
+UPLOAD_CHUNK_ALIGNMENT = 256 * 1024
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Retries of a failed chunk (5xx, connection errors) before giving up
+UPLOAD_CHUNK_RETRIES = 3
+
+
+def get_upload_chunk_size():
+    """GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE rounded down to a multiple of 256 KB"""
+    chunk_size = getattr(settings, 'GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE', DEFAULT_UPLOAD_CHUNK_SIZE)
+    return max(UPLOAD_CHUNK_ALIGNMENT, chunk_size - chunk_size % UPLOAD_CHUNK_ALIGNMENT)
+
+
 class GoogleDriveService:
     """
     Service for managing files and folders in Google Drive for NexPro.
@@ -30,18 +49,38 @@ class GoogleDriveService:
         self.google_connection = google_connection
         self.credentials = None
         self.service = None
+        self.folder_index = GoogleDriveFolderIndex(google_connection)
+        # The stored root folder was checked (not deleted or trashed) by this instance
+        self.root_folder_checked = False
 
     def _get_service(self):
         """
         Get authenticated Google Drive service.
         """
         if not self.service:
-            self.credentials = GoogleOAuthService.get_credentials_from_connection(self.google_connection)
-            if not self.credentials:
-                raise ValueError("Failed to get valid credentials")
-            self.service = build('drive', 'v3', credentials=self.credentials)
+            self.service, self.credentials = GoogleClientCache.get_client(self.google_connection, 'drive', 'v3')
         return self.service
 
+    def _execute_batch(self, requests):
+        """
+        Execute API requests with batch HTTP (through the rate limiter, see
+        google_rate_limiter.execute_batch).
+
+        Args:
+            requests: Dict of {request_id (str): HttpRequest}
+
+        Returns:
+            dict: {request_id: (response, HttpError or None)}
+        """
+        return google_rate_limiter.execute_batch(
+            self._get_service(), requests, 'DRIVE', self.google_connection
+        )
+
+    @staticmethod
+    def _quote(value):
+        """Escape a value for a Drive search query string literal"""
+        return str(value).replace('\\', '\\\\').replace("'", "\\'")
+
     def get_or_create_root_folder(self, folder_name='NexPro'):
         """
         Get or create the root NexPro folder in Google Drive.
@@ -49,23 +88,28 @@ class GoogleDriveService:
         """
         service = self._get_service()
 
-        # Check if we already have a root folder ID stored
+        # The stored root folder is checked once per instance: a trashed
+        # folder still answers calls using it, so a 404 never shows it is gone
         if self.google_connection.drive_folder_id:
+            if self.root_folder_checked:
+                return self.google_connection.drive_folder_id
             try:
                 folder = service.files().get(
                     fileId=self.google_connection.drive_folder_id,
-                    fields='id, name, trashed'
+                    fields='id, trashed'
                 ).execute()
-
-                if not folder.get('trashed'):
-                    return folder['id']
             except HttpError as e:
                 if e.resp.status != 404:
                     raise
-                # Folder was deleted, create a new one
+                folder = None
+            if folder and not folder.get('trashed'):
+                self.root_folder_checked = True
+                return folder['id']
+            logger.info(f"NexPro root folder {self.google_connection.drive_folder_id} was deleted or trashed")
+            self.invalidate_folder()
 
         # Search for existing NexPro folder
-        query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
+        query = f"name='{self._quote(folder_name)}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
         results = service.files().list(
             q=query,
             spaces='drive',
@@ -74,15 +118,12 @@ class GoogleDriveService:
 
         files = results.get('files', [])
         if files:
-            folder_id = files[0]['id']
-            self.google_connection.drive_folder_id = folder_id
-            self.google_connection.save(update_fields=['drive_folder_id'])
-            return folder_id
+            return self._set_root_folder(files[0]['id'])
 
         # Create new root folder
         folder_metadata = {
             'name': folder_name,
-            'mimeType': 'application/vnd.google-apps.folder'
+            'mimeType': FOLDER_MIME_TYPE
         }
 
         folder = service.files().create(
@@ -90,11 +131,27 @@ class GoogleDriveService:
             fields='id'
         ).execute()
 
-        self.google_connection.drive_folder_id = folder['id']
+        logger.info(f"Created NexPro root folder: {folder['id']}")
+        return self._set_root_folder(folder['id'])
+
+    def _set_root_folder(self, folder_id):
+        # Folders indexed below an earlier root folder are not valid any more
+        self.folder_index.invalidate()
+        self.google_connection.drive_folder_id = folder_id
         self.google_connection.save(update_fields=['drive_folder_id'])
+        self.root_folder_checked = True
+        return folder_id
 
-        logger.info(f"Created NexPro root folder: {folder['id']}")
-        return folder['id']
+    def invalidate_folder(self, path=''):
+        """
+        Forget a cached folder (and the folders below it) after Drive
+        answered 404 for it. The empty path is the root folder.
+        """
+        if not path:
+            self.google_connection.drive_folder_id = None
+            self.google_connection.save(update_fields=['drive_folder_id'])
+            self.root_folder_checked = False
+        self.folder_index.invalidate(path)
 
     def create_folder(self, folder_name, parent_folder_id=None):
         """
@@ -105,7 +162,7 @@ class GoogleDriveService:
 
         folder_metadata = {
             'name': folder_name,
-            'mimeType': 'application/vnd.google-apps.folder'
+            'mimeType': FOLDER_MIME_TYPE
         }
 
         if parent_folder_id:
@@ -126,7 +183,7 @@ class GoogleDriveService:
         service = self._get_service()
 
         # Build search query
-        query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
+        query = f"name='{self._quote(folder_name)}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
         if parent_folder_id:
             query += f" and '{parent_folder_id}' in parents"
 
@@ -142,74 +199,222 @@ class GoogleDriveService:
 
         return self.create_folder(folder_name, parent_folder_id)
 
-    def create_client_folder_structure(self, client, sync_settings=None):
+    def get_or_create_folder_path(self, levels):
         """
-        Create folder structure for a client based on settings.
-        Default structure: NexPro / {client_name} / {year} / {work_types...}
+        Get or create nested folders below the NexPro root folder. Folders
+        in the folder index are resolved without API calls.
+
+        Args:
+            levels: List of (folder name, GoogleDriveMapping fields) from the
+                top folder down
+
+        Returns:
+            str: Folder ID of the last level
         """
-        from core.models import GoogleDriveMapping, GoogleSyncLog, GoogleSyncSettings
+        names = [name for name, _ in levels]
+        paths = [folder_path(*names[:depth]) for depth in range(1, len(names) + 1)]
 
-        if sync_settings is None:
+        # Each 404 drops at least one more cached level
+        for attempt in range(len(levels) + 2):
+            self.folder_index.prefetch(paths)
+            parent_id, parent = self.get_or_create_root_folder(), ''
             try:
-                sync_settings = GoogleSyncSettings.objects.get(
-                    organization=self.google_connection.organization
-                )
-            except GoogleSyncSettings.DoesNotExist:
-                sync_settings = None
-
-        try:
-            # Get root folder
-            root_folder_id = self.get_or_create_root_folder()
+                for path, (name, fields) in zip(paths, levels):
+                    folder_id = self.folder_index.get(path)
+                    if not folder_id:
+                        folder_id = self.get_or_create_folder(name, parent_id)
+                        self.folder_index.add([(path, folder_id, parent_id, name, fields)])
+                    parent_id, parent = folder_id, path
+                return parent_id
+            except HttpError as e:
+                if e.resp.status != 404 or attempt == len(levels) + 1:
+                    raise
+                # The cached parent folder was deleted in Drive
+                self.invalidate_folder(parent)
 
-            # Create client folder
-            client_folder_id = self.get_or_create_folder(
-                client.client_name,
-                root_folder_id
-            )
+    def _list_child_folders(self, parent_ids):
+        """
+        List the subfolders of many folders with batch HTTP.
 
-            # Save mapping for client folder
-            client_mapping, _ = GoogleDriveMapping.objects.update_or_create(
-                organization=self.google_connection.organization,
-                client=client,
-                folder_type='CLIENT',
-                defaults={
-                    'google_folder_id': client_folder_id,
-                    'google_folder_name': client.client_name,
-                    'parent_folder_id': root_folder_id,
+        Returns:
+            tuple: ({parent folder ID: {folder name: folder ID}},
+                {parent folder ID: HttpError} of folders that could not be listed)
+        """
+        service = self._get_service()
+        children = {parent_id: {} for parent_id in parent_ids}
+        errors = {}
+        page_tokens = dict.fromkeys(parent_ids)
+
+        while page_tokens:
+            parents = list(page_tokens)
+            requests = {}
+            for i, parent_id in enumerate(parents):
+                params = {
+                    'q': f"'{parent_id}' in parents and mimeType='{FOLDER_MIME_TYPE}' and trashed=false",
+                    'spaces': 'drive',
+                    'fields': 'nextPageToken, files(id, name)',
+                    'pageSize': 1000,
                 }
-            )
+                if page_tokens[parent_id]:
+                    params['pageToken'] = page_tokens[parent_id]
+                requests[str(i)] = service.files().list(**params)
+
+            results = self._execute_batch(requests)
+            page_tokens = {}
+            for i, parent_id in enumerate(parents):
+                response, error = results.get(str(i), (None, None))
+                if error is not None or response is None:
+                    # A partial listing would create duplicates of the
+                    # folders not listed - the parent's children are skipped
+                    errors[parent_id] = error
+                    continue
+                for folder in response.get('files', []):
+                    children[parent_id].setdefault(folder['name'], folder['id'])
+                if response.get('nextPageToken'):
+                    page_tokens[parent_id] = response['nextPageToken']
+
+        return children, errors
+
+    def _create_folders(self, folders):
+        """
+        Create folders with batch HTTP.
 
-            # Create year folder
-            current_year = datetime.now().year
-            year_folder_id = self.get_or_create_folder(
-                str(current_year),
-                client_folder_id
-            )
+        Args:
+            folders: Dict of {key: (folder name, parent folder ID)}
 
-            # Save mapping for year folder
-            year_mapping, _ = GoogleDriveMapping.objects.update_or_create(
-                organization=self.google_connection.organization,
-                client=client,
-                folder_type='YEAR',
-                year=current_year,
-                defaults={
-                    'google_folder_id': year_folder_id,
-                    'google_folder_name': str(current_year),
-                    'parent_folder_id': client_folder_id,
-                }
+        Returns:
+            dict: {key: (folder ID or None, HttpError or None)}
+        """
+        service = self._get_service()
+        keys = list(folders)
+        results = self._execute_batch({
+            str(i): service.files().create(
+                body={'name': name, 'mimeType': FOLDER_MIME_TYPE, 'parents': [parent_id]},
+                fields='id'
             )
+            for i, (name, parent_id) in enumerate(folders[key] for key in keys)
+        })
+
+        created = {}
+        for i, key in enumerate(keys):
+            response, error = results.get(str(i), (None, None))
+            created[key] = ((response or {}).get('id'), error)
+        return created
 
-            # Create work type subfolders
-            work_types = client.work_mappings.filter(active=True).values_list(
-                'work_type__work_name', flat=True
-            ).distinct()
+    def create_client_folder_structures(self, clients, year=None):
+        """
+        Create the folder structure of many clients:
+        NexPro / {client_name} / {year} / {work_types...}
 
-            for work_type_name in work_types:
-                work_type_folder_id = self.get_or_create_folder(
-                    work_type_name,
-                    year_folder_id
+        Folders in the folder index are skipped. The others are built level
+        by level: one batched listing of the parent folders finds existing
+        folders, and one batch of creates adds the missing ones.
+
+        Returns:
+            dict: cached, found, created and errors counts
+        """
+        from core.models import ClientWorkMapping
+
+        clients = list(clients)
+        year = year or datetime.now().year
+
+        work_types = {}
+        for client_id, work_type_id, work_name in ClientWorkMapping.objects.filter(
+            client__in=clients,
+            active=True
+        ).values_list('client_id', 'work_type_id', 'work_type__work_name').distinct():
+            work_types.setdefault(client_id, []).append((work_type_id, work_name))
+
+        # {path: (folder name, parent path, GoogleDriveMapping fields)} per depth
+        tree = [{}, {}, {}]
+        for client in clients:
+            client_path = folder_path(client.client_name)
+            year_path = folder_path(client.client_name, year)
+            tree[0][client_path] = (client.client_name, '', {'folder_type': 'CLIENT', 'client': client})
+            tree[1][year_path] = (str(year), client_path, {'folder_type': 'YEAR', 'client': client, 'year': year})
+            for work_type_id, work_name in work_types.get(client.id, []):
+                tree[2][folder_path(client.client_name, year, work_name)] = (
+                    work_name, year_path,
+                    {'folder_type': 'WORK_TYPE', 'client': client, 'year': year, 'work_type_id': work_type_id}
                 )
 
+        stats = {'cached': 0, 'found': 0, 'created': 0, 'errors': 0}
+
+        # A second pass runs only if cached folders turned out to be deleted
+        for attempt in range(2):
+            root_folder_id = self.get_or_create_root_folder()
+            self.folder_index.prefetch(path for level in tree for path in level)
+            stale = set()
+
+            for level in tree:
+                missing = {}
+                for path, (name, parent, fields) in level.items():
+                    if self.folder_index.get(path):
+                        if not attempt:
+                            stats['cached'] += 1
+                        continue
+                    parent_id = self.folder_index.get(parent) if parent else root_folder_id
+                    if parent_id:
+                        missing[path] = (name, parent_id, fields)
+                    # Otherwise the parent could not be created
+                if not missing:
+                    continue
+
+                existing, list_errors = self._list_child_folders({parent_id for _, parent_id, _ in missing.values()})
+                resolved, to_create = [], {}
+                for path, (name, parent_id, fields) in missing.items():
+                    if parent_id in list_errors:
+                        error = list_errors[parent_id]
+                        if error is not None and error.resp.status == 404:
+                            # The cached parent folder was deleted in Drive
+                            stale.add(parent_path(path))
+                        else:
+                            stats['errors'] += 1
+                            logger.error(f"Error listing Drive folders for '{path}': {str(error)}")
+                        continue
+                    folder_id = existing[parent_id].get(name)
+                    if folder_id:
+                        resolved.append((path, folder_id, parent_id, name, fields))
+                        stats['found'] += 1
+                    else:
+                        to_create[path] = (name, parent_id)
+
+                for path, (folder_id, error) in self._create_folders(to_create).items():
+                    name, parent_id, fields = missing[path]
+                    if error is None and folder_id:
+                        resolved.append((path, folder_id, parent_id, name, fields))
+                        stats['created'] += 1
+                    elif error is not None and error.resp.status == 404:
+                        stale.add(parent_path(path))
+                    else:
+                        stats['errors'] += 1
+                        logger.error(f"Error creating Drive folder '{path}': {str(error)}")
+
+                self.folder_index.add(resolved)
+
+            if not stale:
+                break
+            for path in stale:
+                self.invalidate_folder(path)
+        else:
+            stats['errors'] += len(stale)
+
+        return stats
+
+    def create_client_folder_structure(self, client, sync_settings=None):
+        """
+        Create folder structure for a client based on settings.
+        Default structure: NexPro / {client_name} / {year} / {work_types...}
+        """
+        from core.models import GoogleDriveMapping, GoogleSyncLog
+
+        try:
+            self.create_client_folder_structures([client])
+            client_mapping = GoogleDriveMapping.objects.get(
+                google_connection=self.google_connection,
+                folder_path=folder_path(client.client_name)
+            )
+
             # Log the sync
             GoogleSyncLog.objects.create(
                 organization=client.organization,
@@ -234,10 +439,78 @@ class GoogleDriveService:
             )
             raise
 
-    def upload_file(self, file_path, file_name, parent_folder_id=None, mime_type=None):
+    def _query_upload_session(self, request, session_uri):
+        """
+        Ask Google how much of an interrupted resumable upload it has
+        received: an empty PUT to the upload session with
+        "Content-Range: bytes */<size>".
+
+        Args:
+            request: files().create/update request with a resumable media body
+            session_uri: Upload session to query
+
+        Returns:
+            tuple: (bytes received, uploaded file or None if not complete)
+
+        Raises:
+            HttpError: The session expired (404/410) or the query failed
         """
-        Upload a file to Google Drive.
-        Returns the file ID.
+        rate_limit_scope = getattr(request, 'rate_limit_scope', None)
+        if rate_limit_scope:
+            google_rate_limiter.acquire(*rate_limit_scope)
+
+        size = request.resumable.size()
+        resp, content = request.http.request(
+            session_uri,
+            method='PUT',
+            headers={'Content-Length': '0', 'Content-Range': f'bytes */{size}'}
+        )
+        if resp.status in (200, 201):
+            # The last chunk was received before the upload was interrupted
+            return size, request.postproc(resp, content)
+        if resp.status == 308:
+            # "Range: bytes=0-<last byte received>", missing if nothing was received
+            received = resp.get('range')
+            return (int(received.rsplit('-', 1)[1]) + 1 if received else 0), None
+        raise HttpError(resp, content, uri=session_uri)
+
+    def _resumable_upload(self, request, session_uri=None, on_progress=None):
+        """
+        Send a resumable upload request chunk by chunk.
+
+        Args:
+            request: files().create/update request with a resumable media body
+            session_uri: Upload session of an interrupted upload to resume
+                from the bytes Google has received (see _query_upload_session)
+            on_progress: Called with (session_uri, bytes_sent) after each chunk
+
+        Returns:
+            dict: The uploaded file
+        """
+        if session_uri:
+            bytes_received, response = self._query_upload_session(request, session_uri)
+            if response is not None:
+                return response
+            request.resumable_uri = session_uri
+            request.resumable_progress = bytes_received
+
+        response = None
+        while response is None:
+            rate_limit_scope = getattr(request, 'rate_limit_scope', None)
+            if rate_limit_scope:
+                # Each chunk is a separate call to the Drive API
+                google_rate_limiter.acquire(*rate_limit_scope)
+            status, response = request.next_chunk(num_retries=UPLOAD_CHUNK_RETRIES)
+            if status and on_progress:
+                on_progress(request.resumable_uri, status.resumable_progress)
+        return response
+
+    def upload_file(self, file_path, file_name, parent_folder_id=None, mime_type=None,
+                    session_uri=None, on_progress=None):
+        """
+        Upload a file to Google Drive in GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE chunks,
+        resuming an interrupted upload if its session URI is given (see
+        _resumable_upload). Returns the file object with id and webViewLink.
         """
         service = self._get_service()
 
@@ -252,21 +525,24 @@ class GoogleDriveService:
         media = MediaFileUpload(
             file_path,
             mimetype=mime_type,
+            chunksize=get_upload_chunk_size(),
             resumable=True
         )
 
-        file = service.files().create(
+        request = service.files().create(
             body=file_metadata,
             media_body=media,
             fields='id, webViewLink'
-        ).execute()
+        )
+        file = self._resumable_upload(request, session_uri, on_progress)
 
         logger.info(f"Uploaded file '{file_name}': {file['id']}")
         return file
 
     def upload_file_content(self, content, file_name, parent_folder_id=None, mime_type='application/octet-stream'):
         """
-        Upload file content (bytes or file-like object) to Google Drive.
+        Upload file content (bytes or file-like object) to Google Drive in
+        GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE chunks.
         Returns the file object with id and webViewLink.
         """
         service = self._get_service()
@@ -286,66 +562,115 @@ class GoogleDriveService:
         media = MediaIoBaseUpload(
             content,
             mimetype=mime_type,
+            chunksize=get_upload_chunk_size(),
             resumable=True
         )
 
-        file = service.files().create(
+        request = service.files().create(
             body=file_metadata,
             media_body=media,
             fields='id, webViewLink'
-        ).execute()
+        )
+        file = self._resumable_upload(request)
 
         logger.info(f"Uploaded file content '{file_name}': {file['id']}")
         return file
 
-    def upload_task_attachment(self, task_document, work_instance):
+    def get_task_folder_id(self, work_instance):
         """
-        Upload a task document to the appropriate client folder in Google Drive.
+        Get or create the folder for a task's documents:
+        client folder / due year / task category.
         """
-        from core.models import GoogleDriveMapping, GoogleSyncLog
-
         client = work_instance.client_work.client
         work_type = work_instance.client_work.work_type
+        year = work_instance.due_date.year if work_instance.due_date else datetime.now().year
 
-        try:
-            # Get or create client folder structure
-            client_mapping = GoogleDriveMapping.objects.filter(
-                organization=work_instance.organization,
-                client=client,
-                folder_type='CLIENT'
-            ).first()
-
-            if not client_mapping:
-                self.create_client_folder_structure(client)
-                client_mapping = GoogleDriveMapping.objects.get(
-                    organization=work_instance.organization,
-                    client=client,
-                    folder_type='CLIENT'
-                )
+        return self.get_or_create_folder_path([
+            (client.client_name, {'folder_type': 'CLIENT', 'client': client}),
+            (str(year), {'folder_type': 'YEAR', 'client': client, 'year': year}),
+            (work_type.work_name, {'folder_type': 'WORK_TYPE', 'client': client, 'year': year, 'work_type': work_type}),
+        ])
 
-            # Get or create year folder
-            current_year = work_instance.due_date.year if work_instance.due_date else datetime.now().year
-            year_folder_id = self.get_or_create_folder(
-                str(current_year),
-                client_mapping.google_folder_id
-            )
+    def _progress_callback(self, drive_upload, on_chunk=None):
+        """
+        Build the on_progress callback for upload_file that saves a tracked
+        upload's session URI and progress after every chunk.
+        Returns None when there is no upload record to track.
+        """
+        from core.models import GoogleDriveMapping
+
+        if not drive_upload:
+            return None
 
-            # Get or create work type folder
-            work_type_folder_id = self.get_or_create_folder(
-                work_type.work_name,
-                year_folder_id
+        def on_progress(uri, sent):
+            GoogleDriveMapping.objects.filter(id=drive_upload.id).update(
+                upload_session_uri=uri,
+                upload_bytes_sent=sent,
+                updated_at=timezone.now()
             )
+            if on_chunk:
+                on_chunk()
+
+        return on_progress
+
+    def upload_task_attachment(self, task_document, work_instance, drive_upload=None, on_chunk=None):
+        """
+        Upload a task document to the appropriate client folder in Google Drive.
+
+        Args:
+            task_document: TaskDocument to upload
+            work_instance: The document's WorkInstance
+            drive_upload: Optional GoogleDriveMapping (FILE) tracking the
+                upload. Its session URI and progress are saved after every
+                chunk, and an interrupted upload is resumed from them.
+            on_chunk: Optional callable run after every chunk of a tracked
+                upload (the upload queue renews its leases)
+        """
+        from core.models import GoogleSyncLog
+
+        try:
+            on_progress = self._progress_callback(drive_upload, on_chunk)
+            session_uri = None
+            if drive_upload:
+                if not drive_upload.parent_folder_id:
+                    drive_upload.parent_folder_id = self.get_task_folder_id(work_instance)
+                    drive_upload.save(update_fields=['parent_folder_id', 'updated_at'])
+                work_type_folder_id = drive_upload.parent_folder_id
+                session_uri = drive_upload.upload_session_uri
+            else:
+                work_type_folder_id = self.get_task_folder_id(work_instance)
 
             # Upload the file
             file_path = task_document.file.path
             file_name = task_document.file_name
 
-            uploaded_file = self.upload_file(
-                file_path,
-                file_name,
-                work_type_folder_id,
-                task_document.file_type
-            )
+            try:
+                uploaded_file = self.upload_file(
+                    file_path,
+                    file_name,
+                    work_type_folder_id,
+                    task_document.file_type,
+                    session_uri=session_uri,
+                    on_progress=on_progress
+                )
+            except HttpError as e:
+                if e.resp.status not in (404, 410):
+                    raise
+                # The upload session expired or the cached task folder was
+                # deleted in Drive - resolve the folder again and start over
+                logger.info(f"Drive upload of '{file_name}' got {e.resp.status}, restarting upload")
+                self.invalidate_folder(folder_path(work_instance.client_work.client.client_name))
+                work_type_folder_id = self.get_task_folder_id(work_instance)
+                if drive_upload:
+                    drive_upload.parent_folder_id = work_type_folder_id
+                    drive_upload.save(update_fields=['parent_folder_id', 'updated_at'])
+                uploaded_file = self.upload_file(
+                    file_path,
+                    file_name,
+                    work_type_folder_id,
+                    task_document.file_type,
+                    on_progress=on_progress
+                )
 
             # Log the upload
             GoogleSyncLog.objects.create(
@@ -361,6 +686,9 @@ class GoogleDriveService:
             logger.info(f"Uploaded task attachment to Drive: {file_name}")
             return uploaded_file
 
+        except UploadLeaseLost:
+            # Another worker carries on with the upload - not a failure
+            raise
         except Exception as e:
             logger.error(f"Error uploading task attachment: {str(e)}")
 
@@ -0,0 +1,319 @@
+"""
+Background Google Drive Uploads for NexPro
+
+Task documents are uploaded to Google Drive by Celery workers on the
+google_drive queue, never inside the request that saved them:
+
+1. When a TaskDocument is created in an organization with
+   auto_upload_attachments on, a GoogleDriveMapping row (folder_type FILE,
+   upload_status PENDING) is created and the upload_task_document_to_drive
+   task is dispatched once the transaction commits.
+2. The task streams the file from disk in GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE
+   chunks over a resumable upload session. The session URI and bytes sent
+   are saved on the row after every chunk.
+3. An upload interrupted by a worker restart is picked up again by
+   resume_google_drive_uploads and continues from the saved session.
+
+At most GOOGLE_DRIVE_UPLOAD_CONCURRENCY uploads run at once across all
+workers (numbered concurrency slots in the cache); a task that finds no free
+slot is retried shortly after. Slots and the per-upload lock are leases owned
+by the Celery task ID: they last LEASE_TIMEOUT seconds and are renewed after
+every chunk, so a worker killed mid-upload frees them within one lease, and
+the same task redelivered (acks_late) takes its own lock and slot back.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+GOOGLE_DRIVE_QUEUE = 'google_drive'
+
+SLOT_KEY = 'google_drive:upload_slot:{slot}'
+# Delay before a task that found no free slot tries again (seconds)
+SLOT_RETRY_DELAY = 30
+
+# Only one worker uploads a file at a time
+UPLOAD_LOCK_KEY = 'google_drive:upload:{upload_id}'
+
+# Seconds a slot or upload lock is held without being renewed (renewed after
+# every chunk; a killed worker's leases expire after this)
+LEASE_TIMEOUT = 300
+
+# Delay before a failed upload is retried: RETRY_BASE_DELAY * 2^attempts seconds
+RETRY_BASE_DELAY = 60
+
+
+class UploadLeaseLost(Exception):
+    """The upload lock expired and was taken by another worker"""
+
+
+class GoogleDriveUploadQueue:
+    """
+    Service for queueing and running resumable Google Drive uploads of task
+    documents.
+    """
+
+    # ==========================================================================
+    # Concurrency slots
+    # ==========================================================================
+
+    @staticmethod
+    def acquire_slot(owner):
+        """
+        Lease one of GOOGLE_DRIVE_UPLOAD_CONCURRENCY upload slots. A slot
+        still leased by the same owner (a redelivered task) is taken back.
+
+        Args:
+            owner: Lease owner (the Celery task ID)
+
+        Returns:
+            str or None: Slot key (release it with release_slot), None if all
+                slots are taken
+        """
+        keys = [
+            SLOT_KEY.format(slot=slot)
+            for slot in range(getattr(settings, 'GOOGLE_DRIVE_UPLOAD_CONCURRENCY', 4))
+        ]
+        for key, holder in cache.get_many(keys).items():
+            if holder == owner:
+                cache.touch(key, LEASE_TIMEOUT)
+                return key
+        for key in keys:
+            if cache.add(key, owner, LEASE_TIMEOUT):
+                return key
+        return None
+
+    @staticmethod
+    def release_slot(key, owner):
+        GoogleDriveUploadQueue._release(key, owner)
+
+    @staticmethod
+    def renew(owner, *keys):
+        """
+        Extend the leases of an owner by LEASE_TIMEOUT.
+
+        Returns:
+            bool: False if a lease expired and another owner holds it now
+        """
+        held = cache.get_many([key for key in keys if key])
+        for key in keys:
+            if key and held.get(key) not in (None, owner):
+                return False
+            if key and not cache.touch(key, LEASE_TIMEOUT):
+                # Expired and free - take it again
+                cache.add(key, owner, LEASE_TIMEOUT)
+        return True
+
+    @staticmethod
+    def _release(key, owner):
+        if key and cache.get(key) == owner:
+            cache.delete(key)
+
+    @staticmethod
+    def retry_delay(attempts):
+        return RETRY_BASE_DELAY * 2 ** attempts
+
+    # ==========================================================================
+    # Queueing
+    # ==========================================================================
+
+    @staticmethod
+    def get_connection(task_document):
+        """
+        Google connection to upload a document with: the uploader's, else the
+        task assignee's, if Google Drive is enabled on it.
+        """
+        from core.models import GoogleConnection
+
+        user_ids = [
+            user_id for user_id in (task_document.uploaded_by_id, task_document.work_instance.assigned_to_id)
+            if user_id
+        ]
+        connections = {
+            connection.user_id: connection
+            for connection in GoogleConnection.objects.filter(
+                user_id__in=user_ids,
+                status='CONNECTED',
+                drive_enabled=True
+            ).select_related('user')
+        }
+        return next((connections[user_id] for user_id in user_ids if user_id in connections), None)
+
+    @staticmethod
+    def enqueue(task_document):
+        """
+        Queue a Drive upload of a new task document if its organization
+        auto-uploads attachments. Dispatched after the current transaction
+        commits.
+
+        Returns:
+            GoogleDriveMapping or None: The upload row, if queued
+        """
+        from core.models import GoogleDriveMapping, GoogleSyncSettings
+
+        if not GoogleSyncSettings.objects.filter(
+            organization_id=task_document.organization_id,
+            auto_upload_attachments=True
+        ).exists():
+            return None
+        if not GoogleDriveUploadQueue.get_connection(task_document):
+            return None
+
+        drive_upload = GoogleDriveMapping.objects.create(
+            organization_id=task_document.organization_id,
+            folder_type='FILE',
+            task_document=task_document,
+            work_instance_id=task_document.work_instance_id,
+            google_folder_id='',
+            google_folder_name=task_document.file_name,
+            upload_status='PENDING',
+            upload_total_bytes=task_document.file_size
+        )
+        transaction.on_commit(lambda: GoogleDriveUploadQueue.dispatch(drive_upload.id))
+        return drive_upload
+
+    @staticmethod
+    def dispatch(upload_id, countdown=None):
+        from core.tasks import upload_task_document_to_drive
+
+        upload_task_document_to_drive.apply_async(
+            args=[upload_id],
+            queue=GOOGLE_DRIVE_QUEUE,
+            countdown=countdown
+        )
+
+    # ==========================================================================
+    # Uploading
+    # ==========================================================================
+
+    @staticmethod
+    def upload(upload_id, owner=None, slot=None):
+        """
+        Upload (or resume uploading) the document of an upload row.
+
+        Args:
+            upload_id: GoogleDriveMapping (FILE) ID
+            owner: Owner of the upload lock and slot leases (the Celery task
+                ID); a lock still held by the same owner is taken back
+            slot: Slot key from acquire_slot, renewed with the lock after
+                every chunk
+
+        Returns:
+            dict: status ('completed', 'retry', 'failed', 'locked' or
+                'skipped'), and countdown for 'retry'
+        """
+        from core.models import GoogleDriveMapping
+        from core.services.google_drive_service import GoogleDriveService
+
+        owner = owner or uuid.uuid4().hex
+        lock_key = UPLOAD_LOCK_KEY.format(upload_id=upload_id)
+        if not cache.add(lock_key, owner, LEASE_TIMEOUT) and cache.get(lock_key) != owner:
+            return {'status': 'locked'}
+
+        def renew_leases():
+            if not GoogleDriveUploadQueue.renew(owner, lock_key, slot):
+                raise UploadLeaseLost(f"Upload lock of {upload_id} was taken by another worker")
+
+        try:
+            drive_upload = GoogleDriveMapping.objects.filter(
+                id=upload_id,
+                folder_type='FILE',
+                upload_status__in=['PENDING', 'UPLOADING']
+            ).select_related(
+                'task_document__work_instance__client_work__client',
+                'task_document__work_instance__client_work__work_type',
+                'task_document__work_instance__organization',
+            ).first()
+            if not drive_upload or not drive_upload.task_document:
+                return {'status': 'skipped'}
+
+            task_document = drive_upload.task_document
+            google_connection = GoogleDriveUploadQueue.get_connection(task_document)
+            if not google_connection:
+                GoogleDriveUploadQueue._fail(drive_upload, 'No Google connection with Drive enabled')
+                return {'status': 'failed'}
+
+            drive_upload.upload_status = 'UPLOADING'
+            drive_upload.save(update_fields=['upload_status', 'updated_at'])
+
+            try:
+                uploaded_file = GoogleDriveService(google_connection).upload_task_attachment(
+                    task_document,
+                    task_document.work_instance,
+                    drive_upload=drive_upload,
+                    on_chunk=renew_leases
+                )
+            except UploadLeaseLost as e:
+                # Another worker carries on from the saved progress
+                logger.warning(str(e))
+                return {'status': 'locked'}
+            except Exception as e:
+                # Progress saved so far is kept; the next attempt resumes from it
+                attempts = drive_upload.upload_attempts + 1
+                if attempts >= getattr(settings, 'GOOGLE_DRIVE_UPLOAD_MAX_ATTEMPTS', 5):
+                    GoogleDriveUploadQueue._fail(drive_upload, str(e))
+                    return {'status': 'failed'}
+                GoogleDriveMapping.objects.filter(id=upload_id).update(
+                    upload_attempts=F('upload_attempts') + 1,
+                    upload_error=str(e),
+                    updated_at=timezone.now()
+                )
+                return {'status': 'retry', 'countdown': GoogleDriveUploadQueue.retry_delay(attempts - 1)}
+
+            GoogleDriveMapping.objects.filter(id=upload_id).update(
+                google_folder_id=uploaded_file['id'],
+                upload_status='COMPLETED',
+                upload_session_uri=None,
+                upload_bytes_sent=F('upload_total_bytes'),
+                upload_error=None,
+                updated_at=timezone.now()
+            )
+            return {'status': 'completed'}
+        finally:
+            GoogleDriveUploadQueue._release(lock_key, owner)
+
+    @staticmethod
+    def _fail(drive_upload, error):
+        from core.models import GoogleDriveMapping
+
+        logger.error(f"Google Drive upload of '{drive_upload.google_folder_name}' failed: {error}")
+        GoogleDriveMapping.objects.filter(id=drive_upload.id).update(
+            upload_status='FAILED',
+            upload_session_uri=None,
+            upload_error=error,
+            updated_at=timezone.now()
+        )
+
+    # ==========================================================================
+    # Recovery
+    # ==========================================================================
+
+    @staticmethod
+    def resume_stalled():
+        """
+        Dispatch again uploads that made no progress for
+        GOOGLE_DRIVE_UPLOAD_STALL_SECONDS (e.g. their worker was restarted).
+
+        Returns:
+            int: Number of uploads dispatched
+        """
+        from core.models import GoogleDriveMapping
+
+        cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'GOOGLE_DRIVE_UPLOAD_STALL_SECONDS', 900))
+        upload_ids = list(GoogleDriveMapping.objects.filter(
+            folder_type='FILE',
+            upload_status__in=['PENDING', 'UPLOADING'],
+            updated_at__lte=cutoff
+        ).values_list('id', flat=True))
+
+        for upload_id in upload_ids:
+            GoogleDriveUploadQueue.dispatch(upload_id)
+        return len(upload_ids)
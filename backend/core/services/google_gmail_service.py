@@ -10,10 +10,9 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 from django.utils import timezone
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-from .google_oauth_service import GoogleOAuthService
+from .google_client_cache import GoogleClientCache
 
 logger = logging.getLogger(__name__)
 
@@ -37,10 +36,7 @@ class GoogleGmailService:
         Get authenticated Gmail service.
         """
         if not self.service:
-            self.credentials = GoogleOAuthService.get_credentials_from_connection(self.google_connection)
-            if not self.credentials:
-                raise ValueError("Failed to get valid credentials")
-            self.service = build('gmail', 'v1', credentials=self.credentials)
+            self.service, self.credentials = GoogleClientCache.get_client(self.google_connection, 'gmail', 'v1')
         return self.service
 
     def send_email(self, to_email, subject, body_html, body_text=None, cc=None, bcc=None, attachments=None):
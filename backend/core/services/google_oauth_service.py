@@ -5,7 +5,9 @@ Handles Google OAuth authentication and token management.
 
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
+import google_auth_httplib2
+import httplib2
 from django.conf import settings
 from django.utils import timezone
 from google.oauth2.credentials import Credentials
@@ -15,6 +17,12 @@ from googleapiclient.discovery import build
 
 logger = logging.getLogger(__name__)
 
+# Access tokens are refreshed this long before they expire
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Socket timeout (seconds) of Google API HTTP connections
+GOOGLE_API_HTTP_TIMEOUT = 60
+
 # OAuth Scopes for all Google services
 SCOPES = [
     'https://www.googleapis.com/auth/tasks',           # Google Tasks
@@ -143,23 +151,22 @@ class GoogleOAuthService:
             # Get client credentials from PlatformSettings
             client_id, client_secret, _ = get_platform_google_credentials()
 
+            # google-auth compares expiry as naive UTC
+            expiry = google_connection.token_expiry
+            if expiry and timezone.is_aware(expiry):
+                expiry = timezone.make_naive(expiry, dt_timezone.utc)
+
             credentials = Credentials(
                 token=access_token,
                 refresh_token=refresh_token,
                 token_uri="https://oauth2.googleapis.com/token",
                 client_id=client_id,
                 client_secret=client_secret,
-                scopes=SCOPES
+                scopes=SCOPES,
+                expiry=expiry
             )
 
-            # Check if token is expired and refresh if needed
-            if credentials.expired and credentials.refresh_token:
-                credentials.refresh(Request())
-                # Update stored tokens
-                google_connection.encrypt_token(credentials.token, 'access')
-                google_connection.token_expiry = credentials.expiry
-                google_connection.save(update_fields=['access_token', 'token_expiry', 'updated_at'])
-
+            GoogleOAuthService.refresh_credentials_if_expiring(google_connection, credentials)
             return credentials
 
         except Exception as e:
@@ -168,6 +175,48 @@ class GoogleOAuthService:
             google_connection.save(update_fields=['status', 'updated_at'])
             return None
 
+    @staticmethod
+    def refresh_credentials_if_expiring(google_connection, credentials):
+        """
+        Refresh the access token if it expires within TOKEN_REFRESH_MARGIN
+        (or its expiry is unknown) and store the new token on the connection.
+        This is the only place tokens are refreshed.
+
+        Returns:
+            bool: True if the token was refreshed
+        """
+        if not credentials.refresh_token:
+            return False
+        if credentials.expiry and credentials.expiry - TOKEN_REFRESH_MARGIN > datetime.utcnow():
+            return False
+
+        credentials.refresh(Request())
+        # Update stored tokens
+        google_connection.encrypt_token(credentials.token, 'access')
+        google_connection.token_expiry = timezone.make_aware(credentials.expiry, dt_timezone.utc)
+        google_connection.save(update_fields=['access_token', 'token_expiry', 'updated_at'])
+        return True
+
+    @staticmethod
+    def build_service(api, version, credentials, google_connection=None):
+        """
+        Build a Google API client from the discovery document bundled with
+        google-api-python-client (no discovery request), on its own
+        keep-alive HTTP connection. Its calls go through the rate limiter
+        (per google_connection's user and organization) and are counted in
+        google_quota.
+        """
+        from .google_rate_limiter import google_rate_limiter
+
+        http = google_auth_httplib2.AuthorizedHttp(
+            credentials,
+            http=httplib2.Http(timeout=GOOGLE_API_HTTP_TIMEOUT)
+        )
+        return build(
+            api, version, http=http, static_discovery=True, cache_discovery=False,
+            requestBuilder=google_rate_limiter.request_builder(api, google_connection)
+        )
+
     @staticmethod
     def save_credentials_to_connection(google_connection, credentials):
         """
@@ -184,7 +233,7 @@ class GoogleOAuthService:
 
         # Get user info from Google
         try:
-            service = build('oauth2', 'v2', credentials=credentials)
+            service = GoogleOAuthService.build_service('oauth2', 'v2', credentials)
             user_info = service.userinfo().get().execute()
             google_connection.google_email = user_info.get('email')
             google_connection.google_user_id = user_info.get('id')
@@ -215,6 +264,8 @@ class GoogleOAuthService:
         google_connection.drive_folder_id = None
         google_connection.connected_at = None
         google_connection.last_sync_at = None
+        google_connection.tasks_synced_until = None
+        google_connection.calendar_sync_token = None
         google_connection.save()
 
         return google_connection
@@ -244,7 +295,7 @@ class GoogleOAuthService:
         Get list of Google Task lists for the user.
         """
         try:
-            service = build('tasks', 'v1', credentials=credentials)
+            service = GoogleOAuthService.build_service('tasks', 'v1', credentials)
             results = service.tasklists().list().execute()
             return results.get('items', [])
         except Exception as e:
@@ -257,7 +308,7 @@ class GoogleOAuthService:
         Get list of Google Calendars for the user.
         """
         try:
-            service = build('calendar', 'v3', credentials=credentials)
+            service = GoogleOAuthService.build_service('calendar', 'v3', credentials)
             results = service.calendarList().list().execute()
             return results.get('items', [])
         except Exception as e:
@@ -276,7 +327,7 @@ class GoogleOAuthService:
                 return False
 
             # Try to get user info as a verification
-            service = build('oauth2', 'v2', credentials=credentials)
+            service = GoogleOAuthService.build_service('oauth2', 'v2', credentials)
             user_info = service.userinfo().get().execute()
 
             return user_info is not None
@@ -0,0 +1,372 @@
+"""
+Google API Quota Accounting for NexPro
+
+Every Google API call is counted without touching the database:
+
+1. Calls are added to in-process counters (a dict behind a lock).
+2. At most every GOOGLE_QUOTA_FLUSH_INTERVAL seconds, and at exit, the
+   process adds its counters to shared cache counters with atomic
+   increments.
+3. The flush_google_quota_usage Celery task writes the cache counters to
+   GoogleAPIQuotaUsage with one F() update per API type.
+
+remaining_quota() answers from the last known shared count plus this
+process's unflushed calls, so sync workers can check it before every batch.
+
+Use a shared cache backend (e.g. Redis) in production so all processes see
+the same counters. With a per-process backend (LocMemCache, DummyCache) the
+cache counters of other processes would never reach the database, so each
+process writes its counters straight to GoogleAPIQuotaUsage instead (logging
+a warning) and remaining_quota() reads the stored counts.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Counters only matter for their own day; keep them a little longer so late
+# flushes of yesterday's counts still find them
+COUNTER_TIMEOUT = 60 * 60 * 48
+
+# GoogleAPIQuotaUsage counter fields
+COUNTER_FIELDS = (
+    'queries_count', 'quota_units_used', 'read_operations', 'write_operations',
+    'delete_operations', 'failed_requests', 'rate_limit_hits',
+)
+
+OPERATION_FIELDS = {
+    'read': 'read_operations',
+    'write': 'write_operations',
+    'delete': 'delete_operations',
+}
+
+# HTTP method of an API call -> operation type
+METHOD_OPERATIONS = {
+    'GET': 'read',
+    'POST': 'write',
+    'PUT': 'write',
+    'PATCH': 'write',
+    'DELETE': 'delete',
+}
+
+# Google API name -> GoogleAPIQuotaUsage.api_type
+API_TYPES = {
+    'tasks': 'TASKS',
+    'calendar': 'CALENDAR',
+    'drive': 'DRIVE',
+    'gmail': 'GMAIL',
+}
+
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded', 'quotaExceeded')
+
+
+def is_rate_limit_error(error):
+    """True for 429 responses and 403 rateLimitExceeded/userRateLimitExceeded/quotaExceeded"""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    return status == 429 or (
+        status == 403 and any(reason in str(error) for reason in RATE_LIMIT_REASONS)
+    )
+
+
+def get_flush_interval():
+    return getattr(settings, 'GOOGLE_QUOTA_FLUSH_INTERVAL', 5)
+
+
+def is_cache_shared():
+    """False if the default cache keeps its data inside one process"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+class GoogleQuotaCounter:
+    """
+    Buffered Google API usage counters. Use the module-level google_quota
+    instance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {(day, api_type, field): delta} not yet added to the cache
+        self._pending = {}
+        # {(day, api_type): (queries counted in the cache, monotonic time read)}
+        self._known_used = {}
+        self._flushed_at = time.monotonic()
+        self._warned_local_cache = False
+
+    # ==========================================================================
+    # Cache keys
+    # ==========================================================================
+
+    @staticmethod
+    def _used_key(day, api_type):
+        return f'google_quota:{day.isoformat()}:{api_type}:used'
+
+    @staticmethod
+    def _pending_key(day, api_type, field):
+        return f'google_quota:{day.isoformat()}:{api_type}:pending:{field}'
+
+    @staticmethod
+    def _incr(key, delta, seed):
+        """Atomically add delta to a cache counter, seeding it with seed() if missing"""
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            # Missing - only one process wins the add(), the others just increment
+            cache.add(key, seed(), COUNTER_TIMEOUT)
+            return cache.incr(key, delta)
+
+    @staticmethod
+    def _stored_used(day, api_type):
+        from core.models import GoogleAPIQuotaUsage
+
+        return GoogleAPIQuotaUsage.objects.filter(
+            date=day, api_type=api_type
+        ).values_list('queries_count', flat=True).first() or 0
+
+    # ==========================================================================
+    # Recording (hot path - no database or cache round trips)
+    # ==========================================================================
+
+    def record(self, api_type, queries=1, quota_units=0, operation_type='read',
+               failed=False, rate_limited=False):
+        """
+        Count Google API calls.
+
+        Args:
+            api_type: 'TASKS', 'CALENDAR', 'DRIVE' or 'GMAIL'
+            queries: Number of calls
+            quota_units: Quota units consumed (Gmail)
+            operation_type: 'read', 'write' or 'delete'
+            failed: Count a failed request
+            rate_limited: Count a rate limit error
+        """
+        day = timezone.now().date()
+        deltas = {'queries_count': queries, 'quota_units_used': quota_units}
+        if operation_type in OPERATION_FIELDS:
+            deltas[OPERATION_FIELDS[operation_type]] = queries
+        if failed:
+            deltas['failed_requests'] = 1
+        if rate_limited:
+            deltas['rate_limit_hits'] = 1
+
+        with self._lock:
+            for field, delta in deltas.items():
+                if delta:
+                    key = (day, api_type, field)
+                    self._pending[key] = self._pending.get(key, 0) + delta
+            due = time.monotonic() - self._flushed_at >= get_flush_interval()
+
+        if due:
+            self.flush_local()
+
+    def record_error(self, api_type, error):
+        """Count a failed call; rate limit errors also as rate limit hits"""
+        self.record(api_type, queries=0, failed=True, rate_limited=is_rate_limit_error(error))
+
+    # ==========================================================================
+    # Flushing
+    # ==========================================================================
+
+    def flush_local(self):
+        """
+        Add this process's counters to the shared cache counters (or, without
+        a shared cache, write them to GoogleAPIQuotaUsage).
+
+        Returns:
+            int: Number of API calls written to the database
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+
+        if not pending:
+            return 0
+
+        if not is_cache_shared():
+            return self._persist_local(pending)
+
+        try:
+            for (day, api_type, field), delta in pending.items():
+                self._incr(self._pending_key(day, api_type, field), delta, lambda: 0)
+                if field == 'queries_count':
+                    used = self._incr(
+                        self._used_key(day, api_type), delta, lambda: self._stored_used(day, api_type)
+                    )
+                    with self._lock:
+                        self._known_used[(day, api_type)] = (used, time.monotonic())
+        except Exception as e:
+            logger.error(f"Failed to flush Google API usage counters: {str(e)}")
+        return 0
+
+    def _persist_local(self, pending):
+        """
+        Write this process's counters to GoogleAPIQuotaUsage (no shared cache
+        to add them to). Counters that fail to write are kept for the next
+        flush.
+
+        Returns:
+            int: Number of API calls written
+        """
+        if not self._warned_local_cache:
+            self._warned_local_cache = True
+            logger.warning(
+                "The default cache is per-process; Google API usage is written to the database on "
+                "every flush and quotas are not shared between processes. Configure a shared cache "
+                "backend (CACHE_BACKEND, e.g. Redis)."
+            )
+
+        grouped = {}
+        for (day, api_type, field), delta in pending.items():
+            grouped.setdefault((day, api_type), {})[field] = delta
+
+        written = 0
+        for (day, api_type), deltas in grouped.items():
+            try:
+                self._persist(day, api_type, deltas)
+            except Exception as e:
+                with self._lock:
+                    for field, delta in deltas.items():
+                        key = (day, api_type, field)
+                        self._pending[key] = self._pending.get(key, 0) + delta
+                logger.error(f"Failed to write {api_type} API usage: {str(e)}")
+                continue
+            written += deltas.get('queries_count', 0)
+            with self._lock:
+                # Re-read the stored count on the next get_used()
+                self._known_used.pop((day, api_type), None)
+        return written
+
+    def flush(self, day=None):
+        """
+        Write the shared cache counters of a day to GoogleAPIQuotaUsage.
+
+        Returns:
+            int: Number of API calls written (including this process's
+                counters when there is no shared cache)
+        """
+        from core.models import GoogleAPIQuotaUsage
+
+        written = self.flush_local()
+
+        day = day or timezone.now().date()
+        for api_type, _ in GoogleAPIQuotaUsage.API_TYPE_CHOICES:
+            keys = {self._pending_key(day, api_type, field): field for field in COUNTER_FIELDS}
+            deltas = {}
+            for key, pending in cache.get_many(list(keys)).items():
+                if pending and pending > 0:
+                    # Take the pending count first so concurrent flushes do not write it twice
+                    cache.decr(key, pending)
+                    deltas[keys[key]] = pending
+            if not deltas:
+                continue
+
+            try:
+                self._persist(day, api_type, deltas)
+            except Exception as e:
+                for field, delta in deltas.items():
+                    self._incr(self._pending_key(day, api_type, field), delta, lambda: 0)
+                logger.error(f"Failed to write {api_type} API usage: {str(e)}")
+                continue
+            written += deltas.get('queries_count', 0)
+
+        return written
+
+    def flush_recent(self):
+        """Flush today's and yesterday's counters (for the periodic task)"""
+        today = timezone.now().date()
+        return self.flush(today - timedelta(days=1)) + self.flush(today)
+
+    @staticmethod
+    def _persist(day, api_type, deltas):
+        """Add deltas to the GoogleAPIQuotaUsage row of an API type"""
+        from core.models import GoogleAPIQuotaUsage
+
+        updates = {field: F(field) + delta for field, delta in deltas.items()}
+        rows = GoogleAPIQuotaUsage.objects.filter(date=day, api_type=api_type)
+        if rows.update(**updates, updated_at=timezone.now()):
+            return
+        try:
+            with transaction.atomic():
+                GoogleAPIQuotaUsage.objects.create(date=day, api_type=api_type, **deltas)
+        except IntegrityError:
+            # Created concurrently
+            rows.update(**updates, updated_at=timezone.now())
+
+    # ==========================================================================
+    # Reading
+    # ==========================================================================
+
+    def get_used(self, api_type, day=None):
+        """API calls counted on a day (default today), including unflushed calls of this process"""
+        day = day or timezone.now().date()
+        with self._lock:
+            used, read_at = self._known_used.get((day, api_type), (None, 0))
+            local = self._pending.get((day, api_type, 'queries_count'), 0)
+
+        # Re-read the shared count once it is older than the flush interval
+        if used is None or time.monotonic() - read_at >= get_flush_interval():
+            if not is_cache_shared():
+                used = self._stored_used(day, api_type)
+                with self._lock:
+                    self._known_used[(day, api_type)] = (used, time.monotonic())
+                return used + local
+
+            used = cache.get(self._used_key(day, api_type))
+            if used is None:
+                used = self._stored_used(day, api_type)
+                cache.add(self._used_key(day, api_type), used, COUNTER_TIMEOUT)
+            with self._lock:
+                self._known_used[(day, api_type)] = (used, time.monotonic())
+        return used + local
+
+    def get_pending(self, day):
+        """
+        Counts not yet written to GoogleAPIQuotaUsage for a day.
+
+        Returns:
+            dict: {api_type: {field: delta}}
+        """
+        from core.models import GoogleAPIQuotaUsage
+
+        keys = {
+            self._pending_key(day, api_type, field): (api_type, field)
+            for api_type, _ in GoogleAPIQuotaUsage.API_TYPE_CHOICES
+            for field in COUNTER_FIELDS
+        }
+        pending = {}
+        for key, delta in cache.get_many(list(keys)).items():
+            if delta and delta > 0:
+                api_type, field = keys[key]
+                pending.setdefault(api_type, {})[field] = delta
+        return pending
+
+    def remaining_quota(self, api_type):
+        """
+        Calls left in today's quota for an API type
+        (PlatformSettings.google_*_daily_quota). Cheap enough to check
+        before every batch.
+
+        Returns:
+            int or None: Remaining calls (0 when exhausted), None if no quota is set
+        """
+        from core.models import GoogleAPIQuotaUsage
+
+        quota_limit = GoogleAPIQuotaUsage.get_quota_limits().get(api_type, 0)
+        if not quota_limit:
+            return None
+        return max(0, quota_limit - self.get_used(api_type))
+
+
+google_quota = GoogleQuotaCounter()
+atexit.register(google_quota.flush_local)
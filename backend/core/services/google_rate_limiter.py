@@ -0,0 +1,325 @@
+"""
+Google API Rate Limiter for NexPro
+
+Every Google API call made through a client from
+GoogleOAuthService.build_service waits here before it is sent:
+
+- Token buckets per (project, API) and per (user, API), refilled every
+  second from GOOGLE_API_RATE_LIMITS. Buckets are shared cache counters
+  changed with atomic increments, so all processes draw from the same
+  buckets.
+- Fair sharing across organizations: while several organizations call an
+  API, each may take at most an equal share of the project bucket per
+  second. An organization alone gets all of it.
+- Backoff: a 429 or 403 rateLimitExceeded response blocks the project (or
+  user, for userRateLimitExceeded) bucket for an exponentially growing,
+  jittered delay. Batched calls that were rate limited are retried.
+- A call that cannot get capacity in time fails with
+  GoogleRateLimitExceeded, a 429 HttpError, so callers handle it like a
+  rate limit response from Google. Celery tasks wait up to
+  GOOGLE_API_RATE_LIMIT_MAX_WAIT seconds, web requests only
+  GOOGLE_API_RATE_LIMIT_REQUEST_MAX_WAIT.
+
+Use a shared cache backend (e.g. Redis) in production.
+"""
+
+import logging
+import random
+import time
+import httplib2
+from celery import current_task
+from django.conf import settings
+from django.core.cache import cache
+from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest
+
+from .google_quota import API_TYPES, METHOD_OPERATIONS, google_quota, is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+
+# Calls per batch HTTP request (Google limit)
+BATCH_SIZE = 50
+
+# (project calls per second, calls per second per user) by API type
+DEFAULT_RATE_LIMITS = {
+    'TASKS': (50, 25),
+    'CALENDAR': (100, 10),
+    'DRIVE': (200, 20),
+    'GMAIL': (100, 10),
+}
+
+# Backoff after rate limit errors: BACKOFF_BASE * 2^n seconds, at most BACKOFF_MAX
+BACKOFF_BASE = 1
+BACKOFF_MAX = 64
+# The backoff level resets after this many seconds without rate limit errors
+BACKOFF_RESET = 120
+
+# Times rate limited calls in a batch are retried
+BATCH_RETRIES = 3
+
+# Bucket and fair share counters only live for their own second
+WINDOW_TIMEOUT = 5
+
+
+class GoogleRateLimitExceeded(HttpError):
+    """
+    A call could not be scheduled within the maximum wait (see get_max_wait).
+    Raised as a 429 HttpError so callers handle it like a rate limit
+    response from Google.
+    """
+
+    def __init__(self, message):
+        super().__init__(httplib2.Response({'status': 429}), message.encode())
+
+
+def get_rate_limits(api_type):
+    return getattr(settings, 'GOOGLE_API_RATE_LIMITS', DEFAULT_RATE_LIMITS).get(api_type, (None, None))
+
+
+def get_max_wait():
+    """Seconds a call may wait for capacity: long in Celery tasks, short in web requests"""
+    if current_task and current_task.request.id:
+        return getattr(settings, 'GOOGLE_API_RATE_LIMIT_MAX_WAIT', 60)
+    return getattr(settings, 'GOOGLE_API_RATE_LIMIT_REQUEST_MAX_WAIT', 5)
+
+
+class GoogleRateLimiter:
+    """
+    Shared token-bucket scheduler for Google API calls. Use the module-level
+    google_rate_limiter instance.
+    """
+
+    # ==========================================================================
+    # Cache keys
+    # ==========================================================================
+
+    @staticmethod
+    def _scope(api_type, user_id=None):
+        return f'{api_type}:user:{user_id}' if user_id else f'{api_type}:project'
+
+    @staticmethod
+    def _bucket_key(scope, window):
+        return f'google_rate:{scope}:{window}'
+
+    @staticmethod
+    def _backoff_key(scope):
+        return f'google_rate:{scope}:backoff_until'
+
+    @staticmethod
+    def _backoff_level_key(scope):
+        return f'google_rate:{scope}:backoff_level'
+
+    @staticmethod
+    def _take(key, count):
+        """
+        Add count to a bucket counter; returns the new value (0 if the cache
+        cannot keep the counter - calls are not limited then)
+        """
+        try:
+            return cache.incr(key, count)
+        except ValueError:
+            cache.add(key, 0, WINDOW_TIMEOUT)
+            try:
+                return cache.incr(key, count)
+            except ValueError:
+                # Evicted again, or a cache that stores nothing (DummyCache)
+                return 0
+
+    @staticmethod
+    def _give_back(taken):
+        for key, count in taken:
+            try:
+                cache.decr(key, count)
+            except ValueError:
+                pass
+
+    # ==========================================================================
+    # Scheduling
+    # ==========================================================================
+
+    def _try_acquire(self, api_type, user_id, organization_id, count):
+        """
+        Take count tokens from the project, user and organization share
+        buckets of the current second.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds to wait
+        """
+        now = time.time()
+        project_scope = self._scope(api_type)
+        user_scope = self._scope(api_type, user_id) if user_id else None
+
+        # Backoff after rate limit errors
+        backoff_keys = [self._backoff_key(project_scope)]
+        if user_scope:
+            backoff_keys.append(self._backoff_key(user_scope))
+        backoff_until = max(cache.get_many(backoff_keys).values(), default=0)
+        if backoff_until > now:
+            return backoff_until - now
+
+        project_rate, user_rate = get_rate_limits(api_type)
+        window = int(now)
+        next_window = window + 1 - now
+        buckets = []
+
+        if organization_id and project_rate:
+            # Count organizations calling this API in this second
+            if cache.add(f'google_rate:{api_type}:org:{organization_id}:seen:{window}', 1, WINDOW_TIMEOUT):
+                self._take(f'google_rate:{api_type}:active:{window}', 1)
+            active = cache.get_many([
+                f'google_rate:{api_type}:active:{window - 1}',
+                f'google_rate:{api_type}:active:{window}',
+            ])
+            share = project_rate // max([1, *active.values()])
+            buckets.append((f'google_rate:{api_type}:org:{organization_id}:{window}', max(share, count)))
+
+        if user_scope and user_rate:
+            buckets.append((self._bucket_key(user_scope, window), max(user_rate, count)))
+        if project_rate:
+            buckets.append((self._bucket_key(project_scope, window), max(project_rate, count)))
+
+        taken = []
+        for key, capacity in buckets:
+            taken.append((key, count))
+            if self._take(key, count) > capacity:
+                self._give_back(taken)
+                return next_window
+        return 0
+
+    def acquire(self, api_type, user_id=None, organization_id=None, count=1):
+        """
+        Wait until count calls may be made.
+
+        Args:
+            api_type: 'TASKS', 'CALENDAR', 'DRIVE' or 'GMAIL'
+            user_id: User whose connection makes the calls
+            organization_id: Organization of the user (fair sharing)
+            count: Number of calls (a batch takes one token per call)
+
+        Raises:
+            GoogleRateLimitExceeded: If the calls cannot be made within
+                get_max_wait() seconds
+        """
+        deadline = time.monotonic() + get_max_wait()
+        while True:
+            wait = self._try_acquire(api_type, user_id, organization_id, count)
+            if not wait:
+                return
+            if time.monotonic() + wait > deadline:
+                raise GoogleRateLimitExceeded(f"{api_type} API rate limit: no capacity for {count} call(s)")
+            # Jitter so waiting workers don't all retry at the same instant
+            time.sleep(wait + random.uniform(0, 0.05))
+
+    def backoff(self, api_type, user_id=None, error=None):
+        """
+        Block calls after a rate limit error: the user's bucket for
+        userRateLimitExceeded, otherwise the project's bucket.
+        """
+        scope = self._scope(api_type, user_id if user_id and 'userRateLimitExceeded' in str(error) else None)
+        level_key = self._backoff_level_key(scope)
+        if cache.add(level_key, 1, BACKOFF_RESET):
+            level = 1
+        else:
+            level = cache.incr(level_key)
+            cache.touch(level_key, BACKOFF_RESET)
+
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (level - 1)) * random.uniform(0.5, 1)
+        cache.set(self._backoff_key(scope), time.time() + delay, int(delay) + 1)
+        logger.warning(f"Google {api_type} rate limit hit ({scope}), backing off {delay:.1f}s")
+
+    # ==========================================================================
+    # Requests
+    # ==========================================================================
+
+    def request_builder(self, api, google_connection=None):
+        """
+        requestBuilder for googleapiclient.discovery.build: requests wait
+        for the rate limiter when executed and are counted in google_quota.
+        """
+        api_type = API_TYPES.get(api)
+        if api_type is None:
+            return HttpRequest
+
+        user_id = google_connection.user_id if google_connection else None
+        organization_id = google_connection.organization_id if google_connection else None
+
+        def build_request(http, *args, **kwargs):
+            request = RateLimitedHttpRequest(http, *args, **kwargs)
+            request.rate_limit_scope = (api_type, user_id, organization_id)
+            google_quota.record(api_type, operation_type=METHOD_OPERATIONS.get(request.method, 'read'))
+            return request
+
+        return build_request
+
+    def execute_batch(self, service, requests, api_type, google_connection=None):
+        """
+        Execute API requests with batch HTTP, up to BATCH_SIZE calls (and no
+        more than the user's per-second rate) per round trip. Each batch
+        waits for one token per call; rate limited calls are retried after
+        backing off.
+
+        Args:
+            service: Google API client
+            requests: Dict of {request_id (str): HttpRequest}
+            api_type: API type of the client
+            google_connection: GoogleConnection the client belongs to
+
+        Returns:
+            dict: {request_id: (response, HttpError or None)}
+        """
+        user_id = google_connection.user_id if google_connection else None
+        organization_id = google_connection.organization_id if google_connection else None
+        results = {}
+
+        def callback(request_id, response, exception):
+            results[request_id] = (response, exception)
+            if exception is not None:
+                google_quota.record_error(api_type, exception)
+
+        # A batch never takes more than a second's worth of the user's tokens
+        _, user_rate = get_rate_limits(api_type)
+        batch_size = min(BATCH_SIZE, user_rate) if user_id and user_rate else BATCH_SIZE
+
+        pending = dict(requests)
+        for attempt in range(BATCH_RETRIES + 1):
+            items = list(pending.items())
+            for i in range(0, len(items), batch_size):
+                chunk = items[i:i + batch_size]
+                self.acquire(api_type, user_id, organization_id, count=len(chunk))
+                batch = service.new_batch_http_request(callback=callback)
+                for request_id, request in chunk:
+                    batch.add(request, request_id=request_id)
+                batch.execute()
+
+            errors = {request_id: results.get(request_id, (None, None))[1] for request_id in pending}
+            rate_limited = [request_id for request_id, error in errors.items() if is_rate_limit_error(error)]
+            if not rate_limited or attempt == BATCH_RETRIES:
+                break
+            # The next acquire() waits out the backoff
+            self.backoff(api_type, user_id, errors[rate_limited[0]])
+            pending = {request_id: pending[request_id] for request_id in rate_limited}
+
+        return results
+
+
+class RateLimitedHttpRequest(HttpRequest):
+    """HttpRequest that waits for google_rate_limiter before it is sent"""
+
+    rate_limit_scope = None
+
+    def execute(self, http=None, num_retries=0):
+        if self.rate_limit_scope:
+            google_rate_limiter.acquire(*self.rate_limit_scope)
+        try:
+            return super().execute(http=http, num_retries=num_retries)
+        except HttpError as e:
+            if self.rate_limit_scope:
+                api_type, user_id, _ = self.rate_limit_scope
+                google_quota.record_error(api_type, e)
+                if is_rate_limit_error(e):
+                    google_rate_limiter.backoff(api_type, user_id, e)
+            raise
+
+
+google_rate_limiter = GoogleRateLimiter()
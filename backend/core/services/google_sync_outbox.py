@@ -0,0 +1,339 @@
+"""
+Google Tasks Sync Outbox for NexPro
+
+WorkInstance saves and deletes no longer call Google inline. The signals
+record a pending operation in the GoogleSyncOutbox table once the
+transaction commits, one row per task: a later change to the same task
+updates that row, so a burst of changes (edits, timer ticks) becomes a
+single sync.
+
+The drain_google_sync_outbox Celery task picks up rows that have been
+quiet for GOOGLE_SYNC_DEBOUNCE_SECONDS and sends them in batches per Google
+connection (GoogleTasksService batch HTTP). Rows of a connection that fails
+are retried on the next run, up to GOOGLE_SYNC_OUTBOX_MAX_ATTEMPTS times.
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Cached IDs of users with Google Tasks connected, so the signals need no query
+CONNECTED_USERS_CACHE_KEY = 'google_sync:tasks_user_ids'
+CONNECTED_USERS_CACHE_TIMEOUT = 300
+
+# Only one drain runs at a time
+DRAIN_LOCK_KEY = 'google_sync:outbox_drain'
+DRAIN_LOCK_TIMEOUT = 600
+
+WORK_INSTANCE_SELECT_RELATED = (
+    'client_work__client',
+    'client_work__work_type',
+    'assigned_to',
+    'organization',
+)
+
+
+class GoogleSyncOutboxService:
+    """
+    Service for queueing and draining Google Tasks sync operations.
+    """
+
+    # ==========================================================================
+    # Connected users
+    # ==========================================================================
+
+    @staticmethod
+    def get_connected_user_ids():
+        """IDs of users with an active Google Tasks connection (cached)"""
+        from core.models import GoogleConnection
+
+        user_ids = cache.get(CONNECTED_USERS_CACHE_KEY)
+        if user_ids is None:
+            user_ids = set(GoogleConnection.objects.filter(
+                status='CONNECTED',
+                tasks_enabled=True
+            ).values_list('user_id', flat=True))
+            cache.set(CONNECTED_USERS_CACHE_KEY, user_ids, CONNECTED_USERS_CACHE_TIMEOUT)
+        return user_ids
+
+    @staticmethod
+    def invalidate_connected_users():
+        cache.delete(CONNECTED_USERS_CACHE_KEY)
+
+    # ==========================================================================
+    # Queueing
+    # ==========================================================================
+
+    @staticmethod
+    def _write(entries):
+        """Insert outbox rows, replacing the pending row of the same task"""
+        from core.models import GoogleSyncOutbox
+
+        GoogleSyncOutbox.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['work_instance_id'],
+            update_fields=[
+                'organization', 'user', 'operation', 'google_task_id',
+                'google_tasklist_id', 'attempts', 'last_error', 'updated_at'
+            ]
+        )
+
+    @staticmethod
+    def enqueue_upserts(work_instances):
+        """
+        Queue create/update syncs for WorkInstances assigned to users with
+        Google Tasks connected. Written after the current transaction commits.
+        """
+        from core.models import GoogleSyncOutbox
+
+        connected_user_ids = GoogleSyncOutboxService.get_connected_user_ids()
+        entries = [
+            GoogleSyncOutbox(
+                organization_id=work_instance.organization_id,
+                work_instance_id=work_instance.id,
+                user_id=work_instance.assigned_to_id,
+                operation='UPSERT'
+            )
+            for work_instance in work_instances
+            if work_instance.assigned_to_id in connected_user_ids
+        ]
+        if entries:
+            transaction.on_commit(lambda: GoogleSyncOutboxService._write(entries))
+
+    @staticmethod
+    def enqueue_delete(work_instance, mapping):
+        """
+        Queue deletion of a WorkInstance's Google Task. The mapping's IDs are
+        kept in the outbox row because the mapping is deleted with the task.
+        """
+        from core.models import GoogleSyncOutbox
+
+        entry = GoogleSyncOutbox(
+            organization_id=work_instance.organization_id,
+            work_instance_id=work_instance.id,
+            user_id=mapping.user_id,
+            operation='DELETE',
+            google_task_id=mapping.google_task_id,
+            google_tasklist_id=mapping.google_tasklist_id
+        )
+        transaction.on_commit(lambda: GoogleSyncOutboxService._write([entry]))
+
+    # ==========================================================================
+    # Syncing
+    # ==========================================================================
+
+    @staticmethod
+    def sync_work_instances(work_instances):
+        """
+        Sync WorkInstances to their assignees' Google Tasks, one batched sync
+        per connection. Connections and organization sync settings are
+        loaded once.
+
+        Returns:
+            dict: synced, skipped and errors counts, and failed_user_ids -
+                users whose connection failed as a whole
+        """
+        from core.models import GoogleConnection, GoogleSyncSettings
+        from core.services.google_tasks_service import GoogleTasksService
+
+        work_instances = [wi for wi in work_instances if wi.assigned_to_id]
+
+        connections = {
+            connection.user_id: connection
+            for connection in GoogleConnection.objects.filter(
+                user_id__in={wi.assigned_to_id for wi in work_instances},
+                status='CONNECTED',
+                tasks_enabled=True
+            ).select_related('user')
+        }
+
+        sync_settings_by_org = {
+            sync_settings.organization_id: sync_settings
+            for sync_settings in GoogleSyncSettings.objects.filter(
+                organization_id__in={wi.organization_id for wi in work_instances}
+            ).prefetch_related('sync_work_types')
+        }
+
+        stats = {'synced': 0, 'skipped': 0, 'errors': 0, 'failed_user_ids': {}}
+        by_connection = {}
+
+        for work_instance in work_instances:
+            google_connection = connections.get(work_instance.assigned_to_id)
+            if not google_connection:
+                # Employee doesn't have Google Tasks enabled
+                stats['skipped'] += 1
+                continue
+
+            sync_settings = sync_settings_by_org.get(work_instance.organization_id)
+            if sync_settings:
+                if not sync_settings.sync_tasks_to_google:
+                    stats['skipped'] += 1
+                    continue
+                # Check work type filter
+                work_type_ids = {wt.id for wt in sync_settings.sync_work_types.all()}
+                if work_type_ids and work_instance.client_work.work_type_id not in work_type_ids:
+                    stats['skipped'] += 1
+                    continue
+
+            by_connection.setdefault(google_connection.id, (google_connection, []))[1].append(work_instance)
+
+        for google_connection, connection_work_instances in by_connection.values():
+            try:
+                synced, errors = GoogleTasksService(google_connection).sync_tasks_to_google(
+                    connection_work_instances
+                )
+                stats['synced'] += synced
+                stats['errors'] += errors
+            except Exception as e:
+                stats['errors'] += len(connection_work_instances)
+                stats['failed_user_ids'][google_connection.user_id] = str(e)
+                logger.error(
+                    f"Error syncing {len(connection_work_instances)} WorkInstance(s) to Google "
+                    f"for user {google_connection.user.username}: {str(e)}",
+                    exc_info=True
+                )
+
+        return stats
+
+    @staticmethod
+    def delete_tasks(entries):
+        """
+        Delete the Google Tasks of DELETE outbox rows, one batch per connection.
+
+        Returns:
+            dict: deleted and errors counts, and failed_user_ids
+        """
+        from core.models import GoogleConnection
+        from core.services.google_tasks_service import GoogleTasksService
+
+        stats = {'deleted': 0, 'errors': 0, 'failed_user_ids': {}}
+        connections = {
+            connection.user_id: connection
+            for connection in GoogleConnection.objects.filter(
+                user_id__in={entry.user_id for entry in entries},
+                status='CONNECTED',
+                tasks_enabled=True
+            ).select_related('user')
+        }
+
+        by_user = {}
+        for entry in entries:
+            if entry.user_id in connections:
+                by_user.setdefault(entry.user_id, []).append(
+                    (entry.organization_id, entry.google_task_id, entry.google_tasklist_id)
+                )
+            # Otherwise the user disconnected Google Tasks - nothing to delete
+
+        for user_id, tasks in by_user.items():
+            try:
+                deleted, errors = GoogleTasksService(connections[user_id]).delete_tasks_from_google(tasks)
+                stats['deleted'] += deleted
+                stats['errors'] += errors
+            except Exception as e:
+                stats['errors'] += len(tasks)
+                stats['failed_user_ids'][user_id] = str(e)
+                logger.error(f"Error deleting {len(tasks)} Google Task(s) for user {user_id}: {str(e)}")
+
+        return stats
+
+    # ==========================================================================
+    # Draining
+    # ==========================================================================
+
+    @staticmethod
+    def drain(limit=None):
+        """
+        Send pending outbox operations that have not changed for
+        GOOGLE_SYNC_DEBOUNCE_SECONDS.
+
+        Returns:
+            dict: Statistics about the drain
+        """
+        from core.models import GoogleSyncOutbox, WorkInstance
+        from core.services.google_quota import google_quota
+
+        # Rows wait in the outbox until the daily quota resets
+        remaining = google_quota.remaining_quota('TASKS')
+        if remaining == 0:
+            return {'skipped': 'Google Tasks daily quota reached'}
+
+        if not cache.add(DRAIN_LOCK_KEY, 1, DRAIN_LOCK_TIMEOUT):
+            return {'skipped': 'drain already running'}
+
+        try:
+            limit = limit or getattr(settings, 'GOOGLE_SYNC_OUTBOX_BATCH', 1000)
+            if remaining is not None:
+                limit = min(limit, remaining)
+            max_attempts = getattr(settings, 'GOOGLE_SYNC_OUTBOX_MAX_ATTEMPTS', 5)
+            cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'GOOGLE_SYNC_DEBOUNCE_SECONDS', 10))
+
+            entries = list(
+                GoogleSyncOutbox.objects.filter(updated_at__lte=cutoff).order_by('updated_at')[:limit]
+            )
+            if not entries:
+                return {'processed': 0}
+
+            existing = {
+                wi.id: wi
+                for wi in WorkInstance.objects.filter(
+                    id__in=[entry.work_instance_id for entry in entries]
+                ).select_related(*WORK_INSTANCE_SELECT_RELATED)
+            }
+
+            # A row whose task no longer exists (UPSERT) or still exists
+            # (DELETE from a rolled back transaction) is dropped
+            upserts = [e for e in entries if e.operation == 'UPSERT' and e.work_instance_id in existing]
+            deletes = [e for e in entries if e.operation == 'DELETE' and e.work_instance_id not in existing]
+
+            upsert_stats = GoogleSyncOutboxService.sync_work_instances(
+                [existing[entry.work_instance_id] for entry in upserts]
+            )
+            delete_stats = GoogleSyncOutboxService.delete_tasks(deletes)
+
+            failed = dict(upsert_stats['failed_user_ids'])
+            failed.update(delete_stats['failed_user_ids'])
+
+            # User whose connection each processed row went through
+            sent_by = {entry.id: existing[entry.work_instance_id].assigned_to_id for entry in upserts}
+            sent_by.update((entry.id, entry.user_id) for entry in deletes)
+
+            retry = {}
+            done_ids = []
+            for entry in entries:
+                user_id = sent_by.get(entry.id)
+                if user_id in failed and entry.attempts + 1 < max_attempts:
+                    retry.setdefault(user_id, []).append(entry.id)
+                else:
+                    if user_id in failed:
+                        logger.error(
+                            f"Dropping Google sync of WorkInstance {entry.work_instance_id} "
+                            f"after {entry.attempts + 1} attempts: {failed[user_id]}"
+                        )
+                    done_ids.append(entry.id)
+
+            # Rows changed since they were read (updated_at > cutoff) stay queued
+            GoogleSyncOutbox.objects.filter(id__in=done_ids, updated_at__lte=cutoff).delete()
+            for user_id, entry_ids in retry.items():
+                GoogleSyncOutbox.objects.filter(id__in=entry_ids, updated_at__lte=cutoff).update(
+                    attempts=F('attempts') + 1,
+                    last_error=failed[user_id]
+                )
+
+            return {
+                'processed': len(entries),
+                'synced': upsert_stats['synced'],
+                'deleted': delete_stats['deleted'],
+                'skipped': upsert_stats['skipped'],
+                'errors': upsert_stats['errors'] + delete_stats['errors'],
+                'retrying': sum(len(entry_ids) for entry_ids in retry.values()),
+            }
+        finally:
+            cache.delete(DRAIN_LOCK_KEY)
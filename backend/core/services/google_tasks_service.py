@@ -4,16 +4,34 @@ Handles synchronization between NexPro tasks and Google Tasks.
 """
 
 import logging
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from celery.exceptions import SoftTimeLimitExceeded
 from django.utils import timezone
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-from .google_oauth_service import GoogleOAuthService
+from .google_client_cache import GoogleClientCache
+from .google_rate_limiter import google_rate_limiter
 
 logger = logging.getLogger(__name__)
 
 
+# Tasks changed up to this long before the last sync cursor are listed again,
+# to allow for clock skew; tasks already seen are skipped by their updated time
+SYNC_CURSOR_OVERLAP = timedelta(minutes=1)
+
+# A Google change that failed to apply this many syncs in a row is given up
+# on (logged as failed) so it no longer holds the sync cursor back; a later
+# change of the same task is tried again
+MAX_SYNC_FAILURES = 5
+
+
+def parse_google_datetime(value):
+    """Parse an RFC 3339 timestamp from the Google API"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
 class GoogleTasksService:
     """
     Service for syncing NexPro WorkInstances with Google Tasks.
@@ -33,12 +51,25 @@ class GoogleTasksService:
         Get authenticated Google Tasks service.
         """
         if not self.service:
-            self.credentials = GoogleOAuthService.get_credentials_from_connection(self.google_connection)
-            if not self.credentials:
-                raise ValueError("Failed to get valid credentials")
-            self.service = build('tasks', 'v1', credentials=self.credentials)
+            self.service, self.credentials = GoogleClientCache.get_client(self.google_connection, 'tasks', 'v1')
         return self.service
 
+    def _execute_batch(self, requests):
+        """
+        Execute API requests with batch HTTP through the rate limiter, up to
+        google_rate_limiter.BATCH_SIZE calls per round trip (see
+        GoogleRateLimiter.execute_batch).
+
+        Args:
+            requests: Dict of {request_id (str): HttpRequest}
+
+        Returns:
+            dict: {request_id: (response, HttpError or None)}
+        """
+        return google_rate_limiter.execute_batch(
+            self._get_service(), requests, 'TASKS', self.google_connection
+        )
+
     def get_or_create_tasklist(self, title='NexPro Tasks'):
         """
         Get or create a task list for NexPro tasks.
@@ -177,6 +208,132 @@ class GoogleTasksService:
             )
             raise
 
+    def sync_tasks_to_google(self, work_instances):
+        """
+        Sync many NexPro WorkInstances to Google Tasks with batch HTTP
+        requests (up to google_rate_limiter.BATCH_SIZE calls per round trip).
+        Existing mappings are loaded with one query; mappings and sync logs
+        are written with bulk operations.
+
+        Returns: (synced_count, error_count)
+        """
+        from core.models import GoogleTaskMapping, GoogleSyncLog
+
+        work_instances = list(work_instances)
+        if not work_instances:
+            return 0, 0
+
+        service = self._get_service()
+        tasklist_id = self.get_or_create_tasklist()
+        user = self.google_connection.user
+
+        # A task reassigned from another user gets a new Google Task in this
+        # user's list; its mapping is taken over
+        mappings = {
+            mapping.work_instance_id: mapping
+            for mapping in GoogleTaskMapping.objects.filter(
+                work_instance_id__in=[work_instance.id for work_instance in work_instances]
+            )
+        }
+        work_instances_by_key = {str(work_instance.id): work_instance for work_instance in work_instances}
+        task_data = {
+            key: self._build_google_task_data(work_instance)
+            for key, work_instance in work_instances_by_key.items()
+        }
+
+        def is_update(work_instance):
+            mapping = mappings.get(work_instance.id)
+            return bool(mapping and mapping.user_id == user.id and mapping.google_tasklist_id == tasklist_id)
+
+        requests = {}
+        for key, work_instance in work_instances_by_key.items():
+            if is_update(work_instance):
+                requests[key] = service.tasks().update(
+                    tasklist=tasklist_id,
+                    task=mappings[work_instance.id].google_task_id,
+                    body=task_data[key]
+                )
+            else:
+                requests[key] = service.tasks().insert(tasklist=tasklist_id, body=task_data[key])
+        results = self._execute_batch(requests)
+
+        # Tasks deleted in Google are created again
+        missing = {
+            key: service.tasks().insert(tasklist=tasklist_id, body=task_data[key])
+            for key, (_, error) in results.items()
+            if isinstance(error, HttpError) and error.resp.status == 404
+            and is_update(work_instances_by_key[key])
+        }
+        if missing:
+            results.update(self._execute_batch(missing))
+
+        now = timezone.now()
+        new_mappings = []
+        changed_mappings = []
+        logs = []
+        error_count = 0
+
+        for key, work_instance in work_instances_by_key.items():
+            google_task, error = results.get(key, (None, None))
+            if error is not None or google_task is None:
+                error_count += 1
+                logger.error(f"Error syncing WorkInstance {work_instance.id} to Google: {str(error)}")
+                logs.append(GoogleSyncLog(
+                    organization=work_instance.organization,
+                    user=user,
+                    sync_type='TASK_TO_GOOGLE',
+                    status='FAILED',
+                    work_instance=work_instance,
+                    error_message=str(error)
+                ))
+                continue
+
+            mapping = mappings.get(work_instance.id)
+            created = not is_update(work_instance) or key in missing
+            if mapping is None:
+                new_mappings.append(GoogleTaskMapping(
+                    organization=work_instance.organization,
+                    work_instance=work_instance,
+                    user=user,
+                    google_task_id=google_task['id'],
+                    google_tasklist_id=tasklist_id,
+                    nexpro_updated_at=work_instance.updated_at,
+                    google_updated_at=parse_google_datetime(google_task.get('updated'))
+                ))
+            else:
+                mapping.user = user
+                mapping.google_task_id = google_task['id']
+                mapping.google_tasklist_id = tasklist_id
+                mapping.nexpro_updated_at = work_instance.updated_at
+                mapping.google_updated_at = parse_google_datetime(google_task.get('updated'))
+                mapping.last_synced_at = now
+                changed_mappings.append(mapping)
+
+            logs.append(GoogleSyncLog(
+                organization=work_instance.organization,
+                user=user,
+                sync_type='TASK_TO_GOOGLE',
+                status='SUCCESS',
+                work_instance=work_instance,
+                google_task_id=google_task['id'],
+                details=f"{'Created' if created else 'Updated'} task: {task_data[key].get('title')}"
+            ))
+
+        GoogleTaskMapping.objects.bulk_create(new_mappings)
+        GoogleTaskMapping.objects.bulk_update(changed_mappings, [
+            'user', 'google_task_id', 'google_tasklist_id',
+            'nexpro_updated_at', 'google_updated_at', 'last_synced_at'
+        ])
+        GoogleSyncLog.objects.bulk_create(logs)
+
+        synced_count = len(new_mappings) + len(changed_mappings)
+        if synced_count:
+            self.google_connection.last_sync_at = now
+            self.google_connection.save(update_fields=['last_sync_at'])
+
+        logger.info(f"Batch sync to Google: {synced_count} synced, {error_count} errors")
+        return synced_count, error_count
+
     def sync_task_from_google(self, google_task_id, tasklist_id=None):
         """
         Sync changes from Google Task back to NexPro.
@@ -220,23 +377,7 @@ class GoogleTasksService:
                     logger.info(f"Skipping sync from Google - NexPro has newer changes")
                     return None
 
-            # Update NexPro task based on Google Task status
-            if google_task.get('status') == 'completed':
-                if work_instance.status != 'COMPLETED':
-                    work_instance.status = 'COMPLETED'
-                    work_instance.completed_on = timezone.now().date()
-            elif google_task.get('status') == 'needsAction':
-                if work_instance.status == 'COMPLETED':
-                    work_instance.status = 'STARTED'
-                    work_instance.completed_on = None
-
-            # Update due date if changed
-            if google_task.get('due'):
-                due_date_str = google_task['due'][:10]  # Get YYYY-MM-DD part
-                new_due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-                work_instance.due_date = new_due_date
-
-            work_instance.save()
+            self._apply_google_task(work_instance, google_task)
 
             # Update mapping with current timestamps
             mapping.google_updated_at = google_updated_dt
@@ -265,6 +406,162 @@ class GoogleTasksService:
             logger.error(f"Error syncing task from Google: {str(e)}")
             raise
 
+    @staticmethod
+    def _apply_google_task(work_instance, google_task):
+        """Apply a Google Task's status and due date to its WorkInstance and save it"""
+        # Update NexPro task based on Google Task status
+        if google_task.get('status') == 'completed':
+            if work_instance.status != 'COMPLETED':
+                work_instance.status = 'COMPLETED'
+                work_instance.completed_on = timezone.now().date()
+        elif google_task.get('status') == 'needsAction':
+            if work_instance.status == 'COMPLETED':
+                work_instance.status = 'STARTED'
+                work_instance.completed_on = None
+
+        # Update due date if changed
+        if google_task.get('due'):
+            due_date_str = google_task['due'][:10]  # Get YYYY-MM-DD part
+            new_due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
+            work_instance.due_date = new_due_date
+
+        work_instance.save()
+
+    def sync_changes_from_google(self):
+        """
+        Apply changes made in Google Tasks to NexPro (two-way sync).
+
+        Only tasks updated since the connection's tasks_synced_until cursor
+        are fetched (updatedMin), and their mappings are loaded with one
+        query. Mapping updates and sync logs are written in bulk. The cursor
+        does not move past a task that failed to apply, so it is fetched and
+        retried on the next run, up to MAX_SYNC_FAILURES times per change.
+
+        Returns:
+            dict: checked, updated, skipped and errors counts
+        """
+        from core.models import GoogleTaskMapping, GoogleSyncLog
+
+        stats = {'checked': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+        connection = self.google_connection
+        user = connection.user
+        if not connection.tasks_list_id:
+            return stats
+
+        started_at = timezone.now()
+        updated_min = None
+        if connection.tasks_synced_until:
+            updated_min = connection.tasks_synced_until - SYNC_CURSOR_OVERLAP
+
+        google_tasks = [
+            google_task for google_task in self._list_tasks(connection.tasks_list_id, updated_min)
+            if google_task.get('id') and google_task.get('updated')
+        ]
+        stats['checked'] = len(google_tasks)
+
+        # Tasks without a mapping weren't created from NexPro and are ignored
+        mappings = {
+            mapping.google_task_id: mapping
+            for mapping in GoogleTaskMapping.objects.filter(
+                user=user,
+                google_task_id__in=[google_task['id'] for google_task in google_tasks]
+            ).select_related(
+                'work_instance__client_work__client',
+                'work_instance__client_work__work_type',
+                'work_instance__assigned_to',
+                'work_instance__organization'
+            )
+        }
+
+        changed_mappings = []
+        failed_mappings = []
+        logs = []
+        failed_updated = []
+        try:
+            for google_task in google_tasks:
+                mapping = mappings.get(google_task['id'])
+                if mapping is None:
+                    continue
+
+                google_updated_dt = parse_google_datetime(google_task['updated'])
+
+                # Skip if Google has no new changes since our last sync, or
+                # NexPro was updated more recently
+                stored_google_updated = mapping.google_updated_at
+                if stored_google_updated and timezone.is_naive(stored_google_updated):
+                    stored_google_updated = timezone.make_aware(stored_google_updated)
+                nexpro_updated = mapping.nexpro_updated_at
+                if nexpro_updated and timezone.is_naive(nexpro_updated):
+                    nexpro_updated = timezone.make_aware(nexpro_updated)
+
+                if (stored_google_updated and google_updated_dt <= stored_google_updated) or \
+                        (nexpro_updated and nexpro_updated > google_updated_dt):
+                    stats['skipped'] += 1
+                    continue
+
+                work_instance = mapping.work_instance
+                try:
+                    self._apply_google_task(work_instance, google_task)
+                except SoftTimeLimitExceeded:
+                    raise
+                except Exception as e:
+                    stats['errors'] += 1
+                    error_message = str(e)
+                    mapping.sync_failures += 1
+                    if mapping.sync_failures >= MAX_SYNC_FAILURES:
+                        # Give up on this change; the cursor may move past it
+                        mapping.google_updated_at = google_updated_dt
+                        mapping.sync_failures = 0
+                        error_message = f"{error_message} (given up after {MAX_SYNC_FAILURES} attempts)"
+                    else:
+                        failed_updated.append(google_updated_dt)
+                    failed_mappings.append(mapping)
+                    logger.error(f"Error syncing task {google_task['id']} from Google: {error_message}", exc_info=True)
+                    logs.append(GoogleSyncLog(
+                        organization_id=connection.organization_id,
+                        user=user,
+                        sync_type='TASK_FROM_GOOGLE',
+                        status='FAILED',
+                        google_task_id=google_task['id'],
+                        error_message=error_message
+                    ))
+                    continue
+
+                now = timezone.now()
+                mapping.google_updated_at = google_updated_dt
+                mapping.nexpro_updated_at = now
+                mapping.last_synced_at = now
+                mapping.sync_failures = 0
+                changed_mappings.append(mapping)
+                logs.append(GoogleSyncLog(
+                    organization=work_instance.organization,
+                    user=user,
+                    sync_type='TASK_FROM_GOOGLE',
+                    status='SUCCESS',
+                    work_instance=work_instance,
+                    google_task_id=google_task['id'],
+                    details=f"Synced from Google: status={google_task.get('status')}"
+                ))
+                stats['updated'] += 1
+        finally:
+            # Tasks applied before a soft time limit are recorded too
+            GoogleTaskMapping.objects.bulk_update(
+                changed_mappings, ['google_updated_at', 'nexpro_updated_at', 'last_synced_at', 'sync_failures']
+            )
+            GoogleTaskMapping.objects.bulk_update(failed_mappings, ['google_updated_at', 'sync_failures'])
+            GoogleSyncLog.objects.bulk_create(logs)
+
+        # Advance the cursor (only reached if listing succeeded), but not past
+        # the earliest task that failed and is still retried
+        connection.tasks_synced_until = min(failed_updated) if failed_updated else started_at
+        update_fields = ['tasks_synced_until']
+        if stats['updated']:
+            connection.last_sync_at = timezone.now()
+            update_fields.append('last_sync_at')
+        connection.save(update_fields=update_fields)
+
+        return stats
+
     def delete_task_from_google(self, work_instance):
         """
         Delete a task from Google Tasks when deleted in NexPro.
@@ -306,6 +603,61 @@ class GoogleTasksService:
                 logger.error(f"Error deleting task from Google: {str(e)}")
                 raise
 
+    def delete_tasks_from_google(self, tasks):
+        """
+        Delete Google Tasks of deleted WorkInstances with batch HTTP requests.
+        The WorkInstances and their mappings are already gone, so the Google
+        IDs are passed in.
+
+        Args:
+            tasks: List of (organization_id, google_task_id, google_tasklist_id)
+
+        Returns:
+            tuple: (deleted_count, error_count)
+        """
+        from core.models import GoogleSyncLog
+
+        service = self._get_service()
+        user = self.google_connection.user
+
+        requests = {
+            str(i): service.tasks().delete(tasklist=tasklist_id, task=task_id)
+            for i, (_, task_id, tasklist_id) in enumerate(tasks)
+        }
+        results = self._execute_batch(requests)
+
+        logs = []
+        error_count = 0
+        for i, (organization_id, task_id, _) in enumerate(tasks):
+            _, error = results.get(str(i), (None, None))
+            if error is not None and not (isinstance(error, HttpError) and error.resp.status == 404):
+                error_count += 1
+                logger.error(f"Error deleting Google Task {task_id}: {str(error)}")
+                logs.append(GoogleSyncLog(
+                    organization_id=organization_id,
+                    user=user,
+                    sync_type='TASK_TO_GOOGLE',
+                    status='FAILED',
+                    google_task_id=task_id,
+                    error_message=str(error)
+                ))
+            else:
+                # 404: already deleted in Google
+                logs.append(GoogleSyncLog(
+                    organization_id=organization_id,
+                    user=user,
+                    sync_type='TASK_TO_GOOGLE',
+                    status='SUCCESS',
+                    google_task_id=task_id,
+                    details=f"Deleted Google Task {task_id}"
+                ))
+
+        GoogleSyncLog.objects.bulk_create(logs)
+
+        deleted_count = len(tasks) - error_count
+        logger.info(f"Batch delete from Google: {deleted_count} deleted, {error_count} errors")
+        return deleted_count, error_count
+
     def sync_all_tasks(self, work_instances=None):
         """
         Sync all tasks for the connected user.
@@ -335,18 +687,11 @@ class GoogleTasksService:
                     work_type_ids = sync_settings.sync_work_types.values_list('id', flat=True)
                     queryset = queryset.filter(client_work__work_type_id__in=work_type_ids)
 
-            work_instances = queryset.exclude(status='COMPLETED')
-
-        synced_count = 0
-        error_count = 0
+            work_instances = queryset.exclude(status='COMPLETED').select_related(
+                'client_work__client', 'client_work__work_type', 'assigned_to', 'organization'
+            )
 
-        for work_instance in work_instances:
-            try:
-                self.sync_task_to_google(work_instance, sync_settings)
-                synced_count += 1
-            except Exception as e:
-                logger.error(f"Error syncing WorkInstance {work_instance.id}: {str(e)}")
-                error_count += 1
+        synced_count, error_count = self.sync_tasks_to_google(work_instances)
 
         logger.info(f"Bulk sync completed: {synced_count} synced, {error_count} errors")
         return synced_count, error_count
@@ -402,24 +747,43 @@ class GoogleTasksService:
 
         return task_data
 
+    def _list_tasks(self, tasklist_id, updated_min=None):
+        """
+        List all tasks of a tasklist (following pagination), optionally only
+        those updated since updated_min. Raises HttpError on failure.
+        """
+        service = self._get_service()
+        params = {
+            'tasklist': tasklist_id,
+            'showCompleted': True,
+            'showHidden': True,
+            'maxResults': 100,
+        }
+        if updated_min:
+            params['updatedMin'] = updated_min.isoformat()
+
+        tasks = []
+        page_token = None
+        while True:
+            if page_token:
+                params['pageToken'] = page_token
+            results = service.tasks().list(**params).execute()
+            tasks.extend(results.get('items', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return tasks
+
     def get_all_google_tasks(self):
         """
         Get all tasks from the NexPro tasklist.
         """
-        service = self._get_service()
         tasklist_id = self.google_connection.tasks_list_id
 
         if not tasklist_id:
             return []
 
         try:
-            results = service.tasks().list(
-                tasklist=tasklist_id,
-                showCompleted=True,
-                showHidden=True
-            ).execute()
-
-            return results.get('items', [])
+            return self._list_tasks(tasklist_id)
 
         except HttpError as e:
             logger.error(f"Error fetching Google Tasks: {str(e)}")
@@ -17,18 +17,21 @@ class OTPService:
         return getattr(settings, 'FRONTEND_URL', 'https://nexpro.chinmaytechnosoft.com')
 
     @staticmethod
-    def send_email(to_email, subject, message, html_message=None):
+    def send_email(to_email, subject, message, html_message=None, priority=False):
         """
-        Send email using Platform Settings SMTP configuration.
-        Falls back to Django settings if platform SMTP is not configured.
-        Returns: (success: bool, error_message: str or None)
+        Queue an email for sending with Platform Settings SMTP configuration
+        (not counted against the daily email limits).
+        OTP emails use the priority lane so they never wait behind bulk sends.
+        Returns: (success: bool, error_message: str or None) - False if the
+        email could neither be queued nor sent inline
         """
-        from core.services.email_service import EmailService
-        return EmailService.send_email_via_platform_smtp(
+        from core.services.email_queue import EmailQueue
+        return EmailQueue.enqueue(
             to_email=to_email,
             subject=subject,
             body=message,
-            html_body=html_message
+            html_body=html_message,
+            priority=priority
         )
 
     @staticmethod
@@ -146,12 +149,13 @@ For support, contact: support@nexpro.com
 </html>
 """
 
-            # Use Platform Settings SMTP configuration
+            # Queue on the priority lane (Platform Settings email provider)
             success, error = OTPService.send_email(
                 to_email=email,
                 subject=subject,
                 message=message,
-                html_message=html_message
+                html_message=html_message,
+                priority=True
             )
 
             if not success:
@@ -286,12 +290,13 @@ For support, contact: support@nexpro.com
 </html>
 """
 
-            # Use Platform Settings SMTP configuration
+            # Queue on the priority lane (Platform Settings email provider)
             success, error = OTPService.send_email(
                 to_email=email,
                 subject=subject,
                 message=message,
-                html_message=html_message
+                html_message=html_message,
+                priority=True
             )
 
             if not success:
@@ -0,0 +1,181 @@
+"""
+Compiled reminder schedules for task categories (WorkType).
+
+A WorkType's reminder configuration is compiled once into a ReminderSchedule
+holding one ReminderDateRule per recipient. Rules produce the reminder dates
+for any period with date arithmetic (stride ranges and weekday masks) instead
+of stepping day by day, and period results are memoized per
+(work type config, period) so bulk generation and the schedule preview share
+the same work.
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+
+# Weekdays used when a WEEKLY configuration cannot be parsed (Mon, Wed, Fri)
+DEFAULT_WEEKDAYS = (0, 2, 4)
+
+# WorkType fields that determine period and reminder dates
+SCHEDULE_CONFIG_FIELDS = (
+    'default_frequency',
+    'due_date_day',
+    'enable_client_reminders',
+    'client_reminder_start_day',
+    'client_reminder_end_day',
+    'client_reminder_frequency_type',
+    'client_reminder_interval_days',
+    'client_reminder_weekdays',
+    'enable_employee_reminders',
+    'employee_reminder_start_day',
+    'employee_reminder_end_day',
+    'employee_reminder_frequency_type',
+    'employee_reminder_interval_days',
+    'employee_reminder_weekdays',
+)
+
+# Maximum number of periods memoized per compiled schedule
+MAX_CACHED_PERIODS = 64
+
+
+class ReminderDateRule:
+    """
+    Arithmetic reminder date generator for one frequency configuration.
+
+    Either a fixed stride (DAILY = 1, ALTERNATE_DAYS = 2, CUSTOM = interval)
+    or a 7-day weekday mask (WEEKLY), similar to a business-day weekmask.
+    """
+
+    __slots__ = ('stride', 'weekdays')
+
+    def __init__(self, frequency_type, interval_days=1, weekdays=None):
+        self.stride = 1
+        self.weekdays = None
+
+        if frequency_type == 'ALTERNATE_DAYS':
+            self.stride = 2
+        elif frequency_type == 'WEEKLY' and weekdays:
+            try:
+                days = {int(d.strip()) for d in weekdays.split(',')}
+            except ValueError:
+                days = set(DEFAULT_WEEKDAYS)
+            # Weekday mask: only 0 (Mon) - 6 (Sun) can ever match
+            self.weekdays = tuple(sorted(d for d in days if 0 <= d <= 6))
+        elif frequency_type == 'CUSTOM':
+            self.stride = max(1, interval_days or 1)
+        # Anything else defaults to daily
+
+    def dates_between(self, start_date, end_date):
+        """
+        Return all reminder dates between start_date and end_date (inclusive), sorted.
+        """
+        if start_date > end_date:
+            return []
+
+        span = (end_date - start_date).days
+
+        if self.weekdays is None:
+            return [start_date + timedelta(days=offset) for offset in range(0, span + 1, self.stride)]
+
+        # For each enabled weekday, jump to its first occurrence and stride by a week
+        start_weekday = start_date.weekday()
+        offsets = []
+        for weekday in self.weekdays:
+            offsets.extend(range((weekday - start_weekday) % 7, span + 1, 7))
+        offsets.sort()
+        return [start_date + timedelta(days=offset) for offset in offsets]
+
+
+@lru_cache(maxsize=128)
+def get_date_rule(frequency_type, interval_days=1, weekdays=None):
+    """Return the shared ReminderDateRule for a frequency configuration"""
+    return ReminderDateRule(frequency_type, interval_days, weekdays)
+
+
+class ReminderSchedule:
+    """
+    A WorkType's reminder configuration compiled into reusable date rules.
+
+    Use get_reminder_schedule(work_type) rather than constructing directly so
+    schedules are shared between all work types with the same configuration.
+    """
+
+    def __init__(self, config):
+        from core.models import WorkType
+
+        self.config = config
+        # Detached copy of the configuration used for period calculations
+        self._work_type = WorkType(**dict(zip(SCHEDULE_CONFIG_FIELDS, config)))
+        self.frequency = self._work_type.default_frequency
+        self.client_rule = get_date_rule(
+            self._work_type.client_reminder_frequency_type,
+            self._work_type.client_reminder_interval_days,
+            self._work_type.client_reminder_weekdays
+        )
+        self.employee_rule = get_date_rule(
+            self._work_type.employee_reminder_frequency_type,
+            self._work_type.employee_reminder_interval_days,
+            self._work_type.employee_reminder_weekdays
+        )
+        self._periods = {}
+
+    def _period_anchor(self, reference_date):
+        """
+        Normalize a reference date to the first day of its period so all dates
+        within one period share a cache entry. ONE_TIME periods depend on the
+        exact reference date.
+        """
+        if self.frequency == 'MONTHLY':
+            return date(reference_date.year, reference_date.month, 1)
+        if self.frequency == 'QUARTERLY':
+            # Same quarter boundaries as WorkType.get_period_dates
+            quarter_start_month = ((reference_date.month - 1) // 3) * 3 + 1
+            return date(reference_date.year, quarter_start_month, 1)
+        if self.frequency == 'YEARLY':
+            fy_start_year = reference_date.year if reference_date.month >= 4 else reference_date.year - 1
+            return date(fy_start_year, 4, 1)
+        return reference_date
+
+    def get_period(self, reference_date=None):
+        """
+        Return period dates plus the client and employee reminder dates for the
+        period containing reference_date.
+
+        Returns:
+            dict: The keys of WorkType.get_period_dates plus 'client_reminders'
+            and 'employee_reminders' (tuples of dates)
+        """
+        if reference_date is None:
+            reference_date = date.today()
+
+        anchor = self._period_anchor(reference_date)
+        period = self._periods.get(anchor)
+
+        if period is None:
+            period = self._work_type.get_period_dates(anchor)
+            period['client_reminders'] = tuple(self.client_rule.dates_between(
+                period['client_reminder_start'], period['client_reminder_end']
+            ))
+            period['employee_reminders'] = tuple(self.employee_rule.dates_between(
+                period['employee_reminder_start'], period['employee_reminder_end']
+            ))
+            if len(self._periods) >= MAX_CACHED_PERIODS:
+                self._periods.clear()
+            self._periods[anchor] = period
+
+        return dict(period)
+
+
+@lru_cache(maxsize=256)
+def _compile_schedule(config):
+    return ReminderSchedule(config)
+
+
+def get_reminder_schedule(work_type):
+    """
+    Return the compiled ReminderSchedule for a WorkType.
+    Schedules are memoized by the work type's reminder configuration, so edits
+    to the configuration produce a new schedule automatically.
+    """
+    config = tuple(getattr(work_type, field) for field in SCHEDULE_CONFIG_FIELDS)
+    return _compile_schedule(config)
@@ -30,6 +30,15 @@ import matplotlib.patches as mpatches
 from core.models import (
     WorkInstance, Client, WorkType, User, Organization, ReportConfiguration
 )
+from core.services.smtp_pool import smtp_pool
+from core.services.task_statistics_service import TaskStatisticsService
+
+
+# Output names of the task category fields, as in the WorkInstance-based breakdowns
+WORK_TYPE_FIELD_NAMES = {
+    'work_type__work_name': 'client_work__work_type__work_name',
+    'work_type__statutory_form': 'client_work__work_type__statutory_form',
+}
 
 
 class ReportService:
@@ -61,12 +70,28 @@ class ReportService:
             Q(completed_on__gte=start_date, completed_on__lte=end_date)
         )
 
+        # Tasks due in the period are counted from the daily statistics rollup;
+        # tasks completed in the period but due outside it from live rows
+        completed_outside_period = tasks.filter(
+            completed_on__gte=start_date, completed_on__lte=end_date
+        ).exclude(due_date__gte=start_date, due_date__lte=end_date)
+
+        def period_counts(group_by):
+            return TaskStatisticsService.get_counts(
+                organization, group_by, start_date, end_date,
+                extra_tasks=completed_outside_period
+            )
+
         # Overall counts
-        total_tasks = period_tasks.count()
-        status_counts = dict(period_tasks.values('status').annotate(count=Count('id')).values_list('status', 'count'))
+        status_counts = {row['status']: row['count'] for row in period_counts(['status'])}
+        total_tasks = sum(status_counts.values())
 
         # All-time overdue count (tasks currently overdue)
-        all_overdue = tasks.filter(status='OVERDUE').count()
+        all_overdue = sum(
+            row['count'] for row in TaskStatisticsService.get_counts(
+                organization, ['status'], filters={'status': 'OVERDUE'}
+            )
+        )
 
         # Summary statistics
         summary = {
@@ -86,7 +111,7 @@ class ReportService:
         else:
             summary['completion_rate'] = 0
 
-        # Client-wise breakdown
+        # Client-wise breakdown (clients are not part of the rollup)
         client_wise = period_tasks.values(
             'client_work__client__client_name',
             'client_work__client__client_code'
@@ -98,29 +123,21 @@ class ReportService:
         ).order_by('-total')[:20]  # Top 20 clients
 
         # Employee-wise breakdown
-        employee_wise = period_tasks.exclude(
-            assigned_to__isnull=True
-        ).values(
-            'assigned_to__first_name',
-            'assigned_to__last_name',
-            'assigned_to__email'
-        ).annotate(
-            total=Count('id'),
-            completed=Count('id', filter=Q(status='COMPLETED')),
-            overdue=Count('id', filter=Q(status='OVERDUE')),
-            pending=Count('id', filter=Q(status__in=['NOT_STARTED', 'STARTED', 'PAUSED']))
-        ).order_by('-total')
+        employee_fields = ['assigned_to__first_name', 'assigned_to__last_name', 'assigned_to__email']
+        employee_wise = TaskStatisticsService.summarize(
+            [
+                row for row in period_counts(['assigned_to'] + employee_fields + ['status'])
+                if row['assigned_to'] is not None
+            ],
+            employee_fields
+        )
 
         # Work type-wise breakdown
-        work_type_wise = period_tasks.values(
-            'client_work__work_type__work_name',
-            'client_work__work_type__statutory_form'
-        ).annotate(
-            total=Count('id'),
-            completed=Count('id', filter=Q(status='COMPLETED')),
-            overdue=Count('id', filter=Q(status='OVERDUE')),
-            pending=Count('id', filter=Q(status__in=['NOT_STARTED', 'STARTED', 'PAUSED']))
-        ).order_by('-total')
+        work_type_wise = TaskStatisticsService.summarize(
+            period_counts(['work_type__work_name', 'work_type__statutory_form', 'status']),
+            ['work_type__work_name', 'work_type__statutory_form'],
+            rename=WORK_TYPE_FIELD_NAMES
+        )
 
         # Status breakdown for charts
         status_breakdown = {
@@ -168,8 +185,8 @@ class ReportService:
             'summary': summary,
             'status_breakdown': status_breakdown,
             'client_wise': list(client_wise),
-            'employee_wise': list(employee_wise),
-            'work_type_wise': list(work_type_wise),
+            'employee_wise': employee_wise,
+            'work_type_wise': work_type_wise,
             'overdue_tasks': list(overdue_tasks),
             'upcoming_tasks': list(upcoming_tasks),
         }
@@ -667,7 +684,9 @@ NexCA Report System
                 subject=subject,
                 body=body,
                 from_email=settings.DEFAULT_FROM_EMAIL,
-                to=recipients
+                to=recipients,
+                # Shared connection when sending a batch of reports
+                connection=smtp_pool.get_django_connection()
             )
 
             # Attach PDF
@@ -743,9 +762,7 @@ NexCA Report System
         Fetch ad-hoc report data based on report type and filters.
         Returns a dictionary with statistics based on report type.
         """
-        from django.db.models import Sum
-        from django.db.models.functions import Coalesce
-        from datetime import timedelta
+        from django.db.models import F
 
         filters = filters or {}
 
@@ -773,6 +790,8 @@ NexCA Report System
             'client_work__client',
             'client_work__work_type',
             'assigned_to'
+        ).annotate(
+            time_spent_minutes=F('total_time_spent') / 60
         ).values(
             'id', 'status', 'due_date', 'period_label', 'completed_on',
             'client_work__client__client_name',
@@ -784,9 +803,28 @@ NexCA Report System
             'time_spent_minutes'
         ))
 
+        # Counts come from the daily statistics rollup unless filtered by client,
+        # which is not part of the rollup
+        if filters.get('client_id') and filters['client_id'] != 'ALL':
+            def grouped_counts(group_by):
+                return TaskStatisticsService.get_live_counts(tasks, group_by)
+        else:
+            rollup_filters = {}
+            if filters.get('work_type_id') and filters['work_type_id'] != 'ALL':
+                rollup_filters['work_type_id'] = filters['work_type_id']
+            if filters.get('status') and filters['status'] != 'ALL':
+                rollup_filters['status'] = filters['status']
+            if filters.get('assigned_to') and filters['assigned_to'] != 'ALL':
+                rollup_filters['assigned_to_id'] = filters['assigned_to']
+
+            def grouped_counts(group_by):
+                return TaskStatisticsService.get_counts(
+                    organization, group_by, start_date, end_date, filters=rollup_filters
+                )
+
         # Calculate summary statistics
-        total_tasks = tasks.count()
-        status_counts = dict(tasks.values('status').annotate(count=Count('id')).values_list('status', 'count'))
+        status_counts = {row['status']: row['count'] for row in grouped_counts(['status'])}
+        total_tasks = sum(status_counts.values())
 
         summary = {
             'total_tasks': total_tasks,
@@ -828,32 +866,24 @@ NexCA Report System
             return {'summary': summary, 'client_wise': list(client_wise), 'tasks': task_list}
 
         elif report_type == 'WORK_TYPE_SUMMARY':
-            work_type_wise = tasks.values(
-                'client_work__work_type__work_name',
-                'client_work__work_type__statutory_form'
-            ).annotate(
-                total=Count('id'),
-                completed=Count('id', filter=Q(status='COMPLETED')),
-                overdue=Count('id', filter=Q(status='OVERDUE')),
-                pending=Count('id', filter=Q(status__in=['NOT_STARTED', 'STARTED', 'PAUSED']))
-            ).order_by('-total')
-            return {'summary': summary, 'work_type_wise': list(work_type_wise), 'tasks': task_list}
+            work_type_wise = TaskStatisticsService.summarize(
+                grouped_counts(['work_type__work_name', 'work_type__statutory_form', 'status']),
+                ['work_type__work_name', 'work_type__statutory_form'],
+                rename=WORK_TYPE_FIELD_NAMES
+            )
+            return {'summary': summary, 'work_type_wise': work_type_wise, 'tasks': task_list}
 
         elif report_type == 'STAFF_PRODUCTIVITY':
-            employee_wise = tasks.exclude(
-                assigned_to__isnull=True
-            ).values(
-                'assigned_to__first_name',
-                'assigned_to__last_name',
-                'assigned_to__email'
-            ).annotate(
-                total=Count('id'),
-                completed=Count('id', filter=Q(status='COMPLETED')),
-                overdue=Count('id', filter=Q(status='OVERDUE')),
-                pending=Count('id', filter=Q(status__in=['NOT_STARTED', 'STARTED', 'PAUSED'])),
-                total_time=Coalesce(Sum('time_spent_minutes'), 0)
-            ).order_by('-total')
-            return {'summary': summary, 'employee_wise': list(employee_wise), 'tasks': task_list}
+            employee_fields = ['assigned_to__first_name', 'assigned_to__last_name', 'assigned_to__email']
+            employee_wise = TaskStatisticsService.summarize(
+                [
+                    row for row in grouped_counts(['assigned_to'] + employee_fields + ['status'])
+                    if row['assigned_to'] is not None
+                ],
+                employee_fields,
+                include_time=True
+            )
+            return {'summary': summary, 'employee_wise': employee_wise, 'tasks': task_list}
 
         elif report_type == 'STATUS_ANALYSIS':
             status_breakdown = {
@@ -0,0 +1,258 @@
+"""
+SMTP Connection Pool for NexPro
+
+Opening an SMTP connection costs a TCP connect, a TLS handshake and a login,
+which dominates the time spent sending a burst of reminders, and some
+providers throttle accounts that log in too often. Inside a batch
+(``with smtp_pool.batch(): ...``) connections are kept open per
+(host, port, username, TLS mode) and reused for every message the batch sends
+through the same account, then closed when the batch ends. Connections belong
+to the thread running the batch: batches in other threads never share or
+close them.
+
+Outside a batch every message uses its own connection, as before.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Errors after which a reused connection is considered dead and the message is
+# retried once on a fresh connection
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+# "Service not available, closing transmission channel"
+SMTP_SERVICE_NOT_AVAILABLE = 421
+
+
+class PooledSMTPConnection:
+    """An open, logged-in SMTP connection and its usage counters"""
+
+    def __init__(self, server):
+        self.server = server
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.messages_sent = 0
+
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            # Connection already dropped by the server - just close the socket
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    """
+    Pool of persistent SMTP connections keyed by (host, port, username, mode),
+    held per thread for the duration of its batch.
+
+    mode is one of:
+        'ssl'      - implicit TLS (SMTP_SSL)
+        'starttls' - plain connection upgraded with STARTTLS
+        'plain'    - no TLS
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def _idle(self):
+        """Idle connections of the current thread's batch, by key"""
+        idle = getattr(self._local, 'idle', None)
+        if idle is None:
+            idle = self._local.idle = {}
+        return idle
+
+    @property
+    def idle_timeout(self):
+        """Seconds an idle connection may be reused (servers drop idle clients)"""
+        return getattr(settings, 'SMTP_POOL_IDLE_TIMEOUT', 60)
+
+    @property
+    def max_messages(self):
+        """Messages sent before a connection is recycled"""
+        return getattr(settings, 'SMTP_POOL_MAX_MESSAGES', 100)
+
+    # ==========================================================================
+    # Batches
+    # ==========================================================================
+
+    def in_batch(self):
+        """True if the current thread is inside a batch()"""
+        return getattr(self._local, 'depth', 0) > 0
+
+    @contextmanager
+    def batch(self):
+        """
+        Reuse SMTP connections for all messages sent in this block (by the
+        current thread). Batches can be nested; connections are closed when the
+        outermost batch exits.
+        """
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        try:
+            yield self
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self.close_all()
+                self._close_django_connection()
+
+    def get_django_connection(self):
+        """
+        Get an open Django mail connection (settings.EMAIL_BACKEND) shared by
+        the current batch, for send_mail(connection=...) and
+        EmailMessage(connection=...). Returns None outside a batch so Django
+        opens a connection per message as usual.
+        """
+        if not self.in_batch():
+            return None
+
+        now = time.monotonic()
+        connection = getattr(self._local, 'django_connection', None)
+        if connection is not None and now - self._local.django_connection_used_at > self.idle_timeout:
+            # Probably dropped by the server while idle
+            self._close_django_connection()
+            connection = None
+
+        if connection is None:
+            from django.core.mail import get_connection
+
+            connection = get_connection()
+            connection.open()
+            self._local.django_connection = connection
+        self._local.django_connection_used_at = now
+        return connection
+
+    def _close_django_connection(self):
+        connection = getattr(self._local, 'django_connection', None)
+        self._local.django_connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing mail connection: {str(e)}")
+
+    # ==========================================================================
+    # Connections
+    # ==========================================================================
+
+    @staticmethod
+    def _connect(host, port, username, password, mode):
+        """Open and log in a new SMTP connection"""
+        if mode == 'ssl':
+            server = smtplib.SMTP_SSL(host, port)
+        else:
+            server = smtplib.SMTP(host, port)
+            if mode == 'starttls':
+                server.starttls()
+        try:
+            server.login(username, password)
+        except Exception:
+            server.close()
+            raise
+        return PooledSMTPConnection(server)
+
+    def _acquire(self, key):
+        """Take a usable idle connection for key, discarding expired ones"""
+        now = time.monotonic()
+        expired = []
+        connection = None
+
+        idle = self._idle.get(key, [])
+        while idle:
+            candidate = idle.pop()
+            if now - candidate.last_used_at > self.idle_timeout:
+                expired.append(candidate)
+            else:
+                connection = candidate
+                break
+
+        for candidate in expired:
+            candidate.close()
+        return connection
+
+    def _release(self, key, connection):
+        """Return a connection to the pool, or close it if it is used up"""
+        connection.last_used_at = time.monotonic()
+        if not self.in_batch() or connection.messages_sent >= self.max_messages:
+            connection.close()
+            return
+
+        self._idle.setdefault(key, []).append(connection)
+
+    def close_all(self):
+        """Close the idle connections of the current thread's batch"""
+        idle, self._local.idle = self._idle, {}
+
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    # ==========================================================================
+    # Sending
+    # ==========================================================================
+
+    def send(self, host, port, username, password, mode, from_addr, to_addrs, message):
+        """
+        Send a message, reusing a pooled connection when inside a batch.
+        A message that fails on a reused connection because the server has
+        dropped it is retried once on a fresh connection.
+
+        Args:
+            host, port, username, password: SMTP server and credentials
+            mode: 'ssl', 'starttls' or 'plain'
+            from_addr: Envelope sender
+            to_addrs: List of envelope recipients
+            message: Message as a string (msg.as_string())
+
+        Raises:
+            smtplib.SMTPException or OSError if the message cannot be sent
+        """
+        key = (host, port, username, mode)
+
+        connection = self._acquire(key)
+        if connection is not None:
+            try:
+                connection.server.sendmail(from_addr, to_addrs, message)
+            except RECONNECT_ERRORS as e:
+                logger.info(f"Reconnecting to SMTP server {host}:{port} after error: {str(e)}")
+                connection.close()
+                connection = None
+            except smtplib.SMTPResponseException as e:
+                if e.smtp_code != SMTP_SERVICE_NOT_AVAILABLE:
+                    # Message rejected - the connection itself is still fine
+                    self._release(key, connection)
+                    raise
+                logger.info(f"Reconnecting to SMTP server {host}:{port} after 421 response")
+                connection.close()
+                connection = None
+            except Exception:
+                connection.close()
+                raise
+            else:
+                connection.messages_sent += 1
+                self._release(key, connection)
+                return
+
+        connection = self._connect(host, port, username, password, mode)
+        try:
+            connection.server.sendmail(from_addr, to_addrs, message)
+        except Exception:
+            connection.close()
+            raise
+        connection.messages_sent += 1
+        self._release(key, connection)
+
+
+# Process-wide pool (each Celery worker process has its own)
+smtp_pool = SMTPConnectionPool()
@@ -2,6 +2,10 @@ from datetime import datetime, timedelta, date
 from dateutil.relativedelta import relativedelta
 from django.utils import timezone
 from ..models import ClientWorkMapping, WorkInstance, ReminderInstance, ReminderRule, Notification, WorkTypeAssignment
+from .reminder_schedule import get_date_rule, get_reminder_schedule
+
+# Batch size for bulk_create / IN (...) lookups
+BULK_BATCH_SIZE = 500
 
 
 class ReminderGenerationService:
@@ -22,42 +26,7 @@ class ReminderGenerationService:
         Returns:
             List of dates
         """
-        reminder_dates = []
-        current = start_date
-
-        if frequency_type == 'DAILY':
-            while current <= end_date:
-                reminder_dates.append(current)
-                current += timedelta(days=1)
-
-        elif frequency_type == 'ALTERNATE_DAYS':
-            while current <= end_date:
-                reminder_dates.append(current)
-                current += timedelta(days=2)
-
-        elif frequency_type == 'WEEKLY' and weekdays:
-            # Parse weekday numbers
-            try:
-                days = [int(d.strip()) for d in weekdays.split(',')]
-            except:
-                days = [0, 2, 4]  # Default: Mon, Wed, Fri
-
-            while current <= end_date:
-                if current.weekday() in days:
-                    reminder_dates.append(current)
-                current += timedelta(days=1)
-
-        elif frequency_type == 'CUSTOM':
-            while current <= end_date:
-                reminder_dates.append(current)
-                current += timedelta(days=max(1, interval_days))
-        else:
-            # Default: daily
-            while current <= end_date:
-                reminder_dates.append(current)
-                current += timedelta(days=1)
-
-        return reminder_dates
+        return get_date_rule(frequency_type, interval_days, weekdays).dates_between(start_date, end_date)
 
     @staticmethod
     def generate_period_reminders_for_instance(work_instance, regenerate=False):
@@ -68,132 +37,181 @@ class ReminderGenerationService:
             work_instance: The WorkInstance to generate reminders for
             regenerate: If True, cancel existing pending reminders first
         """
-        work_type = work_instance.client_work.work_type
-        client = work_instance.client_work.client
+        return ReminderGenerationService.generate_period_reminders_for_instances(
+            [work_instance], regenerate=regenerate
+        )
+
+    @staticmethod
+    def _chunks(items, size=BULK_BATCH_SIZE):
+        """Yield successive slices of items for IN (...) queries"""
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
+
+    @staticmethod
+    def _get_existing_reminder_dates(instance_ids):
+        """
+        Fetch (work_instance_id, recipient_type, scheduled date) for all live
+        period reminders of the given instances, one query per chunk.
+        """
+        existing = set()
+        for chunk in ReminderGenerationService._chunks(instance_ids):
+            rows = ReminderInstance.objects.filter(
+                work_instance_id__in=chunk,
+                send_status__in=['PENDING', 'SENT']
+            ).values_list('work_instance_id', 'recipient_type', 'scheduled_at')
+            for work_instance_id, recipient_type, scheduled_at in rows:
+                existing.add((work_instance_id, recipient_type, timezone.localtime(scheduled_at).date()))
+        return existing
+
+    @staticmethod
+    def _get_existing_notification_dates(instance_ids):
+        """
+        Fetch (work_instance_id, user_id, created date) for all in-app reminder
+        notifications of the given instances, one query per chunk.
+        """
+        existing = set()
+        for chunk in ReminderGenerationService._chunks(instance_ids):
+            rows = Notification.objects.filter(
+                work_instance_id__in=chunk,
+                notification_type='REMINDER'
+            ).values_list('work_instance_id', 'user_id', 'created_at')
+            for work_instance_id, user_id, created_at in rows:
+                existing.add((work_instance_id, user_id, timezone.localtime(created_at).date()))
+        return existing
+
+    @staticmethod
+    def generate_period_reminders_for_instances(work_instances, regenerate=False):
+        """
+        Bulk-generate client and employee reminders for many work instances.
+
+        Computes all candidate reminder dates up front, fetches the existing
+        (recipient_type, date) pairs with one query per chunk of instances and
+        bulk_creates only the missing ReminderInstance and Notification rows.
+
+        Args:
+            work_instances: Iterable of WorkInstance objects (ideally with
+                client_work__client, client_work__work_type and assigned_to selected)
+            regenerate: If True, cancel existing pending reminders first
+
+        Returns:
+            tuple: (reminders_created, notifications_created)
+        """
+        work_instances = [wi for wi in work_instances if wi is not None]
+        if not work_instances:
+            return 0, 0
+
+        instance_ids = [wi.id for wi in work_instances]
 
         if regenerate:
             # Cancel existing pending reminders
-            ReminderInstance.objects.filter(
-                work_instance=work_instance,
-                send_status='PENDING'
-            ).update(send_status='CANCELLED')
+            for chunk in ReminderGenerationService._chunks(instance_ids):
+                ReminderInstance.objects.filter(
+                    work_instance_id__in=chunk,
+                    send_status='PENDING'
+                ).update(send_status='CANCELLED')
+
+        existing_reminders = ReminderGenerationService._get_existing_reminder_dates(instance_ids)
+        existing_notifications = ReminderGenerationService._get_existing_notification_dates(instance_ids)
+
+        today = timezone.localdate()
+        new_reminders = []
+        new_notifications = []
+
+        def scheduled_at_for(reminder_date):
+            # Schedule at 11:30 AM IST
+            return timezone.make_aware(
+                datetime.combine(reminder_date, datetime.min.time().replace(hour=11, minute=30))
+            )
 
-        # Get period dates from task category
-        period_dates = work_type.get_period_dates(work_instance.period_start or work_instance.due_date)
+        for work_instance in work_instances:
+            work_type = work_instance.client_work.work_type
+            client = work_instance.client_work.client
 
-        current_time = timezone.now()
-        today = current_time.date()
-
-        # Generate CLIENT reminders
-        if work_type.enable_client_reminders and client.email:
-            client_start = period_dates['client_reminder_start']
-            client_end = period_dates['client_reminder_end']
-
-            client_reminder_dates = ReminderGenerationService.generate_reminder_dates(
-                start_date=client_start,
-                end_date=client_end,
-                frequency_type=work_type.client_reminder_frequency_type,
-                interval_days=work_type.client_reminder_interval_days,
-                weekdays=work_type.client_reminder_weekdays
+            # Get period and reminder dates from the compiled task category schedule
+            period_dates = get_reminder_schedule(work_type).get_period(
+                work_instance.period_start or work_instance.due_date
             )
 
-            for reminder_date in client_reminder_dates:
+            # Generate CLIENT reminders
+            if work_type.enable_client_reminders and client.email:
+                client_reminder_dates = period_dates['client_reminders']
+
                 # Create reminders for all dates (past, today, and future)
                 # Past reminders will be marked as overdue and sent immediately
-                # Schedule at 11:30 AM IST
-                scheduled_at = timezone.make_aware(
-                    datetime.combine(reminder_date, datetime.min.time().replace(hour=11, minute=30))
-                )
-
-                # Avoid duplicate reminders
-                if not ReminderInstance.objects.filter(
-                    work_instance=work_instance,
-                    recipient_type='CLIENT',
-                    scheduled_at__date=reminder_date,
-                    send_status__in=['PENDING', 'SENT']
-                ).exists():
-                    ReminderInstance.objects.create(
+                for reminder_date in client_reminder_dates:
+                    key = (work_instance.id, 'CLIENT', reminder_date)
+                    # Avoid duplicate reminders
+                    if key in existing_reminders:
+                        continue
+                    existing_reminders.add(key)
+                    new_reminders.append(ReminderInstance(
                         organization=work_instance.organization,
                         work_instance=work_instance,
                         recipient_type='CLIENT',
-                        scheduled_at=scheduled_at,
+                        scheduled_at=scheduled_at_for(reminder_date),
                         email_to=client.email,
                         send_status='PENDING',
                         repeat_count=0
-                    )
-
-        # Generate EMPLOYEE reminders
-        if work_type.enable_employee_reminders and work_instance.assigned_to:
-            employee = work_instance.assigned_to
-            employee_email = employee.email
-            notification_type = work_type.employee_notification_type  # EMAIL, IN_APP, or BOTH
-
-            # Check employee's notification preferences
-            user_wants_email_reminders = getattr(employee, 'notify_email_reminders', True)
-
-            emp_start = period_dates['employee_reminder_start']
-            emp_end = period_dates['employee_reminder_end']
-
-            employee_reminder_dates = ReminderGenerationService.generate_reminder_dates(
-                start_date=emp_start,
-                end_date=emp_end,
-                frequency_type=work_type.employee_reminder_frequency_type,
-                interval_days=work_type.employee_reminder_interval_days,
-                weekdays=work_type.employee_reminder_weekdays
-            )
-
-            for reminder_date in employee_reminder_dates:
-                # Create reminders for all dates (past, today, and future)
-                # Past reminders will be marked as overdue and sent immediately
-                # Schedule at 11:30 AM IST
-                scheduled_at = timezone.make_aware(
-                    datetime.combine(reminder_date, datetime.min.time().replace(hour=11, minute=30))
-                )
-
-                # Create EMAIL reminder if notification type includes email AND user wants email reminders
-                if notification_type in ['EMAIL', 'BOTH'] and employee_email and user_wants_email_reminders:
-                    # Avoid duplicate email reminders
-                    if not ReminderInstance.objects.filter(
-                        work_instance=work_instance,
-                        recipient_type='EMPLOYEE',
-                        scheduled_at__date=reminder_date,
-                        send_status__in=['PENDING', 'SENT']
-                    ).exists():
-                        ReminderInstance.objects.create(
-                            organization=work_instance.organization,
-                            work_instance=work_instance,
-                            recipient_type='EMPLOYEE',
-                            scheduled_at=scheduled_at,
-                            email_to=employee_email,
-                            send_status='PENDING',
-                            repeat_count=0
-                        )
-
-                # Create IN-APP notification if notification type includes in-app
-                if notification_type in ['IN_APP', 'BOTH']:
-                    # Avoid duplicate in-app notifications
-                    if not Notification.objects.filter(
-                        work_instance=work_instance,
+                    ))
+
+            # Generate EMPLOYEE reminders
+            if work_type.enable_employee_reminders and work_instance.assigned_to:
+                employee = work_instance.assigned_to
+                employee_email = employee.email
+                notification_type = work_type.employee_notification_type  # EMAIL, IN_APP, or BOTH
+
+                # Check employee's notification preferences
+                user_wants_email_reminders = getattr(employee, 'notify_email_reminders', True)
+                wants_email = notification_type in ['EMAIL', 'BOTH'] and employee_email and user_wants_email_reminders
+                wants_in_app = notification_type in ['IN_APP', 'BOTH']
+
+                employee_reminder_dates = period_dates['employee_reminders']
+
+                client_name = client.client_name
+                work_name = work_type.work_name
+                period = work_instance.period_label
+
+                for reminder_date in employee_reminder_dates:
+                    # Create EMAIL reminder if notification type includes email AND user wants email reminders
+                    if wants_email:
+                        key = (work_instance.id, 'EMPLOYEE', reminder_date)
+                        # Avoid duplicate email reminders
+                        if key not in existing_reminders:
+                            existing_reminders.add(key)
+                            new_reminders.append(ReminderInstance(
+                                organization=work_instance.organization,
+                                work_instance=work_instance,
+                                recipient_type='EMPLOYEE',
+                                scheduled_at=scheduled_at_for(reminder_date),
+                                email_to=employee_email,
+                                send_status='PENDING',
+                                repeat_count=0
+                            ))
+
+                # Create one IN-APP notification per task and employee per day
+                # if notification type includes in-app. Notifications are
+                # stamped with today's created_at, so a run that already
+                # notified this employee today adds none.
+                notification_key = (work_instance.id, employee.id, today)
+                if wants_in_app and employee_reminder_dates and notification_key not in existing_notifications:
+                    existing_notifications.add(notification_key)
+
+                    days_left = (work_instance.due_date - today).days
+                    new_notifications.append(Notification(
+                        organization=work_instance.organization,
                         user=employee,
                         notification_type='REMINDER',
-                        created_at__date=reminder_date
-                    ).exists():
-                        # Create notification (will be shown immediately when date arrives)
-                        client_name = work_instance.client_work.client.client_name
-                        work_name = work_type.work_name
-                        period = work_instance.period_label
-                        days_left = (work_instance.due_date - reminder_date).days
-
-                        Notification.objects.create(
-                            organization=work_instance.organization,
-                            user=employee,
-                            notification_type='REMINDER',
-                            title=f"Reminder: {work_name} - {client_name}",
-                            message=f"Task '{work_name}' for {client_name} ({period}) is due in {days_left} day(s). Due date: {work_instance.due_date.strftime('%d %b %Y')}",
-                            priority='MEDIUM' if days_left > 3 else 'HIGH',
-                            work_instance=work_instance,
-                            action_url=f"/tasks?work_instance={work_instance.id}"
-                        )
+                        title=f"Reminder: {work_name} - {client_name}",
+                        message=f"Task '{work_name}' for {client_name} ({period}) is due in {days_left} day(s). Due date: {work_instance.due_date.strftime('%d %b %Y')}",
+                        priority='MEDIUM' if days_left > 3 else 'HIGH',
+                        work_instance=work_instance,
+                        action_url=f"/tasks?work_instance={work_instance.id}"
+                    ))
+
+        ReminderInstance.objects.bulk_create(new_reminders, batch_size=BULK_BATCH_SIZE)
+        Notification.objects.bulk_create(new_notifications, batch_size=BULK_BATCH_SIZE)
+
+        return len(new_reminders), len(new_notifications)
 
     @staticmethod
     def cancel_reminders_for_completed_task(work_instance):
@@ -217,36 +235,16 @@ class ReminderGenerationService:
         if reference_date is None:
             reference_date = date.today()
 
-        period_dates = work_type.get_period_dates(reference_date)
+        period_dates = get_reminder_schedule(work_type).get_period(reference_date)
 
-        preview = {
+        return {
             'period_start': period_dates['period_start'],
             'period_end': period_dates['period_end'],
             'due_date': period_dates['due_date'],
-            'client_reminders': [],
-            'employee_reminders': []
+            'client_reminders': list(period_dates['client_reminders']) if work_type.enable_client_reminders else [],
+            'employee_reminders': list(period_dates['employee_reminders']) if work_type.enable_employee_reminders else [],
         }
 
-        if work_type.enable_client_reminders:
-            preview['client_reminders'] = ReminderGenerationService.generate_reminder_dates(
-                start_date=period_dates['client_reminder_start'],
-                end_date=period_dates['client_reminder_end'],
-                frequency_type=work_type.client_reminder_frequency_type,
-                interval_days=work_type.client_reminder_interval_days,
-                weekdays=work_type.client_reminder_weekdays
-            )
-
-        if work_type.enable_employee_reminders:
-            preview['employee_reminders'] = ReminderGenerationService.generate_reminder_dates(
-                start_date=period_dates['employee_reminder_start'],
-                end_date=period_dates['employee_reminder_end'],
-                frequency_type=work_type.employee_reminder_frequency_type,
-                interval_days=work_type.employee_reminder_interval_days,
-                weekdays=work_type.employee_reminder_weekdays
-            )
-
-        return preview
-
 
 class TaskAutomationService:
     """Service for automatic task creation and management"""
@@ -572,97 +570,308 @@ class TaskAutomationService:
         Returns:
             list: List of created WorkInstance objects
         """
+        created = TaskAutomationService.create_work_instances_till_fy_end_bulk(
+            [client_work_mapping], start_date=start_date
+        )
+        return created.get(client_work_mapping.id, [])
+
+    @staticmethod
+    def plan_fy_periods(frequency, due_date_day, fy_end, start_date=None):
+        """
+        Compute all periods from the first period until the financial year end.
+
+        Returns:
+            list: (period_label, period_start, period_end, due_date) tuples
+        """
+        if start_date:
+            period = TaskAutomationService.calculate_period_from_date(frequency, start_date, due_date_day)
+        else:
+            period = TaskAutomationService.calculate_next_period_and_due_date(frequency, due_date_day=due_date_day)
+
+        periods = []
+        max_iterations = 12  # Safety limit (max 12 months)
+
+        while period[1] <= fy_end and len(periods) < max_iterations:
+            periods.append(period)
+            period = TaskAutomationService.calculate_next_period_and_due_date(
+                frequency,
+                period[0],
+                period[3],
+                due_date_day
+            )
+
+        return periods
+
+    @staticmethod
+    def create_work_instances_till_fy_end_bulk(client_work_mappings, start_date=None):
+        """
+        Create work instances till the financial year end for many client work mappings at once.
+
+        All periods for all mappings are computed up front, existing period labels
+        and WorkTypeAssignments are loaded with one query each, instances are
+        bulk_created, reminders are generated in bulk and a single batched Google
+        sync is queued after the transaction commits.
+
+        ONE_TIME and YEARLY mappings get a single instance following the same rules
+        as create_work_instance (next period after the latest instance, auto-start
+        for auto-driven task categories).
+
+        Args:
+            client_work_mappings: Iterable of ClientWorkMapping objects (with work_type loaded)
+            start_date: Optional date to calculate the first period from (for new mappings)
+
+        Returns:
+            dict: ClientWorkMapping id -> list of created WorkInstance objects
+        """
         from datetime import datetime
+        from django.contrib.auth import get_user_model
 
-        frequency = client_work_mapping.effective_frequency
-        work_type = client_work_mapping.work_type
-        due_date_day = work_type.due_date_day
+        mappings = list(client_work_mappings)
+        if not mappings:
+            return {}
+
+        if isinstance(start_date, str):
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
 
-        # Get financial year end date
         fy_end = TaskAutomationService.get_financial_year_end(start_date)
+        mapping_ids = [mapping.id for mapping in mappings]
 
-        # For ONE_TIME frequency, just create a single instance
-        if frequency == 'ONE_TIME':
-            instance = TaskAutomationService.create_work_instance(client_work_mapping, start_date)
-            return [instance] if instance else []
+        assignees = TaskAutomationService.load_assignees(mappings)
 
-        # For YEARLY frequency, only create one instance per financial year
-        if frequency == 'YEARLY':
-            instance = TaskAutomationService.create_work_instance(client_work_mapping, start_date)
-            return [instance] if instance else []
+        # Existing period labels and latest instance per mapping in one query
+        existing_labels = set()
+        latest_instances = {}
+        for client_work_id, period_label, due_date, assigned_to_id in WorkInstance.objects.filter(
+            client_work_id__in=mapping_ids
+        ).order_by('due_date').values_list('client_work_id', 'period_label', 'due_date', 'assigned_to_id'):
+            existing_labels.add((client_work_id, period_label))
+            latest_instances[client_work_id] = (period_label, due_date, assigned_to_id)
 
-        created_instances = []
+        previous_assignees = get_user_model().objects.in_bulk(
+            {latest[2] for latest in latest_instances.values() if latest[2]}
+        )
 
-        # Determine the first period
-        if start_date:
-            if isinstance(start_date, str):
-                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            period_label, period_start, period_end, due_date = \
-                TaskAutomationService.calculate_period_from_date(
-                    frequency,
-                    start_date,
-                    due_date_day
-                )
-        else:
-            period_label, period_start, period_end, due_date = \
-                TaskAutomationService.calculate_next_period_and_due_date(frequency, due_date_day=due_date_day)
+        today = timezone.now().date()
+        new_instances = []
+
+        for mapping in mappings:
+            frequency = mapping.effective_frequency
+            work_type = mapping.work_type
+            due_date_day = work_type.due_date_day
+            assigned_to = assignees.get((mapping.organization_id, mapping.work_type_id))
+            initial_status = 'NOT_STARTED'
+            started_on = None
+
+            if frequency in ('ONE_TIME', 'YEARLY'):
+                # Only one instance per financial year
+                latest = latest_instances.get(mapping.id)
+                if latest:
+                    periods = [TaskAutomationService.calculate_next_period_and_due_date(
+                        frequency, latest[0], latest[1], due_date_day
+                    )]
+                    if not assigned_to and latest[2]:
+                        assigned_to = previous_assignees.get(latest[2])
+                elif start_date:
+                    periods = [TaskAutomationService.calculate_period_from_date(frequency, start_date, due_date_day)]
+                else:
+                    periods = [TaskAutomationService.calculate_next_period_and_due_date(
+                        frequency, due_date_day=due_date_day
+                    )]
+
+                # Auto-driven task categories start automatically
+                if work_type.is_auto_driven and work_type.auto_start_on_creation:
+                    initial_status = 'STARTED'
+                    started_on = today
+            else:
+                # All tasks are created as NOT_STARTED
+                # Auto-driven tasks will be started automatically by scheduled job on reminder start day
+                periods = TaskAutomationService.plan_fy_periods(frequency, due_date_day, fy_end, start_date)
 
-        # Get assigned employee
-        assigned_to = None
-        assignment = WorkTypeAssignment.objects.filter(
-            work_type=work_type,
-            organization=client_work_mapping.organization,
+            for period_label, period_start, period_end, due_date in periods:
+                # Skip periods that already exist
+                if (mapping.id, period_label) in existing_labels:
+                    continue
+                existing_labels.add((mapping.id, period_label))
+
+                new_instances.append(WorkInstance(
+                    client_work=mapping,
+                    period_label=period_label,
+                    period_start=period_start,
+                    period_end=period_end,
+                    due_date=due_date,
+                    status=initial_status,
+                    started_on=started_on,
+                    assigned_to=assigned_to,
+                    organization=mapping.organization
+                ))
+
+        created = TaskAutomationService.bulk_create_work_instances(new_instances)
+
+        created_by_mapping = {mapping.id: [] for mapping in mappings}
+        for instance in created:
+            created_by_mapping[instance.client_work_id].append(instance)
+
+        return created_by_mapping
+
+    @staticmethod
+    def load_assignees(client_work_mappings):
+        """
+        Preload the assigned employee per (organization_id, work_type_id) for the
+        given mappings with one WorkTypeAssignment query.
+        Default ordering matches the per-mapping .first() lookup.
+        """
+        assignees = {}
+        for assignment in WorkTypeAssignment.objects.filter(
+            work_type_id__in={mapping.work_type_id for mapping in client_work_mappings},
+            organization_id__in={mapping.organization_id for mapping in client_work_mappings},
             is_active=True
-        ).select_related('employee').first()
+        ).select_related('employee'):
+            assignees.setdefault((assignment.organization_id, assignment.work_type_id), assignment.employee)
+        return assignees
 
-        if assignment:
-            assigned_to = assignment.employee
+    @staticmethod
+    def bulk_create_work_instances(new_instances):
+        """
+        bulk_create unsaved WorkInstances, generate their reminders in bulk and
+        queue their Google sync after commit (bulk_create does not send post_save).
 
-        # Create tasks until we pass the financial year end
-        # All tasks are created as NOT_STARTED
-        # They will auto-start on reminder start day via scheduled job
-        iteration_count = 0
-        max_iterations = 12  # Safety limit (max 12 months)
+        Returns:
+            list: The created WorkInstance objects
+        """
+        from django.db import transaction
+        from ..signals import queue_google_sync
+        from .dashboard_service import DashboardService
+        from .task_statistics_service import TaskStatisticsService
 
-        while period_start <= fy_end and iteration_count < max_iterations:
-            iteration_count += 1
+        if not new_instances:
+            return []
 
-            # Check if this period already exists
-            existing = WorkInstance.objects.filter(
-                client_work=client_work_mapping,
-                period_label=period_label
-            ).exists()
+        with transaction.atomic():
+            created = WorkInstance.objects.bulk_create(new_instances, batch_size=BULK_BATCH_SIZE)
+            TaskStatisticsService.record_bulk_create(created)
 
-            if not existing:
-                # All tasks created as NOT_STARTED
-                # Auto-driven tasks will be started automatically by scheduled job on reminder start day
-                work_instance = WorkInstance.objects.create(
-                    client_work=client_work_mapping,
+            # Generate reminders for all new instances in bulk
+            TaskAutomationService.generate_reminders_for_instances(created)
+
+            queue_google_sync(created)
+
+            # bulk_create skips the post_save dashboard invalidation as well
+            organization_ids = {instance.organization_id for instance in created}
+            transaction.on_commit(lambda: [DashboardService.invalidate(org_id) for org_id in organization_ids])
+
+        return created
+
+    @staticmethod
+    def generate_upcoming_work_instances(client_work_mappings, cutoff_date, dry_run=False):
+        """
+        Generate the next work instances for many mappings until each mapping has
+        an instance due on or after cutoff_date.
+
+        The latest instance of every mapping is loaded with the mappings in one
+        query; mappings that already have an instance due on or after cutoff_date
+        (and ONE_TIME mappings with any instance) are filtered out in that query
+        and never loaded. WorkTypeAssignments are preloaded per (organization, work_type), the
+        chain of next periods is computed in memory and all instances are
+        bulk_created at once.
+
+        Args:
+            client_work_mappings: ClientWorkMapping queryset (e.g. active mappings of one organization)
+            cutoff_date: Create instances until the latest due date reaches this date
+            dry_run: If True, only count what would be created
+
+        Returns:
+            dict: ClientWorkMapping -> number of instances created (or to be created)
+        """
+        from django.contrib.auth import get_user_model
+        from django.db.models import OuterRef, Q, Subquery
+
+        latest = WorkInstance.objects.filter(client_work=OuterRef('pk')).order_by('-due_date')
+        mappings_qs = client_work_mappings.select_related('client', 'work_type', 'organization').annotate(
+            latest_due_date=Subquery(latest.values('due_date')[:1]),
+            latest_period_label=Subquery(latest.values('period_label')[:1]),
+            latest_assigned_to_id=Subquery(latest.values('assigned_to_id')[:1]),
+        )
+
+        # Mappings that already have enough instances need no work
+        one_time = Q(freq_override='ONE_TIME') | (
+            (Q(freq_override__isnull=True) | Q(freq_override='')) & Q(work_type__default_frequency='ONE_TIME')
+        )
+        # (filter() with explicit IS NULL terms: NOT on the subquery annotation
+        # is NULL for mappings without instances and would drop them)
+        no_instances = Q(latest_due_date__isnull=True)
+        mappings_qs = mappings_qs.filter(no_instances | Q(latest_due_date__lt=cutoff_date)).filter(
+            no_instances | ~one_time
+        )
+
+        mappings = list(mappings_qs)
+        if not mappings:
+            return {}
+
+        assignees = TaskAutomationService.load_assignees(mappings)
+        previous_assignees = get_user_model().objects.in_bulk(
+            {mapping.latest_assigned_to_id for mapping in mappings if mapping.latest_assigned_to_id}
+        )
+
+        today = timezone.now().date()
+        max_iterations = 50  # Safety limit to prevent infinite loops
+        new_instances = []
+        counts = {}
+
+        for mapping in mappings:
+            frequency = mapping.effective_frequency
+            work_type = mapping.work_type
+            due_date_day = work_type.due_date_day
+
+            # Determine assigned employee: WorkTypeAssignment, else previous instance's assignee
+            assigned_to = assignees.get((mapping.organization_id, mapping.work_type_id))
+            if not assigned_to and mapping.latest_assigned_to_id:
+                assigned_to = previous_assignees.get(mapping.latest_assigned_to_id)
+
+            # Auto-driven task categories start automatically
+            initial_status = 'NOT_STARTED'
+            started_on = None
+            if work_type.is_auto_driven and work_type.auto_start_on_creation:
+                initial_status = 'STARTED'
+                started_on = today
+
+            period_label = mapping.latest_period_label
+            due_date = mapping.latest_due_date
+            created_count = 0
+
+            for _ in range(max_iterations):
+                if period_label:
+                    period = TaskAutomationService.calculate_next_period_and_due_date(
+                        frequency, period_label, due_date, due_date_day
+                    )
+                else:
+                    period = TaskAutomationService.calculate_next_period_and_due_date(
+                        frequency, due_date_day=due_date_day
+                    )
+                period_label, period_start, period_end, due_date = period
+
+                new_instances.append(WorkInstance(
+                    client_work=mapping,
                     period_label=period_label,
                     period_start=period_start,
                     period_end=period_end,
                     due_date=due_date,
-                    status='NOT_STARTED',
-                    started_on=None,
+                    status=initial_status,
+                    started_on=started_on,
                     assigned_to=assigned_to,
-                    organization=client_work_mapping.organization
-                )
+                    organization=mapping.organization
+                ))
+                created_count += 1
 
-                # Generate reminders for this instance
-                TaskAutomationService.generate_reminders_for_instance(work_instance)
+                # ONE_TIME tasks only ever get a single instance
+                if frequency == 'ONE_TIME' or due_date >= cutoff_date:
+                    break
 
-                created_instances.append(work_instance)
+            counts[mapping] = created_count
 
-            # Calculate next period
-            period_label, period_start, period_end, due_date = \
-                TaskAutomationService.calculate_next_period_and_due_date(
-                    frequency,
-                    period_label,
-                    due_date,
-                    due_date_day
-                )
+        if not dry_run:
+            TaskAutomationService.bulk_create_work_instances(new_instances)
 
-        return created_instances
+        return counts
 
     @staticmethod
     def generate_reminders_for_instance(work_instance):
@@ -671,29 +880,63 @@ class TaskAutomationService:
         Uses the new ReminderGenerationService to create separate client/employee reminders.
         Also generates rule-based reminders for backward compatibility.
         """
+        TaskAutomationService.generate_reminders_for_instances([work_instance])
+
+    @staticmethod
+    def generate_reminders_for_instances(work_instances):
+        """
+        Bulk version of generate_reminders_for_instance.
+        Period-based reminders are materialized with ReminderGenerationService's
+        bulk mode; rule-based reminders are checked against one existing-key query
+        per chunk and bulk_created.
+        """
+        work_instances = [wi for wi in work_instances if wi is not None]
+        if not work_instances:
+            return
+
         # Generate period-based reminders (new approach)
-        ReminderGenerationService.generate_period_reminders_for_instance(work_instance)
+        ReminderGenerationService.generate_period_reminders_for_instances(work_instances)
 
         # Also generate rule-based reminders for backward compatibility
-        work_type = work_instance.client_work.work_type
-        active_rules = ReminderRule.objects.filter(
-            work_type=work_type,
-            is_active=True
-        )
+        work_type_ids = {wi.client_work.work_type_id for wi in work_instances}
+        rules_by_work_type = {}
+        for rule in ReminderRule.objects.filter(work_type_id__in=work_type_ids, is_active=True):
+            rules_by_work_type.setdefault(rule.work_type_id, []).append(rule)
+
+        if not rules_by_work_type:
+            return
+
+        instance_ids = [wi.id for wi in work_instances]
+        existing = set()
+        for chunk in ReminderGenerationService._chunks(instance_ids):
+            existing.update(ReminderInstance.objects.filter(
+                work_instance_id__in=chunk,
+                reminder_rule__isnull=False,
+                send_status__in=['PENDING', 'SENT']
+            ).values_list('work_instance_id', 'reminder_rule_id', 'recipient_type', 'email_to'))
 
         current_time = timezone.now()
-        client_email = work_instance.client_work.client.email
-        employee_email = work_instance.assigned_to.email if work_instance.assigned_to else None
-
-        for rule in active_rules:
-            # Calculate scheduled time (11:30 AM IST)
-            scheduled_date = work_instance.due_date + timedelta(days=rule.offset_days)
-            scheduled_at = timezone.make_aware(
-                datetime.combine(scheduled_date, datetime.min.time().replace(hour=11, minute=30))
-            )
+        new_reminders = []
+
+        for work_instance in work_instances:
+            active_rules = rules_by_work_type.get(work_instance.client_work.work_type_id, [])
+            if not active_rules:
+                continue
+
+            client_email = work_instance.client_work.client.email
+            employee_email = work_instance.assigned_to.email if work_instance.assigned_to else None
+
+            for rule in active_rules:
+                # Calculate scheduled time (11:30 AM IST)
+                scheduled_date = work_instance.due_date + timedelta(days=rule.offset_days)
+                scheduled_at = timezone.make_aware(
+                    datetime.combine(scheduled_date, datetime.min.time().replace(hour=11, minute=30))
+                )
+
+                # Only create reminder if it's in the future
+                if scheduled_at < current_time:
+                    continue
 
-            # Only create reminder if it's in the future
-            if scheduled_at >= current_time:
                 # Determine recipients based on rule's recipient_type
                 recipients = []
                 if rule.recipient_type in ['CLIENT', 'BOTH'] and client_email:
@@ -702,24 +945,23 @@ class TaskAutomationService:
                     recipients.append(('EMPLOYEE', employee_email))
 
                 for recipient_type, email in recipients:
+                    key = (work_instance.id, rule.id, recipient_type, email)
                     # Avoid duplicate reminders
-                    if not ReminderInstance.objects.filter(
+                    if key in existing:
+                        continue
+                    existing.add(key)
+                    new_reminders.append(ReminderInstance(
+                        organization=work_instance.organization,
                         work_instance=work_instance,
                         reminder_rule=rule,
                         recipient_type=recipient_type,
+                        scheduled_at=scheduled_at,
                         email_to=email,
-                        send_status__in=['PENDING', 'SENT']
-                    ).exists():
-                        ReminderInstance.objects.create(
-                            organization=work_instance.organization,
-                            work_instance=work_instance,
-                            reminder_rule=rule,
-                            recipient_type=recipient_type,
-                            scheduled_at=scheduled_at,
-                            email_to=email,
-                            send_status='PENDING',
-                            repeat_count=0
-                        )
+                        send_status='PENDING',
+                        repeat_count=0
+                    ))
+
+        ReminderInstance.objects.bulk_create(new_reminders, batch_size=BULK_BATCH_SIZE)
 
     @staticmethod
     def complete_work_instance(work_instance):
@@ -759,26 +1001,35 @@ class TaskAutomationService:
         """
         Mark tasks as overdue if past due date and not completed.
         Also pauses timers for tasks that become overdue.
+
+        Runs from the scheduled mark_overdue_tasks job only; API reads use the
+        overdue_flag annotation (WorkInstanceQuerySet.with_overdue_flag) instead.
         """
+        from django.db import transaction
+        from .task_statistics_service import TaskStatisticsService
+
         today = timezone.now().date()
         overdue_instances = WorkInstance.objects.filter(
             due_date__lt=today,
             status__in=['NOT_STARTED', 'STARTED', 'PAUSED']
         )
 
-        # For each instance that becomes overdue, pause the timer if running
-        for instance in overdue_instances:
-            if instance.is_timer_running:
-                instance.pause_timer()
+        # Pause the timer only for instances that actually have one running
+        for instance in overdue_instances.filter(is_timer_running=True).iterator():
+            instance.pause_timer()
 
-        count = overdue_instances.update(status='OVERDUE')
+        # update() sends no post_save; move the rollup counts in the same transaction
+        with transaction.atomic():
+            TaskStatisticsService.record_bulk_status_change(overdue_instances, 'OVERDUE')
+            count = overdue_instances.update(status='OVERDUE')
         return count
 
     @staticmethod
     def check_and_update_overdue_status():
         """
         Check all tasks and update overdue status.
-        Called on API requests to ensure status is always accurate.
+        Platform-wide write - do not call from request handlers; the task list
+        computes overdue state at read time.
         Returns the count of newly marked overdue tasks.
         """
         return TaskAutomationService.mark_overdue_tasks()
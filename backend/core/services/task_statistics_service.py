@@ -0,0 +1,422 @@
+"""
+Task Statistics Service for NexPro
+
+Maintains the TaskStatisticsDaily rollup (task counts and time spent per
+due date, task category, assigned employee and status) and answers grouped
+count queries from it. Historical dates are read from the rollup; tasks due
+today are always counted from live WorkInstance rows.
+"""
+
+import logging
+import operator
+from collections import defaultdict
+from functools import reduce
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Batch size for rebuild inserts
+REBUILD_BATCH_SIZE = 1000
+
+# Rollup buckets updated per UPDATE statement
+BUCKET_BATCH_SIZE = 100
+
+# Statuses counted as pending in reports
+REPORT_PENDING_STATUSES = ('NOT_STARTED', 'STARTED', 'PAUSED')
+
+
+def _live_field(field):
+    """Map a TaskStatisticsDaily lookup to the equivalent WorkInstance lookup"""
+    if field == 'date' or field.startswith('date__'):
+        return 'due_' + field
+    if field.startswith('work_type'):
+        return 'client_work__' + field
+    return field
+
+
+class TaskStatisticsService:
+    """
+    Service for the daily task statistics rollup.
+    """
+
+    # -------------------------------------------------------------------------
+    # Incremental maintenance
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _get_work_type_ids(client_work_ids, instances=()):
+        """Resolve work_type_id per client_work_id, using cached mappings where loaded"""
+        from ..models import ClientWorkMapping, WorkInstance
+
+        work_type_ids = {}
+        for instance in instances:
+            if WorkInstance.client_work.is_cached(instance):
+                work_type_ids[instance.client_work_id] = instance.client_work.work_type_id
+
+        missing = set(client_work_ids) - set(work_type_ids)
+        if missing:
+            work_type_ids.update(
+                ClientWorkMapping.objects.filter(id__in=missing).values_list('id', 'work_type_id')
+            )
+        return work_type_ids
+
+    @staticmethod
+    def apply_deltas(deltas, instances=()):
+        """
+        Add count/time deltas to the rollup.
+
+        Args:
+            deltas: dict of (organization_id, due_date, client_work_id, assigned_to_id, status)
+                -> [task_count delta, time spent delta in seconds]
+            instances: Optional WorkInstances whose cached client_work can be used
+                to resolve task categories without a query
+        """
+        deltas = {key: value for key, value in deltas.items() if value[0] or value[1]}
+        if not deltas:
+            return
+
+        work_type_ids = TaskStatisticsService._get_work_type_ids(
+            {key[2] for key in deltas}, instances
+        )
+
+        # Merge mappings that share a task category into one rollup bucket
+        bucket_deltas = defaultdict(lambda: [0, 0])
+        for (organization_id, due_date, client_work_id, assigned_to_id, status), (count, seconds) in deltas.items():
+            work_type_id = work_type_ids.get(client_work_id)
+            if work_type_id is None:
+                continue
+            bucket = bucket_deltas[(organization_id, due_date, work_type_id, assigned_to_id, status)]
+            bucket[0] += count
+            bucket[1] += seconds
+
+        buckets = [(key, delta) for key, delta in bucket_deltas.items() if delta[0] or delta[1]]
+        for i in range(0, len(buckets), BUCKET_BATCH_SIZE):
+            TaskStatisticsService._upsert_buckets(dict(buckets[i:i + BUCKET_BATCH_SIZE]))
+
+    @staticmethod
+    def _bucket_filter(key):
+        organization_id, due_date, work_type_id, assigned_to_id, status = key
+        return Q(
+            organization_id=organization_id,
+            date=due_date,
+            work_type_id=work_type_id,
+            assigned_to_id=assigned_to_id,
+            status=status
+        )
+
+    @staticmethod
+    def _upsert_buckets(buckets):
+        """
+        Add deltas to rollup rows with one UPDATE, then insert the buckets that
+        had no row yet. A concurrent insert of the same bucket is caught by the
+        task_statistics_bucket_unique constraint and turned into an update.
+
+        Args:
+            buckets: dict of (organization_id, date, work_type_id, assigned_to_id, status)
+                -> [task_count delta, time spent delta in seconds]
+        """
+        from ..models import TaskStatisticsDaily
+
+        matches = {key: TaskStatisticsService._bucket_filter(key) for key in buckets}
+        rows = TaskStatisticsDaily.objects.filter(reduce(operator.or_, matches.values()))
+
+        updated = rows.update(
+            task_count=F('task_count') + Case(
+                *(When(matches[key], then=Value(count)) for key, (count, _) in buckets.items()),
+                default=Value(0)
+            ),
+            total_time_spent=F('total_time_spent') + Case(
+                *(When(matches[key], then=Value(seconds)) for key, (_, seconds) in buckets.items()),
+                default=Value(0)
+            )
+        )
+        if updated >= len(buckets):
+            return
+
+        # Removals from a missing bucket are ignored: it was already deleted
+        # (cascading task category / organization delete)
+        existing = set(rows.values_list('organization_id', 'date', 'work_type_id', 'assigned_to_id', 'status'))
+        for key, (count, seconds) in buckets.items():
+            if key in existing or count <= 0:
+                continue
+            organization_id, due_date, work_type_id, assigned_to_id, status = key
+            try:
+                with transaction.atomic():
+                    TaskStatisticsDaily.objects.create(
+                        organization_id=organization_id,
+                        date=due_date,
+                        work_type_id=work_type_id,
+                        assigned_to_id=assigned_to_id,
+                        status=status,
+                        task_count=count,
+                        total_time_spent=seconds
+                    )
+            except IntegrityError:
+                # Inserted by a concurrent transaction since the UPDATE above
+                TaskStatisticsDaily.objects.filter(matches[key]).update(
+                    task_count=F('task_count') + count,
+                    total_time_spent=F('total_time_spent') + seconds
+                )
+
+    @staticmethod
+    def record_change(instance, old_key):
+        """
+        Move a WorkInstance between rollup buckets after it was saved.
+
+        Args:
+            instance: The saved WorkInstance
+            old_key: Its statistics key before the save (None if it was just created)
+        """
+        new_key = instance.get_statistics_key()
+        if new_key == old_key:
+            return
+
+        deltas = defaultdict(lambda: [0, 0])
+        if old_key:
+            deltas[old_key[:5]][0] -= 1
+            deltas[old_key[:5]][1] -= old_key[5] or 0
+        deltas[new_key[:5]][0] += 1
+        deltas[new_key[:5]][1] += new_key[5] or 0
+
+        TaskStatisticsService.apply_deltas(deltas, [instance])
+        instance._statistics_key = new_key
+
+    @staticmethod
+    def record_delete(instance):
+        """Remove a deleted WorkInstance from its rollup bucket"""
+        key = getattr(instance, '_statistics_key', None) or instance.get_statistics_key()
+        TaskStatisticsService.apply_deltas({key[:5]: [-1, -(key[5] or 0)]}, [instance])
+
+    @staticmethod
+    def record_bulk_create(instances):
+        """Add WorkInstances created with bulk_create (which sends no post_save)"""
+        deltas = defaultdict(lambda: [0, 0])
+        for instance in instances:
+            key = instance.get_statistics_key()
+            deltas[key[:5]][0] += 1
+            deltas[key[:5]][1] += key[5] or 0
+            instance._statistics_key = key
+
+        TaskStatisticsService.apply_deltas(deltas, instances)
+
+    @staticmethod
+    def record_bulk_status_change(work_instances, new_status):
+        """
+        Move the rows of a WorkInstance queryset to new_status in the rollup.
+        Call before queryset.update(status=new_status), in the same transaction.
+        """
+        deltas = defaultdict(lambda: [0, 0])
+        groups = work_instances.exclude(status=new_status).values(
+            'organization_id', 'due_date', 'client_work_id', 'assigned_to_id', 'status'
+        ).annotate(count=Count('id'), time_spent=Sum('total_time_spent')).order_by()
+
+        for group in groups:
+            base = (group['organization_id'], group['due_date'], group['client_work_id'], group['assigned_to_id'])
+            seconds = group['time_spent'] or 0
+            deltas[base + (group['status'],)][0] -= group['count']
+            deltas[base + (group['status'],)][1] -= seconds
+            deltas[base + (new_status,)][0] += group['count']
+            deltas[base + (new_status,)][1] += seconds
+
+        TaskStatisticsService.apply_deltas(deltas)
+
+    @staticmethod
+    def rebuild(organization=None):
+        """
+        Rebuild the rollup from WorkInstance rows.
+
+        Args:
+            organization: Organization to rebuild, or None for all organizations
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        from ..models import TaskStatisticsDaily, WorkInstance
+
+        work_instances = WorkInstance.objects.all()
+        existing = TaskStatisticsDaily.objects.all()
+        if organization is not None:
+            work_instances = work_instances.filter(organization=organization)
+            existing = existing.filter(organization=organization)
+
+        groups = work_instances.values(
+            'organization_id', 'due_date', 'client_work__work_type_id', 'assigned_to_id', 'status'
+        ).annotate(count=Count('id'), time_spent=Sum('total_time_spent')).order_by()
+
+        written = 0
+        with transaction.atomic():
+            existing.delete()
+
+            batch = []
+            for group in groups.iterator():
+                batch.append(TaskStatisticsDaily(
+                    organization_id=group['organization_id'],
+                    date=group['due_date'],
+                    work_type_id=group['client_work__work_type_id'],
+                    assigned_to_id=group['assigned_to_id'],
+                    status=group['status'],
+                    task_count=group['count'],
+                    total_time_spent=group['time_spent'] or 0
+                ))
+                if len(batch) >= REBUILD_BATCH_SIZE:
+                    TaskStatisticsDaily.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+
+            if batch:
+                TaskStatisticsDaily.objects.bulk_create(batch)
+                written += len(batch)
+
+        return written
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def get_live_counts(work_instances, group_by):
+        """
+        Group a WorkInstance queryset like get_counts does.
+
+        Args:
+            work_instances: WorkInstance queryset
+            group_by: Rollup field names (e.g. 'status', 'work_type__work_name')
+
+        Returns:
+            list: dicts with the group_by fields plus 'count' and 'time_spent' (seconds)
+        """
+        live_fields = [_live_field(field) for field in group_by]
+        rows = work_instances.values(*live_fields).annotate(
+            count=Count('id'),
+            time_spent=Sum('total_time_spent')
+        ).order_by()
+
+        return [
+            dict(
+                zip(group_by, (row[field] for field in live_fields)),
+                count=row['count'],
+                time_spent=row['time_spent'] or 0
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def get_counts(organization, group_by, start_date=None, end_date=None, filters=None, extra_tasks=None):
+        """
+        Get task counts and time spent grouped by rollup fields.
+        Dates other than today are read from the rollup; tasks due today are
+        counted from live rows.
+
+        Args:
+            organization: Organization, or None for platform-wide counts
+            group_by: Rollup field names, e.g. ['status'] or ['assigned_to__username', 'status']
+            start_date: Optional first due date (inclusive)
+            end_date: Optional last due date (inclusive)
+            filters: Optional rollup lookups, e.g. {'work_type_id': 1, 'status': 'COMPLETED'}
+            extra_tasks: Optional WorkInstance queryset counted from live rows in addition
+                (must not overlap the due date range)
+
+        Returns:
+            list: dicts with the group_by fields plus 'count' and 'time_spent' (seconds)
+        """
+        from ..models import TaskStatisticsDaily, WorkInstance
+
+        today = timezone.now().date()
+        filters = filters or {}
+
+        rollup = TaskStatisticsDaily.objects.exclude(date=today)
+        live = WorkInstance.objects.filter(due_date=today)
+
+        if organization is not None:
+            rollup = rollup.filter(organization=organization)
+            live = live.filter(organization=organization)
+
+        if start_date:
+            rollup = rollup.filter(date__gte=start_date)
+            if today < start_date:
+                live = live.none()
+        if end_date:
+            rollup = rollup.filter(date__lte=end_date)
+            if today > end_date:
+                live = live.none()
+
+        for lookup, value in filters.items():
+            rollup = rollup.filter(**{lookup: value})
+            live = live.filter(**{_live_field(lookup): value})
+
+        totals = defaultdict(lambda: [0, 0])
+
+        rollup_rows = rollup.values(*group_by).annotate(
+            count=Sum('task_count'),
+            time_spent=Sum('total_time_spent')
+        ).order_by()
+        for row in rollup_rows:
+            total = totals[tuple(row[field] for field in group_by)]
+            total[0] += row['count'] or 0
+            total[1] += row['time_spent'] or 0
+
+        live_querysets = [live]
+        if extra_tasks is not None:
+            for lookup, value in filters.items():
+                extra_tasks = extra_tasks.filter(**{_live_field(lookup): value})
+            live_querysets.append(extra_tasks)
+
+        for queryset in live_querysets:
+            for row in TaskStatisticsService.get_live_counts(queryset, group_by):
+                total = totals[tuple(row[field] for field in group_by)]
+                total[0] += row['count']
+                total[1] += row['time_spent']
+
+        return [
+            dict(zip(group_by, key), count=count, time_spent=time_spent)
+            for key, (count, time_spent) in totals.items()
+            if count
+        ]
+
+    @staticmethod
+    def summarize(rows, keys, pending_statuses=REPORT_PENDING_STATUSES, rename=None, include_time=False):
+        """
+        Pivot rows grouped by (keys + status) into per-group totals.
+
+        Args:
+            rows: Output of get_counts / get_live_counts grouped by keys and 'status'
+            keys: Fields identifying a group
+            pending_statuses: Statuses counted as pending
+            rename: Optional {field: output name} for the group fields
+            include_time: Add 'total_time' (minutes)
+
+        Returns:
+            list: dicts with the group fields plus total, completed, overdue, pending,
+            sorted by total descending
+        """
+        rename = rename or {}
+        groups = {}
+
+        for row in rows:
+            key = tuple(row[field] for field in keys)
+            entry = groups.get(key)
+            if entry is None:
+                entry = {rename.get(field, field): value for field, value in zip(keys, key)}
+                entry.update(total=0, completed=0, overdue=0, pending=0)
+                if include_time:
+                    entry['total_time'] = 0
+                groups[key] = entry
+
+            entry['total'] += row['count']
+            if row['status'] == 'COMPLETED':
+                entry['completed'] += row['count']
+            elif row['status'] == 'OVERDUE':
+                entry['overdue'] += row['count']
+            elif row['status'] in pending_statuses:
+                entry['pending'] += row['count']
+            if include_time:
+                entry['total_time'] += row['time_spent']
+
+        if include_time:
+            for entry in groups.values():
+                entry['total_time'] //= 60
+
+        return sorted(groups.values(), key=lambda entry: entry['total'], reverse=True)
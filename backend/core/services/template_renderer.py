@@ -0,0 +1,123 @@
+"""
+Compiled Email Template Rendering for NexPro
+
+Templates with {{placeholder}} markers are parsed once into a list of literal
+and placeholder segments; rendering is then a single join, however many
+context keys there are. Compiled EmailTemplates are cached by (id, updated_at)
+so an edited template is recompiled on its next use.
+"""
+
+import re
+from functools import lru_cache
+from django.conf import settings
+
+from core.utils.local_cache import LocalCache
+
+
+# {{client_name}}, {{PAN}}, ...
+PLACEHOLDER_RE = re.compile(r'\{\{(\w+)\}\}')
+
+
+class CompiledTemplate:
+    """
+    A template split into segments. Even indexes are literal text, odd
+    indexes are placeholder names.
+    """
+
+    __slots__ = ('segments',)
+
+    def __init__(self, segments):
+        self.segments = segments
+
+    @classmethod
+    def compile(cls, template_str, pattern=PLACEHOLDER_RE):
+        """Parse template_str; pattern's first group is the placeholder name"""
+        return cls(pattern.split(template_str or ''))
+
+    @property
+    def placeholders(self):
+        return set(self.segments[1::2])
+
+    def render(self, context):
+        """
+        Fill in placeholders from context. Empty values render as ''.
+        Placeholders missing from context are left as they are.
+        """
+        parts = list(self.segments)
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            if name in context:
+                value = context[name]
+                parts[i] = str(value) if value else ''
+            else:
+                parts[i] = f'{{{{{name}}}}}'
+        return ''.join(parts)
+
+    def render_many(self, contexts):
+        """Render the template once per context"""
+        return [self.render(context) for context in contexts]
+
+
+@lru_cache(maxsize=512)
+def compile_template(template_str):
+    """Compile a template string (cached by content)"""
+    return CompiledTemplate.compile(template_str)
+
+
+def get_cache_timeout():
+    """Seconds branding is cached (platform settings changes show up after this)"""
+    return getattr(settings, 'EMAIL_TEMPLATE_CACHE_TIMEOUT', 300)
+
+
+_compiled_email_templates = LocalCache(maxsize=512)
+
+
+class TemplateRenderer:
+    """
+    Service for rendering EmailTemplate subjects and bodies.
+    """
+
+    @staticmethod
+    def get_compiled(email_template):
+        """
+        Get the compiled (subject, body) of an EmailTemplate, cached by id
+        and updated_at.
+
+        Returns:
+            tuple: (CompiledTemplate, CompiledTemplate)
+        """
+        key = (email_template.pk, email_template.updated_at)
+        compiled = _compiled_email_templates.get(key)
+        if compiled is None:
+            compiled = (
+                CompiledTemplate.compile(email_template.subject_template),
+                CompiledTemplate.compile(email_template.body_template),
+            )
+            _compiled_email_templates.set(key, compiled)
+        return compiled
+
+    @staticmethod
+    def render(email_template, context):
+        """
+        Render an EmailTemplate for one context.
+
+        Returns:
+            tuple: (subject, body)
+        """
+        subject, body = TemplateRenderer.get_compiled(email_template)
+        return subject.render(context), body.render(context)
+
+    @staticmethod
+    def render_batch(email_template, contexts):
+        """
+        Render an EmailTemplate for many recipients from one compiled template.
+
+        Args:
+            email_template: EmailTemplate instance
+            contexts: Iterable of context dicts (see EmailService.get_context_from_work_instance)
+
+        Returns:
+            list: (subject, body) tuples in the order of contexts
+        """
+        subject, body = TemplateRenderer.get_compiled(email_template)
+        return [(subject.render(context), body.render(context)) for context in contexts]
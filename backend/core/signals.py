@@ -1,98 +1,51 @@
 """
 Django signals for automatic Google Tasks synchronization.
-Triggers sync when WorkInstance tasks are created, updated, or deleted.
+Queues sync (via the Google sync outbox) when WorkInstance tasks are created,
+updated, or deleted.
+Queues background Google Drive uploads of new task documents.
+Also invalidates cached dashboard summaries when tasks or clients change and
+keeps the daily task statistics rollup up to date.
 """
 import logging
-from django.db.models.signals import post_save, pre_delete
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
 
-@receiver(post_save, sender='core.WorkInstance')
-def sync_workinstance_to_google(sender, instance, created, **kwargs):
+def queue_google_sync(work_instances):
+    """
+    Queue Google Tasks sync for work instances saved without post_save
+    (e.g. bulk_create). Written to the sync outbox after the current
+    transaction commits.
     """
-    Auto-sync task to Google Tasks when created or updated in NexPro.
+    from core.services.google_sync_outbox import GoogleSyncOutboxService
 
-    Triggers on:
-    - Task creation (especially when assigned to employee)
-    - Task updates (status, due_date, remarks changes)
+    GoogleSyncOutboxService.enqueue_upserts(work_instances)
 
-    Only syncs if:
-    - Task is assigned to an employee
-    - Employee has Google Tasks enabled
-    - Organization sync settings allow it
+
+@receiver(post_save, sender='core.WorkInstance')
+def sync_workinstance_to_google(sender, instance, created, raw=False, **kwargs):
     """
-    from core.models import GoogleConnection, GoogleSyncSettings, GoogleTaskMapping
-    from core.services.google_tasks_service import GoogleTasksService
+    Queue the task for Google Tasks sync when created or updated in NexPro.
 
-    # Skip if no employee assigned
-    if not instance.assigned_to:
+    No Google API call is made here: an outbox row is written after commit
+    (one pending row per task, so repeated saves coalesce) and the
+    drain_google_sync_outbox task syncs it. Only tasks assigned to employees
+    with Google Tasks connected are queued; organization sync settings are
+    checked when the outbox is drained.
+    """
+    if raw or not instance.assigned_to_id:
         return
 
     try:
-        # Check if employee has Google Tasks connected
-        try:
-            google_connection = GoogleConnection.objects.get(
-                user=instance.assigned_to,
-                status='CONNECTED',
-                tasks_enabled=True
-            )
-        except GoogleConnection.DoesNotExist:
-            # Employee doesn't have Google Tasks enabled, skip sync
-            return
-
-        # Check organization sync settings
-        try:
-            sync_settings = GoogleSyncSettings.objects.get(
-                organization=instance.organization
-            )
-
-            # Check if task sync is enabled
-            if not sync_settings.sync_tasks_to_google:
-                return
-
-            # Check filters
-            if sync_settings.sync_only_assigned_tasks:
-                # Already handled by checking instance.assigned_to above
-                pass
-
-            # Check work type filter
-            if sync_settings.sync_work_types.exists():
-                work_type = instance.client_work.work_type
-                if work_type not in sync_settings.sync_work_types.all():
-                    return
-
-        except GoogleSyncSettings.DoesNotExist:
-            # No sync settings, use defaults (sync enabled)
-            pass
-
-        # Skip completed tasks if configured
-        if instance.status == 'COMPLETED':
-            # Still sync to mark as completed in Google
-            pass
-
-        # Perform the sync
-        tasks_service = GoogleTasksService(google_connection)
-
-        # Trigger notification for newly assigned tasks
-        trigger_notification = created and instance.assigned_to
-
-        tasks_service.sync_task_to_google(
-            work_instance=instance,
-            sync_settings=sync_settings if 'sync_settings' in locals() else None
-        )
-
-        logger.info(
-            f"Auto-synced WorkInstance {instance.id} to Google Tasks "
-            f"for user {instance.assigned_to.username}"
-        )
-
+        queue_google_sync([instance])
     except Exception as e:
         # Log error but don't block the save operation
         logger.error(
-            f"Error auto-syncing WorkInstance {instance.id} to Google: {str(e)}",
+            f"Error queuing WorkInstance {instance.id} for Google sync: {str(e)}",
             exc_info=True
         )
 
@@ -100,54 +53,113 @@ def sync_workinstance_to_google(sender, instance, created, **kwargs):
 @receiver(pre_delete, sender='core.WorkInstance')
 def delete_workinstance_from_google(sender, instance, **kwargs):
     """
-    Delete task from Google Tasks when deleted in NexPro.
+    Queue deletion of the task from Google Tasks when deleted in NexPro.
 
-    Only deletes if:
-    - Task was synced to Google (has GoogleTaskMapping)
-    - Employee still has Google Tasks enabled
+    Only queued if the task was synced to Google (has a GoogleTaskMapping).
+    The mapping's Google IDs are copied to the outbox because the mapping is
+    deleted along with the task.
     """
-    from core.models import GoogleConnection, GoogleTaskMapping
-    from core.services.google_tasks_service import GoogleTasksService
+    from core.models import GoogleTaskMapping
+    from core.services.google_sync_outbox import GoogleSyncOutboxService
 
     # Skip if no employee assigned
-    if not instance.assigned_to:
+    if not instance.assigned_to_id:
         return
 
     try:
-        # Check if task was synced to Google
-        try:
-            mapping = GoogleTaskMapping.objects.get(
-                work_instance=instance,
-                user=instance.assigned_to
-            )
-        except GoogleTaskMapping.DoesNotExist:
-            # Task was never synced to Google, nothing to delete
-            return
-
-        # Check if employee still has Google Tasks connected
-        try:
-            google_connection = GoogleConnection.objects.get(
-                user=instance.assigned_to,
-                status='CONNECTED',
-                tasks_enabled=True
-            )
-        except GoogleConnection.DoesNotExist:
-            # Employee disconnected Google Tasks, just delete the mapping
-            mapping.delete()
-            return
-
-        # Delete from Google Tasks
-        tasks_service = GoogleTasksService(google_connection)
-        tasks_service.delete_task_from_google(instance)
-
-        logger.info(
-            f"Auto-deleted WorkInstance {instance.id} from Google Tasks "
-            f"for user {instance.assigned_to.username}"
-        )
-
+        mapping = GoogleTaskMapping.objects.filter(
+            work_instance=instance,
+            user_id=instance.assigned_to_id
+        ).first()
+        if mapping:
+            GoogleSyncOutboxService.enqueue_delete(instance, mapping)
     except Exception as e:
         # Log error but don't block the delete operation
         logger.error(
-            f"Error auto-deleting WorkInstance {instance.id} from Google: {str(e)}",
+            f"Error queuing deletion of WorkInstance {instance.id} from Google: {str(e)}",
             exc_info=True
         )
+
+
+@receiver(post_save, sender='core.GoogleConnection')
+@receiver(post_delete, sender='core.GoogleConnection')
+def invalidate_google_connected_users(sender, instance, **kwargs):
+    """Refresh the cached set of users queued for Google Tasks sync"""
+    from core.services.google_sync_outbox import GoogleSyncOutboxService
+
+    transaction.on_commit(GoogleSyncOutboxService.invalidate_connected_users)
+
+
+@receiver(post_save, sender='core.TaskDocument')
+def queue_task_document_drive_upload(sender, instance, created, raw=False, **kwargs):
+    """
+    Queue a Google Drive upload of a new task document (when the
+    organization auto-uploads attachments). The upload runs on the
+    google_drive Celery queue.
+    """
+    if not created or raw:
+        return
+
+    from core.services.google_drive_uploads import GoogleDriveUploadQueue
+
+    try:
+        GoogleDriveUploadQueue.enqueue(instance)
+    except Exception as e:
+        logger.error(f"Error queueing Google Drive upload of document {instance.id}: {str(e)}")
+
+
+@receiver(post_save, sender='core.WorkInstance')
+@receiver(post_delete, sender='core.WorkInstance')
+@receiver(post_save, sender='core.Client')
+@receiver(post_delete, sender='core.Client')
+def invalidate_dashboard_summary(sender, instance, **kwargs):
+    """
+    Invalidate the cached dashboard summaries of the instance's organization
+    once the change is committed.
+    """
+    from core.services.dashboard_service import DashboardService
+
+    organization_id = instance.organization_id
+    if organization_id:
+        transaction.on_commit(lambda: DashboardService.invalidate(organization_id))
+
+
+@receiver(pre_save, sender='core.WorkInstance')
+def load_task_statistics_key(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Read the stored statistics values of a task saved without having been
+    loaded from the database (e.g. WorkInstance(id=...).save()), so
+    update_task_statistics knows which bucket it leaves.
+    """
+    if raw or instance.pk is None or getattr(instance, '_statistics_key', None) is not None:
+        return
+    if not sender.affects_statistics(update_fields):
+        return
+
+    instance._statistics_key = sender.objects.filter(pk=instance.pk).values_list(
+        *sender.STATISTICS_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender='core.WorkInstance')
+def update_task_statistics(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Move the task between TaskStatisticsDaily buckets when its organization,
+    due date, mapping, assignee, status or time spent changes.
+    Runs in the same transaction as the save.
+    """
+    from core.services.task_statistics_service import TaskStatisticsService
+
+    if raw or not sender.affects_statistics(update_fields):
+        return
+
+    old_key = None if created else getattr(instance, '_statistics_key', None)
+    TaskStatisticsService.record_change(instance, old_key)
+
+
+@receiver(post_delete, sender='core.WorkInstance')
+def remove_task_statistics(sender, instance, **kwargs):
+    """Remove a deleted task from its TaskStatisticsDaily bucket"""
+    from core.services.task_statistics_service import TaskStatisticsService
+
+    TaskStatisticsService.record_delete(instance)
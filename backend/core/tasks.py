@@ -1,4 +1,6 @@
+import uuid
 from celery import shared_task
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 from .models import ReminderInstance, WorkInstance
@@ -6,122 +8,362 @@ from .services.email_service import EmailService
 from .services.task_service import TaskAutomationService
 
 
+# Batch size for set-based status write-backs
+REMINDER_BULK_BATCH_SIZE = 500
+
+
+def _bulk_set_reminder_status(reminder_ids, send_status):
+    """Update send_status for many reminders with chunked UPDATE ... WHERE id IN queries"""
+    for i in range(0, len(reminder_ids), REMINDER_BULK_BATCH_SIZE):
+        ReminderInstance.objects.filter(
+            id__in=reminder_ids[i:i + REMINDER_BULK_BATCH_SIZE]
+        ).update(send_status=send_status)
+
+
+REMINDER_SELECT_RELATED = (
+    'work_instance__client_work__client',
+    'work_instance__client_work__work_type__sender_email',
+    'work_instance__assigned_to',
+    'work_instance__organization',
+    'reminder_rule__email_template',
+    'organization',
+)
+
+# Reminders per send_reminder_group task
+REMINDER_GROUP_SIZE = 200
+
+# A dispatched reminder that is still PENDING after this long (e.g. its task
+# was lost) is dispatched again
+REMINDER_CLAIM_TIMEOUT = timedelta(minutes=30)
+
+# Times send_reminder_group waits for a free slot before giving up; its
+# reminders stay claimed and are dispatched again after REMINDER_CLAIM_TIMEOUT
+REMINDER_GROUP_MAX_RETRIES = 60
+
+# Per-connection lock of sync_google_tasks_for_connection
+GOOGLE_TASKS_SYNC_LOCK_KEY = 'google_sync:tasks_from_google:{connection_id}'
+
+
 @shared_task
 def send_pending_reminders():
     """
-    Celery task to send pending reminder emails
+    Celery task to dispatch pending reminder emails
     Runs periodically (every 10 minutes as configured in celery.py)
 
     IMPORTANT: For reminders with frequency (DAILY, WEEKLY, etc.), we only send
     ONE reminder per task per day, even if multiple reminders are scheduled.
     This prevents sending multiple emails when catching up on past-due reminders.
+
+    Set-based pipeline:
+    1. Load due reminders, the (task, recipient type, email) keys already
+       sent today and the keys of reminders still queued, in one query each
+    2. Bulk-update CANCELLED (task completed) and SKIPPED (already sent today) rows
+    3. Group the rest per organization/sender account, at most one reminder
+       per key (later ones wait for the next run, when the key is known to be
+       sent or not)
+    4. Claim the grouped reminders (last_attempt_at = now) and send each group
+       in chunks with send_reminder_group on the bulk email queue
     """
+    from .services.email_queue import EMAIL_QUEUE_BULK
+
     current_time = timezone.now()
-    today = current_time.date()
+    # sent_at__date compares in the current (local) time zone
+    today = timezone.localdate(current_time)
+    claim_cutoff = current_time - REMINDER_CLAIM_TIMEOUT
 
-    # Fetch pending reminders that are due (scheduled_at <= now)
+    # Fetch pending reminders that are due (scheduled_at <= now) and not
+    # already dispatched to a worker
     pending_reminders = ReminderInstance.objects.filter(
+        Q(last_attempt_at__isnull=True) | Q(last_attempt_at__lt=claim_cutoff),
         send_status='PENDING',
         scheduled_at__lte=current_time
     ).select_related(
-        'work_instance__client_work__client',
-        'work_instance__client_work__work_type',
-        'reminder_rule__email_template',
-        'organization'
+        *REMINDER_SELECT_RELATED
     ).order_by('scheduled_at')  # Process oldest first
 
-    sent_count = 0
-    failed_count = 0
+    # Track which task+recipient combinations have already been sent to today.
+    # Pre-loaded in one query; this prevents sending multiple "catch-up"
+    # reminders in one day.
+    sent_today = set(
+        ReminderInstance.objects.filter(
+            send_status='SENT',
+            sent_at__date=today
+        ).values_list('work_instance_id', 'recipient_type', 'email_to')
+    )
+
+    # Combinations with a reminder dispatched earlier and not sent yet
+    in_flight = set(
+        ReminderInstance.objects.filter(
+            send_status='PENDING',
+            last_attempt_at__gte=claim_cutoff
+        ).values_list('work_instance_id', 'recipient_type', 'email_to')
+    )
+
     skipped_count = 0
+    deferred_count = 0
 
-    # Track which task+recipient combinations we've already sent to today
-    # This prevents sending multiple "catch-up" reminders in one day
-    sent_today = set()
+    cancelled_ids = []
+    skipped_ids = []
+    send_groups = {}
+    dispatched_keys = set()
 
     for reminder in pending_reminders:
         work_instance = reminder.work_instance
 
         # Skip if work is already completed
         if work_instance.status == 'COMPLETED':
-            reminder.send_status = 'CANCELLED'
-            reminder.save()
+            cancelled_ids.append(reminder.id)
             continue
 
         # Create a unique key for this task + recipient type combination
         task_recipient_key = (work_instance.id, reminder.recipient_type, reminder.email_to)
 
-        # Check if we've already sent a reminder for this task+recipient today
         if task_recipient_key in sent_today:
-            # Skip this reminder - already sent one today for this task
-            # Mark older (past-due) reminders as SKIPPED to avoid re-processing
-            if reminder.scheduled_at.date() < today:
-                reminder.send_status = 'SKIPPED'
-                reminder.save()
+            # Already sent today - skip and mark old (past-due) ones as SKIPPED
+            # to avoid re-processing
+            if timezone.localdate(reminder.scheduled_at) < today:
+                skipped_ids.append(reminder.id)
             skipped_count += 1
             continue
 
-        # Also check database for any reminder sent today for this task+recipient
-        already_sent_today = ReminderInstance.objects.filter(
-            work_instance=work_instance,
-            recipient_type=reminder.recipient_type,
-            email_to=reminder.email_to,
-            send_status='SENT',
-            sent_at__date=today
-        ).exists()
-
-        if already_sent_today:
-            # Already sent today - skip and mark old ones as SKIPPED
-            if reminder.scheduled_at.date() < today:
-                reminder.send_status = 'SKIPPED'
-                reminder.save()
-            skipped_count += 1
+        if task_recipient_key in dispatched_keys or task_recipient_key in in_flight:
+            # Decided on the next run, once the earlier reminder is sent (or failed)
+            deferred_count += 1
             continue
-
-        # Send email
-        success, error_message = EmailService.send_reminder_email(reminder)
-
-        if success:
-            reminder.send_status = 'SENT'
-            reminder.sent_at = current_time
-            reminder.error_message = None
-            sent_count += 1
-
-            # Mark that we've sent to this task+recipient today
-            sent_today.add(task_recipient_key)
-
-            # Handle repeating reminders (for rule-based reminders with repeat_if_pending)
-            if reminder.reminder_rule and reminder.reminder_rule.repeat_if_pending:
-                if reminder.repeat_count < reminder.reminder_rule.max_repeats:
-                    # Create next repeat instance
-                    next_scheduled = current_time + timedelta(
-                        days=reminder.reminder_rule.repeat_interval
-                    )
-                    ReminderInstance.objects.create(
-                        organization=reminder.organization,
-                        work_instance=work_instance,
-                        reminder_rule=reminder.reminder_rule,
-                        recipient_type=reminder.recipient_type,
-                        scheduled_at=next_scheduled,
-                        email_to=reminder.email_to,
-                        send_status='PENDING',
-                        repeat_count=reminder.repeat_count + 1
-                    )
-        else:
-            reminder.send_status = 'FAILED'
-            reminder.error_message = error_message
-            failed_count += 1
-
-        reminder.last_attempt_at = current_time
-        reminder.save()
+        dispatched_keys.add(task_recipient_key)
+
+        # Group sends per organization/sender account (scheduled order is kept
+        # within a group)
+        work_type = work_instance.client_work.work_type
+        group_key = (work_instance.organization_id, work_type.sender_email_id)
+        send_groups.setdefault(group_key, []).append(reminder.id)
+
+    _bulk_set_reminder_status(cancelled_ids, 'CANCELLED')
+    _bulk_set_reminder_status(skipped_ids, 'SKIPPED')
+
+    # Claim and dispatch. The claim time identifies this dispatch: a reminder
+    # dispatched again after REMINDER_CLAIM_TIMEOUT is ignored by the old task.
+    queued_count = 0
+    for reminder_ids in send_groups.values():
+        for i in range(0, len(reminder_ids), REMINDER_GROUP_SIZE):
+            chunk = reminder_ids[i:i + REMINDER_GROUP_SIZE]
+            ReminderInstance.objects.filter(id__in=chunk).update(last_attempt_at=current_time)
+            send_reminder_group.apply_async(
+                args=[chunk, current_time.isoformat()],
+                queue=EMAIL_QUEUE_BULK
+            )
+            queued_count += len(chunk)
 
     return {
-        'sent': sent_count,
-        'failed': failed_count,
+        'queued': queued_count,
+        'deferred': deferred_count,
         'skipped': skipped_count,
-        'total_processed': sent_count + failed_count + skipped_count
+        'cancelled': len(cancelled_ids),
+        'total_processed': queued_count + deferred_count + skipped_count
     }
 
 
+@shared_task(bind=True, max_retries=REMINDER_GROUP_MAX_RETRIES)
+def send_reminder_group(self, reminder_ids, claimed_at):
+    """
+    Send a chunk of reminders of one organization/sender account, dispatched
+    by send_pending_reminders.
+
+    Waits (retries, up to REMINDER_GROUP_MAX_RETRIES times) while the
+    organization already has EMAIL_QUEUE_ORG_BULK_CONCURRENCY reminder groups
+    sending (single emails of the organization have their own slots). The sender account
+    is resolved once and one pooled SMTP connection is reused for the chunk.
+    Reminders are not counted against the daily email limits. Statuses are
+    written back with bulk_update.
+
+    Args:
+        reminder_ids: Reminder IDs to send
+        claimed_at: ISO datetime the reminders were claimed at; reminders
+            claimed again since (by a later dispatch) are skipped
+
+    Returns:
+        dict: sent and failed counts
+    """
+    from datetime import datetime
+    from .services.email_queue import EmailQueue
+
+    reminders = list(
+        ReminderInstance.objects.filter(
+            id__in=reminder_ids,
+            send_status='PENDING',
+            last_attempt_at=datetime.fromisoformat(claimed_at)
+        ).select_related(
+            *REMINDER_SELECT_RELATED
+        ).order_by('scheduled_at')
+    )
+    if not reminders:
+        return {'sent': 0, 'failed': 0}
+
+    organization = reminders[0].work_instance.organization
+    work_type = reminders[0].work_instance.client_work.work_type
+    slots = EmailQueue.acquire_slots(organization_id=organization.id, bulk=True)
+    if slots is None:
+        if self.request.retries >= REMINDER_GROUP_MAX_RETRIES:
+            # Still claimed - send_pending_reminders dispatches them again
+            # after REMINDER_CLAIM_TIMEOUT
+            return {'sent': 0, 'failed': 0}
+        raise self.retry(countdown=EmailQueue.slot_retry_delay())
+
+    current_time = timezone.now()
+    sent_count = 0
+    failed_count = 0
+    to_update = []
+    repeats = []
+
+    try:
+        # Resolve the sender account and reminder templates once for the chunk
+        if work_type.sender_email_id and work_type.sender_email.is_active:
+            email_account = work_type.sender_email
+        else:
+            email_account = EmailService.get_default_email_account(organization)
+        templates = EmailService.get_reminder_templates(
+            {reminder.work_instance.client_work.work_type_id for reminder in reminders}
+        )
+
+        # Reuse one SMTP connection and write the email logs in bulk for the whole chunk
+        with EmailService.batch():
+            for reminder in reminders:
+                work_instance = reminder.work_instance
+
+                # Send email
+                success, error_message = EmailService.send_reminder_email(
+                    reminder, email_account=email_account, templates=templates
+                )
+
+                if success:
+                    reminder.send_status = 'SENT'
+                    reminder.sent_at = current_time
+                    reminder.error_message = None
+                    sent_count += 1
+
+                    # Handle repeating reminders (for rule-based reminders with repeat_if_pending)
+                    if reminder.reminder_rule and reminder.reminder_rule.repeat_if_pending:
+                        if reminder.repeat_count < reminder.reminder_rule.max_repeats:
+                            # Queue next repeat instance
+                            next_scheduled = current_time + timedelta(
+                                days=reminder.reminder_rule.repeat_interval
+                            )
+                            repeats.append(ReminderInstance(
+                                organization=reminder.organization,
+                                work_instance=work_instance,
+                                reminder_rule=reminder.reminder_rule,
+                                recipient_type=reminder.recipient_type,
+                                scheduled_at=next_scheduled,
+                                email_to=reminder.email_to,
+                                send_status='PENDING',
+                                repeat_count=reminder.repeat_count + 1
+                            ))
+                else:
+                    reminder.send_status = 'FAILED'
+                    reminder.error_message = error_message
+                    failed_count += 1
+
+                reminder.last_attempt_at = current_time
+                to_update.append(reminder)
+    finally:
+        EmailQueue.release_slots(slots)
+
+        ReminderInstance.objects.bulk_update(
+            to_update,
+            ['send_status', 'sent_at', 'error_message', 'last_attempt_at',
+             'subject_rendered', 'body_rendered'],
+            batch_size=REMINDER_BULK_BATCH_SIZE
+        )
+        if repeats:
+            ReminderInstance.objects.bulk_create(repeats, batch_size=REMINDER_BULK_BATCH_SIZE)
+
+    return {'sent': sent_count, 'failed': failed_count}
+
+
+@shared_task(bind=True, max_retries=None)
+def send_queued_email(self, message):
+    """
+    Send one email queued with EmailQueue.enqueue.
+
+    Messages on the priority lane (OTP) are sent immediately. Others wait
+    (retry) for an SMTP/organization concurrency slot. Failed sends are
+    retried with exponential backoff up to EMAIL_QUEUE_MAX_RETRIES times.
+
+    Args:
+        message: Message dict built by EmailQueue.enqueue
+
+    Returns:
+        dict: success and error
+    """
+    import logging
+    from django.conf import settings
+    from .services.email_queue import EmailQueue
+
+    logger = logging.getLogger(__name__)
+
+    slots = []
+    if not message.get('priority'):
+        slots = EmailQueue.acquire_slots(
+            organization_id=message.get('organization_id'),
+            # Queued emails are sent over SMTP (platform or organization account)
+            provider='SMTP'
+        )
+        if slots is None:
+            raise self.retry(countdown=EmailQueue.slot_retry_delay())
+
+    try:
+        success, error = EmailQueue.deliver(message)
+    finally:
+        EmailQueue.release_slots(slots)
+
+    if not success:
+        attempt = message.get('attempt', 0)
+        if attempt < getattr(settings, 'EMAIL_QUEUE_MAX_RETRIES', 5):
+            logger.warning(
+                f"Queued email to {message['to_email']} failed (attempt {attempt + 1}), retrying: {error}"
+            )
+            raise self.retry(
+                args=[dict(message, attempt=attempt + 1)],
+                countdown=EmailQueue.retry_delay(attempt)
+            )
+        logger.error(f"Queued email to {message['to_email']} failed permanently: {error}")
+
+    return {'success': success, 'error': error}
+
+
+@shared_task
+def flush_email_usage():
+    """
+    Write pending email usage counts to EmailUsageLog
+    Runs every minute as configured in celery.py
+    """
+    from .services.email_rate_limiter import EmailRateLimiter
+
+    return {'written': EmailRateLimiter.flush_recent()}
+
+
+@shared_task
+def flush_google_quota_usage():
+    """
+    Write buffered Google API usage counts to GoogleAPIQuotaUsage
+    Runs every minute as configured in celery.py
+    """
+    from .services.google_quota import google_quota
+
+    return {'written': google_quota.flush_recent()}
+
+
+@shared_task
+def recover_email_log_spool():
+    """
+    Write email logs left in the spool files of crashed workers
+    Runs every 5 minutes as configured in celery.py
+    """
+    from .services.email_log_buffer import email_log_buffer
+
+    return {'recovered': email_log_buffer.recover_spool()}
+
+
 @shared_task
 def mark_overdue_tasks():
     """
@@ -132,6 +374,50 @@ def mark_overdue_tasks():
     return {'overdue_count': count}
 
 
+@shared_task
+def generate_work_instances_for_organizations(organization_ids, cutoff_date, dry_run=False):
+    """
+    Generate upcoming work instances for the active mappings of a chunk of organizations.
+    Used as a chord subtask by the generate_work_instances management command.
+
+    Args:
+        organization_ids: Organization IDs in this chunk
+        cutoff_date: ISO date; create instances until the latest due date reaches it
+        dry_run: If True, only count what would be created
+
+    Returns:
+        dict: mappings processed and instances created in this chunk
+    """
+    from datetime import date
+    from .models import ClientWorkMapping
+
+    counts = TaskAutomationService.generate_upcoming_work_instances(
+        ClientWorkMapping.objects.filter(active=True, organization_id__in=organization_ids),
+        date.fromisoformat(cutoff_date),
+        dry_run=dry_run
+    )
+    return {
+        'mappings': len(counts),
+        'created': sum(counts.values())
+    }
+
+
+@shared_task
+def summarize_work_instance_generation(results, dry_run=False):
+    """
+    Chord callback for generate_work_instances_for_organizations.
+    Totals the chunk results and marks overdue tasks once all chunks are done.
+    """
+    summary = {
+        'mappings': sum(result['mappings'] for result in results),
+        'created': sum(result['created'] for result in results),
+        'overdue_count': 0
+    }
+    if not dry_run:
+        summary['overdue_count'] = TaskAutomationService.mark_overdue_tasks()
+    return summary
+
+
 @shared_task
 def auto_start_tasks():
     """
@@ -256,162 +542,315 @@ def sync_google_tasks_to_nexpro():
     Celery task to sync changes from Google Tasks back to NexPro.
     Runs periodically (every 5 minutes as configured in celery.py)
 
-    For each user with Google Tasks enabled:
-    1. Fetch all tasks from their Google Task list
-    2. Compare with GoogleTaskMapping records
-    3. Identify tasks updated in Google (newer google_updated_at)
-    4. Update corresponding NexPro WorkInstances
-    5. Log all operations
+    Fans out one sync_google_tasks_for_connection subtask per user with
+    Google Tasks enabled, so a slow account only delays itself. The chord
+    callback summarize_google_tasks_sync totals the results.
 
     Returns:
-        dict: Statistics about the sync operation
+        dict: Number of connections dispatched
     """
     import logging
+    from celery import chord
+    from django.conf import settings
     from django.utils import timezone
-    from datetime import datetime
-    from .models import GoogleConnection, GoogleTaskMapping, GoogleSyncLog
-    from .services.google_tasks_service import GoogleTasksService
+    from .models import GoogleConnection
 
     logger = logging.getLogger(__name__)
-    logger.info("Starting periodic Google Tasks → NexPro sync")
-
-    # Statistics
-    total_users = 0
-    total_tasks_checked = 0
-    total_tasks_updated = 0
-    total_tasks_skipped = 0
-    total_errors = 0
 
-    # Get all users with active Google Tasks connection
-    active_connections = GoogleConnection.objects.filter(
+    connection_ids = list(GoogleConnection.objects.filter(
         status='CONNECTED',
         tasks_enabled=True
-    ).select_related('user')
+    ).values_list('id', flat=True))
 
-    total_users = active_connections.count()
-    logger.info(f"Found {total_users} users with active Google Tasks connection")
+    logger.info(f"Dispatching Google Tasks → NexPro sync for {len(connection_ids)} connection(s)")
+    if not connection_ids:
+        return {'dispatched': 0}
 
-    for google_connection in active_connections:
-        user = google_connection.user
-        logger.info(f"Syncing Google Tasks for user: {user.username}")
+    soft_time_limit = getattr(settings, 'GOOGLE_SYNC_CONNECTION_TIME_LIMIT', 120)
+    chord(
+        sync_google_tasks_for_connection.s(connection_id).set(
+            soft_time_limit=soft_time_limit,
+            time_limit=soft_time_limit + 30
+        )
+        for connection_id in connection_ids
+    )(summarize_google_tasks_sync.s(started_at=timezone.now().isoformat()))
 
-        try:
-            # Initialize Google Tasks service
-            tasks_service = GoogleTasksService(google_connection)
+    return {'dispatched': len(connection_ids)}
 
-            # Fetch all tasks from Google
-            google_tasks = tasks_service.get_all_google_tasks()
 
-            if not google_tasks:
-                logger.info(f"No Google Tasks found for user {user.username}")
-                continue
+@shared_task
+def sync_google_tasks_for_connection(connection_id):
+    """
+    Sync changes from Google Tasks for one connection, fetching only the
+    tasks updated in Google since the connection's sync cursor (see
+    GoogleTasksService.sync_changes_from_google). Used as a chord subtask by
+    sync_google_tasks_to_nexpro.
 
-            total_tasks_checked += len(google_tasks)
-            logger.info(f"Found {len(google_tasks)} tasks in Google Tasks for {user.username}")
-
-            # Process each Google Task
-            for google_task in google_tasks:
-                google_task_id = google_task.get('id')
-                google_updated_str = google_task.get('updated')
-
-                if not google_task_id or not google_updated_str:
-                    continue
-
-                try:
-                    # Check if we have a mapping for this task
-                    try:
-                        mapping = GoogleTaskMapping.objects.get(
-                            google_task_id=google_task_id,
-                            user=user
-                        )
-                    except GoogleTaskMapping.DoesNotExist:
-                        # No mapping found - this task wasn't created from NexPro
-                        # Skip it (we only sync tasks that originated from NexPro)
-                        continue
-
-                    # Parse Google's updated timestamp
-                    google_updated_dt = datetime.fromisoformat(
-                        google_updated_str.replace('Z', '+00:00')
-                    )
-
-                    # Check if Google has newer changes than our last sync
-                    if mapping.google_updated_at:
-                        stored_google_updated = mapping.google_updated_at
-                        if hasattr(stored_google_updated, 'tzinfo') and stored_google_updated.tzinfo is None:
-                            # Make it timezone-aware
-                            stored_google_updated = timezone.make_aware(stored_google_updated)
-
-                        if google_updated_dt <= stored_google_updated:
-                            # No new changes in Google, skip
-                            total_tasks_skipped += 1
-                            continue
-
-                    # Also check if NexPro was updated more recently
-                    if mapping.nexpro_updated_at:
-                        nexpro_updated = mapping.nexpro_updated_at
-                        if hasattr(nexpro_updated, 'tzinfo') and nexpro_updated.tzinfo is None:
-                            nexpro_updated = timezone.make_aware(nexpro_updated)
-
-                        if nexpro_updated > google_updated_dt:
-                            # NexPro has newer changes, don't overwrite
-                            logger.info(
-                                f"Skipping task {google_task_id}: "
-                                f"NexPro updated more recently"
-                            )
-                            total_tasks_skipped += 1
-                            continue
-
-                    # Sync the task from Google to NexPro
-                    logger.info(f"Syncing task {google_task_id} from Google to NexPro")
-                    work_instance = tasks_service.sync_task_from_google(
-                        google_task_id=google_task_id,
-                        tasklist_id=google_connection.tasks_list_id
-                    )
-
-                    if work_instance:
-                        total_tasks_updated += 1
-                        logger.info(
-                            f"Successfully synced task {google_task_id} "
-                            f"to WorkInstance {work_instance.id}"
-                        )
-
-                except Exception as task_error:
-                    total_errors += 1
-                    logger.error(
-                        f"Error syncing task {google_task_id} for user {user.username}: "
-                        f"{str(task_error)}",
-                        exc_info=True
-                    )
-                    # Log the error but continue with other tasks
-                    try:
-                        GoogleSyncLog.objects.create(
-                            organization=google_connection.user.organization,
-                            user=user,
-                            sync_type='TASK_FROM_GOOGLE',
-                            status='FAILED',
-                            google_task_id=google_task_id,
-                            error_message=str(task_error)
-                        )
-                    except Exception:
-                        pass
+    A run is skipped while an earlier run for the same connection still
+    holds its lock.
+
+    Returns:
+        dict: checked, updated, skipped and errors counts, and status
+            ('synced', 'locked', 'disconnected', 'timeout' or 'failed')
+    """
+    import logging
+    from celery.exceptions import SoftTimeLimitExceeded
+    from django.conf import settings
+    from django.core.cache import cache
+    from .models import GoogleConnection
+    from .services.google_tasks_service import GoogleTasksService
+
+    logger = logging.getLogger(__name__)
+    result = {'checked': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+
+    # The lock outlives the hard time limit, so a killed run cannot hold it forever
+    lock_key = GOOGLE_TASKS_SYNC_LOCK_KEY.format(connection_id=connection_id)
+    lock_timeout = getattr(settings, 'GOOGLE_SYNC_CONNECTION_TIME_LIMIT', 120) + 60
+    if not cache.add(lock_key, 1, lock_timeout):
+        logger.info(f"Google Tasks sync for connection {connection_id} already running, skipping")
+        return {**result, 'status': 'locked'}
+
+    try:
+        google_connection = GoogleConnection.objects.filter(
+            id=connection_id,
+            status='CONNECTED',
+            tasks_enabled=True
+        ).select_related('user').first()
+        if not google_connection:
+            return {**result, 'status': 'disconnected'}
+
+        result.update(GoogleTasksService(google_connection).sync_changes_from_google())
+        result['status'] = 'synced'
+    except SoftTimeLimitExceeded:
+        result['errors'] += 1
+        result['status'] = 'timeout'
+        logger.error(f"Google Tasks sync for connection {connection_id} timed out")
+    except Exception as e:
+        result['errors'] += 1
+        result['status'] = 'failed'
+        logger.error(f"Error syncing Google Tasks for connection {connection_id}: {str(e)}", exc_info=True)
+    finally:
+        cache.delete(lock_key)
+
+    return result
+
+
+@shared_task
+def summarize_google_tasks_sync(results, started_at=None):
+    """
+    Chord callback for sync_google_tasks_for_connection.
+    Totals the per-connection results once all connections are done.
+    """
+    import logging
+    from django.utils import timezone
+
+    logger = logging.getLogger(__name__)
+
+    summary = {
+        'total_users': len(results),
+        'total_tasks_checked': sum(result['checked'] for result in results),
+        'total_tasks_updated': sum(result['updated'] for result in results),
+        'total_tasks_skipped': sum(result['skipped'] for result in results),
+        'total_errors': sum(result['errors'] for result in results),
+        'locked': sum(1 for result in results if result['status'] == 'locked'),
+        'timed_out': sum(1 for result in results if result['status'] == 'timeout'),
+        'started_at': started_at,
+        'timestamp': timezone.now().isoformat()
+    }
 
+    logger.info(f"Google Tasks sync completed: {summary}")
+    return summary
+
+
+@shared_task
+def sync_google_calendar_to_nexpro():
+    """
+    Celery task to sync changes from Google Calendar back to NexPro.
+    Runs periodically (every 5 minutes as configured in celery.py)
+
+    For each user with Google Calendar enabled, lists only the events changed
+    since that connection's Calendar sync token and applies newer due dates
+    to the mapped WorkInstances (see GoogleCalendarService.sync_changes_from_calendar).
+
+    Returns:
+        dict: Statistics about the sync operation
+    """
+    import logging
+    from django.utils import timezone
+    from .models import GoogleConnection
+    from .services.google_calendar_service import GoogleCalendarService
+
+    logger = logging.getLogger(__name__)
+
+    totals = {'checked': 0, 'updated': 0, 'skipped': 0, 'errors': 0}
+
+    active_connections = list(GoogleConnection.objects.filter(
+        status='CONNECTED',
+        calendar_enabled=True
+    ).select_related('user'))
+
+    for google_connection in active_connections:
+        try:
+            stats = GoogleCalendarService(google_connection).sync_changes_from_calendar()
         except Exception as user_error:
-            total_errors += 1
+            totals['errors'] += 1
             logger.error(
-                f"Error syncing Google Tasks for user {user.username}: {str(user_error)}",
+                f"Error syncing Google Calendar for user {google_connection.user.username}: {str(user_error)}",
                 exc_info=True
             )
-            # Continue with next user
+            continue
+
+        for key in totals:
+            totals[key] += stats[key]
 
-    # Return statistics
     result = {
-        'total_users': total_users,
-        'total_tasks_checked': total_tasks_checked,
-        'total_tasks_updated': total_tasks_updated,
-        'total_tasks_skipped': total_tasks_skipped,
-        'total_errors': total_errors,
+        'total_users': len(active_connections),
+        'total_events_checked': totals['checked'],
+        'total_tasks_updated': totals['updated'],
+        'total_events_skipped': totals['skipped'],
+        'total_errors': totals['errors'],
         'timestamp': timezone.now().isoformat()
     }
 
-    logger.info(f"Google Tasks sync completed: {result}")
+    logger.info(f"Google Calendar sync completed: {result}")
     return result
+
+
+@shared_task
+def sync_work_instances_to_google(work_instance_ids):
+    """
+    Celery task to sync a batch of WorkInstances to Google Tasks right away,
+    bypassing the sync outbox debounce.
+
+    Connections and organization sync settings are loaded once for the batch,
+    and each connection's tasks are sent with batch HTTP requests.
+
+    Returns:
+        dict: Statistics about the sync operation
+    """
+    from .services.google_sync_outbox import GoogleSyncOutboxService, WORK_INSTANCE_SELECT_RELATED
+
+    work_instances = WorkInstance.objects.filter(
+        id__in=work_instance_ids,
+        assigned_to__isnull=False
+    ).select_related(*WORK_INSTANCE_SELECT_RELATED)
+
+    stats = GoogleSyncOutboxService.sync_work_instances(list(work_instances))
+    return {
+        'synced': stats['synced'],
+        'skipped': stats['skipped'],
+        'errors': stats['errors']
+    }
+
+
+@shared_task
+def drain_google_sync_outbox():
+    """
+    Celery task to send pending Google Tasks sync operations queued by the
+    WorkInstance signals. Runs every minute; rows changed within the last
+    GOOGLE_SYNC_DEBOUNCE_SECONDS wait for the next run so bursts of edits
+    to a task are synced once.
+
+    Returns:
+        dict: Statistics about the drain
+    """
+    import logging
+    from .services.google_sync_outbox import GoogleSyncOutboxService
+
+    logger = logging.getLogger(__name__)
+
+    result = GoogleSyncOutboxService.drain()
+    if result.get('processed'):
+        logger.info(f"Google sync outbox drained: {result}")
+    return result
+
+
+@shared_task(bind=True, max_retries=None, acks_late=True)
+def upload_task_document_to_drive(self, upload_id):
+    """
+    Upload a task document to Google Drive in resumable chunks (see
+    GoogleDriveUploadQueue.upload). Runs on the google_drive queue.
+
+    Waits (retries) for one of GOOGLE_DRIVE_UPLOAD_CONCURRENCY upload slots.
+    A failed upload is retried with exponential backoff, resuming from the
+    last chunk Google received, up to GOOGLE_DRIVE_UPLOAD_MAX_ATTEMPTS times.
+
+    Args:
+        upload_id: GoogleDriveMapping (FILE) ID
+
+    Returns:
+        dict: status of the upload
+    """
+    from .services.google_drive_uploads import SLOT_RETRY_DELAY, GoogleDriveUploadQueue
+
+    # Leases are owned by the task ID, so a redelivered task takes its own
+    # slot and upload lock back
+    owner = self.request.id or uuid.uuid4().hex
+    slot = GoogleDriveUploadQueue.acquire_slot(owner)
+    if not slot:
+        raise self.retry(countdown=SLOT_RETRY_DELAY)
+
+    try:
+        result = GoogleDriveUploadQueue.upload(upload_id, owner=owner, slot=slot)
+    finally:
+        GoogleDriveUploadQueue.release_slot(slot, owner)
+
+    if result['status'] == 'retry':
+        raise self.retry(countdown=result['countdown'])
+    return result
+
+
+@shared_task
+def resume_google_drive_uploads():
+    """
+    Celery task to dispatch again Google Drive uploads interrupted by a
+    worker restart. Runs every 10 minutes as configured in celery.py
+    """
+    from .services.google_drive_uploads import GoogleDriveUploadQueue
+
+    return {'dispatched': GoogleDriveUploadQueue.resume_stalled()}
+
+
+@shared_task
+def create_google_drive_client_folders(connection_id, client_ids=None):
+    """
+    Create the Google Drive folder structure of many clients with batch
+    calls (see GoogleDriveService.create_client_folder_structures).
+    Runs on the google_drive queue.
+
+    Args:
+        connection_id: GoogleConnection whose Drive holds the folders
+        client_ids: Clients to create folders for (default: all active
+            clients of the connection's organization)
+
+    Returns:
+        dict: cached, found, created and errors counts
+    """
+    import logging
+    from .models import Client, GoogleConnection, GoogleSyncLog
+    from .services.google_drive_service import GoogleDriveService
+
+    logger = logging.getLogger(__name__)
+
+    google_connection = GoogleConnection.objects.filter(
+        id=connection_id,
+        status='CONNECTED',
+        drive_enabled=True
+    ).select_related('user', 'organization').first()
+    if not google_connection:
+        return {'skipped': 'Google Drive not enabled'}
+
+    clients = Client.objects.filter(organization_id=google_connection.organization_id)
+    clients = clients.filter(id__in=client_ids) if client_ids else clients.filter(status='ACTIVE')
+
+    stats = GoogleDriveService(google_connection).create_client_folder_structures(clients)
+
+    GoogleSyncLog.objects.create(
+        organization=google_connection.organization,
+        user=google_connection.user,
+        sync_type='DRIVE_FOLDER_CREATE',
+        status='FAILED' if stats['errors'] else 'SUCCESS',
+        details=f"Client folder structures: {stats}"
+    )
+    logger.info(f"Created Google Drive client folders for connection {connection_id}: {stats}")
+    return stats
@@ -1,3 +1,1734 @@
-from django.test import TestCase
+import glob
+import json
+import os
+import smtplib
+import tempfile
+import threading
+from datetime import date, timedelta
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+import httplib2
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from googleapiclient.errors import HttpError
+from rest_framework.test import APIClient
+
+from .models import (
+    Client, ClientWorkMapping, EmailLog, EmailTemplate, EmailUsageLog, GoogleAPIQuotaUsage, GoogleConnection,
+    GoogleSyncOutbox,
+    Notification, Organization, PlatformSettings, ReminderInstance, ReminderRule, TaskDocument, TaskStatisticsDaily,
+    User, WorkInstance, WorkType
+)
+from .services.email_log_buffer import email_log_buffer
+from .services.email_queue import EmailQueue
+from .services.email_rate_limiter import EmailRateLimiter
+from .services.email_service import EmailService
+from .services.google_calendar_service import GoogleCalendarService
+from .services.google_client_cache import GoogleClientCache
+from .services.google_drive_folders import folder_path
+from .services.google_drive_service import GoogleDriveService, get_upload_chunk_size
+from .services.google_drive_uploads import UPLOAD_LOCK_KEY, GoogleDriveUploadQueue, UploadLeaseLost
+from .services.google_oauth_service import GoogleOAuthService
+from .services.google_quota import GoogleQuotaCounter
+from .services.google_rate_limiter import BATCH_SIZE, GoogleRateLimitExceeded, GoogleRateLimiter
+from .services.google_sync_outbox import GoogleSyncOutboxService
+from .services.google_tasks_service import MAX_SYNC_FAILURES, GoogleTasksService
+from .services.otp_service import OTPService
+from .services.reminder_schedule import get_date_rule, get_reminder_schedule
+from .services.smtp_pool import SMTPConnectionPool
+from .services.task_service import TaskAutomationService
+from .services.task_statistics_service import TaskStatisticsService
+from .services.template_renderer import CompiledTemplate
+from .tasks import send_reminder_group
+from .utils.query_budget import get_router_endpoints, measure_endpoints, seed_tenant
+
+
+class WorkInstanceQueryCountTests(TestCase):
+    """
+    Task list endpoints must run a fixed number of queries per page,
+    independent of how many tasks (and documents) are on the page.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Query Count Firm', email='firm@example.com')
+        cls.user = User.objects.create_user(
+            username='querycount-admin',
+            email='admin@example.com',
+            password='not-used',
+            organization=cls.organization,
+            role='ADMIN'
+        )
+        cls.staff = [
+            User.objects.create_user(
+                username=f'querycount-staff-{i}',
+                email=f'staff{i}@example.com',
+                password='not-used',
+                organization=cls.organization,
+                role='STAFF'
+            )
+            for i in range(3)
+        ]
+        cls.client_record = Client.objects.create(
+            organization=cls.organization,
+            client_code='QC001',
+            client_name='Query Count Client',
+            email='client@example.com',
+            category='COMPANY'
+        )
+        cls.mappings = [
+            ClientWorkMapping.objects.create(
+                organization=cls.organization,
+                client=cls.client_record,
+                work_type=WorkType.objects.create(
+                    organization=cls.organization,
+                    work_name=f'Category {i}',
+                    default_frequency='MONTHLY'
+                ),
+                start_from_period='Apr 2025'
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.task_count = 0
+
+    def add_tasks(self, count):
+        """Create tasks spread over mappings and assignees, each with a document"""
+        today = timezone.now().date()
+        instances = []
+        for _ in range(count):
+            self.task_count += 1
+            instances.append(WorkInstance(
+                organization=self.organization,
+                client_work=self.mappings[self.task_count % len(self.mappings)],
+                period_label=f'Period {self.task_count}',
+                due_date=today + timedelta(days=self.task_count),
+                assigned_to=self.staff[self.task_count % len(self.staff)]
+            ))
+        instances = WorkInstance.objects.bulk_create(instances)
+        TaskDocument.objects.bulk_create([
+            TaskDocument(
+                organization=self.organization,
+                work_instance=instance,
+                file=f'task_documents/test/{instance.id}.pdf',
+                file_name=f'{instance.id}.pdf'
+            )
+            for instance in instances
+        ])
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.api.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assertFixedQueryCount(self, url):
+        self.add_tasks(3)
+        small_page_queries = self.count_queries(url)
+
+        self.add_tasks(6)
+        large_page_queries = self.count_queries(url)
+
+        self.assertEqual(
+            small_page_queries, large_page_queries,
+            f'{url} runs more queries as rows are added (N+1)'
+        )
+
+    def test_task_list_query_count(self):
+        self.assertFixedQueryCount('/api/tasks/')
+
+    def test_client_tasks_query_count(self):
+        self.assertFixedQueryCount(f'/api/clients/{self.client_record.id}/tasks/')
+
+    def test_dashboard_upcoming_tasks_query_count(self):
+        self.assertFixedQueryCount('/api/dashboard/upcoming_tasks/')
+
+    def test_document_count_is_annotated(self):
+        self.add_tasks(2)
+        response = self.api.get('/api/tasks/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(task['document_count'] == 1 for task in response.data['results']))
+
+
+class WorkInstanceOverdueTests(TestCase):
+    """Overdue state is computed when tasks are read; listing tasks never writes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Overdue Firm', email='overdue@example.com')
+        cls.user = User.objects.create_user(
+            username='overdue-admin',
+            email='overdue-admin@example.com',
+            password='not-used',
+            organization=cls.organization,
+            role='ADMIN'
+        )
+        mapping = ClientWorkMapping.objects.create(
+            organization=cls.organization,
+            client=Client.objects.create(
+                organization=cls.organization,
+                client_code='OD001',
+                client_name='Overdue Client',
+                email='overdue-client@example.com',
+                category='COMPANY'
+            ),
+            work_type=WorkType.objects.create(
+                organization=cls.organization,
+                work_name='Overdue Category',
+                default_frequency='MONTHLY'
+            ),
+            start_from_period='Apr 2025'
+        )
+        today = timezone.now().date()
+        cls.overdue_task, cls.upcoming_task, cls.completed_task = [
+            WorkInstance.objects.create(
+                organization=cls.organization,
+                client_work=mapping,
+                period_label=label,
+                due_date=today + timedelta(days=days),
+                status=status
+            )
+            for label, days, status in (
+                ('Overdue', -3, 'NOT_STARTED'),
+                ('Upcoming', 3, 'NOT_STARTED'),
+                ('Completed', -3, 'COMPLETED'),
+            )
+        ]
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def list_ids(self, url):
+        response = self.api.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return {task['id'] for task in response.data['results']}
+
+    def test_filter_on_computed_flag(self):
+        self.assertEqual(self.list_ids('/api/tasks/?is_overdue=true'), {self.overdue_task.id})
+        self.assertEqual(
+            self.list_ids('/api/tasks/?is_overdue=false'),
+            {self.upcoming_task.id, self.completed_task.id}
+        )
+
+    def test_ordering_on_computed_flag(self):
+        response = self.api.get('/api/tasks/?ordering=-overdue_flag', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['id'], self.overdue_task.id)
+        self.assertTrue(response.data['results'][0]['is_overdue'])
+
+    def test_list_does_not_write(self):
+        with CaptureQueriesContext(connection) as context:
+            self.list_ids('/api/tasks/')
+
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].lstrip().upper().startswith(('UPDATE', 'INSERT', 'DELETE'))
+        ]
+        self.assertEqual(writes, [])
+        self.overdue_task.refresh_from_db()
+        self.assertEqual(self.overdue_task.status, 'NOT_STARTED')
+
+
+class EndpointQueryBudgetTests(TestCase):
+    """
+    Every read-only router endpoint must run the same number of queries
+    whether the tenant has a handful of rows or many times more.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Query Budget Firm', email='budget@example.com')
+        cls.admin = User.objects.create_user(
+            username='budget-admin',
+            email='budget-admin@example.com',
+            password='not-used',
+            organization=cls.organization,
+            role='ADMIN'
+        )
+        cls.platform_admin = User.objects.create_user(
+            username='budget-platform-admin',
+            email='budget-platform@example.com',
+            password='not-used',
+            organization=cls.organization,
+            role='ADMIN',
+            is_platform_admin=True
+        )
+        seed_tenant(cls.organization, clients=2, tasks_per_client=2, work_types=2, staff=2, prefix='small')
+        # googlesync-connection-status creates the caller's connection, so
+        # it exists from the start and the other Google endpoints answer the
+        # same whichever runs first
+        GoogleConnection.objects.create(user=cls.admin, organization=cls.organization)
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+        self.platform_api = APIClient()
+        self.platform_api.force_authenticate(self.platform_admin)
+
+    # Endpoints that do not answer 200 for a user whose Google connection is
+    # not connected, without Google OAuth configuration (everything else must
+    # return 200)
+    EXPECTED_STATUS = {
+        'googlesync-auth-url': 400,
+        'googlesync-calendars': 400,
+        'googlesync-task-lists': 400,
+    }
+
+    def get_endpoints(self):
+        """Router endpoints, with the query parameters required by some actions"""
+        query_params = {
+            'worktypeassignment-by-work-type': {
+                'work_type_id': WorkType.objects.filter(organization=self.organization).values_list('id', flat=True).first()
+            },
+            'credentialvault-by-client': {
+                'client_id': Client.objects.filter(organization=self.organization).values_list('id', flat=True).first()
+            },
+        }
+        return [
+            (name, f'{path}?{urlencode(query_params[name])}' if name in query_params else path)
+            for name, path in get_router_endpoints()
+        ]
+
+    def test_query_count_does_not_grow_with_rows(self):
+        endpoints = self.get_endpoints()
+        small = measure_endpoints(self.api, self.platform_api, endpoints)
+        seed_tenant(self.organization, clients=6, tasks_per_client=3, work_types=4, staff=3, prefix='large')
+        large = measure_endpoints(self.api, self.platform_api, endpoints)
+
+        self.assertTrue(small, 'No router endpoints found')
+        for path, before in small.items():
+            after = large[path]
+            with self.subTest(endpoint=path):
+                expected_status = self.EXPECTED_STATUS.get(before['name'], 200)
+                self.assertEqual(before['status_code'], expected_status, f'{path} returned {before["status_code"]}')
+                self.assertEqual(after['status_code'], expected_status, f'{path} returned {after["status_code"]}')
+                self.assertLessEqual(
+                    after['queries'], before['queries'],
+                    f'{path} runs more queries as rows are added (N+1)'
+                )
+
+
+@mock.patch('core.services.smtp_pool.smtplib.SMTP')
+class SMTPConnectionPoolTests(SimpleTestCase):
+    """SMTP connections are reused inside a batch and reopened when dropped"""
+
+    def send(self, pool, count=1):
+        for _ in range(count):
+            pool.send('smtp.example.com', 587, 'user', 'secret', 'starttls',
+                      'from@example.com', ['to@example.com'], 'message')
+
+    def test_connection_reused_in_batch(self, smtp_class):
+        pool = SMTPConnectionPool()
+        with pool.batch():
+            self.send(pool, 3)
+            smtp_class.return_value.quit.assert_not_called()
+
+        self.assertEqual(smtp_class.call_count, 1)
+        self.assertEqual(smtp_class.return_value.login.call_count, 1)
+        self.assertEqual(smtp_class.return_value.sendmail.call_count, 3)
+        smtp_class.return_value.quit.assert_called_once()
+
+    def test_connection_per_message_outside_batch(self, smtp_class):
+        pool = SMTPConnectionPool()
+        self.send(pool, 2)
+
+        self.assertEqual(smtp_class.call_count, 2)
+        self.assertEqual(smtp_class.return_value.quit.call_count, 2)
+
+    def test_reconnect_after_disconnect(self, smtp_class):
+        dropped, fresh = mock.Mock(), mock.Mock()
+        dropped.sendmail.side_effect = [None, smtplib.SMTPServerDisconnected('gone')]
+        smtp_class.side_effect = [dropped, fresh]
+
+        pool = SMTPConnectionPool()
+        with pool.batch():
+            self.send(pool, 2)
+
+        self.assertEqual(smtp_class.call_count, 2)
+        fresh.sendmail.assert_called_once()
+
+    def test_max_messages_per_connection(self, smtp_class):
+        pool = SMTPConnectionPool()
+        with self.settings(SMTP_POOL_MAX_MESSAGES=2), pool.batch():
+            self.send(pool, 5)
+
+        self.assertEqual(smtp_class.call_count, 3)
+
+    def test_batches_in_other_threads_keep_their_connections(self, smtp_class):
+        first, second = mock.Mock(), mock.Mock()
+        smtp_class.side_effect = [first, second]
+        pool = SMTPConnectionPool()
+        other_batch_done = threading.Event()
+
+        def other_batch():
+            with pool.batch():
+                self.send(pool)
+            other_batch_done.set()
+
+        with pool.batch():
+            self.send(pool)
+            thread = threading.Thread(target=other_batch)
+            thread.start()
+            thread.join()
+            self.assertTrue(other_batch_done.is_set())
+
+            # The other thread's batch closed only its own connection
+            first.quit.assert_not_called()
+            second.quit.assert_called_once()
+            self.send(pool)
+
+        self.assertEqual(first.sendmail.call_count, 2)
+        first.quit.assert_called_once()
+
+
+class EmailQueueSlotTests(SimpleTestCase):
+    """Concurrency slots limit in-flight sends per provider and organization"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_slots_are_limited_and_released(self):
+        with self.settings(EMAIL_QUEUE_ORG_CONCURRENCY=2):
+            first = EmailQueue.acquire_slots(organization_id='org-1')
+            second = EmailQueue.acquire_slots(organization_id='org-1')
+            self.assertIsNotNone(first)
+            self.assertIsNotNone(second)
+            self.assertIsNone(EmailQueue.acquire_slots(organization_id='org-1'))
+            # Other organizations are not affected
+            self.assertIsNotNone(EmailQueue.acquire_slots(organization_id='org-2'))
+
+            EmailQueue.release_slots(first)
+            self.assertIsNotNone(EmailQueue.acquire_slots(organization_id='org-1'))
+
+    def test_busy_organization_does_not_hold_provider_slot(self):
+        with self.settings(EMAIL_QUEUE_ORG_CONCURRENCY=1,
+                           EMAIL_QUEUE_PROVIDER_CONCURRENCY={'SMTP': 2}):
+            self.assertIsNotNone(EmailQueue.acquire_slots(organization_id='org-1', provider='SMTP'))
+            self.assertIsNone(EmailQueue.acquire_slots(organization_id='org-1', provider='SMTP'))
+            self.assertIsNotNone(EmailQueue.acquire_slots(organization_id='org-2', provider='SMTP'))
+
+    def test_reminder_batches_do_not_take_single_email_slots(self):
+        with self.settings(EMAIL_QUEUE_ORG_CONCURRENCY=1, EMAIL_QUEUE_ORG_BULK_CONCURRENCY=1):
+            self.assertIsNotNone(EmailQueue.acquire_slots(organization_id='org-1', bulk=True))
+            self.assertIsNone(EmailQueue.acquire_slots(organization_id='org-1', bulk=True))
+            self.assertIsNotNone(EmailQueue.acquire_slots(organization_id='org-1'))
+
+    @mock.patch('core.tasks.send_queued_email.apply_async', side_effect=ConnectionError('broker down'))
+    def test_enqueue_reports_failed_inline_send(self, apply_async):
+        with mock.patch.object(EmailQueue, 'deliver', return_value=(False, 'SMTP not configured')):
+            success, error = OTPService.send_email('user@example.com', 'Code', '123456', priority=True)
+
+        self.assertFalse(success)
+        self.assertEqual(error, 'SMTP not configured')
+
+    @mock.patch('core.tasks.send_queued_email.apply_async')
+    def test_enqueue_reports_queued_email(self, apply_async):
+        self.assertEqual(OTPService.send_email('user@example.com', 'Code', '123456', priority=True), (True, None))
+        self.assertEqual(apply_async.call_args.kwargs['queue'], 'email_priority')
+
+
+class EmailRateLimiterTests(TestCase):
+    """Daily email limits are enforced with cache counters and flushed to EmailUsageLog"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Rate Limit Firm', email='limits@example.com')
+        cls.other_organization = Organization.objects.create(name='Other Firm', email='other@example.com')
+        platform_settings = PlatformSettings.get_settings()
+        platform_settings.email_daily_limit_per_org = 5
+        platform_settings.email_daily_limit_platform = 8
+        platform_settings.save()
+
+    def setUp(self):
+        cache.clear()
+
+    def reserve(self, organization, count):
+        """Reserve count sends one by one; returns how many were granted"""
+        return sum(EmailRateLimiter.reserve(organization)[0] for _ in range(count))
+
+    def test_organization_limit(self):
+        self.assertEqual(self.reserve(self.organization, 5), 5)
+        can_send, error = EmailRateLimiter.reserve(self.organization)
+        self.assertFalse(can_send)
+        self.assertIn('organization', error)
+        self.assertFalse(EmailUsageLog.increment_count(self.organization)[0])
+        self.assertEqual(EmailRateLimiter.get_count(self.organization), 5)
+
+    def test_platform_limit(self):
+        self.reserve(self.organization, 5)
+        self.assertEqual(self.reserve(self.other_organization, 3), 3)
+        can_send, error = EmailRateLimiter.reserve(self.other_organization)
+        self.assertFalse(can_send)
+        self.assertIn('Platform', error)
+        self.assertEqual(EmailRateLimiter.get_total(), 8)
+        self.assertEqual(EmailRateLimiter.get_count(self.other_organization), 3)
+
+    def test_release_returns_sends(self):
+        self.reserve(self.organization, 5)
+        EmailRateLimiter.release(self.organization)
+        EmailRateLimiter.release(self.organization)
+        self.assertEqual(self.reserve(self.organization, 5), 2)
+
+    def test_release_after_flush_does_not_go_negative(self):
+        self.reserve(self.organization, 3)
+        EmailRateLimiter.flush()
+        EmailRateLimiter.release(self.organization)
+        EmailRateLimiter.release(self.organization)
+
+        self.assertEqual(EmailRateLimiter.flush(), 0)
+        self.assertEqual(EmailUsageLog.objects.get(organization=self.organization).email_count, 1)
+        self.assertEqual(EmailRateLimiter.get_count(self.organization), 1)
+        # Later sends are flushed in full
+        self.reserve(self.organization, 2)
+        self.assertEqual(EmailRateLimiter.flush(), 2)
+
+    def test_flush_writes_usage_log(self):
+        for _ in range(4):
+            EmailUsageLog.increment_count(self.organization)
+        EmailRateLimiter.flush()
+
+        usage = EmailUsageLog.objects.get(organization=self.organization)
+        self.assertEqual(usage.email_count, 4)
+        # Nothing pending is written twice
+        self.assertEqual(EmailRateLimiter.flush(), 0)
+
+    def test_counters_seeded_from_usage_log(self):
+        EmailUsageLog.objects.create(
+            organization=self.organization, date=timezone.now().date(), email_count=4
+        )
+        self.assertEqual(self.reserve(self.organization, 3), 1)
+
+    @mock.patch.object(EmailService, 'send_via_sendgrid')
+    @mock.patch.object(EmailService, 'send_email_via_platform_smtp', return_value=(True, None))
+    def test_system_emails_use_platform_smtp_and_are_not_counted(self, send_smtp, send_sendgrid):
+        platform_settings = PlatformSettings.get_settings()
+        platform_settings.email_provider = 'SENDGRID'
+        platform_settings.save()
+        self.reserve(None, 8)
+        message = {'to_email': 'user@example.com', 'subject': 'Code', 'body': '123456', 'priority': True}
+
+        # OTP (priority) and other system emails are sent at the platform cap
+        self.assertEqual(EmailQueue.deliver(message), (True, None))
+        self.assertEqual(EmailQueue.deliver(dict(message, priority=False)), (True, None))
+
+        self.assertEqual(send_smtp.call_count, 2)
+        send_sendgrid.assert_not_called()
+        self.assertEqual(EmailRateLimiter.get_total(), 8)
+
+    @mock.patch.object(EmailService, 'send_email_via_platform_smtp', return_value=(False, 'SMTP error'))
+    def test_failed_send_gives_its_reservation_back(self, send_smtp):
+        result = EmailService.send_email_with_provider('user@example.com', 'Subject', 'Body', organization=self.organization)
+
+        self.assertEqual(result, (False, 'SMTP error'))
+        self.assertEqual(EmailRateLimiter.get_total(), 0)
+
+    @mock.patch.object(EmailService, 'send_reminder_email', return_value=(True, None))
+    def test_reminders_are_not_held_back_by_the_daily_limit(self, send_reminder):
+        work_type = WorkType.objects.create(organization=self.organization, work_name='Limit Category')
+        work_instance = WorkInstance.objects.create(
+            organization=self.organization,
+            client_work=ClientWorkMapping.objects.create(
+                organization=self.organization,
+                client=Client.objects.create(
+                    organization=self.organization,
+                    client_code='RL001',
+                    client_name='Limit Client',
+                    email='limit-client@example.com',
+                    category='COMPANY'
+                ),
+                work_type=work_type,
+                start_from_period='Apr 2025'
+            ),
+            period_label='Period',
+            period_start=timezone.now().date(),
+            due_date=timezone.now().date() + timedelta(days=5)
+        )
+        claimed_at = timezone.now()
+        reminder = ReminderInstance.objects.create(
+            organization=self.organization,
+            work_instance=work_instance,
+            recipient_type='CLIENT',
+            email_to='limit-client@example.com',
+            scheduled_at=claimed_at,
+            last_attempt_at=claimed_at
+        )
+        self.reserve(self.organization, 5)
+
+        self.assertEqual(send_reminder_group([reminder.id], claimed_at.isoformat()), {'sent': 1, 'failed': 0})
+        reminder.refresh_from_db()
+        self.assertEqual(reminder.send_status, 'SENT')
+        # Reminders do not use up the organization's daily limit
+        self.assertEqual(EmailRateLimiter.get_count(self.organization), 5)
+
+
+class EmailLogBufferTests(TestCase):
+    """Email logs are written once with their final status, in bulk inside a batch"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Log Firm', email='logs@example.com')
+
+    def setUp(self):
+        spool_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spool_dir.cleanup)
+        self.spool_dir = spool_dir.name
+        settings_override = override_settings(EMAIL_LOG_SPOOL_DIR=self.spool_dir, EMAIL_LOG_BUFFER_SIZE=3)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def log_email(self, to_email):
+        return EmailService.log_email(
+            organization=self.organization,
+            from_email='firm@example.com',
+            to_email=to_email,
+            subject='Reminder',
+            tracking_id=EmailService.generate_tracking_id()
+        )
+
+    def test_single_email_is_written_once(self):
+        email_log = self.log_email('one@example.com')
+        self.assertFalse(EmailLog.objects.exists())
+
+        with self.assertNumQueries(1):
+            email_log.mark_failed('Connection refused')
+        self.assertEqual(EmailLog.objects.get().status, 'FAILED')
+
+    def test_batch_writes_logs_in_bulk(self):
+        with EmailService.batch():
+            for i in range(5):
+                self.log_email(f'client{i}@example.com').mark_sent(message_id=f'<{i}@example.com>')
+            # The first full buffer has been written
+            self.assertEqual(EmailLog.objects.count(), 3)
+
+        self.assertEqual(EmailLog.objects.filter(status='SENT').count(), 5)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_recover_spool_of_crashed_worker(self):
+        tracking_id = EmailService.generate_tracking_id()
+        snapshot = {
+            'organization_id': str(self.organization.id),
+            'tracking_id': tracking_id,
+            'from_email': 'firm@example.com',
+            'to_email': 'client@example.com',
+            'subject': 'Reminder',
+            'status': 'PENDING',
+        }
+        # Spool file of a crashed batch: nobody holds its lock
+        path = os.path.join(self.spool_dir, 'emaillog-crashed.jsonl')
+        with open(path, 'w') as spool:
+            spool.write(json.dumps(snapshot) + '\n')
+            spool.write(json.dumps(dict(snapshot, status='SENT', sent_at=timezone.now().isoformat())) + '\n')
+            spool.write('{"tracking_id": "trunc')
+
+        self.assertEqual(email_log_buffer.recover_spool(), 1)
+        self.assertEqual(EmailLog.objects.get(tracking_id=tracking_id).status, 'SENT')
+        self.assertFalse(os.path.exists(path))
+
+    def test_spool_of_running_batch_is_not_recovered(self):
+        with EmailService.batch():
+            self.log_email('busy@example.com')
+            [path] = glob.glob(os.path.join(self.spool_dir, 'emaillog-*.jsonl'))
+
+            # Another thread (or process) sees the spool locked by this batch
+            recovered = []
+            thread = threading.Thread(target=lambda: recovered.append(email_log_buffer.recover_spool()))
+            thread.start()
+            thread.join()
+
+            self.assertEqual(recovered, [0])
+            self.assertTrue(os.path.exists(path))
+            self.assertFalse(EmailLog.objects.exists())
+
+        self.assertEqual(EmailLog.objects.count(), 1)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+
+class CompiledTemplateTests(SimpleTestCase):
+    """Compiled templates render like the old per-key str.replace"""
+
+    def test_render(self):
+        template = CompiledTemplate.compile('Dear {{client_name}}, PAN {{PAN}} due {{due_date}} {{unknown}}')
+        self.assertEqual(
+            template.render({'client_name': 'Acme', 'PAN': None, 'due_date': '31-Mar-2026'}),
+            'Dear Acme, PAN  due 31-Mar-2026 {{unknown}}'
+        )
+        self.assertEqual(EmailService.render_template('{{work_name}}: {{work_name}}', {'work_name': 'GST'}), 'GST: GST')
+
+    def test_render_many(self):
+        template = CompiledTemplate.compile('Hi {{client_name}}')
+        self.assertEqual(
+            template.render_many([{'client_name': 'A'}, {'client_name': 'B'}]),
+            ['Hi A', 'Hi B']
+        )
+
+    def test_cached_reminder_shell(self):
+        first = EmailService.build_professional_html_email('Subject A', 'Line 1\nLine 2', organization_name='Firm')
+        second = EmailService.build_professional_html_email('Subject B', 'Other body', organization_name='Firm')
+        self.assertIn('<title>Subject A</title>', first)
+        self.assertIn('Line 1<br>Line 2', first)
+        self.assertIn('<title>Subject B</title>', second)
+        self.assertNotIn('\x00', second)
+
+
+class PlatformSettingsCacheTests(TestCase):
+    """PlatformSettings.get_settings() is memoized per process and invalidated on save"""
+
+    def setUp(self):
+        cache.clear()
+        PlatformSettings.invalidate_cache()
+
+    def test_memoized(self):
+        PlatformSettings.get_settings()
+        with self.assertNumQueries(0):
+            platform_settings = PlatformSettings.get_settings()
+
+        # Callers get their own copy
+        platform_settings.platform_name = 'Changed'
+        self.assertNotEqual(PlatformSettings.get_settings().platform_name, 'Changed')
+
+    def test_invalidated_on_save(self):
+        platform_settings = PlatformSettings.get_settings()
+        platform_settings.email_daily_limit_per_org = 42
+        platform_settings.save()
+        self.assertEqual(PlatformSettings.get_settings().email_daily_limit_per_org, 42)
+
+    def test_reloaded_when_version_changes(self):
+        PlatformSettings.get_settings()
+        PlatformSettings.objects.filter(pk=1).update(email_daily_limit_per_org=7)
+        cache.set(PlatformSettings.CACHE_VERSION_KEY, 'other-process-saved')
+        with self.settings(PLATFORM_SETTINGS_CHECK_INTERVAL=0):
+            self.assertEqual(PlatformSettings.get_settings().email_daily_limit_per_org, 7)
+
+    def test_secrets_decrypted_once(self):
+        from cryptography.fernet import Fernet
+
+        with self.settings(FERNET_KEY=Fernet.generate_key().decode()):
+            platform_settings = PlatformSettings.get_settings()
+            platform_settings.smtp_password = 'secret'
+            platform_settings.save()
+
+            with mock.patch.object(PlatformSettings, '_get_fernet', wraps=platform_settings._get_fernet) as get_fernet:
+                self.assertEqual(PlatformSettings.get_settings().smtp_password, 'secret')
+                self.assertEqual(PlatformSettings.get_settings().smtp_password, 'secret')
+            self.assertEqual(get_fernet.call_count, 1)
+
+
+class GoogleTasksBatchTests(SimpleTestCase):
+    """Google Tasks calls are sent with batch HTTP, BATCH_SIZE per round trip"""
+
+    def test_execute_batch(self):
+        batches = []
+
+        def new_batch_http_request(callback):
+            batch = mock.Mock()
+            batch.requests = []
+            batch.add.side_effect = lambda request, request_id: batch.requests.append(request_id)
+            batch.execute.side_effect = lambda: [
+                callback(request_id, {'id': f'g-{request_id}'}, None) for request_id in batch.requests
+            ]
+            batches.append(batch)
+            return batch
+
+        tasks_service = GoogleTasksService(google_connection=None)
+        tasks_service.service = mock.Mock(new_batch_http_request=new_batch_http_request)
+
+        results = tasks_service._execute_batch({str(i): mock.Mock() for i in range(BATCH_SIZE * 2 + 1)})
+
+        self.assertEqual([len(batch.requests) for batch in batches], [BATCH_SIZE, BATCH_SIZE, 1])
+        self.assertEqual(results['7'], ({'id': 'g-7'}, None))
+
+
+@mock.patch('core.models.GoogleSyncLog')
+@mock.patch('core.models.GoogleCalendarMapping.objects')
+class GoogleCalendarSyncTests(SimpleTestCase):
+    """Calendar changes are listed incrementally with sync tokens, one page at a time"""
+
+    def setUp(self):
+        self.connection = mock.Mock(calendar_id=None, calendar_sync_token='token-1')
+        self.connection.user.id = 1
+        self.calendar_service = GoogleCalendarService(self.connection)
+        self.calendar_service.service = mock.Mock()
+        self.list_events = self.calendar_service.service.events.return_value.list
+
+    def test_pages_are_applied_one_at_a_time(self, mapping_objects, sync_log_model):
+        pages = [
+            {'items': [{'id': 'e1'}], 'nextPageToken': 'p2'},
+            {'items': [{'id': 'e2'}], 'nextSyncToken': 'token-2'},
+        ]
+        self.list_events.return_value.execute.side_effect = pages
+        mapping_objects.filter.return_value.select_related.return_value = []
+
+        stats = self.calendar_service.sync_changes_from_calendar()
+
+        self.assertEqual(stats['checked'], 2)
+        self.assertEqual(mapping_objects.filter.call_count, 2)
+        first_call, second_call = self.list_events.call_args_list
+        self.assertEqual(first_call.kwargs['syncToken'], 'token-1')
+        self.assertEqual(second_call.kwargs['pageToken'], 'p2')
+        self.assertEqual(self.connection.calendar_sync_token, 'token-2')
+
+    def test_expired_sync_token_falls_back_to_full_sync(self, mapping_objects, sync_log_model):
+        expired = HttpError(mock.Mock(status=410, reason='Gone'), b'Sync token is no longer valid')
+        self.list_events.return_value.execute.side_effect = [
+            expired,
+            {'items': [{'id': 'e1'}], 'nextSyncToken': 'token-2'},
+        ]
+        mapping_objects.filter.return_value.select_related.return_value = []
+
+        stats = self.calendar_service.sync_changes_from_calendar()
+
+        self.assertEqual(stats['checked'], 1)
+        full_sync_call = self.list_events.call_args_list[1]
+        self.assertNotIn('syncToken', full_sync_call.kwargs)
+        self.assertNotIn('showDeleted', full_sync_call.kwargs)
+        self.assertEqual(self.connection.calendar_sync_token, 'token-2')
+        self.connection.save.assert_called_once_with(update_fields=['calendar_sync_token'])
+
+    def test_other_listing_errors_keep_the_token(self, mapping_objects, sync_log_model):
+        self.list_events.return_value.execute.side_effect = HttpError(mock.Mock(status=500, reason='Backend Error'), b'Backend error')
+
+        with self.assertRaises(HttpError):
+            self.calendar_service.sync_changes_from_calendar()
+
+        self.assertEqual(self.connection.calendar_sync_token, 'token-1')
+        self.connection.save.assert_not_called()
+
+    def test_push_skips_tasks_unchanged_since_last_sync(self, mapping_objects, sync_log_model):
+        synced_at = timezone.now()
+        unchanged = mock.Mock(id=1, updated_at=synced_at)
+        changed = mock.Mock(id=2, updated_at=synced_at + timedelta(minutes=5))
+        mapping_objects.filter.return_value = [
+            mock.Mock(work_instance_id=work_instance.id, user_id=1, google_calendar_id='primary',
+                      google_event_id=f'event-{work_instance.id}', nexpro_updated_at=synced_at)
+            for work_instance in (unchanged, changed)
+        ]
+
+        with mock.patch.object(GoogleCalendarService, '_build_calendar_event_data', return_value={}), \
+                mock.patch.object(GoogleCalendarService, '_execute_batch',
+                                  return_value={'2': ({'id': 'event-2'}, None)}) as execute_batch:
+            synced, errors = self.calendar_service.sync_tasks_to_calendar([unchanged, changed])
+
+        self.assertEqual((synced, errors), (1, 0))
+        self.assertEqual(list(execute_batch.call_args.args[0]), ['2'])
+        update_event = self.calendar_service.service.events.return_value.update
+        update_event.assert_called_once_with(calendarId='primary', eventId='event-2', body={})
+
+
+class GoogleClientCacheTests(SimpleTestCase):
+    """Google API clients are built once per connection, API and token"""
+
+    def setUp(self):
+        GoogleClientCache.clear()
+        self.addCleanup(GoogleClientCache.clear)
+        for name, kwargs in [
+            ('get_credentials_from_connection', {'side_effect': lambda connection: mock.Mock()}),
+            ('build_service', {'side_effect': lambda api, version, credentials, google_connection=None: mock.Mock()}),
+            ('refresh_credentials_if_expiring', {'return_value': False}),
+        ]:
+            patcher = mock.patch.object(GoogleOAuthService, name, **kwargs)
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def test_client_is_reused_until_token_changes(self):
+        connection = mock.Mock(pk=1, status='CONNECTED', access_token='token-1')
+
+        first, _ = GoogleClientCache.get_client(connection, 'tasks', 'v1')
+        second, _ = GoogleClientCache.get_client(connection, 'tasks', 'v1')
+        self.assertIs(first, second)
+        self.assertEqual(self.build_service.call_count, 1)
+
+        GoogleClientCache.get_client(connection, 'calendar', 'v3')
+        connection.access_token = 'token-2'
+        GoogleClientCache.get_client(connection, 'tasks', 'v1')
+        self.assertEqual(self.build_service.call_count, 3)
+
+    def test_disconnected_connection_raises(self):
+        connection = mock.Mock(pk=1, status='DISCONNECTED', access_token=None)
+        with self.assertRaises(ValueError):
+            GoogleClientCache.get_client(connection, 'tasks', 'v1')
+
+
+class GoogleQuotaCounterTests(TestCase):
+    """Google API calls are counted in memory and written to GoogleAPIQuotaUsage in bulk"""
+
+    def setUp(self):
+        cache.clear()
+        self.counter = GoogleQuotaCounter()
+
+    def test_record_makes_no_queries(self):
+        with self.assertNumQueries(0):
+            for _ in range(10):
+                self.counter.record('TASKS', operation_type='write')
+
+    def test_flush_writes_counts(self):
+        for _ in range(3):
+            self.counter.record('TASKS', operation_type='write')
+        self.counter.record('TASKS', operation_type='delete')
+        self.counter.record('CALENDAR')
+
+        self.assertEqual(self.counter.flush(), 5)
+        self.assertEqual(self.counter.flush(), 0)
+
+        usage = GoogleAPIQuotaUsage.objects.get(api_type='TASKS', date=timezone.now().date())
+        self.assertEqual((usage.queries_count, usage.write_operations, usage.delete_operations), (4, 3, 1))
+        self.assertEqual(self.counter.get_used('TASKS'), 4)
+
+    def test_remaining_quota_includes_unflushed_calls(self):
+        with mock.patch.object(GoogleAPIQuotaUsage, 'get_quota_limits', return_value={'TASKS': 10}):
+            self.counter.record('TASKS', queries=4)
+            self.assertEqual(self.counter.remaining_quota('TASKS'), 6)
+            self.counter.record('TASKS', queries=20)
+            self.assertEqual(self.counter.remaining_quota('TASKS'), 0)
+            self.assertIsNone(self.counter.remaining_quota('GMAIL'))
+
+    def test_per_process_cache_writes_counts_to_database(self):
+        self.counter.record('TASKS', queries=3)
+
+        with self.assertLogs('core.services.google_quota', 'WARNING'):
+            self.assertEqual(self.counter.flush_local(), 3)
+
+        usage = GoogleAPIQuotaUsage.objects.get(api_type='TASKS', date=timezone.now().date())
+        self.assertEqual(usage.queries_count, 3)
+        # Another process's counter sees the stored count
+        self.assertEqual(GoogleQuotaCounter().get_used('TASKS'), 3)
+
+    @mock.patch('core.services.google_quota.is_cache_shared', return_value=True)
+    def test_shared_cache_counters_are_written_by_flush(self, is_cache_shared):
+        self.counter.record('TASKS', queries=3)
+
+        self.assertEqual(self.counter.flush_local(), 0)
+        self.assertFalse(GoogleAPIQuotaUsage.objects.exists())
+        self.assertEqual(GoogleQuotaCounter().get_used('TASKS'), 3)
+
+        self.assertEqual(self.counter.flush(), 3)
+        usage = GoogleAPIQuotaUsage.objects.get(api_type='TASKS', date=timezone.now().date())
+        self.assertEqual(usage.queries_count, 3)
+
+
+@override_settings(GOOGLE_API_RATE_LIMITS={'TASKS': (4, 2)})
+class GoogleRateLimiterTests(SimpleTestCase):
+    """Google API calls take tokens from per-second project, user and organization buckets"""
+
+    def setUp(self):
+        cache.clear()
+        self.limiter = GoogleRateLimiter()
+        patcher = mock.patch('core.services.google_rate_limiter.time.time', return_value=1000.25)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_user_and_project_buckets(self):
+        self.assertEqual(self.limiter._try_acquire('TASKS', 1, None, 2), 0)
+        # User 1 has used its 2 calls for this second
+        self.assertAlmostEqual(self.limiter._try_acquire('TASKS', 1, None, 1), 0.75)
+        self.assertEqual(self.limiter._try_acquire('TASKS', 2, None, 2), 0)
+        # The project's 4 calls are used up
+        self.assertAlmostEqual(self.limiter._try_acquire('TASKS', 3, None, 1), 0.75)
+
+    def test_organizations_share_the_project_bucket(self):
+        self.assertEqual(self.limiter._try_acquire('TASKS', 1, 10, 1), 0)
+        self.assertEqual(self.limiter._try_acquire('TASKS', 2, 20, 1), 0)
+        self.assertEqual(self.limiter._try_acquire('TASKS', 3, 10, 1), 0)
+        # Two organizations are active: 2 calls each
+        self.assertNotEqual(self.limiter._try_acquire('TASKS', 4, 10, 1), 0)
+        self.assertEqual(self.limiter._try_acquire('TASKS', 5, 20, 1), 0)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_calls_are_not_blocked_when_the_cache_keeps_nothing(self):
+        self.assertEqual(self.limiter._try_acquire('TASKS', 1, 10, 1), 0)
+        self.assertEqual(self.limiter._try_acquire('TASKS', 1, 10, 1), 0)
+
+    def test_backoff_blocks_calls(self):
+        with mock.patch('core.services.google_rate_limiter.random.uniform', return_value=1):
+            self.limiter.backoff('TASKS', 1, error=Exception('rateLimitExceeded'))
+        self.assertAlmostEqual(self.limiter._try_acquire('TASKS', 2, None, 1), 1)
+
+    @mock.patch('core.services.google_rate_limiter.time.sleep')
+    def test_web_requests_fail_fast_with_an_http_error(self, sleep):
+        cache.set(self.limiter._backoff_key(self.limiter._scope('TASKS')), 1030)
+
+        with self.assertRaises(HttpError) as raised:
+            self.limiter.acquire('TASKS', 1)
+
+        self.assertIsInstance(raised.exception, GoogleRateLimitExceeded)
+        self.assertEqual(raised.exception.resp.status, 429)
+        sleep.assert_not_called()
+
+
+class GoogleSyncOutboxTests(TestCase):
+    """WorkInstance changes are queued in the sync outbox instead of calling Google on save"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Outbox Firm', email='outbox@example.com')
+        cls.user = User.objects.create_user(
+            username='outbox-staff',
+            email='staff@example.com',
+            password='not-used',
+            organization=cls.organization,
+            role='STAFF'
+        )
+        client_record = Client.objects.create(
+            organization=cls.organization,
+            client_code='OB001',
+            client_name='Outbox Client',
+            email='client@example.com',
+            category='COMPANY'
+        )
+        cls.mapping = ClientWorkMapping.objects.create(
+            organization=cls.organization,
+            client=client_record,
+            work_type=WorkType.objects.create(
+                organization=cls.organization,
+                work_name='Outbox Category',
+                default_frequency='MONTHLY'
+            ),
+            start_from_period='Apr 2025'
+        )
+
+    def setUp(self):
+        patcher = mock.patch.object(
+            GoogleSyncOutboxService, 'get_connected_user_ids', return_value={self.user.id}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_task(self):
+        return WorkInstance.objects.create(
+            organization=self.organization,
+            client_work=self.mapping,
+            period_label='Apr 2025',
+            due_date=timezone.now().date(),
+            assigned_to=self.user
+        )
+
+    def test_saves_are_coalesced(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self.create_task()
+        for status in ('STARTED', 'PAUSED'):
+            with self.captureOnCommitCallbacks(execute=True):
+                task.status = status
+                task.save()
+
+        entries = GoogleSyncOutbox.objects.filter(work_instance_id=task.id)
+        self.assertEqual(entries.count(), 1)
+        self.assertEqual(entries.get().operation, 'UPSERT')
+
+    @override_settings(GOOGLE_SYNC_DEBOUNCE_SECONDS=0)
+    def test_drain_syncs_and_removes_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self.create_task()
+
+        stats = {'synced': 1, 'skipped': 0, 'errors': 0, 'failed_user_ids': {}}
+        with mock.patch.object(GoogleSyncOutboxService, 'sync_work_instances', return_value=stats) as sync:
+            result = GoogleSyncOutboxService.drain()
+
+        self.assertEqual([wi.id for wi in sync.call_args.args[0]], [task.id])
+        self.assertEqual(result['synced'], 1)
+        self.assertFalse(GoogleSyncOutbox.objects.exists())
+
+    @override_settings(GOOGLE_SYNC_DEBOUNCE_SECONDS=0)
+    def test_failed_connection_is_retried(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = self.create_task()
+
+        stats = {'synced': 0, 'skipped': 0, 'errors': 1, 'failed_user_ids': {self.user.id: 'token revoked'}}
+        with mock.patch.object(GoogleSyncOutboxService, 'sync_work_instances', return_value=stats):
+            GoogleSyncOutboxService.drain()
+
+        entry = GoogleSyncOutbox.objects.get(work_instance_id=task.id)
+        self.assertEqual((entry.attempts, entry.last_error), (1, 'token revoked'))
+
+
+class GoogleTasksSyncFanOutTests(SimpleTestCase):
+    """Google Tasks → NexPro sync runs one locked subtask per connection"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_overlapping_run_is_skipped(self):
+        from .tasks import GOOGLE_TASKS_SYNC_LOCK_KEY, sync_google_tasks_for_connection
+
+        cache.add(GOOGLE_TASKS_SYNC_LOCK_KEY.format(connection_id=7), 1)
+        with mock.patch.object(GoogleTasksService, 'sync_changes_from_google') as sync:
+            result = sync_google_tasks_for_connection(7)
+
+        self.assertEqual(result['status'], 'locked')
+        sync.assert_not_called()
+
+    def test_summary_totals_connection_results(self):
+        from .tasks import summarize_google_tasks_sync
+
+        summary = summarize_google_tasks_sync([
+            {'checked': 3, 'updated': 1, 'skipped': 2, 'errors': 0, 'status': 'synced'},
+            {'checked': 0, 'updated': 0, 'skipped': 0, 'errors': 1, 'status': 'timeout'},
+            {'checked': 0, 'updated': 0, 'skipped': 0, 'errors': 0, 'status': 'locked'},
+        ])
+
+        self.assertEqual(summary['total_users'], 3)
+        self.assertEqual(summary['total_tasks_checked'], 3)
+        self.assertEqual(summary['total_errors'], 1)
+        self.assertEqual((summary['locked'], summary['timed_out']), (1, 1))
+
+
+@mock.patch('core.models.GoogleSyncLog')
+@mock.patch('core.models.GoogleTaskMapping.objects')
+class GoogleTasksSyncCursorTests(SimpleTestCase):
+    """The Google Tasks sync cursor never moves past a task that was not applied"""
+
+    def setUp(self):
+        self.connection = mock.Mock(tasks_list_id='list-1', tasks_synced_until=None)
+        self.service = GoogleTasksService(self.connection)
+        self.google_tasks = [
+            {'id': 'ok', 'updated': '2026-10-16T10:00:00.000Z', 'status': 'completed'},
+            {'id': 'broken', 'updated': '2026-10-16T09:00:00.000Z', 'status': 'completed'},
+        ]
+
+    def sync(self, mapping_objects, apply_side_effect, sync_failures=0):
+        mapping_objects.filter.return_value.select_related.return_value = [
+            mock.Mock(google_task_id=google_task['id'], google_updated_at=None, nexpro_updated_at=None,
+                      sync_failures=sync_failures)
+            for google_task in self.google_tasks
+        ]
+
+        def apply(work_instance, google_task):
+            if google_task['id'] == 'broken':
+                raise apply_side_effect
+
+        with mock.patch.object(GoogleTasksService, '_list_tasks', return_value=self.google_tasks), \
+                mock.patch.object(GoogleTasksService, '_apply_google_task', side_effect=apply):
+            return self.service.sync_changes_from_google()
+
+    def test_cursor_stops_at_failed_task(self, mapping_objects, sync_log_model):
+        stats = self.sync(mapping_objects, ValueError('bad due date'))
+
+        self.assertEqual((stats['updated'], stats['errors']), (1, 1))
+        self.assertEqual(self.connection.tasks_synced_until.isoformat(), '2026-10-16T09:00:00+00:00')
+        self.assertEqual(len(mapping_objects.bulk_update.call_args_list[0].args[0]), 1)
+
+    def test_cursor_moves_past_a_task_that_keeps_failing(self, mapping_objects, sync_log_model):
+        with mock.patch.object(timezone, 'now', return_value=timezone.now()) as now:
+            stats = self.sync(mapping_objects, ValueError('bad due date'), sync_failures=MAX_SYNC_FAILURES - 1)
+
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(self.connection.tasks_synced_until, now.return_value)
+        given_up, = mapping_objects.bulk_update.call_args_list[1].args[0]
+        self.assertEqual(given_up.google_updated_at.isoformat(), '2026-10-16T09:00:00+00:00')
+        self.assertEqual(given_up.sync_failures, 0)
+
+    def test_soft_time_limit_is_not_swallowed(self, mapping_objects, sync_log_model):
+        from celery.exceptions import SoftTimeLimitExceeded
+
+        with self.assertRaises(SoftTimeLimitExceeded):
+            self.sync(mapping_objects, SoftTimeLimitExceeded())
+
+        # The applied task is still recorded; the cursor is not moved
+        self.assertEqual(len(mapping_objects.bulk_update.call_args_list[0].args[0]), 1)
+        self.assertIsNone(self.connection.tasks_synced_until)
+        self.connection.save.assert_not_called()
+
+
+class GoogleDriveUploadLeaseTests(SimpleTestCase):
+    """Upload slots and locks are leases owned by the uploading task"""
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(GOOGLE_DRIVE_UPLOAD_CONCURRENCY=2)
+    def test_slots_are_leased_per_owner(self):
+        first = GoogleDriveUploadQueue.acquire_slot('task-1')
+        second = GoogleDriveUploadQueue.acquire_slot('task-2')
+        self.assertNotEqual(first, second)
+        self.assertIsNone(GoogleDriveUploadQueue.acquire_slot('task-3'))
+
+        # A redelivered task gets its own slot back
+        self.assertEqual(GoogleDriveUploadQueue.acquire_slot('task-1'), first)
+
+        # Only the owner releases a slot
+        GoogleDriveUploadQueue.release_slot(first, 'task-3')
+        self.assertIsNone(GoogleDriveUploadQueue.acquire_slot('task-3'))
+        GoogleDriveUploadQueue.release_slot(first, 'task-1')
+        self.assertEqual(GoogleDriveUploadQueue.acquire_slot('task-3'), first)
+
+    @mock.patch('core.models.GoogleDriveMapping.objects')
+    def test_lock_is_taken_back_by_its_owner(self, mapping_objects):
+        mapping_objects.filter.return_value.select_related.return_value.first.return_value = None
+        lock_key = UPLOAD_LOCK_KEY.format(upload_id=7)
+        cache.add(lock_key, 'task-1')
+
+        self.assertEqual(GoogleDriveUploadQueue.upload(7, owner='task-2'), {'status': 'locked'})
+        self.assertEqual(cache.get(lock_key), 'task-1')
+
+        self.assertEqual(GoogleDriveUploadQueue.upload(7, owner='task-1'), {'status': 'skipped'})
+        self.assertIsNone(cache.get(lock_key))
+
+    def test_renew_fails_once_another_owner_holds_the_lock(self):
+        lock_key = UPLOAD_LOCK_KEY.format(upload_id=7)
+        cache.add(lock_key, 'task-1')
+        self.assertTrue(GoogleDriveUploadQueue.renew('task-1', lock_key, None))
+
+        # The lease expired and another worker took it
+        cache.set(lock_key, 'task-2')
+        self.assertFalse(GoogleDriveUploadQueue.renew('task-1', lock_key, None))
+
+
+class GoogleDriveResumableUploadTests(SimpleTestCase):
+    """Drive uploads are sent in chunks and resume from a saved upload session"""
+
+    def resumable_request(self, status, headers=None):
+        request = mock.Mock(spec=['next_chunk', 'resumable_uri', 'resumable_progress', 'resumable', 'http', 'postproc'])
+        request.resumable.size.return_value = 4 * 1024 * 1024
+        request.http.request.return_value = (httplib2.Response(dict(headers or {}, status=status)), b'{}')
+        return request
+
+    def test_resume_reports_progress_per_chunk(self):
+        request = self.resumable_request(308, {'range': 'bytes=0-1048575'})
+        request.next_chunk.side_effect = [
+            (mock.Mock(resumable_progress=2 * 1024 * 1024), None),
+            (None, {'id': 'file-1'}),
+        ]
+        progress = []
+
+        response = GoogleDriveService(google_connection=None)._resumable_upload(
+            request,
+            session_uri='https://upload.example/session',
+            on_progress=lambda uri, sent: progress.append((uri, sent))
+        )
+
+        self.assertEqual(response, {'id': 'file-1'})
+        # Google is asked for the received byte range before sending more
+        request.http.request.assert_called_once_with(
+            'https://upload.example/session',
+            method='PUT',
+            headers={'Content-Length': '0', 'Content-Range': f'bytes */{4 * 1024 * 1024}'}
+        )
+        self.assertEqual(request.resumable_uri, 'https://upload.example/session')
+        self.assertEqual(request.resumable_progress, 1024 * 1024)
+        self.assertEqual(progress, [('https://upload.example/session', 2 * 1024 * 1024)])
+
+    def test_resume_of_finished_upload_sends_nothing(self):
+        request = self.resumable_request(200)
+        request.postproc.return_value = {'id': 'file-1'}
+
+        response = GoogleDriveService(google_connection=None)._resumable_upload(
+            request, session_uri='https://upload.example/session'
+        )
+
+        self.assertEqual(response, {'id': 'file-1'})
+        request.next_chunk.assert_not_called()
+
+    def test_expired_session_raises_http_error(self):
+        request = self.resumable_request(404)
+
+        with self.assertRaises(HttpError):
+            GoogleDriveService(google_connection=None)._resumable_upload(
+                request, session_uri='https://upload.example/session'
+            )
+
+    @mock.patch('core.models.GoogleSyncLog.objects')
+    def test_lost_lease_is_not_logged_as_failed(self, sync_log_objects):
+        drive_service = GoogleDriveService(google_connection=mock.Mock())
+
+        with mock.patch.object(drive_service, 'get_task_folder_id', return_value='folder-1'), \
+                mock.patch.object(drive_service, 'upload_file', side_effect=UploadLeaseLost('taken')):
+            with self.assertRaises(UploadLeaseLost):
+                drive_service.upload_task_attachment(mock.Mock(), mock.Mock())
+
+        sync_log_objects.create.assert_not_called()
+
+    @override_settings(GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE=5 * 1024 * 1024 + 1)
+    def test_chunk_size_is_aligned(self):
+        self.assertEqual(get_upload_chunk_size(), 5 * 1024 * 1024)
+
+
+class GoogleDriveFolderIndexTests(SimpleTestCase):
+    """Known Drive folders resolve from the folder index; deleted ones are resolved again"""
+
+    def setUp(self):
+        self.drive_service = GoogleDriveService(google_connection=mock.Mock(drive_folder_id='root'))
+        self.drive_service.service = mock.Mock()
+        self.cached = {}
+        self.drive_service.folder_index = mock.Mock()
+        self.drive_service.folder_index.get.side_effect = self.cached.get
+        self.drive_service.folder_index.invalidate.side_effect = lambda path='': self.cached.clear()
+        self.files = self.drive_service.service.files.return_value
+        self.files.get.return_value.execute.return_value = {'id': 'root', 'trashed': False}
+
+    def test_folder_path_escapes_slashes(self):
+        self.assertEqual(folder_path('A/B Traders', 2025), 'A%2FB Traders/2025')
+
+    def test_known_folders_need_no_api_calls(self):
+        self.cached.update({'Client': 'client-folder', 'Client/2025': 'year-folder'})
+
+        folder_id = self.drive_service.get_or_create_folder_path([('Client', {}), ('2025', {})])
+
+        self.assertEqual(folder_id, 'year-folder')
+        # Only the root folder is checked
+        self.files.get.assert_called_once()
+        self.files.list.assert_not_called()
+        self.files.create.assert_not_called()
+
+    def test_trashed_root_folder_is_replaced(self):
+        self.cached['Client'] = 'trashed-client-folder'
+        self.files.get.return_value.execute.return_value = {'id': 'root', 'trashed': True}
+        self.files.list.return_value.execute.return_value = {'files': []}
+        self.files.create.return_value.execute.return_value = {'id': 'new-root'}
+
+        self.assertEqual(self.drive_service.get_or_create_root_folder(), 'new-root')
+        self.assertEqual(self.drive_service.google_connection.drive_folder_id, 'new-root')
+        self.assertEqual(self.cached, {})
+
+        # The new root is not checked again by this instance
+        self.assertEqual(self.drive_service.get_or_create_root_folder(), 'new-root')
+        self.files.get.assert_called_once()
+
+    @mock.patch('core.models.ClientWorkMapping.objects')
+    def test_failed_listing_creates_no_folders(self, work_mapping_objects):
+        work_mapping_objects.filter.return_value.values_list.return_value.distinct.return_value = []
+        backend_error = HttpError(mock.Mock(status=500, reason='Backend Error'), b'')
+        self.drive_service._list_child_folders = mock.Mock(return_value=({'root': {}}, {'root': backend_error}))
+        self.drive_service._create_folders = mock.Mock(return_value={})
+
+        stats = self.drive_service.create_client_folder_structures([mock.Mock(id=1, client_name='Client')])
+
+        self.assertEqual((stats['created'], stats['errors']), (0, 1))
+        for create_call in self.drive_service._create_folders.call_args_list:
+            self.assertEqual(create_call.args[0], {})
+
+    def test_deleted_folder_is_resolved_again(self):
+        self.cached['Client'] = 'deleted-folder'
+        not_found = HttpError(mock.Mock(status=404, reason='File not found'), b'')
+        self.drive_service.get_or_create_folder = mock.Mock(side_effect=[not_found, 'client-folder', 'year-folder'])
+
+        folder_id = self.drive_service.get_or_create_folder_path([('Client', {}), ('2025', {})])
+
+        self.assertEqual(folder_id, 'year-folder')
+        self.drive_service.folder_index.invalidate.assert_called_once_with('Client')
+        self.assertEqual(
+            self.drive_service.get_or_create_folder.call_args_list[1:],
+            [mock.call('Client', 'root'), mock.call('2025', 'client-folder')]
+        )
+
+
+class ReminderGenerationTests(TestCase):
+    """Bulk reminder generation creates each reminder once, however often it runs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(name='Reminder Firm', email='reminders@example.com')
+        staff = User.objects.create_user(
+            username='reminder-staff',
+            email='reminder-staff@example.com',
+            password='not-used',
+            organization=organization,
+            role='STAFF'
+        )
+        work_type = WorkType.objects.create(
+            organization=organization,
+            work_name='Reminder Category',
+            default_frequency='MONTHLY'
+        )
+        ReminderRule.objects.create(
+            organization=organization,
+            work_type=work_type,
+            offset_days=-1,
+            reminder_type='FILING_REMINDER',
+            recipient_type='BOTH',
+            email_template=EmailTemplate.objects.create(
+                organization=organization,
+                work_type=work_type,
+                template_name='Filing',
+                subject_template='Filing due',
+                body_template='Please file'
+            )
+        )
+        mapping = ClientWorkMapping.objects.create(
+            organization=organization,
+            client=Client.objects.create(
+                organization=organization,
+                client_code='RM001',
+                client_name='Reminder Client',
+                email='reminder-client@example.com',
+                category='COMPANY'
+            ),
+            work_type=work_type,
+            start_from_period='Apr 2025'
+        )
+        today = timezone.now().date()
+        cls.work_instances = [
+            WorkInstance.objects.create(
+                organization=organization,
+                client_work=mapping,
+                period_label=f'Period {i}',
+                period_start=today.replace(day=1),
+                due_date=today + timedelta(days=10 + i),
+                assigned_to=staff
+            )
+            for i in range(3)
+        ]
+
+    def test_second_run_creates_no_duplicates(self):
+        TaskAutomationService.generate_reminders_for_instances(self.work_instances)
+        reminders = ReminderInstance.objects.count()
+        notifications = Notification.objects.filter(notification_type='REMINDER').count()
+        self.assertGreater(reminders, 0)
+        self.assertTrue(ReminderInstance.objects.filter(reminder_rule__isnull=False).exists())
+
+        TaskAutomationService.generate_reminders_for_instances(self.work_instances)
+
+        self.assertEqual(ReminderInstance.objects.count(), reminders)
+        self.assertEqual(Notification.objects.filter(notification_type='REMINDER').count(), notifications)
+
+    def test_one_notification_per_task_and_day(self):
+        TaskAutomationService.generate_reminders_for_instances(self.work_instances)
+
+        notifications = Notification.objects.filter(notification_type='REMINDER')
+        self.assertLessEqual(notifications.count(), len(self.work_instances))
+        for notification in notifications:
+            # Days left are counted from the day the notification is created
+            days_left = (notification.work_instance.due_date - timezone.localdate()).days
+            self.assertIn(f'is due in {days_left} day(s)', notification.message)
+
+
+def legacy_reminder_dates(start_date, end_date, frequency_type, interval_days=1, weekdays=None):
+    """The day-stepping reminder date loop ReminderDateRule replaced (reference output)"""
+    step = {'ALTERNATE_DAYS': 2, 'CUSTOM': max(1, interval_days)}.get(frequency_type, 1)
+    if frequency_type == 'WEEKLY' and weekdays:
+        try:
+            days = [int(d.strip()) for d in weekdays.split(',')]
+        except ValueError:
+            days = [0, 2, 4]
+        step = 1
+    else:
+        days = None
+
+    reminder_dates = []
+    current = start_date
+    while current <= end_date:
+        if days is None or current.weekday() in days:
+            reminder_dates.append(current)
+        current += timedelta(days=step)
+    return reminder_dates
+
+
+class ReminderScheduleTests(SimpleTestCase):
+    """Compiled reminder date rules produce the same dates as the old day-stepping loops"""
+
+    FREQUENCIES = [
+        ('DAILY', 1, None),
+        ('ALTERNATE_DAYS', 2, None),
+        ('WEEKLY', 1, '0,2,4'),
+        ('WEEKLY', 1, '6'),
+        ('WEEKLY', 1, 'x,y'),
+        ('WEEKLY', 1, None),
+        ('CUSTOM', 3, None),
+        ('CUSTOM', 10, None),
+        ('CUSTOM', 0, None),
+    ]
+
+    RANGES = [
+        (date(2024, 1, 25), date(2024, 3, 5)),    # Leap February
+        (date(2025, 3, 28), date(2025, 4, 3)),    # Financial year boundary
+        (date(2025, 12, 30), date(2026, 1, 2)),   # Calendar year boundary
+        (date(2025, 6, 30), date(2025, 6, 30)),   # Single day
+        (date(2025, 7, 10), date(2025, 7, 1)),    # Empty range
+    ]
+
+    def test_dates_match_legacy_loop(self):
+        for frequency_type, interval_days, weekdays in self.FREQUENCIES:
+            rule = get_date_rule(frequency_type, interval_days, weekdays)
+            for start_date, end_date in self.RANGES:
+                with self.subTest(frequency=frequency_type, interval=interval_days, weekdays=weekdays,
+                                  start=start_date, end=end_date):
+                    self.assertEqual(
+                        rule.dates_between(start_date, end_date),
+                        legacy_reminder_dates(start_date, end_date, frequency_type, interval_days, weekdays)
+                    )
+
+    def test_period_reminders_match_legacy_loop(self):
+        reference_dates = [
+            date(2024, 2, 10), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 1),
+            date(2024, 6, 30), date(2024, 7, 1), date(2024, 12, 31), date(2025, 1, 1),
+        ]
+        for default_frequency in ('MONTHLY', 'QUARTERLY', 'YEARLY', 'ONE_TIME'):
+            for frequency_type, interval_days, weekdays in self.FREQUENCIES:
+                work_type = WorkType(
+                    default_frequency=default_frequency,
+                    due_date_day=20,
+                    client_reminder_start_day=5,
+                    client_reminder_end_day=-1,
+                    client_reminder_frequency_type=frequency_type,
+                    client_reminder_interval_days=interval_days,
+                    client_reminder_weekdays=weekdays,
+                    employee_reminder_start_day=31,
+                    employee_reminder_end_day=0,
+                    employee_reminder_frequency_type=frequency_type,
+                    employee_reminder_interval_days=interval_days,
+                    employee_reminder_weekdays=weekdays,
+                )
+                for reference_date in reference_dates:
+                    with self.subTest(period=default_frequency, frequency=frequency_type,
+                                      weekdays=weekdays, reference=reference_date):
+                        expected = work_type.get_period_dates(reference_date)
+                        period = get_reminder_schedule(work_type).get_period(reference_date)
+
+                        self.assertEqual(period['due_date'], expected['due_date'])
+                        self.assertEqual(list(period['client_reminders']), legacy_reminder_dates(
+                            expected['client_reminder_start'], expected['client_reminder_end'],
+                            frequency_type, interval_days, weekdays
+                        ))
+                        self.assertEqual(list(period['employee_reminders']), legacy_reminder_dates(
+                            expected['employee_reminder_start'], expected['employee_reminder_end'],
+                            frequency_type, interval_days, weekdays
+                        ))
+
+
+class FinancialYearTaskGenerationTests(TestCase):
+    """Assigning a task category creates its tasks till the financial year end in one batch"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='FY Firm', email='fy@example.com')
+        cls.client_record = Client.objects.create(
+            organization=cls.organization,
+            client_code='FY001',
+            client_name='FY Client',
+            email='fy-client@example.com',
+            category='COMPANY'
+        )
+
+    def create_mapping(self, frequency):
+        return ClientWorkMapping.objects.create(
+            organization=self.organization,
+            client=self.client_record,
+            work_type=WorkType.objects.create(
+                organization=self.organization,
+                work_name=f'{frequency} Category',
+                default_frequency=frequency
+            ),
+            start_from_period='Dec 2025'
+        )
+
+    def test_plan_monthly_periods_till_fy_end(self):
+        periods = TaskAutomationService.plan_fy_periods('MONTHLY', 20, date(2026, 3, 31), date(2025, 12, 1))
+
+        self.assertEqual(
+            [period_label for period_label, _, _, _ in periods],
+            ['Nov 2025', 'Dec 2025', 'Jan 2026', 'Feb 2026', 'Mar 2026']
+        )
+        self.assertEqual(periods[0][3], date(2025, 12, 20))
+        self.assertEqual(periods[-1][3], date(2026, 4, 20))
+
+    def test_plan_quarterly_periods_till_fy_end(self):
+        periods = TaskAutomationService.plan_fy_periods('QUARTERLY', 20, date(2026, 3, 31), date(2025, 10, 1))
+
+        self.assertEqual([period_start for _, period_start, _, _ in periods], [date(2025, 10, 1), date(2026, 1, 1)])
+
+    def test_bulk_creation_is_idempotent(self):
+        monthly = self.create_mapping('MONTHLY')
+        yearly = self.create_mapping('YEARLY')
+
+        created = TaskAutomationService.create_work_instances_till_fy_end_bulk(
+            [monthly, yearly], start_date='2025-12-01'
+        )
+
+        self.assertEqual(len(created[monthly.id]), 5)
+        self.assertEqual([wi.period_label for wi in created[yearly.id]], ['FY 2025-26'])
+        self.assertEqual(WorkInstance.objects.filter(client_work=monthly).count(), 5)
+
+        again = TaskAutomationService.create_work_instances_till_fy_end_bulk([monthly], start_date='2025-12-01')
+        self.assertEqual(again[monthly.id], [])
+        self.assertEqual(WorkInstance.objects.filter(client_work=monthly).count(), 5)
+
+
+class UpcomingWorkInstanceGenerationTests(TestCase):
+    """Mappings that already have enough instances are filtered out before loading"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Upcoming Firm', email='upcoming@example.com')
+        client_record = Client.objects.create(
+            organization=cls.organization,
+            client_code='UP001',
+            client_name='Upcoming Client',
+            email='upcoming-client@example.com',
+            category='COMPANY'
+        )
+        cls.cutoff_date = timezone.now().date() + timedelta(days=90)
+        cls.mappings = {}
+        for frequency, latest_due in (
+            ('MONTHLY', None),
+            ('QUARTERLY', cls.cutoff_date + timedelta(days=1)),
+            ('ONE_TIME', cls.cutoff_date - timedelta(days=200)),
+        ):
+            mapping = ClientWorkMapping.objects.create(
+                organization=cls.organization,
+                client=client_record,
+                work_type=WorkType.objects.create(
+                    organization=cls.organization,
+                    work_name=f'{frequency} Upcoming',
+                    default_frequency=frequency
+                ),
+                start_from_period='Apr 2025'
+            )
+            if latest_due:
+                WorkInstance.objects.create(
+                    organization=cls.organization,
+                    client_work=mapping,
+                    period_label='Existing',
+                    due_date=latest_due
+                )
+            cls.mappings[frequency] = mapping
+
+    def test_only_mappings_needing_instances_are_processed(self):
+        counts = TaskAutomationService.generate_upcoming_work_instances(
+            ClientWorkMapping.objects.filter(organization=self.organization),
+            self.cutoff_date,
+            dry_run=True
+        )
+
+        self.assertEqual(list(counts), [self.mappings['MONTHLY']])
+        self.assertGreater(counts[self.mappings['MONTHLY']], 0)
+
+
+class TaskStatisticsRollupTests(TestCase):
+    """The TaskStatisticsDaily rollup always matches counting the work instances"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = Organization.objects.create(name='Stats Firm', email='stats@example.com')
+        cls.users = [
+            User.objects.create_user(
+                username=f'stats-user-{i}',
+                email=f'stats-user-{i}@example.com',
+                password='not-used',
+                organization=cls.organization,
+                role='STAFF'
+            )
+            for i in range(2)
+        ]
+        cls.mapping = ClientWorkMapping.objects.create(
+            organization=cls.organization,
+            client=Client.objects.create(
+                organization=cls.organization,
+                client_code='ST001',
+                client_name='Stats Client',
+                email='stats-client@example.com',
+                category='COMPANY'
+            ),
+            work_type=WorkType.objects.create(
+                organization=cls.organization,
+                work_name='Stats Category',
+                default_frequency='MONTHLY'
+            ),
+            start_from_period='Apr 2025'
+        )
+
+    def create_task(self, label, days=5, **fields):
+        return WorkInstance.objects.create(
+            organization=self.organization,
+            client_work=self.mapping,
+            period_label=label,
+            due_date=timezone.now().date() + timedelta(days=days),
+            **fields
+        )
+
+    def assertRollupMatchesTasks(self):
+        rollup = {
+            (row.date, row.work_type_id, row.assigned_to_id, row.status): (row.task_count, row.total_time_spent)
+            for row in TaskStatisticsDaily.objects.filter(organization=self.organization)
+            if row.task_count
+        }
+        expected = {}
+        for task in WorkInstance.objects.filter(organization=self.organization).select_related('client_work'):
+            key = (task.due_date, task.client_work.work_type_id, task.assigned_to_id, task.status)
+            count, seconds = expected.get(key, (0, 0))
+            expected[key] = (count + 1, seconds + task.total_time_spent)
+        self.assertEqual(rollup, expected)
+
+    def test_create(self):
+        self.create_task('Create 1')
+        self.create_task('Create 2')
+        self.create_task('Create 3', assigned_to=self.users[0])
+
+        self.assertRollupMatchesTasks()
+        self.assertEqual(TaskStatisticsDaily.objects.filter(organization=self.organization).count(), 2)
+
+    def test_status_and_assignee_change(self):
+        task = self.create_task('Change', assigned_to=self.users[0])
+
+        task.status = 'STARTED'
+        task.save()
+        self.assertRollupMatchesTasks()
+
+        task.assigned_to = self.users[1]
+        task.total_time_spent = 120
+        task.save(update_fields=['assigned_to', 'total_time_spent'])
+        self.assertRollupMatchesTasks()
+
+    def test_save_without_statistics_fields_skips_rollup(self):
+        task = self.create_task('Timer')
+
+        with CaptureQueriesContext(connection) as queries:
+            task.start_timer()
+
+        self.assertFalse([query for query in queries if 'task_statistics_daily' in query['sql']])
+
+    def test_save_of_instance_not_loaded_from_database(self):
+        task = self.create_task('Detached')
+
+        detached = WorkInstance.objects.get(pk=task.pk)
+        del detached._statistics_key
+        detached.status = 'COMPLETED'
+        detached.save()
+
+        self.assertRollupMatchesTasks()
+
+    def test_refresh_from_db_updates_previous_values(self):
+        task = self.create_task('Refresh')
+        WorkInstance.objects.filter(pk=task.pk).update(status='STARTED')
+        TaskStatisticsService.rebuild(self.organization)
+
+        task.refresh_from_db()
+        task.status = 'COMPLETED'
+        task.save()
+
+        self.assertRollupMatchesTasks()
+
+    def test_delete(self):
+        kept = self.create_task('Kept')
+        deleted = self.create_task('Deleted', status='STARTED')
+        deleted.delete()
+
+        self.assertRollupMatchesTasks()
+        self.assertTrue(WorkInstance.objects.filter(pk=kept.pk).exists())
+
+    def test_bulk_create(self):
+        TaskAutomationService.bulk_create_work_instances([
+            WorkInstance(
+                organization=self.organization,
+                client_work=self.mapping,
+                period_label=f'Bulk {i}',
+                due_date=timezone.now().date() + timedelta(days=i % 3),
+                assigned_to=self.users[i % 2] if i % 3 else None
+            )
+            for i in range(12)
+        ])
+        self.create_task('After bulk', days=1)
+
+        self.assertRollupMatchesTasks()
+
+    def test_mark_overdue(self):
+        self.create_task('Late', days=-2)
+        self.create_task('Late started', days=-2, status='STARTED', assigned_to=self.users[0])
+        self.create_task('On time', days=2)
+
+        self.assertEqual(TaskAutomationService.mark_overdue_tasks(), 2)
+        self.assertRollupMatchesTasks()
@@ -0,0 +1,48 @@
+"""
+In-process cache utilities for NexPro
+Small LRU caches for values that are cheap to keep per process, such as
+compiled email templates, branding and Google API clients.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """
+    Small thread-safe in-process LRU cache with a per-entry timeout in
+    seconds, or a callable returning it (timeout=None keeps entries until
+    evicted).
+    """
+
+    def __init__(self, maxsize=256, timeout=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        timeout = self.timeout() if callable(self.timeout) else self.timeout
+        expires_at = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,290 @@
+"""
+Query budget utilities for NexPro
+
+Seeds a realistic tenant and measures the number of SQL queries and the wall
+time of every read-only router endpoint. Used by the benchmark_endpoints
+management command and by the endpoint query budget tests to catch N+1
+regressions (query counts that grow with the number of rows on a page).
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def seed_tenant(organization, clients=100, tasks_per_client=4, work_types=6, staff=5, prefix='bench'):
+    """
+    Bulk-create a realistic data set for an organization: staff, task
+    categories with subtasks, templates and reminder rules, clients with
+    work mappings, tasks with documents and reminders, credentials,
+    notifications and sender email accounts.
+
+    Can be called repeatedly on the same organization with a different
+    prefix to grow the data set.
+
+    Args:
+        organization: Organization to seed
+        clients: Number of clients to create
+        tasks_per_client: Number of tasks per client (spread over mappings)
+        work_types: Number of task categories to create
+        staff: Number of staff users to create
+        prefix: Unique prefix for codes, names and usernames
+
+    Returns:
+        dict: Number of rows created per model
+    """
+    from ..models import (
+        Client, ClientWorkMapping, CredentialVault, EmailTemplate, Notification,
+        OrganizationEmail, ReminderInstance, ReminderRule, SubTaskCategory,
+        TaskDocument, User, WorkInstance, WorkType, WorkTypeAssignment
+    )
+
+    today = timezone.now().date()
+    now = timezone.now()
+    unusable_password = make_password(None)
+
+    users = User.objects.bulk_create([
+        User(
+            username=f'{prefix}-staff-{i}',
+            email=f'{prefix}-staff-{i}@example.com',
+            first_name='Staff',
+            last_name=str(i),
+            password=unusable_password,
+            organization=organization,
+            role='STAFF'
+        )
+        for i in range(staff)
+    ])
+
+    sender_emails = OrganizationEmail.objects.bulk_create([
+        OrganizationEmail(
+            organization=organization,
+            email_address=f'{prefix}-sender-{i}@example.com'
+        )
+        for i in range(2)
+    ])
+
+    categories = WorkType.objects.bulk_create([
+        WorkType(
+            organization=organization,
+            work_name=f'{prefix} Category {i}',
+            default_frequency='MONTHLY',
+            sender_email=sender_emails[i % len(sender_emails)]
+        )
+        for i in range(work_types)
+    ])
+
+    SubTaskCategory.objects.bulk_create([
+        SubTaskCategory(organization=organization, work_type=work_type, name=f'Step {i}')
+        for work_type in categories
+        for i in range(3)
+    ])
+
+    WorkTypeAssignment.objects.bulk_create([
+        WorkTypeAssignment(
+            organization=organization,
+            work_type=work_type,
+            employee=users[i % len(users)]
+        )
+        for i, work_type in enumerate(categories)
+    ] if users else [])
+
+    templates = EmailTemplate.objects.bulk_create([
+        EmailTemplate(
+            organization=organization,
+            work_type=work_type,
+            template_name=f'{work_type.work_name} reminder',
+            template_type='CLIENT',
+            subject_template='Reminder: {{work_name}} due {{due_date}}',
+            body_template='Dear {{client_name}}, {{work_name}} for {{period_label}} is due on {{due_date}}.'
+        )
+        for work_type in categories
+    ])
+
+    ReminderRule.objects.bulk_create([
+        ReminderRule(
+            organization=organization,
+            work_type=template.work_type,
+            offset_days=-3,
+            reminder_type='DOCUMENT_REMINDER',
+            recipient_type='CLIENT',
+            email_template=template
+        )
+        for template in templates
+    ])
+
+    client_records = Client.objects.bulk_create([
+        Client(
+            organization=organization,
+            client_code=f'{prefix}-{i:05d}',
+            client_name=f'{prefix} Client {i}',
+            email=f'{prefix}-client-{i}@example.com',
+            category='COMPANY'
+        )
+        for i in range(clients)
+    ])
+
+    mappings = ClientWorkMapping.objects.bulk_create([
+        ClientWorkMapping(
+            organization=organization,
+            client=client,
+            work_type=categories[(i + j) % len(categories)],
+            start_from_period='Apr 2025'
+        )
+        for i, client in enumerate(client_records)
+        for j in range(min(2, len(categories)))
+    ])
+
+    CredentialVault.objects.bulk_create([
+        CredentialVault(
+            organization=organization,
+            client=client,
+            portal_type='GST',
+            username=client.client_code,
+            password_enc='not-a-real-secret'
+        )
+        for client in client_records
+    ])
+
+    instances = []
+    for i, client in enumerate(client_records):
+        client_mappings = mappings[i * min(2, len(categories)):(i + 1) * min(2, len(categories))]
+        for j in range(tasks_per_client):
+            instances.append(WorkInstance(
+                organization=organization,
+                client_work=client_mappings[j % len(client_mappings)],
+                period_label=f'{prefix} Period {j}',
+                due_date=today + timedelta(days=(i + j) % 30),
+                assigned_to=users[(i + j) % len(users)] if users else None
+            ))
+    instances = WorkInstance.objects.bulk_create(instances)
+
+    TaskDocument.objects.bulk_create([
+        TaskDocument(
+            organization=organization,
+            work_instance=instance,
+            file=f'task_documents/{prefix}/{instance.id}.pdf',
+            file_name=f'{instance.id}.pdf',
+            uploaded_by=instance.assigned_to
+        )
+        for instance in instances
+    ])
+
+    ReminderInstance.objects.bulk_create([
+        ReminderInstance(
+            organization=organization,
+            work_instance=instance,
+            recipient_type='CLIENT',
+            scheduled_at=now + timedelta(days=1),
+            email_to=f'{prefix}-client@example.com'
+        )
+        for instance in instances
+    ])
+
+    Notification.objects.bulk_create([
+        Notification(
+            organization=organization,
+            user=instance.assigned_to,
+            title='Task assigned',
+            message=instance.period_label,
+            work_instance=instance
+        )
+        for instance in instances
+        if instance.assigned_to_id
+    ])
+
+    return {
+        'users': len(users),
+        'work_types': len(categories),
+        'clients': len(client_records),
+        'client_works': len(mappings),
+        'tasks': len(instances),
+    }
+
+
+def get_router_endpoints():
+    """
+    List the read-only router endpoints that take no URL arguments: the list
+    route and the detail=False GET actions of every registered ViewSet.
+
+    Returns:
+        list: (url_name, path) tuples sorted by path
+    """
+    from ..urls import router
+
+    endpoints = []
+    for pattern in router.urls:
+        if pattern.pattern.regex.groupindex or pattern.name == 'api-root':
+            continue
+        actions = getattr(pattern.callback, 'actions', None) or {}
+        if 'get' not in actions:
+            continue
+        endpoints.append((pattern.name, reverse(pattern.name)))
+
+    return sorted(endpoints, key=lambda endpoint: endpoint[1])
+
+
+def measure_endpoint(api_client, path):
+    """
+    Measure one GET request. The cache is cleared and the endpoint is called
+    once to warm up (imports, content types, permissions) before the
+    measured call, so only per-request queries are counted.
+
+    Args:
+        api_client: Authenticated rest_framework.test.APIClient
+        path: URL path to request
+
+    Returns:
+        dict: status_code, queries, seconds
+    """
+    api_client.raise_request_exception = False
+
+    cache.clear()
+    api_client.get(path, secure=True)
+
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        response = api_client.get(path, secure=True)
+        elapsed = time.perf_counter() - started
+
+    return {
+        'status_code': response.status_code,
+        'queries': len(context),
+        'seconds': elapsed,
+    }
+
+
+def measure_endpoints(api_client, fallback_client=None, endpoints=None):
+    """
+    Measure all router endpoints.
+
+    Args:
+        api_client: Authenticated APIClient of an organization admin
+        fallback_client: Optional APIClient (e.g. a platform admin) used for
+            endpoints that refuse the first client with 403
+        endpoints: Optional list of (url_name, path); defaults to
+            get_router_endpoints()
+
+    Returns:
+        dict: {path: {'name', 'status_code', 'queries', 'seconds'}}
+    """
+    results = {}
+    for name, path in endpoints or get_router_endpoints():
+        result = measure_endpoint(api_client, path)
+        if result['status_code'] == 403 and fallback_client is not None:
+            result = measure_endpoint(fallback_client, path)
+        result['name'] = name
+        results[path] = result
+        logger.debug(f"{path}: {result['status_code']} {result['queries']} queries {result['seconds']:.3f}s")
+
+    return results
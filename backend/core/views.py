@@ -6,7 +6,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Q, Count
+from django.db.models import Q, Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.http import HttpResponse
 from datetime import timedelta
 from openpyxl import Workbook, load_workbook
@@ -18,6 +19,7 @@ import logging
 from .utils.audit import AuditLogger, AuditAction
 
 audit_logger = logging.getLogger('nexpro.audit')
+logger = logging.getLogger(__name__)
 from .models import (
     Organization, OrganizationEmail, Subscription,
     Client, WorkType, WorkTypeAssignment, ClientWorkMapping, WorkInstance,
@@ -53,6 +55,8 @@ from .permissions import (
 from .services.task_service import TaskAutomationService
 from .services.email_service import EmailService
 from .services.plan_service import PlanService
+from .services.dashboard_service import DashboardService
+from .services.task_statistics_service import TaskStatisticsService
 from .services.otp_service import OTPService
 
 User = get_user_model()
@@ -743,7 +747,9 @@ class OrganizationEmailViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     ViewSet for managing organization email accounts.
     Only admins can manage email accounts.
     """
-    queryset = OrganizationEmail.objects.all()
+    queryset = OrganizationEmail.objects.select_related('smtp_inherit_from').annotate(
+        work_types_count=Count('work_types')
+    )
     serializer_class = OrganizationEmailSerializer
     permission_classes = [permissions.IsAuthenticated, IsOrganizationAdmin]
 
@@ -807,17 +813,24 @@ class UserViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     def get_queryset(self):
         """Get users for current organization"""
         user = self.request.user
+        users = User.objects.select_related('organization').prefetch_related(
+            Prefetch(
+                'work_type_assignments',
+                queryset=WorkTypeAssignment.objects.filter(is_active=True).select_related('work_type'),
+                to_attr='active_work_type_assignments'
+            )
+        )
 
         # Platform admins can see all users
         if getattr(user, 'is_platform_admin', False):
             org_id = self.request.headers.get('X-Organization-ID')
             if org_id:
-                return User.objects.filter(organization_id=org_id)
-            return User.objects.all()
+                return users.filter(organization_id=org_id)
+            return users
 
         # Regular users see only their organization's users
         if hasattr(self.request, 'organization') and self.request.organization:
-            return User.objects.filter(organization=self.request.organization)
+            return users.filter(organization=self.request.organization)
 
         return User.objects.none()
 
@@ -970,7 +983,7 @@ class UserViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
             user=user,
             created_at__gte=timezone.now() - timezone.timedelta(days=90)
         ).values(
-            'action', 'resource_type', 'details', 'ip_address', 'created_at'
+            'action', 'description', 'resource_type', 'extra_data', 'ip_address', 'created_at'
         ).order_by('-created_at')[:500]  # Limit to 500 entries
         export_data['activity_logs'] = list(audit_logs)
 
@@ -992,15 +1005,15 @@ class UserViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
         response['Content-Disposition'] = f'attachment; filename="nexpro_data_export_{user.username}_{timezone.now().strftime("%Y%m%d")}.json"'
 
         # Log the data export for audit
-        AuditLog.objects.create(
+        AuditLog.log(
+            action='DATA_EXPORT',
             user=user,
             organization=organization,
-            action='EXPORT',
+            description=f"Personal data exported by {user.email}",
             resource_type='USER_DATA',
             resource_id=str(user.id),
-            details={'export_type': 'DPDP_DATA_PORTABILITY'},
-            ip_address=request.META.get('REMOTE_ADDR'),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
+            request=request,
+            extra_data={'export_type': 'DPDP_DATA_PORTABILITY'}
         )
 
         return response
@@ -1050,7 +1063,9 @@ class UserViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
 
 class ClientViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for managing clients"""
-    queryset = Client.objects.all()
+    queryset = Client.objects.annotate(
+        work_count=Count('work_mappings', filter=Q(work_mappings__active=True), distinct=True)
+    )
     serializer_class = ClientSerializer
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['status', 'category']
@@ -1085,7 +1100,7 @@ class ClientViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     def tasks(self, request, pk=None):
         """Get all work instances for a client"""
         client = self.get_object()
-        instances = WorkInstance.objects.filter(client_work__client=client)
+        instances = WorkInstance.objects.filter(client_work__client=client).for_serializer()
         serializer = WorkInstanceSerializer(instances, many=True, context={'request': request})
         return Response(serializer.data)
 
@@ -1113,25 +1128,32 @@ class ClientViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
             )
 
         created_mappings = []
+        new_mappings = []
         errors = []
 
+        # Load requested task categories and existing mappings in one query each
+        work_type_qs = WorkType.objects.filter(
+            id__in=[wt_id for wt_id in work_type_ids if str(wt_id).isdigit()]
+        )
+        if organization:
+            work_type_qs = work_type_qs.filter(organization=organization)
+        work_types = {str(wt.id): wt for wt in work_type_qs}
+        existing_mappings = {
+            mapping.work_type_id: mapping
+            for mapping in ClientWorkMapping.objects.filter(client=client, work_type__in=work_types.values())
+        }
+
         for work_type_id in work_type_ids:
             try:
                 # Get task category within same organization
-                work_type_qs = WorkType.objects.filter(id=work_type_id)
-                if organization:
-                    work_type_qs = work_type_qs.filter(organization=organization)
-                work_type = work_type_qs.first()
+                work_type = work_types.get(str(work_type_id))
 
                 if not work_type:
                     errors.append(f'Task category with ID {work_type_id} not found')
                     continue
 
                 # Check if mapping already exists
-                existing_mapping = ClientWorkMapping.objects.filter(
-                    client=client,
-                    work_type=work_type
-                ).first()
+                existing_mapping = existing_mappings.get(work_type.id)
 
                 if existing_mapping:
                     if not existing_mapping.active:
@@ -1150,17 +1172,28 @@ class ClientViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
                     active=True,
                     organization=organization
                 )
-                print(f"[DEBUG] Created ClientWorkMapping: {client_work.id} for {work_type.work_name}")
-
-                # Auto-create all work instances till financial year end (March 31st)
-                work_instances = TaskAutomationService.create_work_instances_till_fy_end(client_work, start_date=start_from_period)
-                print(f"[DEBUG] Created {len(work_instances)} WorkInstance(s) for {work_type.work_name} till FY end")
+                existing_mappings[work_type.id] = client_work
+                logger.debug(f"Created ClientWorkMapping: {client_work.id} for {work_type.work_name}")
 
+                new_mappings.append(client_work)
                 created_mappings.append(client_work)
 
             except Exception as e:
                 errors.append(f'Error assigning task category {work_type_id}: {str(e)}')
 
+        if new_mappings:
+            try:
+                # Auto-create all work instances till financial year end (March 31st) in one batch
+                created_instances = TaskAutomationService.create_work_instances_till_fy_end_bulk(
+                    new_mappings, start_date=start_from_period
+                )
+                logger.debug(
+                    f"Created {sum(len(v) for v in created_instances.values())} WorkInstance(s) "
+                    f"for {len(new_mappings)} task category(s) till FY end"
+                )
+            except Exception as e:
+                errors.append(f'Error creating tasks for assigned task categories: {str(e)}')
+
         response_data = {
             'created_count': len(created_mappings),
             'errors': errors if errors else None,
@@ -1401,7 +1434,11 @@ class ClientViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
 
 class WorkTypeViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for managing task categories"""
-    queryset = WorkType.objects.all()
+    queryset = WorkType.objects.select_related('sender_email').prefetch_related(
+        'subtask_categories'
+    ).annotate(
+        subtask_count=Count('subtask_categories', filter=Q(subtask_categories__is_active=True))
+    )
     serializer_class = WorkTypeSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminOrReadOnly]
     filterset_fields = ['default_frequency', 'is_active']
@@ -1566,7 +1603,7 @@ class WorkTypeViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
 
 class SubTaskCategoryViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for managing subtask categories within task categories"""
-    queryset = SubTaskCategory.objects.all()
+    queryset = SubTaskCategory.objects.select_related('work_type')
     serializer_class = SubTaskCategorySerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminOrReadOnly]
     filterset_fields = ['work_type', 'is_active', 'is_required']
@@ -1678,7 +1715,7 @@ class SubTaskCategoryViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
 
 class ClientWorkMappingViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for managing client-work mappings"""
-    queryset = ClientWorkMapping.objects.all()
+    queryset = ClientWorkMapping.objects.select_related('client', 'work_type')
     serializer_class = ClientWorkMappingSerializer
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['client', 'work_type', 'active']
@@ -1711,38 +1748,31 @@ class WorkInstanceViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['status', 'assigned_to', 'client_work__client', 'client_work__work_type']
     search_fields = ['client_work__client__client_name', 'client_work__work_type__work_name', 'period_label']
-    ordering_fields = ['due_date', 'created_at']
-
-    def list(self, request, *args, **kwargs):
-        """List work instances with automatic overdue status check"""
-        # Check and update overdue tasks before listing
-        TaskAutomationService.check_and_update_overdue_status()
-        return super().list(request, *args, **kwargs)
+    ordering_fields = ['due_date', 'created_at', 'overdue_flag']
 
     def get_queryset(self):
-        """Filter queryset based on user role"""
+        """
+        Filter queryset based on user role.
+
+        Overdue state is computed at read time (overdue_flag annotation); the persisted
+        OVERDUE status is reconciled only by the scheduled mark_overdue_tasks job,
+        so listing tasks never writes.
+        """
         user = self.request.user
 
+        base_qs = WorkInstance.objects.for_serializer().with_overdue_flag()
+
+        # Optional ?is_overdue=true|false filter on the computed flag
+        is_overdue = self.request.query_params.get('is_overdue')
+        if is_overdue is not None:
+            base_qs = base_qs.filter(overdue_flag=is_overdue.lower() in ('true', '1'))
+
         # Platform admins see all
         if getattr(user, 'is_platform_admin', False):
             org_id = self.request.headers.get('X-Organization-ID')
             if org_id:
-                return WorkInstance.objects.filter(organization_id=org_id).select_related(
-                    'client_work__client',
-                    'client_work__work_type',
-                    'assigned_to'
-                )
-            return WorkInstance.objects.all().select_related(
-                'client_work__client',
-                'client_work__work_type',
-                'assigned_to'
-            )
-
-        base_qs = WorkInstance.objects.select_related(
-            'client_work__client',
-            'client_work__work_type',
-            'assigned_to'
-        )
+                return base_qs.filter(organization_id=org_id)
+            return base_qs
 
         # Filter by organization
         if hasattr(self.request, 'organization') and self.request.organization:
@@ -2257,7 +2287,10 @@ class NotificationViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
         return Notification.objects.filter(
             organization=organization,
             user=user
-        ).select_related('work_instance').order_by('-created_at')
+        ).select_related(
+            'work_instance__client_work__client',
+            'work_instance__client_work__work_type'
+        ).order_by('-created_at')
 
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
@@ -2397,58 +2430,10 @@ class DashboardViewSet(TenantViewSetMixin, viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Get dashboard summary stats"""
-        today = timezone.now().date()
-        week_later = today + timedelta(days=7)
-        user = request.user
         organization = getattr(request, 'organization', None)
-
         base_qs = self._get_base_queryset(request)
 
-        if user.role == 'STAFF':
-            stats = {
-                'my_tasks': base_qs.filter(
-                    status__in=['NOT_STARTED', 'STARTED', 'IN_PROGRESS']
-                ).count(),
-                'pending_tasks': base_qs.filter(
-                    status__in=['NOT_STARTED', 'STARTED', 'IN_PROGRESS']
-                ).count(),
-                'overdue_tasks': base_qs.filter(
-                    due_date__lt=today
-                ).exclude(status='COMPLETED').count(),
-                'today_due': base_qs.filter(due_date=today).count(),
-                'week_due': base_qs.filter(
-                    due_date__gte=today,
-                    due_date__lte=week_later
-                ).count(),
-                'completed_this_month': base_qs.filter(
-                    status='COMPLETED',
-                    completed_on__year=today.year,
-                    completed_on__month=today.month
-                ).count(),
-            }
-        else:
-            stats = {
-                'total_clients': Client.objects.filter(
-                    organization=organization,
-                    status='ACTIVE'
-                ).count() if organization else 0,
-                'pending_tasks': base_qs.filter(
-                    status__in=['NOT_STARTED', 'STARTED', 'IN_PROGRESS']
-                ).count(),
-                'overdue_tasks': base_qs.filter(
-                    due_date__lt=today
-                ).exclude(status='COMPLETED').count(),
-                'today_due': base_qs.filter(due_date=today).count(),
-                'week_due': base_qs.filter(
-                    due_date__gte=today,
-                    due_date__lte=week_later
-                ).count(),
-                'completed_this_month': base_qs.filter(
-                    status='COMPLETED',
-                    completed_on__year=today.year,
-                    completed_on__month=today.month
-                ).count(),
-            }
+        stats = DashboardService.get_summary(organization, request.user, base_qs)
 
         return Response(stats)
 
@@ -2460,7 +2445,7 @@ class DashboardViewSet(TenantViewSetMixin, viewsets.ViewSet):
 
         tasks = base_qs.filter(
             status__in=['NOT_STARTED', 'STARTED', 'IN_PROGRESS']
-        ).order_by('due_date')[:limit]
+        ).for_serializer().order_by('due_date')[:limit]
 
         serializer = WorkInstanceSerializer(tasks, many=True, context={'request': request})
         return Response(serializer.data)
@@ -2475,15 +2460,21 @@ class DashboardViewSet(TenantViewSetMixin, viewsets.ViewSet):
 
         base_qs = WorkInstance.objects.filter(organization=organization)
 
-        # Status distribution
-        status_counts = {}
-        for status_choice in ['NOT_STARTED', 'STARTED', 'IN_PROGRESS', 'COMPLETED', 'OVERDUE']:
-            status_counts[status_choice] = base_qs.filter(status=status_choice).count()
+        # Status distribution (from the daily task statistics rollup)
+        status_counts = dict.fromkeys(['NOT_STARTED', 'STARTED', 'IN_PROGRESS', 'COMPLETED', 'OVERDUE'], 0)
+        for row in TaskStatisticsService.get_counts(organization, ['status']):
+            if row['status'] in status_counts:
+                status_counts[row['status']] = row['count']
 
         # Work type distribution
-        work_type_counts = base_qs.values(
-            'client_work__work_type__work_name'
-        ).annotate(count=Count('id')).order_by('-count')[:10]
+        work_type_counts = [
+            {'client_work__work_type__work_name': row['work_type__work_name'], 'count': row['count']}
+            for row in sorted(
+                TaskStatisticsService.get_counts(organization, ['work_type__work_name']),
+                key=lambda row: row['count'],
+                reverse=True
+            )[:10]
+        ]
 
         # Client-wise task distribution
         client_counts = base_qs.values(
@@ -2491,14 +2482,11 @@ class DashboardViewSet(TenantViewSetMixin, viewsets.ViewSet):
         ).annotate(count=Count('id')).order_by('-count')[:10]
 
         # Staff productivity
-        staff_counts = base_qs.values(
-            'assigned_to__username'
-        ).annotate(
-            total=Count('id'),
-            completed=Count('id', filter=Q(status='COMPLETED')),
-            pending=Count('id', filter=Q(status__in=['NOT_STARTED', 'STARTED', 'IN_PROGRESS'])),
-            overdue=Count('id', filter=Q(status='OVERDUE'))
-        ).order_by('-total')
+        staff_counts = TaskStatisticsService.summarize(
+            TaskStatisticsService.get_counts(organization, ['assigned_to__username', 'status']),
+            ['assigned_to__username'],
+            pending_statuses=['NOT_STARTED', 'STARTED', 'IN_PROGRESS']
+        )
 
         return Response({
             'status_distribution': status_counts,
@@ -2581,24 +2569,29 @@ class PlatformAdminViewSet(viewsets.ViewSet):
 
         # Plan distribution - dynamically from SubscriptionPlan model
         plan_distribution = {}
+        organizations_per_plan = dict(
+            Organization.objects.order_by().values_list('plan').annotate(count=Count('id'))
+        )
         # First, get counts from SubscriptionPlan records
-        subscription_plans = SubscriptionPlan.objects.filter(is_active=True)
-        for plan in subscription_plans:
-            plan_distribution[plan.code] = Organization.objects.filter(plan=plan.code).count()
+        subscription_plans = SubscriptionPlan.objects.filter(is_active=True).values_list('code', flat=True)
+        for plan_code in subscription_plans:
+            plan_distribution[plan_code] = organizations_per_plan.get(plan_code, 0)
         # Also include any legacy/hardcoded plan codes that may still be in use
         legacy_codes = ['FREE', 'STARTER', 'PROFESSIONAL', 'ENTERPRISE']
         for plan_code in legacy_codes:
             if plan_code not in plan_distribution:
-                count = Organization.objects.filter(plan=plan_code).count()
+                count = organizations_per_plan.get(plan_code, 0)
                 if count > 0:  # Only include if there are orgs using this plan
                     plan_distribution[plan_code] = count
 
-        # Total clients and tasks across platform
+        # Total clients and tasks across platform (tasks from the daily statistics rollup)
         total_clients = Client.objects.count()
-        total_tasks = WorkInstance.objects.count()
-        pending_tasks = WorkInstance.objects.filter(
-            status__in=['NOT_STARTED', 'STARTED', 'IN_PROGRESS']
-        ).count()
+        task_status_counts = TaskStatisticsService.get_counts(None, ['status'])
+        total_tasks = sum(row['count'] for row in task_status_counts)
+        pending_tasks = sum(
+            row['count'] for row in task_status_counts
+            if row['status'] in ['NOT_STARTED', 'STARTED', 'IN_PROGRESS']
+        )
 
         return Response({
             'organizations': {
@@ -3072,9 +3065,8 @@ Best regards,
         Includes daily breakdown, limits, and per-organization usage.
         """
         from core.models import EmailUsageLog
-        from django.db.models import Sum
+        from core.services.email_rate_limiter import EmailRateLimiter
         from django.utils import timezone
-        from datetime import timedelta
 
         days = int(request.query_params.get('days', 30))
         platform_settings = PlatformSettings.get_settings()
@@ -3083,10 +3075,8 @@ Best regards,
         # Get overall platform usage stats
         platform_stats = EmailUsageLog.get_usage_stats(organization=None, days=days)
 
-        # Get today's usage
-        today_usage = EmailUsageLog.objects.filter(date=today).aggregate(
-            total=Sum('email_count')
-        )['total'] or 0
+        # Get today's usage (live counter, includes counts not yet written to EmailUsageLog)
+        today_usage = EmailRateLimiter.get_total(today)
 
         # Get per-organization usage for today (top 10)
         org_usage_today = EmailUsageLog.objects.filter(
@@ -3276,7 +3266,12 @@ class SubscriptionPlanViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Return all plans, optionally filtered by status"""
-        queryset = SubscriptionPlan.objects.all()
+        organizations_count = Organization.objects.filter(
+            plan=OuterRef('code')
+        ).order_by().values('plan').annotate(count=Count('id')).values('count')
+        queryset = SubscriptionPlan.objects.annotate(
+            organizations_count=Coalesce(Subquery(organizations_count), 0)
+        )
         is_active = self.request.query_params.get('is_active', None)
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
@@ -3561,7 +3556,7 @@ class GoogleQuotaViewSet(viewsets.ViewSet):
 
 class ReportConfigurationViewSet(TenantViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for managing report configurations"""
-    queryset = ReportConfiguration.objects.all()
+    queryset = ReportConfiguration.objects.select_related('organization')
     serializer_class = ReportConfigurationSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminOrReadOnly]
 
@@ -3906,21 +3901,29 @@ class GoogleSyncHubViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def drive_folders(self, request):
         """Get all Drive folder mappings for the organization."""
-        mappings = GoogleDriveMapping.objects.filter(organization=request.user.organization).select_related('client')
+        mappings = GoogleDriveMapping.objects.filter(organization=request.user.organization).exclude(folder_type='FILE').select_related('client')
         return Response(GoogleDriveMappingSerializer(mappings, many=True).data)
 
     @action(detail=False, methods=['post'])
     def create_client_folders(self, request):
-        """Create Google Drive folder structure for a client."""
+        """
+        Create Google Drive folder structure for a client, or (with
+        all_clients) for all active clients in the background.
+        """
         from .services.google_drive_service import GoogleDriveService
         client_id = request.data.get('client_id')
-        if not client_id:
+        all_clients = request.data.get('all_clients')
+        if not client_id and not all_clients:
             return Response({'error': 'client_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         try:
             connection = GoogleConnection.objects.get(user=request.user)
-            client = Client.objects.get(id=client_id, organization=request.user.organization)
             if connection.status != 'CONNECTED' or not connection.drive_enabled:
                 return Response({'error': 'Google Drive not enabled'}, status=status.HTTP_400_BAD_REQUEST)
+            if not client_id:
+                from .tasks import create_google_drive_client_folders
+                create_google_drive_client_folders.delay(connection.id)
+                return Response({'success': True, 'queued': True}, status=status.HTTP_202_ACCEPTED)
+            client = Client.objects.get(id=client_id, organization=request.user.organization)
             drive_service = GoogleDriveService(connection)
             mapping = drive_service.create_client_folder_structure(client)
             return Response({'success': True, 'mapping': GoogleDriveMappingSerializer(mapping).data})
@@ -28,10 +28,34 @@ app.conf.beat_schedule = {
         'task': 'core.tasks.mark_overdue_tasks',
         'schedule': crontab(hour=0, minute=30),  # Run daily at 12:30 AM
     },
+    'flush-email-usage-every-minute': {
+        'task': 'core.tasks.flush_email_usage',
+        'schedule': crontab(),  # Run every minute
+    },
+    'recover-email-log-spool-every-5-minutes': {
+        'task': 'core.tasks.recover_email_log_spool',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+    },
     'sync-google-tasks-every-5-minutes': {
         'task': 'core.tasks.sync_google_tasks_to_nexpro',
         'schedule': crontab(minute='*/5'),  # Run every 5 minutes
     },
+    'sync-google-calendar-every-5-minutes': {
+        'task': 'core.tasks.sync_google_calendar_to_nexpro',
+        'schedule': crontab(minute='*/5'),  # Run every 5 minutes
+    },
+    'flush-google-quota-usage-every-minute': {
+        'task': 'core.tasks.flush_google_quota_usage',
+        'schedule': crontab(),  # Run every minute
+    },
+    'drain-google-sync-outbox-every-minute': {
+        'task': 'core.tasks.drain_google_sync_outbox',
+        'schedule': crontab(),  # Run every minute
+    },
+    'resume-google-drive-uploads-every-10-minutes': {
+        'task': 'core.tasks.resume_google_drive_uploads',
+        'schedule': crontab(minute='*/10'),  # Run every 10 minutes
+    },
 }
 
 @app.task(bind=True)
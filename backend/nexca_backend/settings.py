@@ -3,6 +3,7 @@ Django settings for nexca_backend project.
 Production-ready configuration with IT Act & DPDP Act compliance.
 """
 
+import sys
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
@@ -244,6 +245,19 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=config('EMAIL_HOST_USER', default='noreply@nexpro.com'))
 SERVER_EMAIL = DEFAULT_FROM_EMAIL
 
+# SMTP connection pool (core.services.smtp_pool) used for batch sends
+SMTP_POOL_IDLE_TIMEOUT = config('SMTP_POOL_IDLE_TIMEOUT', default=60, cast=int)
+SMTP_POOL_MAX_MESSAGES = config('SMTP_POOL_MAX_MESSAGES', default=100, cast=int)
+
+# Buffered EmailLog writes (core.services.email_log_buffer) used for batch sends
+EMAIL_LOG_BUFFER_SIZE = config('EMAIL_LOG_BUFFER_SIZE', default=100, cast=int)
+# Spool of email logs not yet written by a batch. Must survive worker restarts:
+# mount a persistent volume here in containers (BASE_DIR is ephemeral there)
+EMAIL_LOG_SPOOL_DIR = config('EMAIL_LOG_SPOOL_DIR', default=str(BASE_DIR / 'email_log_spool'))
+
+# Seconds email branding is cached per organization (core.services.template_renderer)
+EMAIL_TEMPLATE_CACHE_TIMEOUT = config('EMAIL_TEMPLATE_CACHE_TIMEOUT', default=300, cast=int)
+
 # Celery Settings
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
@@ -252,6 +266,48 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Outbound email queues (core.services.email_queue). OTP emails go to
+# email_priority, which should have its own worker so they never wait
+# behind reminder batches on email_bulk.
+CELERY_TASK_ROUTES = {
+    'core.tasks.send_queued_email': {'queue': 'email'},
+    'core.tasks.send_reminder_group': {'queue': 'email_bulk'},
+    'core.tasks.upload_task_document_to_drive': {'queue': 'google_drive'},
+    'core.tasks.create_google_drive_client_folders': {'queue': 'google_drive'},
+}
+EMAIL_QUEUE_PROVIDER_CONCURRENCY = {
+    'SMTP': config('EMAIL_QUEUE_SMTP_CONCURRENCY', default=8, cast=int),
+    'SENDGRID': config('EMAIL_QUEUE_SENDGRID_CONCURRENCY', default=20, cast=int),
+    'SES': config('EMAIL_QUEUE_SES_CONCURRENCY', default=20, cast=int),
+}
+EMAIL_QUEUE_ORG_CONCURRENCY = config('EMAIL_QUEUE_ORG_CONCURRENCY', default=2, cast=int)
+EMAIL_QUEUE_ORG_BULK_CONCURRENCY = config('EMAIL_QUEUE_ORG_BULK_CONCURRENCY', default=2, cast=int)
+EMAIL_QUEUE_MAX_RETRIES = config('EMAIL_QUEUE_MAX_RETRIES', default=5, cast=int)
+EMAIL_QUEUE_RETRY_BACKOFF = config('EMAIL_QUEUE_RETRY_BACKOFF', default=30, cast=int)
+
+# Cache - shared by all web and Celery worker processes. Email queue slots and
+# rate limits, Google API quotas and buckets, upload slots and locks and the
+# PlatformSettings version all rely on it, so it must not be per-process.
+# Defaults to a separate database on the Celery broker's Redis.
+CACHES = {
+    "default": {
+        "BACKEND": config('CACHE_BACKEND', default='django.core.cache.backends.redis.RedisCache'),
+        "LOCATION": config('CACHE_LOCATION', default='redis://localhost:6379/1'),
+    }
+}
+if 'test' in sys.argv:
+    # Test runs are single-process and must not clear the shared cache
+    CACHES = {
+        "default": {
+            "BACKEND": 'django.core.cache.backends.locmem.LocMemCache',
+            "LOCATION": 'nexpro-test',
+        }
+    }
+
+# Seconds between checks of the shared-cache version of the memoized
+# PlatformSettings (changes saved by other processes show up after this)
+PLATFORM_SETTINGS_CHECK_INTERVAL = config('PLATFORM_SETTINGS_CHECK_INTERVAL', default=5, cast=int)
+
 # Encryption Key for Credentials (Fernet)
 FERNET_KEY = config('FERNET_KEY', default='')
 
@@ -262,6 +318,44 @@ FIRM_NAME = config('FIRM_NAME', default='Your Professional Firm Name')
 GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID', default='')
 GOOGLE_CLIENT_SECRET = config('GOOGLE_CLIENT_SECRET', default='')
 
+# Google Tasks sync outbox (core.services.google_sync_outbox)
+GOOGLE_SYNC_DEBOUNCE_SECONDS = config('GOOGLE_SYNC_DEBOUNCE_SECONDS', default=10, cast=int)
+GOOGLE_SYNC_OUTBOX_BATCH = config('GOOGLE_SYNC_OUTBOX_BATCH', default=1000, cast=int)
+GOOGLE_SYNC_OUTBOX_MAX_ATTEMPTS = config('GOOGLE_SYNC_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+
+# Seconds one connection's Google Tasks -> NexPro sync may run before it is
+# stopped (core.tasks.sync_google_tasks_for_connection)
+GOOGLE_SYNC_CONNECTION_TIME_LIMIT = config('GOOGLE_SYNC_CONNECTION_TIME_LIMIT', default=120, cast=int)
+
+# Background Google Drive uploads of task documents (core.services.google_drive_uploads).
+# The chunk size is rounded down to a multiple of 256 KB.
+GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE = config('GOOGLE_DRIVE_UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+GOOGLE_DRIVE_UPLOAD_CONCURRENCY = config('GOOGLE_DRIVE_UPLOAD_CONCURRENCY', default=4, cast=int)
+GOOGLE_DRIVE_UPLOAD_MAX_ATTEMPTS = config('GOOGLE_DRIVE_UPLOAD_MAX_ATTEMPTS', default=5, cast=int)
+# Uploads without progress for this long are dispatched again
+GOOGLE_DRIVE_UPLOAD_STALL_SECONDS = config('GOOGLE_DRIVE_UPLOAD_STALL_SECONDS', default=900, cast=int)
+
+# Seconds Google API usage is counted in memory before it is added to the
+# shared cache counters (core.services.google_quota)
+GOOGLE_QUOTA_FLUSH_INTERVAL = config('GOOGLE_QUOTA_FLUSH_INTERVAL', default=5, cast=int)
+
+# Google API rate limiter (core.services.google_rate_limiter):
+# (project calls per second, calls per second per user) by API type
+GOOGLE_API_RATE_LIMITS = {
+    'TASKS': (config('GOOGLE_TASKS_RATE_LIMIT', default=50, cast=int),
+              config('GOOGLE_TASKS_USER_RATE_LIMIT', default=25, cast=int)),
+    'CALENDAR': (config('GOOGLE_CALENDAR_RATE_LIMIT', default=100, cast=int),
+                 config('GOOGLE_CALENDAR_USER_RATE_LIMIT', default=10, cast=int)),
+    'DRIVE': (config('GOOGLE_DRIVE_RATE_LIMIT', default=200, cast=int),
+              config('GOOGLE_DRIVE_USER_RATE_LIMIT', default=20, cast=int)),
+    'GMAIL': (config('GOOGLE_GMAIL_RATE_LIMIT', default=100, cast=int),
+              config('GOOGLE_GMAIL_USER_RATE_LIMIT', default=10, cast=int)),
+}
+# Longest a call waits for capacity before failing with GoogleRateLimitExceeded
+# (a 429 HttpError): in Celery tasks, and in web requests
+GOOGLE_API_RATE_LIMIT_MAX_WAIT = config('GOOGLE_API_RATE_LIMIT_MAX_WAIT', default=60, cast=int)
+GOOGLE_API_RATE_LIMIT_REQUEST_MAX_WAIT = config('GOOGLE_API_RATE_LIMIT_REQUEST_MAX_WAIT', default=5, cast=int)
+
 # Logging Configuration for IT Act compliance (audit trail)
 LOGGING = {
     'version': 1,